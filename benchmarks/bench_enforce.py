@@ -0,0 +1,62 @@
+"""Measure the PreToolUse pass-through cost of -n enforcement.
+
+PreToolUse runs before every tool call. Without an active -n marker the hook
+should cost little more than starting the interpreter, so the in-process
+check and the whole `ai-flags handle --pre-tool-use` process are timed, next
+to a bare interpreter and the full CLI import for comparison.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from harness import bench, print_results
+
+from ai_flags import enforce
+
+SRC = str(Path(__file__).resolve().parents[1] / "src")
+
+
+def _payload(session_id: str) -> dict:
+    return {"session_id": session_id, "tool_name": "Bash", "tool_input": {"command": "pytest -q"}}
+
+
+def _run(code: str, stdin: str, env: dict[str, str]) -> None:
+    subprocess.run([sys.executable, "-c", code], input=stdin, env=env, text=True, check=True)
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as home:
+        enforce.MARKER_DIR = Path(home) / ".config" / "ai-flags" / "no-lint"
+        pattern = enforce.compile_pattern(enforce.DEFAULT_LINT_COMMANDS)
+        enforce.activate("active", pattern, ttl=3600)
+
+        inactive = _payload("inactive")
+        active = _payload("active")
+        stdin = json.dumps(inactive)
+        env = {**os.environ, "PYTHONPATH": SRC, "HOME": home}
+        entry = (
+            "import sys; sys.argv = ['ai-flags', 'handle', '--pre-tool-use']\n"
+            "from ai_flags.__main__ import main; main()"
+        )
+
+        print_results(
+            [
+                bench("check, no marker", lambda: enforce.check(inactive)),
+                bench("check, marker (allowed command)", lambda: enforce.check(active)),
+                bench("process: python -c pass", lambda: _run("pass", stdin, env), repeat=3),
+                bench("process: handle --pre-tool-use", lambda: _run(entry, stdin, env), repeat=3),
+                bench(
+                    "process: import ai_flags.cli",
+                    lambda: _run("import ai_flags.cli", stdin, env),
+                    repeat=3,
+                ),
+            ]
+        )
+
+
+if __name__ == "__main__":
+    main()
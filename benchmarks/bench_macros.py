@@ -0,0 +1,30 @@
+"""Compare the cost of a macro prompt with single- and multi-flag prompts.
+
+A lone macro uses the context rendered at config load, so `task -x` should
+cost no more than `task -c`.
+"""
+
+from harness import bench, print_results
+
+from ai_flags.api import FlagProcessor
+from ai_flags.config import AiFlagsConfig
+
+
+def main() -> None:
+    processor = FlagProcessor(AiFlagsConfig(macros={"x": ["c", "t", "n"]}))
+    cases = {
+        "single flag (-c)": "implement the feature -c",
+        "macro (-x = -c -t -n)": "implement the feature -x",
+        "members (-c -t -n)": "implement the feature -c -t -n",
+        "macro + flag (-x -d)": "implement the feature -x -d",
+    }
+    print_results(
+        [
+            bench(name, lambda prompt=prompt: processor.run(prompt, "default"))
+            for name, prompt in cases.items()
+        ]
+    )
+
+
+if __name__ == "__main__":
+    main()
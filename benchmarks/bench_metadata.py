@@ -0,0 +1,76 @@
+"""Compare hook output size and cost across metadata modes.
+
+For every prompt of a corpus, the hook output is built with each metadata
+mode, with and without merged blocks, and the serialized JSON size, the
+estimated tokens of additionalContext and the time to build and serialize
+it are reported as totals over the corpus.
+
+    uv run python benchmarks/bench_metadata.py                  # synthetic corpus
+    uv run python benchmarks/bench_metadata.py --corpus prompts/  # one prompt per *.txt file
+
+Prompts without trailing flags get -c -t -n appended.
+"""
+
+import argparse
+import json
+from pathlib import Path
+
+from harness import bench
+
+from ai_flags.api import FlagProcessor
+from ai_flags.budget import estimate_tokens
+from ai_flags.config import AiFlagsConfig
+from ai_flags.output import build_hook_output
+from ai_flags.parser import parse_trailing_flags
+
+MODES = ("full", "truncated:200", "flags-only", "none")
+DEFAULT_FLAGS = "-c -t -n"
+
+# Typical prompts: a one-liner, a paragraph, a pasted stack trace, a pasted file
+SYNTHETIC_SIZES = (60, 1_000, 20_000, 200_000)
+
+
+def synthetic_corpus() -> list[str]:
+    """Return prompts of the sizes in SYNTHETIC_SIZES."""
+    text = "Traceback (most recent call last): File 'app.py', line 12, in main\n"
+    return [(text * (size // len(text) + 1))[:size] for size in SYNTHETIC_SIZES]
+
+
+def load_corpus(directory: Path) -> list[str]:
+    """Read one prompt per *.txt file."""
+    return [path.read_text(encoding="utf-8") for path in sorted(directory.glob("*.txt"))]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--corpus", type=Path, help="Directory with one prompt per *.txt file")
+    args = parser.parse_args()
+
+    prompts = load_corpus(args.corpus) if args.corpus else synthetic_corpus()
+    prompts = [p if parse_trailing_flags(p) else f"{p.rstrip()} {DEFAULT_FLAGS}" for p in prompts]
+    print(f"{len(prompts)} prompts, {sum(len(p) for p in prompts):,} characters\n")
+    print(f"{'mode':<28} {'JSON bytes':>12} {'est. tokens':>12} {'time (us)':>10}")
+
+    for merge in (False, True):
+        results = [FlagProcessor(AiFlagsConfig(merge_blocks=merge)).run(p) for p in prompts]
+        for mode in MODES:
+
+            def serialize(mode=mode, results=results) -> list[str]:
+                return [
+                    json.dumps(build_hook_output(r.cleaned_prompt, r.flags, r.context, mode))
+                    for r in results
+                ]
+
+            outputs = serialize()
+            size = sum(len(output.encode("utf-8")) for output in outputs)
+            tokens = sum(
+                estimate_tokens(json.loads(output)["hookSpecificOutput"]["additionalContext"])
+                for output in outputs
+            )
+            name = f"{mode}{' (merged)' if merge else ''}"
+            micros = bench(name, serialize, repeat=3).best_ns / 1000
+            print(f"{name:<28} {size:>12,} {tokens:>12,} {micros:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Show that the cost of a prompt doesn't grow with the number of defined flags.
+
+Each config defines N user-defined word flags on top of the built-in ones.
+Per-prompt cost (a built-in flag, a word flag, several flags, an unknown
+flag) should stay flat from 5 to 1,000 flags; only building the config's
+snapshot, once per config version, grows with N.
+"""
+
+import time
+
+from harness import bench, print_results
+
+from ai_flags.api import FlagProcessor
+from ai_flags.config import AiFlagsConfig
+
+FLAG_COUNTS = (5, 100, 1_000)
+
+
+def make_config(count: int) -> AiFlagsConfig:
+    """Return a config with count user-defined flags named f0, f1, ..."""
+    return AiFlagsConfig(
+        flags={
+            f"f{i}": {"content": f"Instructions of user-defined flag number {i}."}
+            for i in range(count)
+        }
+    )
+
+
+def main() -> None:
+    results = []
+    for count in FLAG_COUNTS:
+        start = time.perf_counter()
+        config = make_config(count)
+        processor = FlagProcessor(config)
+        build_ms = (time.perf_counter() - start) * 1000
+        print(f"{count:>5} flags: config and snapshot built in {build_ms:,.1f} ms")
+
+        last = f"f{count - 1}"
+        cases = {
+            "built-in (-c)": "implement the feature -c",
+            "word (-fN)": f"implement the feature -{last}",
+            "mixed (-c -t -f0 -fN)": f"implement the feature -c -t -f0 -{last}",
+            "unknown (-nope)": "implement the feature -nope",
+        }
+        results.extend(
+            bench(f"{count} flags/{name}", lambda p=prompt, f=processor: f.run(p, "default"))
+            for name, prompt in cases.items()
+        )
+    print()
+    print_results(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,152 @@
+"""Micro-benchmark suite for the prompt pipeline, compared against a committed baseline.
+
+Covers the parser, validator, executor and output formatters over prompt
+sizes from 10 B to 10 MB, 0 to 20 flags, and the default config versus one
+with large custom content. Each case reports ops/sec and the peak
+allocation of one call (tracemalloc).
+
+    uv run python benchmarks/bench_suite.py                     # compare with baseline.json
+    uv run python benchmarks/bench_suite.py --output out.json   # also save the results
+    uv run python benchmarks/bench_suite.py --update-baseline   # accept the current numbers
+
+Exits with status 1 if a case is slower, or allocates more, than the
+baseline by more than --tolerance. Throughput depends on the machine, so
+regenerate the baseline when moving to different hardware.
+"""
+
+import argparse
+import sys
+from collections.abc import Callable
+from itertools import cycle, islice
+from pathlib import Path
+
+from harness import BenchResult, bench, compare, load_results, print_results, save_results
+
+from ai_flags.api import build_handlers
+from ai_flags.config import AiFlagsConfig, FlagConfig
+from ai_flags.executor import execute_flag_handlers
+from ai_flags.output import format_cli_output, format_hook_output
+from ai_flags.parser import parse_trailing_flags
+from ai_flags.validator import validate_flags
+
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+DEFAULT_TOLERANCE = 0.5  # Throughput on shared machines is noisy; allocations are stable
+
+PROMPT_SIZES = {"10B": 10, "1KB": 1_000, "100KB": 100_000, "10MB": 10_000_000}
+FLAG_COUNTS = (0, 1, 5, 20)
+LARGE_CONTENT_SIZE = 16_000  # Bytes of custom content per flag
+OUTPUT_FLAG_COUNT = 5
+
+ENABLED_FLAGS = {"s", "c", "t", "d", "n"}
+
+
+def make_flags(count: int) -> list[str]:
+    """Return count flag letters, cycling through the built-in flags."""
+    return list(islice(cycle("sctdn"), count))
+
+
+def make_prompt(size: int, flags: list[str]) -> str:
+    """Return a prompt of about size bytes followed by the flags."""
+    text = ("refactor the parser and keep the tests green " * (size // 40 + 1))[:size]
+    return " ".join([text.rstrip() or "task", *(f"-{flag}" for flag in flags)])
+
+
+def make_configs() -> dict[str, AiFlagsConfig]:
+    """Return the default config and one with large custom content for every flag."""
+    content = ("Follow the project conventions closely. " * (LARGE_CONTENT_SIZE // 40))[
+        :LARGE_CONTENT_SIZE
+    ]
+    large = AiFlagsConfig(
+        subagent=FlagConfig(content=content),
+        commit=FlagConfig(content=content),
+        test=FlagConfig(content=content),
+        debug=FlagConfig(content=content),
+        no_lint=FlagConfig(content=content),
+    )
+    return {"default": AiFlagsConfig(), "large": large}
+
+
+def cases() -> dict[str, Callable[[], object]]:
+    """Build every benchmark case, keyed by name."""
+    suite: dict[str, Callable[[], object]] = {}
+
+    for size_name, size in PROMPT_SIZES.items():
+        for count in FLAG_COUNTS:
+            prompt = make_prompt(size, make_flags(count))
+            suite[f"parse/{size_name}/{count} flags"] = lambda p=prompt: parse_trailing_flags(p)
+
+    for count in FLAG_COUNTS:
+        flags = make_flags(count)
+        suite[f"validate/{count} flags"] = lambda f=flags: validate_flags(f, ENABLED_FLAGS)
+
+    for config_name, config in make_configs().items():
+        handlers = build_handlers(config)
+        for count in FLAG_COUNTS:
+            flags = make_flags(count)
+            suite[f"execute/{config_name}/{count} flags"] = (
+                lambda f=flags, h=handlers: execute_flag_handlers(f, h, "plan")
+            )
+
+        flags = make_flags(OUTPUT_FLAG_COUNT)
+        context = execute_flag_handlers(flags, handlers, "plan")
+        for size_name, size in PROMPT_SIZES.items():
+            prompt = make_prompt(size, [])
+            suite[f"format_hook_output/{config_name}/{size_name}"] = (
+                lambda p=prompt, f=flags, c=context: format_hook_output(p, f, c)
+            )
+            suite[f"format_cli_output/{config_name}/{size_name}"] = (
+                lambda p=prompt, f=flags, c=context: format_cli_output(p, f, c)
+            )
+
+    return suite
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--output", type=Path, help="Write the results to this JSON file")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH, help="Baseline JSON file")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=DEFAULT_TOLERANCE,
+        help=f"Allowed regression as a fraction (default: {DEFAULT_TOLERANCE})",
+    )
+    parser.add_argument(
+        "--update-baseline", action="store_true", help="Overwrite the baseline with these results"
+    )
+    parser.add_argument("--filter", default="", help="Only run cases whose name contains this")
+    parser.add_argument("--repeat", type=int, default=5, help="Timing repeats per case")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    results: list[BenchResult] = [
+        bench(name, func, repeat=args.repeat, memory=True)
+        for name, func in cases().items()
+        if args.filter in name
+    ]
+    print_results(results)
+
+    if args.output:
+        save_results(results, args.output)
+    if args.update_baseline:
+        save_results(results, args.baseline)
+        print(f"\nBaseline written to {args.baseline}")
+        return 0
+    if not args.baseline.exists():
+        print(f"\nNo baseline at {args.baseline}; run with --update-baseline to create it")
+        return 0
+
+    regressions = compare(results, load_results(args.baseline), args.tolerance)
+    if regressions:
+        print(f"\nRegressions beyond {args.tolerance:.0%}:")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+    print(f"\nNo regressions beyond {args.tolerance:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+"""Minimal benchmark harness.
+
+Run a benchmark script from the repository root, e.g.:
+
+    uv run python benchmarks/bench_macros.py
+"""
+
+import json
+import sys
+import timeit
+import tracemalloc
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+# Allow running from a checkout without installing the package
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+
+@dataclass(frozen=True)
+class BenchResult:
+    """Timing of one benchmark case."""
+
+    name: str
+    ops_per_sec: float
+    best_ns: float  # Fastest repeat, per call
+    peak_bytes: int | None = None  # Peak traced allocation of one call, if measured
+
+
+def peak_allocation(func: Callable[[], object]) -> int:
+    """Return the peak memory allocated by one call of func (after a warm-up call)."""
+    func()
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def bench(
+    name: str, func: Callable[[], object], repeat: int = 5, memory: bool = False
+) -> BenchResult:
+    """Time func, auto-scaling the loop count to ~0.2 s per repeat.
+
+    With memory=True, the peak allocation of a single call is measured too.
+    """
+    timer = timeit.Timer(func)
+    number, _ = timer.autorange()
+    best = min(timer.repeat(repeat=repeat, number=number)) / number
+    return BenchResult(
+        name=name,
+        ops_per_sec=1 / best,
+        best_ns=best * 1e9,
+        peak_bytes=peak_allocation(func) if memory else None,
+    )
+
+
+def print_results(results: list[BenchResult]) -> None:
+    """Print results as an aligned table."""
+    width = max(len(result.name) for result in results)
+    memory = any(result.peak_bytes is not None for result in results)
+    header = f"{'case':<{width}}  {'ops/sec':>12}  {'ns/op':>14}"
+    print(header + (f"  {'peak bytes':>12}" if memory else ""))
+    for result in results:
+        line = f"{result.name:<{width}}  {result.ops_per_sec:>12,.0f}  {result.best_ns:>14,.0f}"
+        if result.peak_bytes is not None:
+            line += f"  {result.peak_bytes:>12,}"
+        print(line)
+
+
+def save_results(results: list[BenchResult], path: Path) -> None:
+    """Write results as JSON, keyed by case name."""
+    data = {
+        "python": sys.version.split()[0],
+        "results": {result.name: asdict(result) for result in results},
+    }
+    path.write_text(json.dumps(data, indent=2) + "\n")
+
+
+def load_results(path: Path) -> dict[str, BenchResult]:
+    """Read results written by save_results()."""
+    data = json.loads(path.read_text())
+    return {name: BenchResult(**result) for name, result in data["results"].items()}
+
+
+# Allocation differences below this are noise (interned strings, free lists)
+MEMORY_SLACK_BYTES = 4096
+
+
+def compare(
+    results: list[BenchResult], baseline: dict[str, BenchResult], tolerance: float
+) -> list[str]:
+    """List the cases that regressed against a baseline.
+
+    A case regresses if its throughput dropped, or its peak allocation grew,
+    by more than the tolerance (a fraction, e.g. 0.3 for 30%). Cases missing
+    from the baseline are skipped.
+    """
+    regressions = []
+    for result in results:
+        base = baseline.get(result.name)
+        if base is None:
+            continue
+        if result.ops_per_sec < base.ops_per_sec * (1 - tolerance):
+            regressions.append(
+                f"{result.name}: {result.ops_per_sec:,.0f} ops/sec "
+                f"(baseline {base.ops_per_sec:,.0f})"
+            )
+        if (
+            result.peak_bytes is not None
+            and base.peak_bytes is not None
+            and result.peak_bytes > base.peak_bytes * (1 + tolerance) + MEMORY_SLACK_BYTES
+        ):
+            regressions.append(
+                f"{result.name}: peak {result.peak_bytes:,} bytes (baseline {base.peak_bytes:,})"
+            )
+    return regressions
@@ -0,0 +1,25 @@
+"""Console entry point.
+
+`ai-flags handle --pre-tool-use` runs before every tool call, so it is
+dispatched here, before click and the config models are imported.
+"""
+
+import sys
+
+PRE_TOOL_USE_ARGS = ["handle", "--pre-tool-use"]
+
+
+def main() -> None:
+    """Run the ai-flags CLI."""
+    if sys.argv[1:] == PRE_TOOL_USE_ARGS:
+        from ai_flags.enforce import pre_tool_use
+
+        sys.exit(pre_tool_use())
+
+    from ai_flags.cli import cli
+
+    cli()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,706 @@
+"""In-process Python API for embedding ai-flags.
+
+Example:
+    >>> from ai_flags.api import FlagProcessor
+    >>> processor = FlagProcessor()
+    >>> output = processor.process({"prompt": "fix the bug -c"})
+    >>> output["hookSpecificOutput"]["additionalContext"]
+"""
+
+import json
+import re
+import threading
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+from ai_flags import cache, config_loader, enforce
+from ai_flags.budget import fit_budget, fragment_tokens, table_tokens
+from ai_flags.config import PERMISSION_MODES, AiFlagsConfig, FlagConfig
+from ai_flags.dedup import dedupe_table
+from ai_flags.executor import (
+    DEFAULT_PERMISSION_MODE,
+    DispatchTable,
+    add_hint,
+    compile_dispatch_table,
+    render_flags,
+)
+from ai_flags.fingerprint import Project
+from ai_flags.handlers import (
+    CommitHandler,
+    CoverageHandler,
+    CustomHandler,
+    DebugHandler,
+    FlagHandler,
+    NoLintHandler,
+    SubagentHandler,
+)
+from ai_flags.logger import log_handle
+from ai_flags.macros import expand_flags, resolve_macros
+from ai_flags.output import build_hook_output, empty_hook_output, format_cli_output
+from ai_flags.parser import FLAG_PATTERN, MAX_FLAG_LENGTH, parse_trailing_flags
+from ai_flags.pipeline import Pipeline, PipelineState, Stage
+from ai_flags.sticky import get_sticky, has_sticky, split_sticky, update_sticky
+from ai_flags.validator import validate_flags
+
+# Maximum number of distinct configs (e.g. per project layer set) kept warm
+SNAPSHOT_CACHE_SIZE = 32
+
+# Values of Invocation.output
+HOOK_OUTPUT = "hook"
+CLI_OUTPUT = "cli"
+
+NO_FLAGS = "No flags detected"
+INVALID_FLAGS = "Invalid or disabled flags"
+
+# A prompt with trailing flags ends in whitespace (or nothing) followed by -x, -x+ or -x-
+_FLAG_END_RE = re.compile(rf"(?:^|\s)-{FLAG_PATTERN}[+-]?$")
+# Characters of the prompt's end that _FLAG_END_RE needs: whitespace, dash, flag, modifier
+_FLAG_END_LENGTH = MAX_FLAG_LENGTH + 3
+
+
+@dataclass(frozen=True)
+class ProcessResult:
+    """Outcome of processing a single prompt."""
+
+    cleaned_prompt: str
+    flags: list[str] = field(default_factory=list)
+    context: str = ""
+    error: str | None = None
+    tokens: int = 0  # Estimated tokens of context
+
+
+@dataclass(frozen=True)
+class _ConfigSnapshot:
+    """Config together with everything derived from it."""
+
+    config: AiFlagsConfig
+    enabled_flags: frozenset[str]
+    handlers: dict[str, FlagHandler]
+    # Rendered blocks of the enabled flags per permission mode; other modes are added on first use
+    tables: dict[str, DispatchTable]
+    macros: dict[str, tuple[str, ...]]  # Fully expanded
+    # Rendered context of each usable macro per known permission mode
+    macro_contexts: dict[tuple[str, str], str]
+    priorities: dict[str, int]
+    lint_pattern: str  # Denied Bash commands while -n is active ("" = nothing to deny)
+    project_flags: frozenset[str]  # Flags whose handler adds a hint about the project
+    # Compact blocks per permission mode, compiled the first time the budget is exceeded
+    short_tables: dict[str, DispatchTable] = field(default_factory=dict)
+
+    def dispatch_table(self, permission_mode: str | None) -> DispatchTable:
+        """Return the compiled table for a permission mode."""
+        mode = permission_mode or DEFAULT_PERMISSION_MODE
+        table = self.tables.get(mode)
+        if table is None:
+            table = compile_tables(self.config, self.handlers, self.enabled_flags, (mode,))[mode]
+            self.tables[mode] = table
+        return table
+
+    def short_table(self, permission_mode: str | None) -> DispatchTable:
+        """Return the compiled table of compact variants for a permission mode."""
+        mode = permission_mode or DEFAULT_PERMISSION_MODE
+        table = self.short_tables.get(mode)
+        if table is None:
+            table = compile_tables(
+                self.config, self.handlers, self.enabled_flags, (mode,), short=True
+            )[mode]
+            self.short_tables[mode] = table
+        return table
+
+
+@dataclass(slots=True)
+class Invocation(PipelineState):
+    """State of one prompt passing through the pipeline.
+
+    Callers set either the request fields (prompt, permission_mode, ...),
+    a decoded hook payload (hook_input) or its JSON text (raw), plus the
+    output wanted. The stages fill in the rest; custom stages may read and
+    change any of it.
+    """
+
+    raw: str | None = None  # Hook payload as JSON text
+    hook_input: dict[str, Any] | None = None  # Decoded hook payload
+    prompt: str = ""
+    permission_mode: str | None = None
+    cwd: str | None = None
+    transcript_path: str | None = None
+    session_id: str | None = None
+    # HOOK_OUTPUT, CLI_OUTPUT or None (result only: no -n enforcement, response or log)
+    output: str | None = None
+
+    processor: "FlagProcessor | None" = None  # Set by FlagProcessor.invoke()
+    snapshot: _ConfigSnapshot | None = None
+    cleaned_prompt: str = ""
+    parsed: list[str] | None = None  # Trailing flag tokens, with sticky modifiers
+    flags: list[str] = field(default_factory=list)  # Prompt and sticky flags, macros unexpanded
+    expanded: list[str] = field(default_factory=list)
+    table: DispatchTable | None = None  # Blocks to render for this prompt
+    tokens: int = 0  # Estimated tokens of the blocks in table
+    result: ProcessResult | None = None
+    response: Any = None  # Hook output dict (HOOK_OUTPUT) or text (CLI_OUTPUT)
+
+    def finish(self, result: ProcessResult) -> None:
+        """Set the result and skip the remaining non-final stages."""
+        self.result = result
+        self.done = True
+
+
+# Handler factory of each built-in flag letter
+_BUILTIN_HANDLERS: dict[str, Callable[[AiFlagsConfig, FlagConfig], FlagHandler]] = {
+    "s": lambda config, flag: SubagentHandler(flag.content, flag.short_content),
+    "c": lambda config, flag: CommitHandler(flag.content, flag.short_content),
+    "t": lambda config, flag: CoverageHandler(flag.content, flag.short_content),
+    "d": lambda config, flag: DebugHandler(flag.content, flag.short_content, config.debug_capture),
+    "n": lambda config, flag: NoLintHandler(flag.content, flag.short_content),
+}
+
+
+def build_handlers(config: AiFlagsConfig) -> dict[str, FlagHandler]:
+    """Build a handler for every flag in the config's registry."""
+    handlers: dict[str, FlagHandler] = {}
+    for entry in config.registry:
+        if entry.builtin:
+            handlers[entry.flag] = _BUILTIN_HANDLERS[entry.flag](config, config.entry_config(entry))
+        else:
+            flag_config = config.flags[entry.name]
+            tag = flag_config.tag or f"{entry.name}_instructions"
+            handlers[entry.flag] = CustomHandler(
+                entry.flag, tag, flag_config.content, flag_config.short_content
+            )
+    return handlers
+
+
+def compile_tables(
+    config: AiFlagsConfig,
+    handlers: dict[str, FlagHandler],
+    enabled_flags: frozenset[str],
+    modes: tuple[str, ...] = PERMISSION_MODES,
+    short: bool = False,
+) -> dict[str, DispatchTable]:
+    """Compile one dispatch table per permission mode from the flag configs."""
+    enabled = {flag: handler for flag, handler in handlers.items() if flag in enabled_flags}
+    flag_modes = {}
+    mode_content = {}
+    for flag in enabled:
+        flag_config = config.get_flag_config(flag)
+        if flag_config is not None:
+            flag_modes[flag] = flag_config.modes
+            mode_content[flag] = flag_config.mode_content
+    return {
+        mode: compile_dispatch_table(enabled, mode, flag_modes, mode_content, short)
+        for mode in modes
+    }
+
+
+class FlagProcessor:
+    """Reusable, thread-safe prompt flag processor.
+
+    The loaded config and the handlers built from it are cached. When the
+    processor was created without an explicit config, every call revalidates
+    the cache by stat'ing the config file and the project layers of the
+    hook's cwd (see config_loader.resolve_config), and reloads only if one of
+    them changed.
+    """
+
+    def __init__(
+        self,
+        config: AiFlagsConfig | None = None,
+        *,
+        config_path: Path | None = None,
+        log_mode: str = "api",
+        pipeline: Pipeline | None = None,
+    ):
+        """Initialize the processor.
+
+        Args:
+            config: Fixed config to use. If None, the config file is loaded
+                and reloaded whenever it changes on disk.
+            config_path: Config file to watch (defaults to the global config)
+            log_mode: Mode name recorded in the handle log
+            pipeline: Stages to run (defaults to PIPELINE), e.g.
+                ``PIPELINE.insert(Stage("redact", redact), after="parse")``
+        """
+        self._fixed = config is not None
+        self._pipeline = pipeline if pipeline is not None else PIPELINE
+        self._config_path = config_path if config_path else config_loader.CONFIG_PATH
+        self._log_mode = log_mode
+        self._lock = threading.Lock()
+        self._fixed_snapshot = self._build_snapshot(config) if config is not None else None
+        # Keyed by ResolvedConfig.key, so directories sharing the same layers share handlers
+        self._snapshots: OrderedDict[tuple, _ConfigSnapshot] = OrderedDict()
+
+    @staticmethod
+    def _build_snapshot(config: AiFlagsConfig) -> _ConfigSnapshot:
+        enabled_flags = frozenset(config.get_enabled_flags())
+        handlers = build_handlers(config)
+        tables = compile_tables(config, handlers, enabled_flags)
+        macros = resolve_macros(config.macros, config.registry)
+        macro_contexts = {
+            (name, mode): render_flags(list(flags), table, config.merge_blocks)
+            for name, flags in macros.items()
+            if validate_flags(list(flags), enabled_flags)
+            for mode, table in tables.items()
+        }
+        return _ConfigSnapshot(
+            config=config,
+            enabled_flags=enabled_flags,
+            handlers=handlers,
+            tables=tables,
+            macros=macros,
+            macro_contexts=macro_contexts,
+            priorities={
+                entry.flag: config.entry_config(entry).priority for entry in config.registry
+            },
+            lint_pattern=(
+                enforce.compile_pattern(config.lint_commands) if config.lint_commands else ""
+            ),
+            project_flags=frozenset(
+                flag for flag, handler in handlers.items() if handler.uses_project
+            ),
+        )
+
+    def _get_snapshot(self, cwd: str | None = None) -> _ConfigSnapshot:
+        """Return the snapshot for cwd, reloading the config if it changed."""
+        if self._fixed_snapshot is not None:
+            return self._fixed_snapshot
+
+        resolved = config_loader.resolve_config(cwd, self._config_path)
+
+        with self._lock:
+            snapshot = self._snapshots.get(resolved.key)
+            if snapshot is not None:
+                self._snapshots.move_to_end(resolved.key)
+            else:
+                snapshot = self._build_snapshot(resolved.config)
+                self._snapshots[resolved.key] = snapshot
+                while len(self._snapshots) > SNAPSHOT_CACHE_SIZE:
+                    self._snapshots.popitem(last=False)
+            return snapshot
+
+    @property
+    def config(self) -> AiFlagsConfig:
+        """The currently active global config (without project layers)."""
+        return self._get_snapshot().config
+
+    def invalidate(self) -> None:
+        """Drop cached configs so the next call reloads them."""
+        if self._fixed_snapshot is not None:
+            return
+        config_loader.clear_config_cache()
+        with self._lock:
+            self._snapshots.clear()
+
+    def invoke(self, invocation: Invocation) -> Invocation:
+        """Run an invocation through the pipeline and record its metrics.
+
+        Exceptions raised by a stage propagate.
+        """
+        invocation.processor = self
+        failed = True
+        try:
+            self._pipeline.run(invocation)
+            failed = False
+        finally:
+            self._record(invocation, failed)
+        return invocation
+
+    def run(
+        self,
+        prompt: str,
+        permission_mode: str | None = None,
+        cwd: str | None = None,
+        transcript_path: str | None = None,
+        session_id: str | None = None,
+    ) -> ProcessResult:
+        """Parse, validate and execute the flags of a prompt.
+
+        Args:
+            prompt: User prompt potentially ending with flags
+            permission_mode: Optional permission mode (e.g., "plan")
+            cwd: Optional working directory whose project config layers apply
+            transcript_path: Optional session transcript, used for deduplication
+            session_id: Optional session whose sticky flags apply (see ai_flags.sticky)
+
+        Returns:
+            ProcessResult with the combined XML context, or with ``error``
+            set if no flags were found or some flags are invalid/disabled
+
+        Raises:
+            RuntimeError: If a custom pipeline produced no result
+        """
+        invocation = self.invoke(
+            Invocation(
+                prompt=prompt,
+                permission_mode=permission_mode,
+                cwd=cwd,
+                transcript_path=transcript_path,
+                session_id=session_id,
+            )
+        )
+        if invocation.result is None:
+            raise RuntimeError("the pipeline finished without a result")
+        return invocation.result
+
+    def process(self, hook_input: dict[str, Any] | str) -> dict[str, Any]:
+        """Process a UserPromptSubmit hook payload.
+
+        Never raises: on any error the empty hook output is returned.
+
+        Args:
+            hook_input: Hook JSON payload, decoded or as text (uses "prompt",
+                "permission_mode", "cwd", "transcript_path" and "session_id")
+
+        Returns:
+            Dict with the hookSpecificOutput structure
+        """
+        if isinstance(hook_input, str):
+            invocation = Invocation(raw=hook_input, output=HOOK_OUTPUT)
+        else:
+            invocation = Invocation(hook_input=hook_input, output=HOOK_OUTPUT)
+        try:
+            response = self.invoke(invocation).response
+        except Exception as e:  # noqa: BLE001 - custom stages may raise anything; hooks must not
+            # On error, return empty output (graceful degradation)
+            log_handle(
+                mode=self._log_mode, flags=[], cleaned_prompt="", success=False, error=str(e)
+            )
+            return empty_hook_output()
+        return response if response is not None else empty_hook_output()
+
+    def _record(self, invocation: Invocation, failed: bool = False) -> None:
+        """Add the invocation, and the cache lookups since the last one, to the shared metrics.
+
+        Only if metrics are enabled; otherwise the cache lookups are left for a later call.
+        """
+        snapshot = invocation.snapshot
+        if snapshot is None or not snapshot.config.metrics:
+            return
+        # Imported on first use: most configs leave metrics and auditing off
+        from ai_flags import metrics
+
+        result = invocation.result
+        metrics.record(
+            metrics.Sample(
+                mode=self._log_mode,
+                flags=result.flags if result is not None and result.error is None else [],
+                validation_failed=result is not None and bool(result.error and result.flags),
+                error=failed,
+                timings_ns=invocation.phase_timings(),
+                cache={
+                    namespace: (counts.hits, counts.misses, counts.writes)
+                    for namespace, counts in cache.take_counts().items()
+                },
+            )
+        )
+
+
+def _sticky_flags(
+    snapshot: _ConfigSnapshot,
+    session_id: str,
+    flags: list[str],
+    sticky_on: list[str],
+    sticky_off: list[str],
+) -> list[str] | None:
+    """Update the session's sticky flags and return those usable with this config.
+
+    Returns None, without storing anything, if the prompt's flags are invalid.
+    """
+    ttl = snapshot.config.sticky_ttl
+    if sticky_on or sticky_off:
+        registry = snapshot.config.registry
+        known = all(flag in registry or flag in snapshot.macros for flag in sticky_off)
+        if not known or not validate_flags(
+            expand_flags(flags, snapshot.macros), snapshot.enabled_flags
+        ):
+            return None
+        sticky = update_sticky(session_id, sticky_on, sticky_off, ttl)
+    else:
+        sticky = get_sticky(session_id, ttl)
+
+    # Flags disabled since they were made sticky are skipped, not reported as invalid
+    return [
+        flag
+        for flag in sticky
+        if validate_flags(expand_flags([flag], snapshot.macros), snapshot.enabled_flags)
+    ]
+
+
+def _add_project_hints(
+    snapshot: _ConfigSnapshot, table: DispatchTable, flags: list[str], cwd: str
+) -> DispatchTable:
+    """Return a copy of table with the handlers' hints about the project at cwd."""
+    project = Project(cwd)
+    hinted = dict(table)
+    for flag in flags:
+        if flag in snapshot.project_flags and flag in table:
+            hint = snapshot.handlers[flag].get_project_hint(project)
+            if hint:
+                hinted[flag] = add_hint(table[flag], hint)
+    return hinted
+
+
+def _dedupes(invocation: Invocation, snapshot: _ConfigSnapshot) -> bool:
+    return snapshot.config.dedup.enabled and bool(invocation.transcript_path)
+
+
+def _hinted(invocation: Invocation, snapshot: _ConfigSnapshot) -> frozenset[str]:
+    """Return the flags that get project hints in this invocation."""
+    if invocation.cwd and snapshot.config.project_hints:
+        return snapshot.project_flags
+    return frozenset()
+
+
+def _snapshot(invocation: Invocation) -> _ConfigSnapshot:
+    if invocation.snapshot is None:
+        raise RuntimeError("no config loaded: the pipeline needs the config stage")
+    return invocation.snapshot
+
+
+# Pipeline stages, in order
+
+
+def _read(invocation: Invocation) -> None:
+    """Take the request fields from the hook payload, decoding it if needed."""
+    if invocation.raw is not None:
+        try:
+            invocation.hook_input = json.loads(invocation.raw)
+        except ValueError:
+            invocation.finish(ProcessResult(cleaned_prompt="", error="Invalid JSON input"))
+            return
+        if not isinstance(invocation.hook_input, dict):
+            invocation.finish(ProcessResult(cleaned_prompt="", error="Invalid hook input"))
+            return
+
+    hook_input = invocation.hook_input
+    if hook_input is not None:
+        invocation.prompt = hook_input.get("prompt", "")
+        invocation.permission_mode = hook_input.get("permission_mode")
+        invocation.cwd = hook_input.get("cwd")
+        invocation.transcript_path = hook_input.get("transcript_path")
+        invocation.session_id = hook_input.get("session_id")
+
+
+def _load_config(invocation: Invocation) -> None:
+    """Get the config snapshot for the invocation's cwd."""
+    if invocation.processor is None:
+        raise RuntimeError("invocations are run through FlagProcessor.invoke()")
+    invocation.snapshot = invocation.processor._get_snapshot(invocation.cwd)
+
+
+def _reject(invocation: Invocation) -> None:
+    """Finish a prompt that can't end with a flag, unless its session has sticky flags.
+
+    Runs before the config is loaded, so most prompts cost a regex search
+    and, in hook mode, one sticky lookup.
+    """
+    # rstrip() returns the prompt itself when there is nothing to strip
+    if _FLAG_END_RE.search(invocation.prompt.rstrip()[-_FLAG_END_LENGTH:]) is not None:
+        return
+    invocation.cleaned_prompt = invocation.prompt
+    invocation.parsed = []
+    if not invocation.session_id or not has_sticky(invocation.session_id):
+        invocation.finish(ProcessResult(cleaned_prompt=invocation.prompt, error=NO_FLAGS))
+
+
+def _parse(invocation: Invocation) -> None:
+    """Parse the trailing flags and add the session's sticky flags."""
+    snapshot = _snapshot(invocation)
+    if invocation.parsed is None:
+        parsed = parse_trailing_flags(invocation.prompt)
+        invocation.cleaned_prompt, invocation.parsed = (
+            parsed if parsed is not None else (invocation.prompt, [])
+        )
+    flags, sticky_on, sticky_off = split_sticky(invocation.parsed)
+    if invocation.session_id:
+        sticky = _sticky_flags(snapshot, invocation.session_id, flags, sticky_on, sticky_off)
+        if sticky is None:
+            invocation.finish(
+                ProcessResult(
+                    cleaned_prompt=invocation.cleaned_prompt,
+                    flags=flags + sticky_off,
+                    error=INVALID_FLAGS,
+                )
+            )
+            return
+        flags = flags + [flag for flag in sticky if flag not in flags]
+    if not flags:
+        invocation.finish(ProcessResult(cleaned_prompt=invocation.cleaned_prompt, error=NO_FLAGS))
+        return
+    invocation.flags = flags
+
+
+def _expand(invocation: Invocation) -> None:
+    """Expand macros; a lone macro's context is taken as rendered at config load."""
+    snapshot = _snapshot(invocation)
+    flags = invocation.flags
+    if (
+        len(flags) == 1
+        and not _dedupes(invocation, snapshot)
+        # Rendered without project hints
+        and _hinted(invocation, snapshot).isdisjoint(snapshot.macros.get(flags[0], ()))
+    ):
+        mode = invocation.permission_mode or DEFAULT_PERMISSION_MODE
+        context = snapshot.macro_contexts.get((flags[0], mode))
+        if context is not None:
+            tokens = fragment_tokens(context)
+            budget = snapshot.config.token_budget
+            if budget is None or tokens <= budget:
+                invocation.finish(
+                    ProcessResult(
+                        cleaned_prompt=invocation.cleaned_prompt,
+                        flags=flags,
+                        context=context,
+                        tokens=tokens,
+                    )
+                )
+                return
+    invocation.expanded = expand_flags(flags, snapshot.macros)
+
+
+def _validate(invocation: Invocation) -> None:
+    """Finish with an error if a flag is unknown or disabled."""
+    if not validate_flags(invocation.expanded, _snapshot(invocation).enabled_flags):
+        invocation.finish(
+            ProcessResult(
+                cleaned_prompt=invocation.cleaned_prompt,
+                flags=invocation.flags,
+                error=INVALID_FLAGS,
+            )
+        )
+
+
+def _resolve(invocation: Invocation) -> None:
+    """Choose each flag's block: deduplicated, with project hints, within the token budget."""
+    snapshot = _snapshot(invocation)
+    expanded = invocation.expanded
+    table = snapshot.dispatch_table(invocation.permission_mode)
+    if _dedupes(invocation, snapshot) and invocation.transcript_path:
+        dedup = snapshot.config.dedup
+        table = dedupe_table(
+            table, expanded, Path(invocation.transcript_path), dedup.turns, dedup.max_bytes
+        )
+    if invocation.cwd and not _hinted(invocation, snapshot).isdisjoint(expanded):
+        table = _add_project_hints(snapshot, table, expanded, invocation.cwd)
+    tokens = table_tokens(expanded, table)
+    budget = snapshot.config.token_budget
+    if budget is not None and tokens > budget:
+        short_table = snapshot.short_table(invocation.permission_mode)
+        table = fit_budget(expanded, table, short_table, snapshot.priorities, budget)
+        tokens = table_tokens(expanded, table)
+    invocation.table = table
+    invocation.tokens = tokens
+
+
+def _render(invocation: Invocation) -> None:
+    """Render the blocks into the result's context."""
+    if invocation.table is None:
+        raise RuntimeError("nothing to render: the pipeline needs the resolve stage")
+    context = render_flags(
+        invocation.expanded, invocation.table, _snapshot(invocation).config.merge_blocks
+    )
+    invocation.result = ProcessResult(
+        cleaned_prompt=invocation.cleaned_prompt,
+        flags=invocation.flags,
+        context=context,
+        tokens=invocation.tokens,
+    )
+
+
+def _enforce(invocation: Invocation) -> None:
+    """Deny linter calls until the next prompt if this prompt used -n."""
+    snapshot = invocation.snapshot
+    result = invocation.result
+    if invocation.output != HOOK_OUTPUT or not invocation.session_id or result is None:
+        return
+    # Without a snapshot the prompt was rejected before the config was loaded
+    flags = (
+        expand_flags(result.flags, snapshot.macros)
+        if snapshot is not None and result.error is None
+        else []
+    )
+    if snapshot is not None and "n" in flags and snapshot.lint_pattern:
+        enforce.activate(invocation.session_id, snapshot.lint_pattern, snapshot.config.sticky_ttl)
+    else:
+        enforce.deactivate(invocation.session_id)
+
+
+def _serialize(invocation: Invocation) -> None:
+    """Build the hook output or the CLI text."""
+    result = invocation.result
+    snapshot = invocation.snapshot
+    if invocation.output == HOOK_OUTPUT:
+        # Invalid flags are silent in hook mode, like prompts without flags or context
+        if result is None or snapshot is None or result.error or not result.context:
+            invocation.response = empty_hook_output()
+            return
+        invocation.response = build_hook_output(
+            result.cleaned_prompt, result.flags, result.context, snapshot.config.metadata
+        )
+        if snapshot.config.audit:
+            from ai_flags import audit
+
+            audit.record(result.context, result.flags, invocation.session_id, invocation.prompt)
+    elif invocation.output == CLI_OUTPUT and result is not None and result.error is None:
+        invocation.response = format_cli_output(result.cleaned_prompt, result.flags, result.context)
+
+
+def _log(invocation: Invocation) -> None:
+    """Add the invocation to the handle log."""
+    result = invocation.result
+    if invocation.output is None or result is None or invocation.processor is None:
+        return
+    # A prompt without flags is the common case for the hook, not an error
+    success = result.error is None or (
+        invocation.output == HOOK_OUTPUT and result.error == NO_FLAGS
+    )
+    log_handle(
+        mode=invocation.processor._log_mode,
+        flags=result.flags,
+        cleaned_prompt=result.cleaned_prompt,
+        success=success,
+        error=None if success else result.error,
+        tokens=result.tokens if success and result.flags else None,
+    )
+
+
+# The default pipeline, assembled once per process and shared by all processors
+PIPELINE: Pipeline = Pipeline(
+    [
+        Stage("read", _read, "parse"),
+        Stage("reject", _reject, "parse"),
+        Stage("config", _load_config, "config"),
+        Stage("parse", _parse, "parse"),
+        Stage("expand", _expand, "validate"),
+        Stage("validate", _validate, "validate"),
+        Stage("resolve", _resolve, "execute"),
+        Stage("render", _render, "execute"),
+        Stage("enforce", _enforce, "output", final=True),
+        Stage("serialize", _serialize, "output", final=True),
+        Stage("log", _log, "output", final=True),
+    ]
+)
+
+
+_default_processor: FlagProcessor | None = None
+_default_lock = threading.Lock()
+
+
+def get_processor() -> FlagProcessor:
+    """Return the shared process-wide processor for the global config."""
+    global _default_processor
+    if _default_processor is None:
+        with _default_lock:
+            if _default_processor is None:
+                _default_processor = FlagProcessor()
+    return _default_processor
+
+
+def process(hook_input: dict[str, Any]) -> dict[str, Any]:
+    """Process a hook payload with the shared processor.
+
+    See FlagProcessor.process().
+    """
+    return get_processor().process(hook_input)
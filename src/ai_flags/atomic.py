@@ -0,0 +1,109 @@
+"""Crash- and concurrency-safe file writes."""
+
+import os
+import tempfile
+import threading
+from collections.abc import Iterator
+from contextlib import contextmanager
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+DEFAULT_MODE = 0o644
+
+
+def atomic_write_bytes(
+    path: Path, data: bytes, mode: int | None = None, durable: bool = True
+) -> None:
+    """Atomically replace a file's contents.
+
+    The data is written to a temp file in the same directory, fsynced and
+    renamed over the target, so readers see either the old or the new
+    contents and never a truncated file.
+
+    Args:
+        path: File to write
+        data: New contents
+        mode: Permission bits (default: keep the existing file's, else 0o644)
+        durable: Fsync the file and the directory, so the new contents survive
+            a crash (caches that can be rebuilt skip this)
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    if mode is None:
+        try:
+            mode = path.stat().st_mode & 0o777
+        except OSError:
+            mode = DEFAULT_MODE
+
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            if durable:
+                f.flush()
+                os.fsync(f.fileno())
+        os.chmod(tmp_name, mode)
+        os.replace(tmp_name, path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+
+    if durable:
+        _fsync_dir(path.parent)
+
+
+def atomic_write_text(path: Path, text: str, mode: int | None = None) -> None:
+    """Atomically replace a file's contents with UTF-8 text (see atomic_write_bytes)."""
+    atomic_write_bytes(path, text.encode("utf-8"), mode)
+
+
+def _fsync_dir(directory: Path) -> None:
+    """Persist a rename by fsyncing its directory (best effort, POSIX only)."""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+_held = threading.local()
+
+
+@contextmanager
+def file_lock(lock_path: Path) -> Iterator[None]:
+    """Hold an exclusive advisory lock on lock_path.
+
+    Serializes writers across processes and threads. The lock is reentrant
+    within a thread, so a locked read-modify-write may call functions that
+    take the same lock. Readers are expected not to lock at all. On platforms
+    without fcntl this is a no-op.
+    """
+    held: dict[str, int] = _held.__dict__.setdefault("locks", {})
+    key = str(lock_path)
+
+    if held.get(key) or fcntl is None:
+        held[key] = held.get(key, 0) + 1
+        try:
+            yield
+        finally:
+            held[key] -= 1
+        return
+
+    lock_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(lock_path, "a") as f:
+        fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        held[key] = 1
+        try:
+            yield
+        finally:
+            held[key] = 0
+            fcntl.flock(f.fileno(), fcntl.LOCK_UN)
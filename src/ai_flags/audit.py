@@ -0,0 +1,180 @@
+"""Content-addressed audit trail of injected contexts.
+
+Each distinct flag context is stored once, zlib-compressed, under its
+SHA-256 (``blobs/ab/abcd….z``). Every hook invocation appends one fixed-size
+record (timestamp, session id, context hash, flag mask, prompt hash) to
+``records-v1.bin``, so storage grows with the number of distinct contexts
+rather than the number of prompts. Prompts themselves are only hashed.
+
+Recording is opt-in (``audit: true`` in config).
+"""
+
+import hashlib
+import os
+import string
+import struct
+import time
+import zlib
+from collections.abc import Iterator
+from dataclasses import dataclass
+from pathlib import Path
+
+from ai_flags import ephemeral
+from ai_flags.atomic import atomic_write_bytes
+from ai_flags.config_loader import CONFIG_DIR
+
+AUDIT_DIR = CONFIG_DIR / "audit"
+
+FLAG_LETTERS = string.ascii_lowercase
+
+# Record layout: timestamp, session id (UTF-8, NUL-padded), context hash,
+# flag bitmask (bit i = letter i), prompt hash
+_RECORD = struct.Struct("<d40s32sI32s")
+RECORD_SIZE = _RECORD.size
+_RECORDS_NAME = "records-v1.bin"
+
+
+@dataclass(frozen=True)
+class AuditRecord:
+    """One recorded injection."""
+
+    index: int
+    timestamp: float
+    session_id: str
+    context_hash: str  # Hex SHA-256 of the injected flag context
+    flags: list[str]
+    prompt_hash: str  # Hex SHA-256 of the submitted prompt
+
+
+def flag_mask(flags: list[str]) -> int:
+    """Encode flag letters as a bitmask."""
+    mask = 0
+    for flag in flags:
+        index = FLAG_LETTERS.find(flag)
+        if index >= 0:
+            mask |= 1 << index
+    return mask
+
+
+def mask_flags(mask: int) -> list[str]:
+    """Decode a bitmask into flag letters (alphabetical)."""
+    return [letter for i, letter in enumerate(FLAG_LETTERS) if mask & (1 << i)]
+
+
+def _blob_path(directory: Path, digest: str) -> Path:
+    return directory / "blobs" / digest[:2] / f"{digest}.z"
+
+
+def store_blob(context: str, directory: Path) -> str:
+    """Store a context unless it is already present.
+
+    Returns:
+        Hex SHA-256 of the context
+    """
+    data = context.encode("utf-8")
+    digest = hashlib.sha256(data).hexdigest()
+    path = _blob_path(directory, digest)
+    if not path.exists():
+        atomic_write_bytes(path, zlib.compress(data, 9))
+    return digest
+
+
+def load_blob(digest: str, directory: Path | None = None) -> str:
+    """Return a stored context.
+
+    Raises:
+        FileNotFoundError: If no context with that hash is stored
+        ValueError: If the stored blob is corrupt
+    """
+    path = _blob_path(directory if directory else AUDIT_DIR, digest)
+    try:
+        data = zlib.decompress(path.read_bytes())
+    except zlib.error as e:
+        raise ValueError(f"corrupt blob {digest}: {e}") from e
+    if hashlib.sha256(data).hexdigest() != digest:
+        raise ValueError(f"blob {digest} does not match its hash")
+    return data.decode("utf-8")
+
+
+def record(
+    context: str,
+    flags: list[str],
+    session_id: str | None,
+    prompt: str,
+    directory: Path | None = None,
+) -> None:
+    """Store a context and append its record.
+
+    Best effort: auditing never breaks prompt handling, so I/O errors are
+    ignored. Nothing is recorded in ephemeral mode.
+    """
+    if ephemeral.enabled():
+        return
+    directory = directory if directory else AUDIT_DIR
+    try:
+        digest = store_blob(context, directory)
+        entry = _RECORD.pack(
+            time.time(),
+            str(session_id or "").encode("utf-8")[:40],
+            bytes.fromhex(digest),
+            flag_mask(flags),
+            hashlib.sha256(prompt.encode("utf-8")).digest(),
+        )
+        # A single O_APPEND write of a small record never interleaves with other writers
+        fd = os.open(directory / _RECORDS_NAME, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+        try:
+            os.write(fd, entry)
+        finally:
+            os.close(fd)
+    except OSError:
+        pass
+
+
+def _unpack(index: int, data: bytes) -> AuditRecord:
+    timestamp, session, context_hash, mask, prompt_hash = _RECORD.unpack(data)
+    return AuditRecord(
+        index=index,
+        timestamp=timestamp,
+        session_id=session.rstrip(b"\0").decode("utf-8", errors="replace"),
+        context_hash=context_hash.hex(),
+        flags=mask_flags(mask),
+        prompt_hash=prompt_hash.hex(),
+    )
+
+
+def count(directory: Path | None = None) -> int:
+    """Return the number of complete records."""
+    try:
+        size = os.stat((directory if directory else AUDIT_DIR) / _RECORDS_NAME).st_size
+    except OSError:
+        return 0
+    return size // RECORD_SIZE
+
+
+def get_record(index: int, directory: Path | None = None) -> AuditRecord:
+    """Read one record by index; negative indexes count from the end.
+
+    Raises:
+        IndexError: If there is no such record
+    """
+    directory = directory if directory else AUDIT_DIR
+    total = count(directory)
+    if index < 0:
+        index += total
+    if not 0 <= index < total:
+        raise IndexError(f"no audit record {index}")
+    with open(directory / _RECORDS_NAME, "rb") as f:
+        f.seek(index * RECORD_SIZE)
+        return _unpack(index, f.read(RECORD_SIZE))
+
+
+def iter_records(start: int = 0, directory: Path | None = None) -> Iterator[AuditRecord]:
+    """Yield the records from index start on."""
+    directory = directory if directory else AUDIT_DIR
+    total = count(directory)
+    if start >= total:
+        return
+    with open(directory / _RECORDS_NAME, "rb") as f:
+        f.seek(start * RECORD_SIZE)
+        for index in range(start, total):
+            yield _unpack(index, f.read(RECORD_SIZE))
@@ -0,0 +1,85 @@
+"""Token estimation and budget enforcement for the injected context.
+
+The estimator is an offline approximation of BPE tokenizers: each word
+counts as one token plus one per further 8 characters, and every
+punctuation character counts as one. It is meant for budgeting, not
+billing. Estimates of static fragments (rendered flag blocks) are cached.
+"""
+
+import re
+from collections.abc import Mapping
+from functools import lru_cache
+
+from ai_flags.executor import DispatchTable
+
+_TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+# Above this size, estimate from the length instead of scanning the text
+_SCAN_LIMIT = 65_536
+
+
+def estimate_tokens(text: str) -> int:
+    """Estimate the number of tokens in text."""
+    if len(text) > _SCAN_LIMIT:
+        return (len(text) + 3) // 4
+    return sum(1 + (len(piece) - 1) // 8 for piece in _TOKEN_RE.findall(text))
+
+
+@lru_cache(maxsize=1024)
+def fragment_tokens(fragment: str) -> int:
+    """Estimate the tokens of a static fragment, caching the result."""
+    return estimate_tokens(fragment)
+
+
+def fit_budget(
+    flags: list[str],
+    table: DispatchTable,
+    short_table: DispatchTable,
+    priorities: Mapping[str, int],
+    budget: int,
+) -> DispatchTable:
+    """Choose the block variant of each flag so the total fits the budget.
+
+    Blocks are first swapped for their short variants and then dropped, in
+    order of increasing priority; among equal priorities, flags given later in
+    the prompt go first.
+
+    Args:
+        flags: Flag letters in prompt order
+        table: Full rendered blocks
+        short_table: Compact rendered blocks (flags without one are absent)
+        priorities: Flag letter -> priority (higher is kept longer, default 0)
+        budget: Maximum estimated tokens
+
+    Returns:
+        Table holding the chosen block of each flag that is kept
+    """
+    chosen = {flag: table[flag] for flag in flags if flag in table}
+    total = sum(fragment_tokens(block) for block in chosen.values())
+    if total <= budget:
+        return chosen
+
+    position = {flag: index for index, flag in enumerate(flags)}
+    order = sorted(chosen, key=lambda flag: (priorities.get(flag, 0), -position[flag]))
+
+    for flag in order:
+        short = short_table.get(flag)
+        if short is None:
+            continue
+        saved = fragment_tokens(chosen[flag]) - fragment_tokens(short)
+        if saved > 0:
+            chosen[flag] = short
+            total -= saved
+            if total <= budget:
+                return chosen
+
+    for flag in order:
+        total -= fragment_tokens(chosen.pop(flag))
+        if total <= budget:
+            break
+    return chosen
+
+
+def table_tokens(flags: list[str], table: DispatchTable) -> int:
+    """Return the estimated tokens of the blocks of flags in table."""
+    return sum(fragment_tokens(table[flag]) for flag in flags if flag in table)
@@ -0,0 +1,420 @@
+"""On-disk key/value cache shared by short-lived hook processes.
+
+Each namespace (e.g. "contexts") is a directory under the cache root with
+one file per entry, named by the SHA-256 of its key:
+
+    <root>/<namespace>/ab/abcd….bin
+
+An entry file holds a header (magic, expiry time, key length), the key and
+the value. Writers create it under a temp name and rename it into place, so
+readers, which never lock, see either a complete old or a complete new
+entry. An entry for another key (a hash collision), an expired entry or a
+damaged file is a miss.
+
+Recency is the file's mtime: a hit touches the entry at most once per
+TOUCH_INTERVAL. Writes never evict. At most once per EVICT_INTERVAL, a
+write stamps the namespace and starts a detached ``python -m
+ai_flags.cache`` that deletes expired entries, then the least recently
+used ones until the namespace fits in its size cap.
+
+The root defaults to ~/.config/ai-flags/cache. Point it at tmpfs with
+
+    AI_FLAGS_CACHE_DIR=$XDG_RUNTIME_DIR/ai-flags
+
+In ephemeral mode (see ai_flags.ephemeral) each DiskCache object keeps its
+entries in memory instead, least recently used first out of the same cap.
+
+Lookups and writes are counted per namespace. FlagProcessor adds the counts
+to the shared metrics file when metrics are enabled (see ai_flags.metrics),
+so `ai-flags cache stats` can show the hit rate of all hook processes.
+"""
+
+import contextlib
+import hashlib
+import os
+import re
+import struct
+import sys
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+
+from ai_flags import ephemeral
+from ai_flags.atomic import atomic_write_bytes
+from ai_flags.config_loader import CONFIG_DIR
+
+CACHE_DIR_ENV = "AI_FLAGS_CACHE_DIR"
+DEFAULT_CACHE_DIR = CONFIG_DIR / "cache"
+
+DEFAULT_MAX_BYTES = 16 * 1024 * 1024  # Per namespace
+
+# Seconds between mtime updates of an entry that keeps being hit
+TOUCH_INTERVAL = 60
+# Seconds between eviction runs of a namespace
+EVICT_INTERVAL = 300
+# Temp files older than this were left behind by a crashed writer
+STALE_TEMP_AGE = 3600
+
+# Entry layout: magic, expiry (Unix time, 0 = never), key length; then key, value
+_HEADER = struct.Struct("<4sdI")
+_MAGIC = b"AIC1"
+_SUFFIX = ".bin"
+_STAMP_NAME = ".evicted"
+_NAMESPACE_RE = re.compile(r"^[a-z0-9][a-z0-9_-]*$")
+
+
+def cache_root() -> Path:
+    """Return the cache root: $AI_FLAGS_CACHE_DIR, else DEFAULT_CACHE_DIR."""
+    value = os.environ.get(CACHE_DIR_ENV)
+    return Path(value).expanduser() if value else DEFAULT_CACHE_DIR
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    """Lookups and writes of a cache."""
+
+    hits: int = 0
+    misses: int = 0
+    writes: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of lookups that hit (0.0 without lookups)."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+@dataclass(frozen=True)
+class Usage:
+    """On-disk size of one namespace."""
+
+    namespace: str
+    entries: int
+    bytes: int
+
+
+# Counts of this process not yet taken by take_counts(): namespace -> [hits, misses, writes]
+_pending: dict[str, list[int]] = {}
+_pending_lock = threading.Lock()
+
+
+def _add_pending(namespace: str, hits: int = 0, misses: int = 0, writes: int = 0) -> None:
+    with _pending_lock:
+        counts = _pending.setdefault(namespace, [0, 0, 0])
+        counts[0] += hits
+        counts[1] += misses
+        counts[2] += writes
+
+
+def take_counts() -> dict[str, CacheStats]:
+    """Return the lookups and writes of every namespace since the last call, and reset them."""
+    with _pending_lock:
+        taken = {
+            namespace: CacheStats(hits=hits, misses=misses, writes=writes)
+            for namespace, (hits, misses, writes) in _pending.items()
+        }
+        _pending.clear()
+    return taken
+
+
+class DiskCache:
+    """A size-capped, TTL-aware key/value cache in one namespace.
+
+    Safe to share between threads and processes. Every operation is best
+    effort: I/O errors make get() miss and set() do nothing.
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        *,
+        root: Path | None = None,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        ttl: float | None = None,
+    ):
+        """Initialize the cache.
+
+        Args:
+            namespace: Directory name under the root, e.g. "contexts"
+            root: Cache root (defaults to cache_root() when first used)
+            max_bytes: Size the namespace is evicted down to
+            ttl: Default seconds an entry stays valid (None = until evicted)
+
+        Raises:
+            ValueError: If the namespace isn't a lowercase name
+        """
+        if not _NAMESPACE_RE.match(namespace):
+            raise ValueError(f"invalid cache namespace '{namespace}'")
+        self.namespace = namespace
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._root = root
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._writes = 0
+        # Ephemeral mode: key -> (expiry, value), least recently used first
+        self._memory: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+        self._memory_bytes = 0
+
+    @property
+    def directory(self) -> Path:
+        """Directory of the namespace."""
+        return (self._root if self._root is not None else cache_root()) / self.namespace
+
+    def _path(self, key: str) -> tuple[Path, bytes]:
+        key_bytes = key.encode("utf-8")
+        digest = hashlib.sha256(key_bytes).hexdigest()
+        return self.directory / digest[:2] / f"{digest}{_SUFFIX}", key_bytes
+
+    def _count(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self._hits += 1
+            else:
+                self._misses += 1
+        _add_pending(self.namespace, hits=int(hit), misses=int(not hit))
+
+    def _count_write(self) -> None:
+        with self._lock:
+            self._writes += 1
+        _add_pending(self.namespace, writes=1)
+
+    def get(self, key: str) -> bytes | None:
+        """Return the value stored for key, or None if missing or expired."""
+        if ephemeral.enabled():
+            value = self._memory_get(key)
+            self._count(value is not None)
+            return value
+
+        path, key_bytes = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+                mtime = os.fstat(f.fileno()).st_mtime
+                now = time.time()
+                value = _decode(data, key_bytes, now)
+                if value is not None and now - mtime > TOUCH_INTERVAL:
+                    # Recency for eviction; a read-only cache still serves hits
+                    with contextlib.suppress(OSError):
+                        os.utime(f.fileno())
+        except OSError:
+            value = None
+        self._count(value is not None)
+        return value
+
+    def set(self, key: str, value: bytes, ttl: float | None = None) -> None:
+        """Store value under key, replacing any previous value.
+
+        Args:
+            ttl: Seconds the entry stays valid (default: the cache's ttl)
+        """
+        ttl = ttl if ttl is not None else self.ttl
+        expires = time.time() + ttl if ttl is not None else 0.0
+        if ephemeral.enabled():
+            self._memory_set(key, value, expires)
+            return
+
+        path, key_bytes = self._path(key)
+        data = _HEADER.pack(_MAGIC, expires, len(key_bytes)) + key_bytes + value
+        try:
+            atomic_write_bytes(path, data, durable=False)
+        except OSError:
+            return
+        self._count_write()
+        evict_in_background(self.directory, self.max_bytes)
+
+    def delete(self, key: str) -> None:
+        """Remove the entry for key, if any."""
+        if ephemeral.enabled():
+            with self._lock:
+                entry = self._memory.pop(key, None)
+                if entry is not None:
+                    self._memory_bytes -= len(entry[1])
+            return
+        with contextlib.suppress(OSError):
+            self._path(key)[0].unlink()
+
+    def _memory_get(self, key: str) -> bytes | None:
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is None:
+                return None
+            expires, value = entry
+            if expires and expires <= time.time():
+                del self._memory[key]
+                self._memory_bytes -= len(value)
+                return None
+            self._memory.move_to_end(key)
+            return value
+
+    def _memory_set(self, key: str, value: bytes, expires: float) -> None:
+        with self._lock:
+            old = self._memory.pop(key, None)
+            if old is not None:
+                self._memory_bytes -= len(old[1])
+            self._memory[key] = (expires, value)
+            self._memory_bytes += len(value)
+            while self._memory_bytes > self.max_bytes:
+                _, (_, evicted) = self._memory.popitem(last=False)
+                self._memory_bytes -= len(evicted)
+        self._count_write()
+
+    @property
+    def stats(self) -> CacheStats:
+        """Hits, misses and writes of this cache object so far."""
+        with self._lock:
+            return CacheStats(hits=self._hits, misses=self._misses, writes=self._writes)
+
+
+def _decode(data: bytes, key_bytes: bytes, now: float) -> bytes | None:
+    """Return the value of an entry file if it holds key_bytes and hasn't expired."""
+    if len(data) < _HEADER.size:
+        return None
+    magic, expires, key_length = _HEADER.unpack_from(data)
+    start = _HEADER.size + key_length
+    if magic != _MAGIC or data[_HEADER.size : start] != key_bytes:
+        return None
+    if expires and expires <= now:
+        return None
+    return data[start:]
+
+
+def _entries(directory: Path) -> list[tuple[float, int, str]]:
+    """Return (mtime, size, path) of the entry files of a namespace."""
+    entries = []
+    try:
+        shards = [e.path for e in os.scandir(directory) if e.is_dir(follow_symlinks=False)]
+    except OSError:
+        return []
+    for shard in shards:
+        try:
+            with os.scandir(shard) as it:
+                for entry in it:
+                    try:
+                        st = entry.stat(follow_symlinks=False)
+                    except OSError:
+                        continue
+                    if entry.name.endswith(_SUFFIX):
+                        entries.append((st.st_mtime, st.st_size, entry.path))
+                    elif entry.name.endswith(".tmp") and time.time() - st.st_mtime > STALE_TEMP_AGE:
+                        with contextlib.suppress(OSError):
+                            os.unlink(entry.path)
+        except OSError:
+            continue
+    return entries
+
+
+def _expired(path: str, now: float) -> bool:
+    try:
+        with open(path, "rb") as f:
+            header = f.read(_HEADER.size)
+    except OSError:
+        return False
+    if len(header) < _HEADER.size:
+        return True
+    magic, expires, _ = _HEADER.unpack(header)
+    return magic != _MAGIC or (expires != 0 and expires <= now)
+
+
+def evict(directory: Path, max_bytes: int) -> int:
+    """Delete expired entries, then least recently used ones until the namespace fits.
+
+    Returns:
+        Number of entries deleted
+    """
+    now = time.time()
+    removed = 0
+    kept = []
+    for mtime, size, path in _entries(directory):
+        if _expired(path, now):
+            with contextlib.suppress(OSError):
+                os.unlink(path)
+                removed += 1
+        else:
+            kept.append((mtime, size, path))
+
+    total = sum(size for _, size, _ in kept)
+    for _, size, path in sorted(kept):
+        if total <= max_bytes:
+            break
+        with contextlib.suppress(OSError):
+            os.unlink(path)
+            removed += 1
+        total -= size
+    return removed
+
+
+def evict_in_background(directory: Path, max_bytes: int) -> None:
+    """Start a detached eviction of a namespace unless one ran within EVICT_INTERVAL.
+
+    The run is stamped before spawning, so concurrent writers start at most one.
+    """
+    stamp = directory / _STAMP_NAME
+    try:
+        if time.time() - os.stat(stamp).st_mtime < EVICT_INTERVAL:
+            return
+    except OSError:
+        pass
+
+    import subprocess  # Only needed once per EVICT_INTERVAL
+
+    try:
+        stamp.touch()
+        subprocess.Popen(
+            [sys.executable, "-m", "ai_flags.cache", str(directory), str(max_bytes)],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+    except OSError:
+        pass
+
+
+def usage(root: Path | None = None) -> list[Usage]:
+    """Return the on-disk size of every namespace under the root."""
+    root = root if root is not None else cache_root()
+    try:
+        namespaces = sorted(e.name for e in os.scandir(root) if e.is_dir(follow_symlinks=False))
+    except OSError:
+        return []
+    result = []
+    for namespace in namespaces:
+        entries = _entries(root / namespace)
+        result.append(Usage(namespace, len(entries), sum(size for _, size, _ in entries)))
+    return result
+
+
+def clear(namespace: str | None = None, root: Path | None = None) -> int:
+    """Delete every entry of a namespace (None = all namespaces).
+
+    Returns:
+        Number of entries deleted
+
+    Raises:
+        OSError: EROFS in ephemeral mode
+    """
+    root = root if root is not None else cache_root()
+    ephemeral.check_writable(root)
+    namespaces = [namespace] if namespace else [u.namespace for u in usage(root)]
+    removed = 0
+    for name in namespaces:
+        for _, _, path in _entries(root / name):
+            with contextlib.suppress(OSError):
+                os.unlink(path)
+                removed += 1
+    return removed
+
+
+def main(argv: list[str]) -> int:
+    """Entry point of the detached eviction process: namespace directory, max bytes."""
+    directory, max_bytes = argv
+    evict(Path(directory), int(max_bytes))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
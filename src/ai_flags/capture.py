@@ -0,0 +1,124 @@
+"""Recent failure output for -d.
+
+The configured sources (``debug_capture.sources``) are files or globs
+relative to the hook's cwd, e.g. pytest's ``.pytest_cache/v/cache/lastfailed``
+or ``logs/*.log``. Only the last max_bytes of each file are read, through
+tail.read_tail(), so a multi-GB log costs the same as a small one. Globs
+are matched with glob.glob() without recursion, so ``**`` matches one
+directory level only.
+
+Rendered tails are cached in memory by path and stat signature. Reading
+stops at the capture deadline, so slow storage can delay -d only briefly.
+"""
+
+import glob
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from ai_flags.config import DebugCaptureConfig
+from ai_flags.config_loader import StatSignature, stat_signature
+from ai_flags.tail import read_tail
+
+# pytest's record of the tests that failed in the last run
+LASTFAILED_NAME = "lastfailed"
+
+# Maximum number of rendered tails kept in memory
+CACHE_SIZE = 64
+
+_ANSI_RE = re.compile(rb"\x1b\[[0-9;?]*[A-Za-z]")
+# "node id": true entries of pytest's lastfailed JSON, complete even in a cut-off tail
+_NODE_ID_RE = re.compile(rb'"((?:[^"\\]|\\.)+)":\s*true')
+
+_cache: OrderedDict[tuple[str, int], tuple[StatSignature, str]] = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _candidates(
+    cwd: str, sources: list[str], max_age: int, deadline: float
+) -> list[tuple[float, str]]:
+    """Return (mtime, path) of the regular files the sources match, newest first."""
+    oldest = time.time() - max_age
+    found: dict[str, float] = {}
+    for source in sources:
+        if time.monotonic() > deadline:
+            break
+        pattern = os.path.join(cwd, os.path.expanduser(source))
+        for path in glob.glob(pattern) if glob.has_magic(pattern) else [pattern]:
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            if os.path.isfile(path) and st.st_mtime >= oldest:
+                found[path] = st.st_mtime
+    return sorted(((mtime, path) for path, mtime in found.items()), reverse=True)
+
+
+def render_tail(path: str, max_bytes: int, label: str) -> str:
+    """Render the end of one file: failed test ids for lastfailed, else the text.
+
+    Raises:
+        OSError: If the file can't be read
+    """
+    data = read_tail(path, max_bytes)
+    if os.path.basename(path) == LASTFAILED_NAME:
+        node_ids = [match.decode("utf-8", errors="replace") for match in _NODE_ID_RE.findall(data)]
+        if not node_ids:
+            return ""
+        return f"Failed tests ({label}):\n" + "\n".join(node_ids)
+
+    text = _ANSI_RE.sub(b"", data).decode("utf-8", errors="replace").strip()
+    if not text:
+        return ""
+    return f"Last {len(data)} bytes of {label}:\n{text}"
+
+
+def _cached_tail(path: str, max_bytes: int, label: str) -> str:
+    """Return render_tail() of a file, reusing the result while the file is unchanged."""
+    key = (path, max_bytes)
+    signature = stat_signature(path)
+    with _cache_lock:
+        entry = _cache.get(key)
+        if entry is not None and entry[0] == signature:
+            _cache.move_to_end(key)
+            return entry[1]
+
+    text = render_tail(path, max_bytes, label)
+    with _cache_lock:
+        _cache[key] = (signature, text)
+        _cache.move_to_end(key)
+        while len(_cache) > CACHE_SIZE:
+            _cache.popitem(last=False)
+    return text
+
+
+def capture_failures(cwd: str, settings: DebugCaptureConfig) -> str:
+    """Collect recent failure output below cwd, within the configured caps.
+
+    Returns:
+        One section per file, most recently modified first ("" if none)
+    """
+    deadline = time.monotonic() + settings.deadline_ms / 1000
+    remaining = settings.max_total_bytes
+    sections = []
+    candidates = _candidates(cwd, settings.sources, settings.max_age, deadline)
+    for _, path in candidates[: settings.max_files]:
+        if remaining <= 0 or time.monotonic() > deadline:
+            break
+        max_bytes = min(settings.max_bytes, remaining)
+        try:
+            text = _cached_tail(path, max_bytes, os.path.relpath(path, cwd))
+        except (OSError, ValueError):
+            continue
+        if text:
+            sections.append(text)
+            remaining -= max_bytes
+    return "\n\n".join(sections)
+
+
+def clear_cache() -> None:
+    """Forget the rendered tails cached in memory."""
+    with _cache_lock:
+        _cache.clear()
@@ -5,20 +5,22 @@ import json
 import sys
 import os
 import subprocess
+import time
+from pathlib import Path
 from typing import Optional
 
-from ai_flags.config_loader import load_config, save_config, reset_config, CONFIG_PATH
-from ai_flags.parser import parse_trailing_flags
-from ai_flags.validator import validate_flags
-from ai_flags.executor import execute_flag_handlers
-from ai_flags.output import format_hook_output, format_cli_output
-from ai_flags.handlers import (
-    SubagentHandler,
-    CommitHandler,
-    CoverageHandler,
-    DebugHandler,
-    NoLintHandler,
+from ai_flags import config_loader, env, hook_installer, watchdog
+from ai_flags.api import CLI_OUTPUT, FlagProcessor, Invocation
+from ai_flags.atomic import atomic_write_text
+from ai_flags.config_loader import (
+    config_write_lock,
+    load_global_config,
+    resolve_config,
+    save_config,
+    reset_config,
+    CONFIG_PATH,
 )
+from ai_flags.output import empty_hook_output
 from ai_flags.logger import log_handle
 
 
@@ -30,32 +32,69 @@ def cli():
 
 @cli.command()
 @click.argument("prompt", required=False)
-def handle(prompt: Optional[str]):
+@click.option(
+    "--pre-tool-use",
+    is_flag=True,
+    help="Run as a PreToolUse hook that denies linter calls while -n is active",
+)
+def handle(prompt: Optional[str], pre_tool_use: bool):
     """Handle a prompt with flags.
 
     Auto-detects input mode:
     - If PROMPT argument provided: CLI mode (plain text output)
     - If stdin has data: Hook mode (JSON in/out)
     """
+    if pre_tool_use:
+        # The installed entry point short-circuits this before importing click (see __main__)
+        from ai_flags import enforce
+
+        sys.exit(enforce.pre_tool_use())
+
+    if os.environ.get("AI_FLAGS_PROFILE"):
+        # Imported only on demand so unprofiled runs don't pay for cProfile/tracemalloc
+        from ai_flags import profiling
+
+        with profiling.from_environment():
+            _handle(prompt)
+    else:
+        _handle(prompt)
+
+
+def _handle(prompt: str | None):
+    """Dispatch to CLI or hook mode."""
     # Detect mode: prefer explicit prompt argument (CLI mode)
     if prompt:
         # CLI mode: process argument
         _handle_cli_mode(prompt)
     elif not sys.stdin.isatty():
-        # Check if stdin actually has data
-        try:
-            # Hook mode: read JSON from stdin
-            _handle_hook_mode()
-        except (json.JSONDecodeError, EOFError):
-            # stdin exists but has no valid JSON (or is empty)
-            click.echo("Error: No valid JSON input on stdin", err=True)
-            sys.exit(1)
+        # Armed before reading stdin, which may never be closed
+        with _hook_watchdog() as dog:
+            # Check if stdin actually has data
+            try:
+                # Hook mode: read JSON from stdin
+                _handle_hook_mode(dog)
+            except (json.JSONDecodeError, EOFError):
+                # stdin exists but has no valid JSON (or is empty)
+                click.echo("Error: No valid JSON input on stdin", err=True)
+                sys.exit(1)
     else:
         click.echo("Error: No prompt provided and stdin is empty", err=True)
         sys.exit(1)
 
 
-def _handle_hook_mode():
+def _hook_watchdog() -> watchdog.Watchdog:
+    """Create the watchdog that answers with empty output if handling takes too long."""
+    deadline = watchdog.deadline_from_environment()
+
+    def record_overrun(answered: bool) -> None:
+        error = f"Deadline of {deadline * 1000:.0f} ms exceeded"
+        click.echo(f"ai-flags: {error}, {'sent empty output' if answered else 'exiting'}", err=True)
+        log_handle(mode="hook", flags=[], cleaned_prompt="", success=False, error=error)
+
+    return watchdog.Watchdog(deadline, json.dumps(empty_hook_output()) + "\n", record_overrun)
+
+
+def _handle_hook_mode(dog: watchdog.Watchdog):
     """Handle hook mode (JSON stdin → JSON stdout)."""
     # Read all stdin content first to check if empty
     stdin_content = sys.stdin.read()
@@ -64,181 +103,299 @@ def _handle_hook_mode():
         # Empty stdin - this is an error condition
         raise json.JSONDecodeError("Empty stdin", "", 0)
 
-    # Try to parse JSON
+    # Invalid JSON (but not empty) gracefully degrades to the empty output
+    output = FlagProcessor(log_mode="hook").process(stdin_content)
+
+    # Pretty-print only when there is context to show
+    indent = 2 if output["hookSpecificOutput"]["additionalContext"] else None
+    dog.write(json.dumps(output, indent=indent) + "\n")
+
+
+def _handle_cli_mode(prompt: str):
+    """Handle CLI mode (argument → plain text output)."""
+    # Resolved (and cached) here only to report variables the config skipped
+    for error in resolve_config(os.getcwd()).env_errors:
+        click.echo(f"Warning: ignoring {error}", err=True)
+
+    invocation = FlagProcessor(log_mode="cli").invoke(
+        Invocation(prompt=prompt, cwd=os.getcwd(), output=CLI_OUTPUT)
+    )
+
+    result = invocation.result
+    if result is None or result.error:
+        if result is not None and result.flags:
+            click.echo("Error: Invalid or disabled flags detected", err=True)
+        else:
+            click.echo("Error: No flags detected in prompt", err=True)
+        sys.exit(1)
+
+    click.echo(invocation.response)
+
+
+@cli.command("install-hook")
+@click.option(
+    "--settings",
+    "settings_path",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default=None,
+    help="Claude Code settings file (default: ~/.claude/settings.json)",
+)
+@click.option(
+    "--timeout",
+    type=click.IntRange(min=1),
+    default=hook_installer.DEFAULT_TIMEOUT,
+    show_default=True,
+    help="Hook timeout in seconds",
+)
+@click.option("--yes", "-y", is_flag=True, help="Remove the legacy wrapper without asking")
+@click.option(
+    "--enforce/--no-enforce",
+    default=True,
+    show_default=True,
+    help="Also register the PreToolUse hook that blocks linters while -n is active",
+)
+def install_hook(settings_path: Path | None, timeout: int, yes: bool, enforce: bool):
+    """Register `ai-flags handle` as a UserPromptSubmit command hook.
+
+    With --enforce (the default), `ai-flags handle --pre-tool-use` is also
+    registered as a PreToolUse hook for Bash.
+    """
+    if settings_path is None:
+        settings_path = hook_installer.SETTINGS_PATH
+
     try:
-        hook_input = json.loads(stdin_content)
-    except (json.JSONDecodeError, ValueError):
-        # Invalid JSON (but not empty) - gracefully degrade for hooks
-        log_handle(
-            mode="hook", flags=[], cleaned_prompt="", success=False, error="Invalid JSON input"
-        )
-        click.echo(
-            json.dumps(
-                {
-                    "hookSpecificOutput": {
-                        "hookEventName": "UserPromptSubmit",
-                        "additionalContext": "",
-                    }
-                }
-            ),
-            err=False,
+        settings = hook_installer.load_settings(settings_path)
+    except (ValueError, TypeError) as e:
+        click.echo(f"Error: Cannot parse {settings_path}: {e}", err=True)
+        sys.exit(1)
+
+    changed = hook_installer.merge_hook(settings, timeout=timeout)
+    if enforce:
+        changed |= hook_installer.merge_hook(
+            settings,
+            command=hook_installer.PRE_TOOL_USE_COMMAND,
+            timeout=timeout,
+            event=hook_installer.PRE_TOOL_USE_EVENT,
+            matcher=hook_installer.PRE_TOOL_USE_MATCHER,
         )
-        return
 
-    try:
-        # Extract prompt from hook input
-        prompt = hook_input.get("prompt", "")
-        permission_mode = hook_input.get("permission_mode")
-
-        # Load config
-        config = load_config()
-        enabled_flags = config.get_enabled_flags()
-
-        # Parse flags
-        result = parse_trailing_flags(prompt)
-        if result is None:
-            # No flags detected - output empty JSON
-            log_handle(mode="hook", flags=[], cleaned_prompt=prompt, success=True)
-            click.echo(
-                json.dumps(
-                    {
-                        "hookSpecificOutput": {
-                            "hookEventName": "UserPromptSubmit",
-                            "additionalContext": "",
-                        }
-                    }
-                )
-            )
-            return
-
-        cleaned_prompt, flags = result
-
-        # Validate flags
-        if not validate_flags(flags, enabled_flags):
-            # Invalid flags - silent exit (output empty JSON)
-            log_handle(
-                mode="hook",
-                flags=flags,
-                cleaned_prompt=cleaned_prompt,
-                success=False,
-                error="Invalid or disabled flags",
-            )
+    # Detect the README's old Python wrapper, which would inject context a second time.
+    # The wrapper file lives in ~/.claude, so it only concerns the global settings
+    # or a settings file that actually registers it.
+    legacy_hooks = hook_installer.find_legacy_hooks(settings)
+    legacy_file = hook_installer.LEGACY_WRAPPER_PATH
+    targets_global = settings_path.resolve() == hook_installer.SETTINGS_PATH.resolve()
+    remove_file = legacy_file.exists() and (targets_global or bool(legacy_hooks))
+
+    if legacy_hooks or remove_file:
+        click.echo("Found legacy hook wrapper:")
+        for command in legacy_hooks:
+            click.echo(f"  settings entry: {command}")
+        if remove_file:
+            click.echo(f"  file: {legacy_file}")
+
+        if yes or click.confirm("Remove it?", default=True):
+            if hook_installer.remove_legacy_hooks(settings):
+                changed = True
+            try:
+                if remove_file:
+                    legacy_file.unlink(missing_ok=True)
+                click.echo("Legacy wrapper removed")
+            except OSError as e:
+                click.echo(f"Warning: Could not remove {legacy_file}: {e}", err=True)
+        elif legacy_hooks:
             click.echo(
-                json.dumps(
-                    {
-                        "hookSpecificOutput": {
-                            "hookEventName": "UserPromptSubmit",
-                            "additionalContext": "",
-                        }
-                    }
-                )
+                "Warning: Both hooks are registered; flag context will be added twice", err=True
             )
-            return
 
-        # Build handlers with custom content from config
-        handlers = _build_handlers(config)
+    if changed:
+        hook_installer.save_settings(settings_path, settings)
+        click.echo(f"Hook installed in {settings_path}")
+    else:
+        click.echo(f"Hook already installed in {settings_path}")
+
 
-        # Execute handlers
-        context = execute_flag_handlers(flags, handlers, permission_mode)
+@cli.group("metrics")
+def metrics_group():
+    """Usage metrics (enable with `metrics: true` in config)."""
 
-        # If no context generated (e.g., -s filtered in normal mode), return empty
-        if not context:
-            log_handle(mode="hook", flags=flags, cleaned_prompt=cleaned_prompt, success=True)
-            click.echo(
-                json.dumps(
-                    {
-                        "hookSpecificOutput": {
-                            "hookEventName": "UserPromptSubmit",
-                            "additionalContext": "",
-                        }
-                    }
-                )
-            )
-            return
 
-        # Format and output
-        output = format_hook_output(cleaned_prompt, flags, context)
-        click.echo(output)
-        log_handle(mode="hook", flags=flags, cleaned_prompt=cleaned_prompt, success=True)
+@metrics_group.command("export")
+@click.option(
+    "--output",
+    "-o",
+    type=click.Path(dir_okay=False, path_type=Path),
+    default=None,
+    help="Write to this file atomically, e.g. ai_flags.prom in the textfile collector dir",
+)
+def metrics_export(output: Path | None):
+    """Print or write the counters in OpenMetrics text format."""
+    from ai_flags import metrics
 
-    except Exception as e:
-        # On error, output empty JSON (graceful degradation)
-        log_handle(mode="hook", flags=[], cleaned_prompt="", success=False, error=str(e))
-        click.echo(
-            json.dumps(
-                {
-                    "hookSpecificOutput": {
-                        "hookEventName": "UserPromptSubmit",
-                        "additionalContext": "",
-                    }
-                }
-            ),
-            err=False,
-        )
-        sys.exit(0)
+    text = metrics.render_openmetrics(metrics.snapshot())
+    if output is None:
+        click.echo(text, nl=False)
+        return
 
+    try:
+        atomic_write_text(output, text)
+    except OSError as e:
+        click.echo(f"Error: Cannot write {output}: {e}", err=True)
+        sys.exit(1)
+    click.echo(f"Metrics written to {output}")
 
-def _handle_cli_mode(prompt: str):
-    """Handle CLI mode (argument → plain text output)."""
-    # Load config
-    config = load_config()
-    enabled_flags = config.get_enabled_flags()
-
-    # Parse flags
-    result = parse_trailing_flags(prompt)
-    if result is None:
-        log_handle(
-            mode="cli", flags=[], cleaned_prompt=prompt, success=False, error="No flags detected"
-        )
-        click.echo("Error: No flags detected in prompt", err=True)
+
+@metrics_group.command("reset")
+def metrics_reset():
+    """Zero all counters."""
+    from ai_flags import metrics
+
+    try:
+        metrics.reset()
+    except OSError as e:
+        click.echo(f"Error: Cannot reset metrics: {e}", err=True)
         sys.exit(1)
+    click.echo("Metrics reset")
+
+
+@cli.group("cache")
+def cache_group():
+    """On-disk cache shared by hook processes."""
+
 
-    cleaned_prompt, flags = result
+@cache_group.command("stats")
+def cache_stats():
+    """Show the entries and size of every cache namespace, and its hit rate."""
+    from ai_flags import cache, metrics
 
-    # Validate flags
-    if not validate_flags(flags, enabled_flags):
-        log_handle(
-            mode="cli",
-            flags=flags,
-            cleaned_prompt=cleaned_prompt,
-            success=False,
-            error="Invalid or disabled flags",
+    click.echo(f"Cache root: {cache.cache_root()}")
+    namespaces = cache.usage()
+    if not namespaces:
+        click.echo("No cached entries")
+    for u in namespaces:
+        click.echo(f"{u.namespace:<20} {u.entries:>8} entries {u.bytes:>12,} bytes")
+
+    # Lookups of all processes, counted in the shared metrics
+    counts = [
+        (namespace, cache.CacheStats(hits, misses, writes))
+        for namespace, (hits, misses, writes) in metrics.snapshot().cache.items()
+        if hits or misses or writes
+    ]
+    if not counts:
+        click.echo("No lookups recorded (enable `metrics: true` to count them)")
+    for namespace, stats in counts:
+        click.echo(
+            f"{namespace:<20} {stats.hits:>8} hits {stats.misses:>8} misses "
+            f"{stats.writes:>8} writes ({stats.hit_rate:.0%} hit rate)"
         )
-        click.echo("Error: Invalid or disabled flags detected", err=True)
+
+
+@cache_group.command("clear")
+@click.argument("namespace", required=False)
+def cache_clear(namespace: str | None):
+    """Delete cached entries (of NAMESPACE, default: all)."""
+    from ai_flags import cache
+
+    try:
+        removed = cache.clear(namespace)
+    except OSError as e:
+        click.echo(f"Error: Cannot clear the cache: {e}", err=True)
         sys.exit(1)
+    click.echo(f"Removed {removed} cache entries")
+
+
+@cli.group("audit")
+def audit_group():
+    """Audit trail of injected contexts (enable with `audit: true` in config)."""
+
+
+def _format_time(timestamp: float) -> str:
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(timestamp))
+
 
-    # Build handlers
-    handlers = _build_handlers(config)
+@audit_group.command("list")
+@click.option("--limit", type=click.IntRange(min=1), default=20, show_default=True)
+@click.option("--session", "session_id", default=None, help="Only show this session")
+def audit_list(limit: int, session_id: str | None):
+    """List the most recent injections."""
+    from ai_flags import audit
 
-    # Execute handlers
-    context = execute_flag_handlers(flags, handlers, permission_mode=None)
+    if session_id is None:
+        records = list(audit.iter_records(max(0, audit.count() - limit)))
+    else:
+        records = [r for r in audit.iter_records() if r.session_id == session_id][-limit:]
 
-    # Format and output
-    output = format_cli_output(cleaned_prompt, flags, context)
-    click.echo(output)
-    log_handle(mode="cli", flags=flags, cleaned_prompt=cleaned_prompt, success=True)
+    if not records:
+        click.echo("No audit records")
+        return
+    for r in records:
+        flags = " ".join(f"-{flag}" for flag in r.flags)
+        click.echo(
+            f"{r.index:>6}  {_format_time(r.timestamp)}  {r.session_id or '-':<36}  "
+            f"{r.context_hash[:12]}  {flags}"
+        )
 
 
-def _build_handlers(config):
-    """Build handler instances with custom content from config."""
-    handlers = {}
+@audit_group.command("show")
+@click.argument("index", type=int, default=-1)
+def audit_show(index: int):
+    """Show an injection and its context (INDEX from `audit list`, default: the latest)."""
+    from ai_flags import audit
 
-    s_cfg = config.subagent
-    handlers["s"] = SubagentHandler(content=s_cfg.content)
+    try:
+        r = audit.get_record(index)
+        context = audit.load_blob(r.context_hash)
+    except IndexError:
+        click.echo(f"Error: No audit record {index}", err=True)
+        sys.exit(1)
+    except (OSError, ValueError) as e:
+        click.echo(f"Error: Cannot read the context of record {index}: {e}", err=True)
+        sys.exit(1)
 
-    c_cfg = config.commit
-    handlers["c"] = CommitHandler(content=c_cfg.content)
+    click.echo(f"Record:  {r.index}")
+    click.echo(f"Time:    {_format_time(r.timestamp)}")
+    click.echo(f"Session: {r.session_id or '-'}")
+    click.echo("Flags:   " + " ".join(f"-{flag}" for flag in r.flags))
+    click.echo(f"Prompt:  sha256:{r.prompt_hash}")
+    click.echo(f"Context: sha256:{r.context_hash}")
+    click.echo()
+    click.echo(context)
 
-    t_cfg = config.test
-    handlers["t"] = CoverageHandler(content=t_cfg.content)
 
-    d_cfg = config.debug
-    handlers["d"] = DebugHandler(content=d_cfg.content)
+@cli.group()
+def profile():
+    """Inspect profiles collected with AI_FLAGS_PROFILE."""
 
-    n_cfg = config.no_lint
-    handlers["n"] = NoLintHandler(content=n_cfg.content)
 
-    return handlers
+@profile.command("report")
+@click.option(
+    "--dir",
+    "directory",
+    type=click.Path(file_okay=False, path_type=Path),
+    default=None,
+    help="Profile directory (default: $AI_FLAGS_PROFILE_DIR or ~/.config/ai-flags/profiles)",
+)
+@click.option(
+    "--sort",
+    type=click.Choice(["cumulative", "tottime", "calls"]),
+    default="cumulative",
+    show_default=True,
+    help="cProfile sort order",
+)
+@click.option("--limit", type=click.IntRange(min=1), default=30, show_default=True)
+def profile_report(directory: Path | None, sort: str, limit: int):
+    """Merge all collected profiles into one ranked report."""
+    from ai_flags import profiling
+
+    if directory is None:
+        env_dir = os.environ.get(profiling.PROFILE_DIR_ENV)
+        directory = Path(env_dir) if env_dir else profiling.PROFILE_DIR
+
+    text = profiling.report(directory, sort=sort, limit=limit)
+    if not text:
+        click.echo(f"No profiles found in {directory}", err=True)
+        sys.exit(1)
+    click.echo(text, nl=False)
 
 
 # Config commands
@@ -250,32 +407,71 @@ def config():
 
 @config.command("show")
 def config_show():
-    """Display current configuration."""
-    cfg = load_config()
+    """Display the effective configuration for the current directory."""
+    resolved = resolve_config(os.getcwd())
+    cfg = resolved.config
 
     click.echo("AI Flags Configuration")
     click.echo("=" * 50)
-    click.echo(f"Config file: {CONFIG_PATH}")
+    if env.env_only():
+        click.echo(f"Config source: environment only ({env.SOURCE_VAR}={env.ENV_ONLY})")
+    else:
+        click.echo(f"Config file: {CONFIG_PATH}")
+    if resolved.env_vars:
+        click.echo(f"Environment: {', '.join(resolved.env_vars)}")
+    for error in resolved.env_errors:
+        click.echo(f"Ignored: {error}")
+    if resolved.remote is not None:
+        cached = any(layer.parent == config_loader.REMOTE_DIR for layer in resolved.layers)
+        pending = "" if cached else " (not fetched yet)"
+        click.echo(f"Remote config: {resolved.remote.url}{pending}")
+    if resolved.profile is not None:
+        click.echo(f"Profile: {resolved.profile}")
+    for layer in resolved.layers:
+        if layer != CONFIG_PATH and layer.parent != config_loader.REMOTE_DIR:
+            click.echo(f"Project layer: {layer}")
     click.echo()
 
-    flags_info = [
-        ("s", "subagent", cfg.subagent),
-        ("c", "commit", cfg.commit),
-        ("t", "test", cfg.test),
-        ("d", "debug", cfg.debug),
-        ("n", "no_lint", cfg.no_lint),
-    ]
-
-    for letter, name, flag_cfg in flags_info:
+    for entry in cfg.registry:
+        flag_cfg = cfg.entry_config(entry)
         status = "✓ enabled" if flag_cfg.enabled else "✗ disabled"
-        custom = " (custom content)" if flag_cfg.content else ""
-        click.echo(f"-{letter} ({name:10s}): {status}{custom}")
+        custom = " (custom content)" if entry.builtin and flag_cfg.content else ""
+        modes = f" [modes: {', '.join(flag_cfg.modes)}]" if flag_cfg.modes is not None else ""
+        click.echo(f"-{entry.flag} ({entry.name:10s}): {status}{custom}{modes}")
+
+    if cfg.macros:
+        click.echo()
+        click.echo("Macros:")
+        for name, members in cfg.macros.items():
+            click.echo(f"-{name} = " + " ".join(f"-{member}" for member in members))
+
+
+@config.command("fetch")
+def config_fetch():
+    """Fetch the remote config now instead of waiting for the background refresh."""
+    from ai_flags import remote
+
+    settings = resolve_config().remote
+    if settings is None:
+        click.echo("Error: No remote config (set remote.url in the config file)", err=True)
+        sys.exit(1)
+
+    try:
+        status = remote.fetch(settings, config_loader.REMOTE_DIR)
+    except (OSError, ValueError, TypeError) as e:
+        click.echo(f"Error: Cannot fetch {settings.url}: {e}", err=True)
+        sys.exit(1)
+    click.echo(f"Remote config {status}: {settings.url}")
 
 
 @config.command("reset")
 def config_reset():
     """Reset configuration to defaults."""
-    reset_config()
+    try:
+        reset_config()
+    except OSError as e:
+        click.echo(f"Error: Cannot write {CONFIG_PATH}: {e}", err=True)
+        sys.exit(1)
     click.echo("Configuration reset to defaults")
 
 
@@ -284,41 +480,44 @@ def config_edit():
     """Open config file in $EDITOR."""
     editor = os.environ.get("EDITOR", "nano")
 
-    # Ensure config exists
-    if not CONFIG_PATH.exists():
-        save_config(load_config())
+    # Ensure config exists (the editor's own writes are not serialized)
+    try:
+        with config_write_lock():
+            if not CONFIG_PATH.exists():
+                save_config(load_global_config())
+    except OSError as e:
+        click.echo(f"Error: Cannot write {CONFIG_PATH}: {e}", err=True)
+        sys.exit(1)
 
     subprocess.run([editor, str(CONFIG_PATH)])
 
 
 @config.command("set")
-@click.argument(
-    "flag",
-    type=click.Choice(["s", "c", "t", "d", "n", "subagent", "commit", "test", "debug", "no_lint"]),
-)
+@click.argument("flag")
 @click.argument("value", type=click.Choice(["enabled", "disabled"]))
 def config_set(flag: str, value: str):
-    """Enable or disable a flag."""
-    # Normalize flag name
-    flag_map = {
-        "s": "subagent",
-        "c": "commit",
-        "t": "test",
-        "d": "debug",
-        "n": "no_lint",
-    }
-    flag_name = flag_map.get(flag, flag)
-
-    # Load config
-    cfg = load_config()
-
-    # Update
+    """Enable or disable a flag, by letter, word or name (e.g. c or commit)."""
     enabled = value == "enabled"
-    flag_cfg = getattr(cfg, flag_name)
-    flag_cfg.enabled = enabled
 
-    # Save
-    save_config(cfg)
+    # Hold the writer lock across load-modify-save so concurrent sets aren't lost.
+    # Only the global file is modified: remote, profile, project and environment
+    # layers must not be copied into it.
+    try:
+        with config_write_lock():
+            try:
+                cfg = load_global_config()
+            except ValueError as e:
+                click.echo(f"Error: Invalid config: {e}", err=True)
+                sys.exit(1)
+            entry = cfg.registry.find(flag)
+            if entry is None:
+                click.echo(f"Error: Unknown flag '{flag}'", err=True)
+                sys.exit(1)
+            cfg.entry_config(entry).enabled = enabled
+            save_config(cfg)
+    except OSError as e:
+        click.echo(f"Error: Cannot write {CONFIG_PATH}: {e}", err=True)
+        sys.exit(1)
 
     status = "enabled" if enabled else "disabled"
     click.echo(f"Flag '{flag}' {status}")
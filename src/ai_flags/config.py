@@ -1,6 +1,37 @@
 """Configuration models."""
 
-from pydantic import BaseModel, Field
+import string
+from typing import Any
+
+from pydantic import (
+    BaseModel,
+    Field,
+    PrivateAttr,
+    ValidationInfo,
+    field_validator,
+    model_validator,
+)
+
+from ai_flags.enforce import DEFAULT_LINT_COMMANDS
+from ai_flags.macros import resolve_macros
+from ai_flags.output import check_metadata_mode
+from ai_flags.parser import FLAG_RE
+from ai_flags.profiles import PathTrie, build_trie, match_profile
+from ai_flags.registry import FlagEntry, FlagRegistry
+
+# Values of the hook's "permission_mode"
+PERMISSION_MODES = ("default", "plan", "acceptEdits", "bypassPermissions")
+
+# Config field of each built-in flag letter
+FLAG_FIELDS = {"s": "subagent", "c": "commit", "t": "test", "d": "debug", "n": "no_lint"}
+
+# Validation context key: a validated AiFlagsConfig whose profiles are reused,
+# instead of validated and compiled again, if the data has the same profiles
+PROFILES_OF = "profiles_of"
+
+
+def _profiles_source(info: ValidationInfo) -> "AiFlagsConfig | None":
+    return info.context.get(PROFILES_OF) if info.context else None
 
 
 class FlagConfig(BaseModel):
@@ -8,6 +39,83 @@ class FlagConfig(BaseModel):
 
     enabled: bool = Field(default=True, description="Whether this flag is enabled")
     content: str | None = Field(default=None, description="Custom content (None = use default)")
+    modes: list[str] | None = Field(
+        default=None,
+        description="Permission modes the flag applies to (None = the flag's default)",
+    )
+    mode_content: dict[str, str] = Field(
+        default_factory=dict, description="Content variants keyed by permission mode"
+    )
+    short_content: str | None = Field(
+        default=None, description="Compact content used under the token budget (None = default)"
+    )
+    priority: int = Field(
+        default=0, description="Flags with higher priority keep their full content longer"
+    )
+
+
+class CustomFlagConfig(FlagConfig):
+    """Configuration for a user-defined flag (see ai_flags.registry)."""
+
+    flag: str | None = Field(
+        default=None, description="Letter or word typed after the dash (None = the name)"
+    )
+    content: str = Field(description="Instructions injected when the flag is used")
+    tag: str | None = Field(
+        default=None,
+        pattern=r"^[A-Za-z_][A-Za-z0-9_.-]*$",
+        description="XML tag of the block (None = <name>_instructions)",
+    )
+
+    @field_validator("flag")
+    @classmethod
+    def _check_flag(cls, flag: str | None) -> str | None:
+        if flag is not None and not FLAG_RE.fullmatch(flag):
+            raise ValueError(f"flag '{flag}' must be a lowercase letter or word")
+        return flag
+
+
+class DedupConfig(BaseModel):
+    """Replace blocks already injected in recent turns with a short reference."""
+
+    enabled: bool = Field(default=False, description="Scan the transcript for repeated blocks")
+    turns: int = Field(default=5, ge=1, description="User turns to look back")
+    max_bytes: int = Field(
+        default=1_048_576, ge=1024, description="Maximum bytes read from the end of the transcript"
+    )
+
+
+class DebugCaptureConfig(BaseModel):
+    """Recent failure output appended to -d, read from the end of files below the hook's cwd."""
+
+    sources: list[str] = Field(
+        default_factory=list,
+        description="Files or globs relative to cwd, e.g. .pytest_cache/v/cache/lastfailed",
+    )
+    max_bytes: int = Field(default=8192, ge=256, description="Bytes read from the end of a file")
+    max_total_bytes: int = Field(default=16384, ge=256, description="Bytes read from all files")
+    max_files: int = Field(default=3, ge=1, description="Most recently modified files used")
+    max_age: int = Field(
+        default=3600, ge=1, description="Skip files not modified for this many seconds"
+    )
+    deadline_ms: int = Field(
+        default=50, ge=1, description="Stop reading further files after this many ms"
+    )
+
+
+class RemoteConfig(BaseModel):
+    """Shared config document fetched over HTTP and layered over the local config."""
+
+    url: str = Field(description="http(s) URL of a YAML or JSON config document")
+    ttl: int = Field(default=3600, ge=60, description="Seconds between conditional re-fetches")
+    timeout: float = Field(default=5.0, gt=0, description="Fetch timeout in seconds")
+
+    @field_validator("url")
+    @classmethod
+    def _check_url(cls, url: str) -> str:
+        if not url.startswith(("http://", "https://")):
+            raise ValueError("remote url must start with http:// or https://")
+        return url
 
 
 class AiFlagsConfig(BaseModel):
@@ -20,28 +128,162 @@ class AiFlagsConfig(BaseModel):
     debug: FlagConfig = Field(default_factory=FlagConfig, description="Debug flag (-d)")
     no_lint: FlagConfig = Field(default_factory=FlagConfig, description="No-lint flag (-n)")
 
+    flags: dict[str, CustomFlagConfig] = Field(
+        default_factory=dict, description="User-defined flags keyed by name"
+    )
+
+    macros: dict[str, list[str]] = Field(
+        default_factory=dict, description="Composite flags, e.g. {x: [c, t, n]}"
+    )
+
+    token_budget: int | None = Field(
+        default=None, ge=1, description="Maximum estimated tokens of flag context (None = no limit)"
+    )
+
+    metadata: str = Field(
+        default="full",
+        description="Prompt echoed in flag_metadata: full, truncated:N, flags-only or none",
+    )
+
+    merge_blocks: bool = Field(
+        default=False, description="Merge the blocks of several flags into one XML block"
+    )
+
+    dedup: DedupConfig = Field(
+        default_factory=DedupConfig, description="Transcript-aware deduplication"
+    )
+
+    lint_commands: list[str] = Field(
+        default_factory=lambda: list(DEFAULT_LINT_COMMANDS),
+        description="Bash commands denied while -n is active (needs the PreToolUse hook)",
+    )
+
+    project_hints: bool = Field(
+        default=True,
+        description="Add details about the cwd's project to -t, -n and -d (tooling, failures)",
+    )
+
+    debug_capture: DebugCaptureConfig = Field(
+        default_factory=DebugCaptureConfig, description="Failure output added to -d"
+    )
+
+    profiles: dict[str, dict[str, Any]] = Field(
+        default_factory=dict,
+        description="Partial configs keyed by path prefix, e.g. {'~/oss/**': {...}}",
+    )
+
+    remote: RemoteConfig | None = Field(
+        default=None, description="Team config fetched in the background (global config only)"
+    )
+
+    sticky_ttl: int = Field(
+        default=86400, ge=60, description="Seconds a session's sticky flags (-c+) are kept"
+    )
+
+    metrics: bool = Field(
+        default=False, description="Record usage metrics (see `ai-flags metrics export`)"
+    )
+
+    audit: bool = Field(
+        default=False, description="Keep an audit trail of injected contexts (`ai-flags audit`)"
+    )
+
+    # Compiled from profiles when the config is validated
+    _profile_trie: PathTrie | None = PrivateAttr(default=None)
+    # Built-in and user-defined flags, indexed when the config is validated
+    _registry: FlagRegistry = PrivateAttr(default_factory=lambda: FlagRegistry(()))
+
+    @field_validator("flags")
+    @classmethod
+    def _check_flag_names(cls, flags: dict[str, CustomFlagConfig]) -> dict[str, CustomFlagConfig]:
+        for name, flag_config in flags.items():
+            if flag_config.flag is None and not FLAG_RE.fullmatch(name):
+                raise ValueError(
+                    f"flag name '{name}' must be a lowercase letter or word, or set 'flag'"
+                )
+            if name in FLAG_FIELDS.values():
+                raise ValueError(f"flag name '{name}' is taken by a built-in flag")
+        return flags
+
+    @field_validator("macros")
+    @classmethod
+    def _check_macro_names(cls, macros: dict[str, list[str]]) -> dict[str, list[str]]:
+        for name in macros:
+            if len(name) != 1 or name not in string.ascii_lowercase:
+                raise ValueError(f"macro name '{name}' must be a single lowercase letter")
+        return macros
+
+    @field_validator("metadata")
+    @classmethod
+    def _check_metadata(cls, metadata: str) -> str:
+        return check_metadata_mode(metadata)
+
+    @field_validator("profiles")
+    @classmethod
+    def _check_profiles(
+        cls, profiles: dict[str, dict[str, Any]], info: ValidationInfo
+    ) -> dict[str, dict[str, Any]]:
+        source = _profiles_source(info)
+        if source is not None and source.profiles == profiles:
+            return source.profiles
+        for pattern, overrides in profiles.items():
+            nested = {"profiles", "remote"} & overrides.keys()
+            if nested:
+                raise ValueError(f"profile '{pattern}' can't set {', '.join(sorted(nested))}")
+            # Each profile must be valid on its own; merged with the base it's checked on use
+            AiFlagsConfig(**overrides)
+        return profiles
+
+    @model_validator(mode="after")
+    def _build_registry(self) -> "AiFlagsConfig":
+        # Duplicate flags raise ValueError, i.e. a ValidationError at load time
+        builtin = [FlagEntry(letter, field, True) for letter, field in FLAG_FIELDS.items()]
+        custom = [
+            FlagEntry(flag_config.flag or name, name, False)
+            for name, flag_config in self.flags.items()
+        ]
+        self._registry = FlagRegistry(builtin + custom)
+        return self
+
+    @model_validator(mode="after")
+    def _check_macro_members(self) -> "AiFlagsConfig":
+        for name in self.macros:
+            if name in self._registry:
+                raise ValueError(f"macro '{name}' shadows the -{name} flag")
+        # Rejects unknown members and cycles when the config is loaded
+        resolve_macros(self.macros, self._registry)
+        return self
+
+    @model_validator(mode="after")
+    def _compile_profiles(self, info: ValidationInfo) -> "AiFlagsConfig":
+        source = _profiles_source(info)
+        if source is not None and self.profiles is source.profiles:
+            self._profile_trie = source._profile_trie
+            return self
+        # Invalid patterns raise ValueError, i.e. a ValidationError at load time
+        self._profile_trie = build_trie(list(self.profiles)) if self.profiles else None
+        return self
+
+    def match_profile(self, cwd: str) -> str | None:
+        """Return the pattern of the most specific profile covering cwd."""
+        if self._profile_trie is None:
+            return None
+        return match_profile(self._profile_trie, cwd)
+
+    @property
+    def registry(self) -> FlagRegistry:
+        """The built-in and user-defined flags, as validated."""
+        return self._registry
+
     def get_enabled_flags(self) -> set[str]:
-        """Return set of enabled flag letters."""
-        enabled = set()
-        if self.subagent.enabled:
-            enabled.add("s")
-        if self.commit.enabled:
-            enabled.add("c")
-        if self.test.enabled:
-            enabled.add("t")
-        if self.debug.enabled:
-            enabled.add("d")
-        if self.no_lint.enabled:
-            enabled.add("n")
-        return enabled
-
-    def get_flag_config(self, flag_letter: str) -> FlagConfig | None:
-        """Get config for a specific flag letter."""
-        flag_map = {
-            "s": self.subagent,
-            "c": self.commit,
-            "t": self.test,
-            "d": self.debug,
-            "n": self.no_lint,
-        }
-        return flag_map.get(flag_letter)
+        """Return set of enabled flags."""
+        return {entry.flag for entry in self._registry if self.entry_config(entry).enabled}
+
+    def get_flag_config(self, flag: str) -> FlagConfig | None:
+        """Get config for a specific flag (letter or word)."""
+        entry = self._registry.get(flag)
+        return self.entry_config(entry) if entry is not None else None
+
+    def entry_config(self, entry: FlagEntry) -> FlagConfig:
+        """Return the settings of a registry entry."""
+        return getattr(self, entry.name) if entry.builtin else self.flags[entry.name]
@@ -1,47 +1,483 @@
 """Configuration loading and saving."""
 
+import os
+import threading
+import tomllib
+from collections import OrderedDict
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
 from pathlib import Path
+from typing import Any
 
 import yaml
+from pydantic import ValidationError
 
-from ai_flags.config import AiFlagsConfig
+from ai_flags import env, ephemeral
+from ai_flags.atomic import atomic_write_text, file_lock
+from ai_flags.config import PROFILES_OF, AiFlagsConfig, RemoteConfig
 
 CONFIG_DIR = Path.home() / ".config" / "ai-flags"
 CONFIG_PATH = CONFIG_DIR / "config.yaml"
 
+# Cached copies of remote config documents
+REMOTE_DIR = CONFIG_DIR / "remote"
+
+# Project-level override files, looked up in the hook's cwd and its parents.
+# If a directory has both, the first name wins.
+PROJECT_CONFIG_NAMES = (".ai-flags.yaml", ".ai-flags.toml")
+
+# Maximum number of (config path, cwd) resolutions kept in memory
+RESOLVE_CACHE_SIZE = 128
+
+# Maximum number of validated global configs (file, or file plus remote document) kept
+BASE_CACHE_SIZE = 8
+
+# Stat signature of a file: (mtime_ns, size, inode), or None if missing
+StatSignature = tuple[int, int, int] | None
+
+
+@dataclass(frozen=True)
+class ResolvedConfig:
+    """A merged config together with the files it was built from.
+
+    The config instance is shared between callers of resolve_config() and must
+    be treated as read-only; load_config() returns a private copy.
+    """
+
+    config: AiFlagsConfig
+    layers: tuple[Path, ...]  # Files that contributed, lowest precedence first
+    key: tuple[tuple[str, StatSignature], ...]  # Identifies the merged content
+    probes: tuple[tuple[Path, StatSignature], ...]  # Every path checked, found or not
+    remote: RemoteConfig | None = None  # Remote source named by the global config
+    profile: str | None = None  # Pattern of the profile applied for cwd
+    env_vars: tuple[str, ...] = ()  # AI_FLAGS_* variables that contributed
+    env_errors: tuple[str, ...] = ()  # Why the other AI_FLAGS_* variables were skipped
+
+
+# libyaml's loader parses large configs (e.g. hundreds of profiles) about ten
+# times faster; same safe subset of YAML
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+# Errors that make a config file unusable (unreadable, unparsable or invalid)
+_CONFIG_ERRORS = (
+    OSError,
+    ValueError,
+    TypeError,
+    yaml.YAMLError,
+    tomllib.TOMLDecodeError,
+    ValidationError,
+)
+
+_resolve_cache: OrderedDict[tuple[str, str | None, tuple[tuple[str, str], ...]], ResolvedConfig] = (
+    OrderedDict()
+)
+_resolve_lock = threading.Lock()
+
+# Stat signatures of the global layers -> (their merged data, its validated config)
+_base_cache: OrderedDict[tuple[Any, ...], tuple[dict[str, Any], AiFlagsConfig]] = OrderedDict()
+
 
 def get_default_config() -> AiFlagsConfig:
     """Return default configuration (all flags enabled, no custom content)."""
     return AiFlagsConfig()
 
 
-def load_config() -> AiFlagsConfig:
-    """Load configuration from file, or return default if not exists."""
-    if not CONFIG_PATH.exists():
-        return get_default_config()
-
+def stat_signature(path: str | Path) -> StatSignature:
+    """Return a cheap change-detection signature for a file."""
     try:
-        with open(CONFIG_PATH) as f:
-            data = yaml.safe_load(f)
+        st = os.stat(path)
+    except OSError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def _read_config_data(path: Path) -> dict[str, Any]:
+    """Read a YAML or TOML config file into a dict (empty file → empty dict)."""
+    if path.suffix == ".toml":
+        with open(path, "rb") as f:
+            data = tomllib.load(f)
+    else:
+        with open(path) as f:
+            data = yaml.load(f, Loader=_YAML_LOADER)
+
+    if data is None:
+        return {}
+    if not isinstance(data, dict):
+        raise TypeError(f"{path} does not contain a mapping")
+    return data
+
 
-        if data is None:
-            return get_default_config()
+def merge_config_data(base: dict[str, Any], override: dict[str, Any]) -> dict[str, Any]:
+    """Deep-merge two config dicts; values in override win, nested dicts are merged."""
+    merged = dict(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = merge_config_data(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
 
+
+def _project_dirs(cwd: str) -> list[Path]:
+    """Return cwd and its parents, outermost first."""
+    start = Path(os.path.abspath(cwd))
+    return [*reversed(start.parents), start]
+
+
+def _validate(data: dict[str, Any], base: AiFlagsConfig | None = None) -> AiFlagsConfig:
+    """Validate merged config data.
+
+    Profiles are the costly part: each one is validated on its own and all of
+    them are compiled into a trie. If data still has base's profiles, base's
+    validated ones are reused.
+    """
+    if base is None or not base.profiles:
         return AiFlagsConfig(**data)
-    except Exception:
-        # On any error, return default config
+    return AiFlagsConfig.model_validate(data, context={PROFILES_OF: base})
+
+
+def _variable_error(name: str, error: Exception) -> str:
+    """Return why an AI_FLAGS_* variable was skipped."""
+    if isinstance(error, ValidationError):
+        return f"{name}: {error.errors()[0]['msg']}"
+    return f"{name}: {error}"
+
+
+def _environment_layer(
+    data: dict[str, Any],
+    variables: tuple[tuple[str, str], ...],
+    config: AiFlagsConfig | None = None,
+    base: AiFlagsConfig | None = None,
+) -> tuple[dict[str, Any], AiFlagsConfig | None, tuple[str, ...], tuple[str, ...]]:
+    """Merge the AI_FLAGS_* variables over data, skipping the invalid ones.
+
+    Args:
+        data: Merged data of the layers below
+        variables: (name, value) pairs, e.g. from env.snapshot()
+        config: The config of data, whose flags AI_FLAGS_DISABLED names (None = defaults)
+        base: Config whose validated profiles are reused (see _validate)
+
+    Returns:
+        Tuple of (data, its config or None if no variable applied, names of
+        the variables applied, errors of the ones skipped)
+    """
+    layers, errors = env.config_layers(variables)
+    env_config: AiFlagsConfig | None = None
+    names: list[str] = []
+    if layers:
+        merged = data
+        for _, overrides in layers:
+            merged = merge_config_data(merged, overrides)
+        try:
+            # Usually every variable is valid: a single validation
+            env_config = _validate(merged, base)
+            data = merged
+            names = [name for name, _ in layers]
+        except _CONFIG_ERRORS:
+            # Apply the variables one at a time to find the invalid ones
+            for name, overrides in layers:
+                merged = merge_config_data(data, overrides)
+                try:
+                    env_config = _validate(merged, base)
+                except _CONFIG_ERRORS as e:
+                    errors.append(_variable_error(name, e))
+                    continue
+                data = merged
+                names.append(name)
+
+    disabled = dict(variables).get(env.DISABLED_VAR)
+    if disabled:
+        # Resolved last, so flags defined by the other variables can be disabled too
+        flags = env_config or config or AiFlagsConfig()
+        overrides, flag_errors = env.disabled_data(disabled, flags.registry)
+        errors.extend(flag_errors)
+        if overrides:
+            merged = merge_config_data(data, overrides)
+            try:
+                env_config = _validate(merged, base)
+            except _CONFIG_ERRORS as e:
+                errors.append(_variable_error(env.DISABLED_VAR, e))
+            else:
+                data = merged
+                names.append(env.DISABLED_VAR)
+    return data, env_config, tuple(names), tuple(errors)
+
+
+def _resolve_environment(variables: tuple[tuple[str, str], ...]) -> ResolvedConfig:
+    """Build the config from the environment alone, without touching any file."""
+    _, config, names, errors = _environment_layer({}, variables)
+    return ResolvedConfig(
+        config=config if config is not None else AiFlagsConfig(),
+        layers=(),
+        key=(),
+        probes=(),
+        env_vars=names,
+        env_errors=errors,
+    )
+
+
+def _validated_base(
+    cache_key: tuple[Any, ...], read: Callable[[], dict[str, Any]], base: AiFlagsConfig | None
+) -> tuple[dict[str, Any], AiFlagsConfig]:
+    """Return the data read for a global layer and its config, cached by stat signatures.
+
+    Hook processes resolve a new cwd against the same global config over and
+    over, so its profiles are validated and compiled once per file version.
+
+    Raises:
+        Any of _CONFIG_ERRORS, if the layer is unusable (not cached)
+    """
+    with _resolve_lock:
+        entry = _base_cache.get(cache_key)
+        if entry is not None:
+            _base_cache.move_to_end(cache_key)
+            return entry
+
+    data = read()
+    entry = (data, _validate(data, base))
+    with _resolve_lock:
+        _base_cache[cache_key] = entry
+        while len(_base_cache) > BASE_CACHE_SIZE:
+            _base_cache.popitem(last=False)
+    return entry
+
+
+def _resolve_uncached(
+    path: Path, cwd: str | None, variables: tuple[tuple[str, str], ...] = ()
+) -> ResolvedConfig:
+    """Read the global config and any project layers and merge them."""
+    probes: list[tuple[Path, StatSignature]] = []
+    key: list[tuple[str, StatSignature]] = []
+    layers: list[Path] = []
+
+    # Stat before reading, so a concurrent change invalidates the entry next time
+    signature = stat_signature(path)
+    probes.append((path, signature))
+    key.append((str(path), signature))
+
+    data: dict[str, Any] = {}
+    # The config of data, and the one whose validated profiles later layers reuse
+    config: AiFlagsConfig | None = None
+    base: AiFlagsConfig | None = None
+    if signature is not None:
+        try:
+            data, config = _validated_base(tuple(key), lambda: _read_config_data(path), None)
+            base = config
+            layers.append(path)
+        except _CONFIG_ERRORS:
+            # On any error, fall back to the default config
+            data = {}
+    remote_settings = config.remote if config is not None else None
+
+    # The cached remote document overrides the global config but not project layers
+    if remote_settings is not None:
+        # Imported only for configs that name a remote source
+        from ai_flags import remote
+
+        document = remote.cache_files(remote_settings.url, REMOTE_DIR).document
+        document_signature = stat_signature(document)
+        probes.append((document, document_signature))
+        if document_signature is not None:
+            key.append((str(document), document_signature))
+            global_data = data
+            try:
+                data, config = _validated_base(
+                    tuple(key),
+                    lambda: merge_config_data(
+                        global_data,
+                        remote.parse_document(document.read_text(encoding="utf-8")),
+                    ),
+                    base,
+                )
+                base = config
+                layers.append(document)
+            except _CONFIG_ERRORS:
+                pass
+
+    # Profiles from the global config (or the remote document) sit below project layers
+    profile = None
+    if cwd and config is not None and config.profiles:
+        profile = config.match_profile(cwd)
+        if profile is not None:
+            key.append((f"profile:{profile}", None))
+            try:
+                merged = merge_config_data(data, data["profiles"][profile])
+                config = _validate(merged, base)
+                data = merged
+            except _CONFIG_ERRORS:
+                profile = None
+
+    if cwd:
+        for directory in _project_dirs(cwd):
+            for name in PROJECT_CONFIG_NAMES:
+                candidate = directory / name
+                layer_signature = stat_signature(candidate)
+                probes.append((candidate, layer_signature))
+                if layer_signature is None:
+                    continue
+
+                key.append((str(candidate), layer_signature))
+                try:
+                    merged = merge_config_data(data, _read_config_data(candidate))
+                    layer_config = _validate(merged, base)
+                except _CONFIG_ERRORS:
+                    # Skip a broken project layer rather than dropping the whole config
+                    break
+                data, config = merged, layer_config
+                layers.append(candidate)
+                break
+
+    data, env_config, env_vars, env_errors = _environment_layer(data, variables, config, base)
+    if env_config is not None:
+        config = env_config
+
+    return ResolvedConfig(
+        config=config if config is not None else AiFlagsConfig(),
+        layers=tuple(layers),
+        key=tuple(key),
+        probes=tuple(probes),
+        remote=remote_settings,
+        profile=profile,
+        env_vars=env_vars,
+        env_errors=env_errors,
+    )
+
+
+def resolve_config(cwd: str | Path | None = None, path: Path | None = None) -> ResolvedConfig:
+    """Resolve the effective config for a working directory.
+
+    Project files named in PROJECT_CONFIG_NAMES in cwd and its parents are
+    merged over the global config, closest directory last. If the global
+    config names a remote document, its cached copy sits between the two,
+    and a background refresh is started once the copy is older than its TTL.
+    The most specific profile covering cwd is applied just below the
+    project files, and AI_FLAGS_* variables (see ai_flags.env) above them.
+    Results are cached per (path, cwd, variables) with LRU eviction and
+    revalidated by re-stat'ing every probed path, including the ones that
+    did not exist. With AI_FLAGS_CONFIG=env, only the variables are used
+    and no file is accessed.
+
+    Args:
+        cwd: Working directory to look for project layers in (None = global only)
+        path: Global config file (defaults to CONFIG_PATH)
+
+    Returns:
+        ResolvedConfig whose config must not be mutated
+    """
+    variables = env.snapshot()
+    env_only = env.env_only()
+    if path is None:
+        path = CONFIG_PATH
+    # Normalize so a relative cwd can't hit another directory's entry after a chdir.
+    # Without file layers neither matters (and abspath would call getcwd).
+    cwd_key = os.path.abspath(cwd) if cwd and not env_only else None
+    cache_key = (env.ENV_ONLY if env_only else str(path), cwd_key, variables)
+
+    with _resolve_lock:
+        entry = _resolve_cache.get(cache_key)
+        if entry is not None:
+            _resolve_cache.move_to_end(cache_key)
+
+    if entry is None or any(stat_signature(p) != sig for p, sig in entry.probes):
+        if env_only:
+            entry = _resolve_environment(variables)
+        else:
+            entry = _resolve_uncached(path, cwd_key, variables)
+
+        with _resolve_lock:
+            _resolve_cache[cache_key] = entry
+            _resolve_cache.move_to_end(cache_key)
+            while len(_resolve_cache) > RESOLVE_CACHE_SIZE:
+                _resolve_cache.popitem(last=False)
+
+    if entry.remote is not None:
+        from ai_flags import remote
+
+        remote.refresh_in_background(entry.remote, REMOTE_DIR)
+    return entry
+
+
+def clear_config_cache() -> None:
+    """Forget all cached config resolutions."""
+    with _resolve_lock:
+        _resolve_cache.clear()
+        _base_cache.clear()
+
+
+def load_config(path: Path | None = None, cwd: str | Path | None = None) -> AiFlagsConfig:
+    """Load configuration from file, or return default if not exists.
+
+    AI_FLAGS_* environment variables override the files; with
+    AI_FLAGS_CONFIG=env they are the only source (see resolve_config).
+
+    Args:
+        path: Config file to load (defaults to CONFIG_PATH)
+        cwd: Optional working directory whose project layers are merged on top
+    """
+    return resolve_config(cwd, path).config.model_copy(deep=True)
+
+
+def load_global_config(path: Path | None = None) -> AiFlagsConfig:
+    """Load the global config file alone, for load-modify-save sequences.
+
+    Unlike load_config(), nothing is merged in: no remote document, profile,
+    project layer or AI_FLAGS_* variable. Saving the result therefore writes
+    back what the file held plus the caller's change.
+
+    Args:
+        path: Config file to load (defaults to CONFIG_PATH)
+
+    Returns:
+        The file's config, or the default config if the file doesn't exist
+
+    Raises:
+        OSError: If the file exists but can't be read
+        ValueError: If the file can't be parsed or is invalid
+    """
+    if path is None:
+        path = CONFIG_PATH
+    try:
+        data = _read_config_data(path)
+    except FileNotFoundError:
         return get_default_config()
+    except (TypeError, yaml.YAMLError) as e:
+        raise ValueError(f"{path}: {e}") from e
+    return AiFlagsConfig(**data)
+
+
+@contextmanager
+def config_write_lock() -> Iterator[None]:
+    """Serialize config writers across processes.
+
+    Wrap a load-modify-save sequence in this so concurrent `config set`
+    invocations don't lose each other's changes. Readers never take the lock:
+    save_config() replaces the file atomically, so they always see a complete
+    config.
+
+    Raises:
+        OSError: EROFS in ephemeral mode, before anything is written
+    """
+    ephemeral.check_writable(CONFIG_PATH)
+    # Next to the file it protects, so redirecting CONFIG_PATH moves the lock too
+    with file_lock(CONFIG_PATH.with_name(CONFIG_PATH.name + ".lock")):
+        yield
 
 
 def save_config(config: AiFlagsConfig) -> None:
-    """Save configuration to file."""
-    CONFIG_DIR.mkdir(parents=True, exist_ok=True)
+    """Save configuration to file atomically.
 
+    Raises:
+        OSError: If the file can't be written, or in ephemeral mode
+    """
     # Convert to dict for cleaner YAML output
     data = config.model_dump(exclude_none=False)
+    text = yaml.safe_dump(data, default_flow_style=False, sort_keys=False)
+
+    with config_write_lock():
+        atomic_write_text(CONFIG_PATH, text)
 
-    with open(CONFIG_PATH, "w") as f:
-        yaml.safe_dump(data, f, default_flow_style=False, sort_keys=False)
+    clear_config_cache()
 
 
 def reset_config() -> AiFlagsConfig:
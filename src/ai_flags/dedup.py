@@ -0,0 +1,90 @@
+"""Transcript-aware deduplication of instruction blocks.
+
+When the same flag is used on every turn, its full block is injected every
+time. With dedup enabled, the tail of the session transcript is scanned
+backwards and a block that was already injected within the last few turns is
+replaced by a short reference to the earlier one.
+"""
+
+import json
+from collections.abc import Mapping
+from pathlib import Path
+
+from ai_flags.executor import DispatchTable, block_body
+from ai_flags.tail import iter_lines_reverse
+
+REFERENCE_NOTE = "Same instructions as given earlier in this conversation; they still apply."
+
+
+def _needle(block: str) -> bytes:
+    """Return the block's body as it appears inside a JSON string in the transcript.
+
+    Only the body is matched, so blocks are found whether or not they were
+    merged into one block when injected.
+    """
+    return json.dumps(block_body(block), ensure_ascii=False)[1:-1].encode("utf-8")
+
+
+def _is_user_turn(line: bytes) -> bool:
+    """Check whether a transcript line is a prompt typed by the user.
+
+    Tool results are recorded as user messages too and don't start a turn.
+    """
+    return b'"type":"user"' in line and b'"tool_result"' not in line
+
+
+def recently_injected(
+    transcript_path: Path, blocks: Mapping[str, str], turns: int, max_bytes: int
+) -> set[str]:
+    """Find which blocks occur in the transcript within the last turns user turns.
+
+    Args:
+        transcript_path: Session transcript (JSONL)
+        blocks: Flag letter -> rendered block to look for
+        turns: Number of user turns to look back
+        max_bytes: Upper bound on the bytes read from the end of the transcript
+
+    Returns:
+        Flag letters whose block was found (empty if the transcript is unreadable)
+    """
+    needles = {flag: _needle(block) for flag, block in blocks.items()}
+    found: set[str] = set()
+    seen_turns = 0
+
+    try:
+        for line in iter_lines_reverse(transcript_path, max_bytes):
+            for flag, needle in needles.items():
+                if flag not in found and needle in line:
+                    found.add(flag)
+            if len(found) == len(needles):
+                break
+            if _is_user_turn(line):
+                seen_turns += 1
+                if seen_turns >= turns:
+                    break
+    except (OSError, ValueError):
+        pass
+
+    return found
+
+
+def reference_block(block: str) -> str:
+    """Replace the body of a rendered block with a short reference note."""
+    opening = block[: block.index("\n")]
+    closing = block[block.rindex("\n") + 1 :]
+    return f"{opening}\n{REFERENCE_NOTE}\n{closing}"
+
+
+def dedupe_table(
+    table: DispatchTable,
+    flags: list[str],
+    transcript_path: Path,
+    turns: int,
+    max_bytes: int,
+) -> DispatchTable:
+    """Return a copy of table in which recently injected blocks are references."""
+    blocks = {flag: table[flag] for flag in flags if flag in table}
+    recent = recently_injected(transcript_path, blocks, turns, max_bytes)
+    if not recent:
+        return table
+    return {**table, **{flag: reference_block(table[flag]) for flag in recent}}
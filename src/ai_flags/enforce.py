@@ -0,0 +1,165 @@
+"""PreToolUse enforcement of -n (no-lint).
+
+While the latest prompt of a session used -n, a per-session marker file holds
+the precompiled linter pattern, and `ai-flags handle --pre-tool-use` denies
+Bash calls that match it. PreToolUse fires on every tool call, so this module
+imports only the standard library: without a marker the hook reads stdin,
+stats one file and exits without loading config or compiling anything.
+"""
+
+import json
+import os
+import re
+import sys
+import time
+from collections.abc import Iterable
+from pathlib import Path
+
+# Same directory as config_loader.CONFIG_DIR, which isn't imported here to keep
+# pydantic off the PreToolUse path
+MARKER_DIR = Path.home() / ".config" / "ai-flags" / "no-lint"
+
+DEFAULT_LINT_COMMANDS = (
+    "ruff",
+    "black",
+    "isort",
+    "flake8",
+    "pylint",
+    "mypy",
+    "pyright",
+    "basedpyright",
+    "eslint",
+    "prettier",
+    "tsc",
+    "biome",
+    "golangci-lint",
+    "cargo clippy",
+    "pre-commit",
+)
+
+# Wrappers that may precede a linter, e.g. "uv run ruff" or "npx eslint"
+_RUNNERS = (
+    r"sudo|env|time|command|uvx|npx|bunx|uv\s+run|poetry\s+run|pipx\s+run|pdm\s+run|"
+    r"hatch\s+run|pnpm(?:\s+exec)?|yarn|python3?\s+-m"
+)
+
+_SESSION_ID = re.compile(r"[\w-]{1,128}")
+
+DENY_REASON = "Linting and type-checking are disabled for this task (-n)."
+
+
+def compile_pattern(commands: Iterable[str]) -> str:
+    """Build a regex matching any of the commands in command position.
+
+    Matches at the start of the command line or after a shell separator,
+    optionally behind runners such as "uv run" and with a path prefix, so
+    "cd src && uv run .venv/bin/ruff check" matches but "grep ruff notes" doesn't.
+
+    Returns:
+        The pattern source, stored in the marker file
+    """
+    names = "|".join(
+        r"\s+".join(re.escape(word) for word in command.split())
+        for command in sorted(commands, key=len, reverse=True)
+    )
+    return rf"(?:^|[;&|(]|\$\()\s*(?:(?:{_RUNNERS})\s+)*(?:\S*/)?(?:{names})(?=$|[\s;&|)])"
+
+
+def _marker_path(session_id: object) -> Path | None:
+    if not isinstance(session_id, str) or not _SESSION_ID.fullmatch(session_id):
+        return None
+    return MARKER_DIR / session_id
+
+
+def activate(session_id: str, pattern: str, ttl: int) -> None:
+    """Start enforcing -n for a session and drop markers older than ttl seconds.
+
+    Nothing is enforced in ephemeral mode, which writes no markers.
+    """
+    # Imported here: tempfile and friends aren't needed on the PreToolUse path
+    from ai_flags import ephemeral
+    from ai_flags.atomic import atomic_write_text
+
+    marker = _marker_path(session_id)
+    if marker is None or ephemeral.enabled():
+        return
+    try:
+        atomic_write_text(marker, pattern)
+        cutoff = time.time() - ttl
+        for entry in os.scandir(MARKER_DIR):
+            if entry.is_file() and entry.stat().st_mtime < cutoff:
+                os.unlink(entry.path)
+    except OSError:
+        pass
+
+
+def deactivate(session_id: str) -> None:
+    """Stop enforcing -n for a session.
+
+    Most prompts come without -n in sessions that aren't enforcing it: for
+    those this is a single stat, with nothing written or removed.
+    """
+    marker = _marker_path(session_id)
+    if marker is None or not marker.exists():
+        return
+    from ai_flags import ephemeral
+
+    if ephemeral.enabled():
+        return
+    try:
+        marker.unlink(missing_ok=True)
+    except OSError:
+        pass
+
+
+def check(hook_input: dict) -> dict | None:
+    """Decide on a PreToolUse payload.
+
+    Returns:
+        The deny output if the call runs a linter while -n is active, else None
+    """
+    if hook_input.get("tool_name") != "Bash":
+        return None
+    marker = _marker_path(hook_input.get("session_id"))
+    if marker is None:
+        return None
+    try:
+        pattern = marker.read_text(encoding="utf-8")
+    except OSError:
+        return None
+
+    tool_input = hook_input.get("tool_input")
+    command = tool_input.get("command") if isinstance(tool_input, dict) else None
+    if not isinstance(command, str):
+        return None
+    try:
+        if not re.search(pattern, command, re.MULTILINE):
+            return None
+    except re.error:
+        return None
+    return {
+        "hookSpecificOutput": {
+            "hookEventName": "PreToolUse",
+            "permissionDecision": "deny",
+            "permissionDecisionReason": DENY_REASON,
+        }
+    }
+
+
+def pre_tool_use() -> int:
+    """Run the PreToolUse hook on stdin. Never fails the tool call on bad input.
+
+    Returns:
+        Process exit code
+    """
+    try:
+        hook_input = json.loads(sys.stdin.read())
+    except ValueError:
+        return 0
+    if not isinstance(hook_input, dict):
+        return 0
+
+    output = check(hook_input)
+    if output is not None:
+        sys.stdout.write(json.dumps(output) + "\n")
+    return 0
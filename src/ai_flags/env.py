@@ -0,0 +1,142 @@
+"""Configuration from AI_FLAGS_* environment variables.
+
+Every config field can be set as AI_FLAGS_<FIELD>, and every field of a
+nested section as AI_FLAGS_<SECTION>_<FIELD>:
+
+    AI_FLAGS_TOKEN_BUDGET=2000
+    AI_FLAGS_COMMIT_CONTENT="Commit with a conventional message."
+    AI_FLAGS_DEDUP_ENABLED=true
+    AI_FLAGS_LINT_COMMANDS='["ruff", "mypy"]'   # Lists and mappings are JSON
+    AI_FLAGS_DISABLED=n,s                       # Shorthand for <flag>_ENABLED=false, custom flags too
+
+The variables form the top config layer. With AI_FLAGS_CONFIG=env they
+are the only source, and loading the config touches no file at all.
+``profiles`` and ``remote`` can only be set in config files.
+
+The names follow pydantic-settings' conventions (prefix, nested delimiter,
+JSON for complex values), but the variables are parsed here: importing
+pydantic-settings would cost more than the rest of a hook invocation.
+"""
+
+import json
+import os
+import types
+import typing
+from collections.abc import Mapping
+from functools import cache
+from typing import Any
+
+from pydantic import BaseModel
+
+from ai_flags.config import AiFlagsConfig
+from ai_flags.registry import FlagRegistry
+
+ENV_PREFIX = "AI_FLAGS_"
+
+# AI_FLAGS_CONFIG=env makes the environment the only config source
+SOURCE_VAR = "AI_FLAGS_CONFIG"
+ENV_ONLY = "env"
+
+# Comma-separated flag letters to disable
+DISABLED_VAR = "AI_FLAGS_DISABLED"
+
+# Fields that can only be set in config files
+FILE_ONLY_FIELDS = ("profiles", "remote")
+
+
+def _is_json(annotation: Any) -> bool:
+    """Return whether values of a field type are written as JSON."""
+    origin = typing.get_origin(annotation)
+    if origin in (typing.Union, types.UnionType):
+        return any(_is_json(arg) for arg in typing.get_args(annotation) if arg is not type(None))
+    if origin is not None:
+        return origin in (list, dict)
+    return isinstance(annotation, type) and issubclass(annotation, (BaseModel, list, dict))
+
+
+@cache
+def config_vars() -> dict[str, tuple[tuple[str, ...], bool]]:
+    """Return the config variables: name → (path in the config dict, value is JSON)."""
+    variables = {}
+    for name, field in AiFlagsConfig.model_fields.items():
+        if name in FILE_ONLY_FIELDS:
+            continue
+        variables[ENV_PREFIX + name.upper()] = ((name,), _is_json(field.annotation))
+        section = field.annotation
+        if isinstance(section, type) and issubclass(section, BaseModel):
+            for key, sub in section.model_fields.items():
+                variables[f"{ENV_PREFIX}{name.upper()}_{key.upper()}"] = (
+                    (name, key),
+                    _is_json(sub.annotation),
+                )
+    return variables
+
+
+def snapshot(environ: Mapping[str, str] | None = None) -> tuple[tuple[str, str], ...]:
+    """Return the AI_FLAGS_* variables, sorted, as a hashable cache key."""
+    environ = os.environ if environ is None else environ
+    # Iterating keys only: os.environ decodes every value items() touches
+    return tuple(sorted((k, environ[k]) for k in environ if k.startswith(ENV_PREFIX)))
+
+
+def env_only(environ: Mapping[str, str] | None = None) -> bool:
+    """Return whether AI_FLAGS_CONFIG=env makes the environment the only source."""
+    environ = os.environ if environ is None else environ
+    return environ.get(SOURCE_VAR, "").strip().lower() == ENV_ONLY
+
+
+def config_layers(
+    variables: tuple[tuple[str, str], ...],
+) -> tuple[list[tuple[str, dict[str, Any]]], list[str]]:
+    """Turn AI_FLAGS_* variables into partial config dicts, one per variable.
+
+    Whole sections (AI_FLAGS_DEDUP='{...}') come before single fields of the
+    same section, so merging the dicts in order lets the fields override the
+    section. Variables that aren't config fields are ignored, and so is
+    AI_FLAGS_DISABLED, which needs the flags of the config (see disabled_data()).
+
+    Args:
+        variables: (name, value) pairs, e.g. from snapshot()
+
+    Returns:
+        Tuple of ((name, partial config) pairs in merge order, errors of the
+        variables left out because their JSON value or a flag letter is invalid)
+    """
+    known = config_vars()
+    layers: list[tuple[str, dict[str, Any]]] = []
+    errors: list[str] = []
+    # Shorter paths first, so a section's fields override the section
+    for name, value in sorted(variables, key=lambda item: len(known.get(item[0], ((),))[0])):
+        if name not in known:
+            continue
+        path, is_json = known[name]
+        if is_json:
+            try:
+                value = json.loads(value)
+            except json.JSONDecodeError as e:
+                errors.append(f"{name} is not valid JSON: {e}")
+                continue
+        layers.append((name, {path[0]: value} if len(path) == 1 else {path[0]: {path[1]: value}}))
+
+    return layers, errors
+
+
+def disabled_data(value: str, registry: FlagRegistry) -> tuple[dict[str, Any], list[str]]:
+    """Turn AI_FLAGS_DISABLED into a partial config dict that disables its flags.
+
+    Flags are looked up in the registry of the config the variable applies
+    to, so user-defined flags can be disabled as well as the built-in ones.
+
+    Returns:
+        Tuple of (partial config, errors of the flags the registry doesn't know)
+    """
+    data: dict[str, Any] = {}
+    errors: list[str] = []
+    for flag in filter(None, (part.strip() for part in value.split(","))):
+        entry = registry.get(flag)
+        if entry is None:
+            errors.append(f"{DISABLED_VAR}: unknown flag '{flag}'")
+            continue
+        section = data if entry.builtin else data.setdefault("flags", {})
+        section[entry.name] = {"enabled": False}
+    return data, errors
@@ -0,0 +1,91 @@
+"""Ephemeral mode: run without ever writing to the filesystem.
+
+For read-only homes such as locked-down CI containers. The mode is on
+when the config directory (~/.config/ai-flags) can't be written, or can't
+be created because its closest existing parent can't be written. The
+environment overrides the detection:
+
+    AI_FLAGS_EPHEMERAL=1     # Always ephemeral
+    AI_FLAGS_EPHEMERAL=0     # Never, even on a read-only home
+    AI_FLAGS_LOG=stderr      # Handle log as JSON lines on stderr (default in ephemeral mode: off)
+
+In ephemeral mode the handle log goes to stderr or nowhere, sticky flags
+and cached fingerprints live in the process's memory, and metrics, the
+audit trail, -n enforcement markers and remote config refreshes are
+skipped. Commands that change the config (`config set`, `config edit`, ...)
+fail with EROFS instead of half-writing.
+
+The result is computed once per process: one access() call.
+"""
+
+import errno
+import os
+from pathlib import Path
+
+EPHEMERAL_ENV = "AI_FLAGS_EPHEMERAL"
+LOG_ENV = "AI_FLAGS_LOG"
+
+# Values of AI_FLAGS_LOG
+LOG_FILE = "file"
+LOG_STDERR = "stderr"
+LOG_OFF = "off"
+
+_TRUE = ("1", "true", "yes", "on")
+_FALSE = ("0", "false", "no", "off")
+
+_enabled: bool | None = None
+
+
+def _writable(directory: Path) -> bool:
+    """Return whether directory, or the closest existing parent to create it in, is writable."""
+    for candidate in (directory, *directory.parents):
+        try:
+            if not os.path.isdir(candidate):
+                if os.path.lexists(candidate):
+                    return False  # A file where a directory is needed
+                continue
+        except OSError:
+            return False
+        return os.access(candidate, os.W_OK)
+    return False
+
+
+def enabled() -> bool:
+    """Return whether ai-flags must not write anything in this process."""
+    global _enabled
+    if _enabled is None:
+        value = os.environ.get(EPHEMERAL_ENV, "").strip().lower()
+        if value in _TRUE:
+            _enabled = True
+        elif value in _FALSE:
+            _enabled = False
+        else:
+            # Imported here: config_loader imports this module
+            from ai_flags.config_loader import CONFIG_DIR
+
+            _enabled = not _writable(CONFIG_DIR)
+    return _enabled
+
+
+def log_destination() -> str:
+    """Return where the handle log goes: LOG_FILE, LOG_STDERR or LOG_OFF."""
+    value = os.environ.get(LOG_ENV, "").strip().lower()
+    if value in (LOG_STDERR, LOG_OFF):
+        return value
+    return LOG_OFF if enabled() else LOG_FILE
+
+
+def check_writable(path: Path) -> None:
+    """Refuse to write ai-flags state in ephemeral mode.
+
+    Raises:
+        OSError: EROFS, if the mode is on
+    """
+    if enabled():
+        raise OSError(errno.EROFS, f"ephemeral mode, not writing ({EPHEMERAL_ENV})", str(path))
+
+
+def clear_cache() -> None:
+    """Forget the mode, so the next enabled() checks the environment and directory again."""
+    global _enabled
+    _enabled = None
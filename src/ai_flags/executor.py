@@ -4,6 +4,15 @@ from collections.abc import Mapping
 
 from ai_flags.handlers.base import FlagHandler
 
+# Permission mode assumed when the hook input has none (and in CLI mode)
+DEFAULT_PERMISSION_MODE = "default"
+
+# Flag letter -> rendered XML block, for one permission mode
+DispatchTable = dict[str, str]
+
+# Tag of the single block that holds all flag blocks when they are merged
+MERGED_TAG = "flag_instructions"
+
 
 def wrap_in_xml_tag(tag: str, content: str) -> str:
     """Wrap content in XML tags.
@@ -18,6 +27,78 @@ def wrap_in_xml_tag(tag: str, content: str) -> str:
     return f"<{tag}>\n{content}\n</{tag}>"
 
 
+def compile_dispatch_table(
+    handlers: Mapping[str, FlagHandler],
+    permission_mode: str | None,
+    flag_modes: Mapping[str, list[str] | None] | None = None,
+    mode_content: Mapping[str, Mapping[str, str]] | None = None,
+    short: bool = False,
+) -> DispatchTable:
+    """Render the XML block of every flag that applies in a permission mode.
+
+    Flags that don't apply, or have no content, are left out of the table.
+
+    Args:
+        handlers: Dict mapping flag letter to handler instance
+        permission_mode: Permission mode to compile for (None = "default")
+        flag_modes: Per-flag modes from config (missing/None = handler's default_modes)
+        mode_content: Per-flag content variants keyed by permission mode
+        short: Render the handlers' compact variants instead (see get_short_content)
+
+    Returns:
+        Dict mapping flag letter to its rendered XML block
+    """
+    mode = permission_mode or DEFAULT_PERMISSION_MODE
+    table: DispatchTable = {}
+
+    for flag, handler in handlers.items():
+        modes = flag_modes.get(flag) if flag_modes else None
+        if modes is None:
+            modes = handler.default_modes
+        if modes is not None and mode not in modes:
+            continue
+
+        if short:
+            content = handler.get_short_content(mode)
+        else:
+            variants = mode_content.get(flag, {}) if mode_content else {}
+            content = variants.get(mode) or handler.get_content(mode)
+        if content:  # Only add non-empty content
+            table[flag] = wrap_in_xml_tag(handler.get_xml_tag(), content)
+
+    return table
+
+
+def block_body(block: str) -> str:
+    """Return the content of a rendered block without its opening and closing tags."""
+    if "\n" not in block:
+        return block
+    return block[block.index("\n") + 1 : block.rindex("\n")]
+
+
+def add_hint(block: str, hint: str) -> str:
+    """Insert a line before the closing tag of a rendered block."""
+    cut = block.rindex("\n")
+    return f"{block[:cut]}\n{hint}{block[cut:]}"
+
+
+def render_flags(flags: list[str], table: DispatchTable, merge: bool = False) -> str:
+    """Build the combined XML context from a compiled dispatch table.
+
+    Args:
+        flags: List of flag letters
+        table: Dispatch table for the current permission mode
+        merge: Put the contents of several blocks into one MERGED_TAG block
+
+    Returns:
+        Combined XML context string
+    """
+    blocks = [table[flag] for flag in flags if flag in table]
+    if merge and len(blocks) > 1:
+        return wrap_in_xml_tag(MERGED_TAG, "\n\n".join(block_body(block) for block in blocks))
+    return "\n".join(blocks)
+
+
 def execute_flag_handlers(
     flags: list[str],
     handlers: Mapping[str, FlagHandler],
@@ -25,6 +106,10 @@ def execute_flag_handlers(
 ) -> str:
     """Execute handlers for each flag and build combined XML context.
 
+    Each handler's default_modes decide whether its flag applies. Callers
+    that render many prompts should compile the table once instead (see
+    compile_dispatch_table).
+
     Args:
         flags: List of flag letters
         handlers: Dict mapping flag letter to handler instance
@@ -33,19 +118,5 @@ def execute_flag_handlers(
     Returns:
         Combined XML context string
     """
-    contexts = []
-
-    for flag in flags:
-        # Skip -s flag if not in plan mode
-        if flag == "s" and permission_mode != "plan":
-            continue
-
-        handler = handlers.get(flag)
-        if handler:
-            content = handler.get_content(permission_mode)
-            if content:  # Only add non-empty content
-                tag = handler.get_xml_tag()
-                wrapped = wrap_in_xml_tag(tag, content)
-                contexts.append(wrapped)
-
-    return "\n".join(contexts)
+    used = {flag: handlers[flag] for flag in flags if flag in handlers}
+    return render_flags(flags, compile_dispatch_table(used, permission_mode))
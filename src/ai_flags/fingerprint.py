@@ -0,0 +1,382 @@
+"""Project fingerprint: languages, test command and linters of the hook's cwd.
+
+-t and -n name the project's own tooling instead of talking about "tests"
+and "linters" in general. The fingerprint is derived from a fixed set of
+manifest files (MANIFEST_NAMES) in cwd and its git root; the tree itself is
+never walked, so huge repositories cost the same as small ones.
+
+Fingerprints are cached in memory and in the "projects" namespace of the
+shared on-disk cache (see ai_flags.cache), together with the stat
+signatures of every manifest name probed, so a warm lookup costs one stat
+per probed name plus a small read, and adding, removing or editing a
+manifest invalidates the entry.
+"""
+
+import json
+import os
+import re
+import threading
+import tomllib
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from functools import cached_property
+from pathlib import Path
+from typing import Any
+
+from ai_flags.cache import DiskCache
+from ai_flags.config_loader import StatSignature, stat_signature
+
+# Fingerprints shared by hook processes
+DISK_CACHE = DiskCache("projects")
+
+# Files that decide the fingerprint, looked up in cwd and the git root
+MANIFEST_NAMES = (
+    "justfile",
+    "Makefile",
+    "pyproject.toml",
+    "setup.cfg",
+    "tox.ini",
+    "pytest.ini",
+    "ruff.toml",
+    ".ruff.toml",
+    "mypy.ini",
+    ".flake8",
+    "pyrightconfig.json",
+    "uv.lock",
+    "poetry.lock",
+    "package.json",
+    "pnpm-lock.yaml",
+    "yarn.lock",
+    "bun.lockb",
+    "Cargo.toml",
+    "go.mod",
+)
+
+# Task runner recipes/targets that run tests, and those that lint or format
+TEST_TARGETS = ("test", "tests")
+LINT_TARGETS = ("lint", "check", "fmt", "format", "typecheck")
+
+# Python tools recognized in [tool.*] tables and dependencies -> commands
+PYTHON_LINTERS = {
+    "ruff": ("ruff check", "ruff format"),
+    "black": ("black",),
+    "isort": ("isort",),
+    "flake8": ("flake8",),
+    "pylint": ("pylint",),
+    "mypy": ("mypy",),
+    "pyright": ("pyright",),
+}
+
+# Standalone config files of Python tools
+PYTHON_CONFIG_FILES = {
+    "ruff.toml": "ruff",
+    ".ruff.toml": "ruff",
+    "mypy.ini": "mypy",
+    ".flake8": "flake8",
+    "pyrightconfig.json": "pyright",
+    "pytest.ini": "pytest",
+}
+
+# JavaScript dev dependencies -> commands, used when package.json has no lint script
+JS_LINTERS = {
+    "eslint": "eslint",
+    "prettier": "prettier",
+    "@biomejs/biome": "biome",
+    "typescript": "tsc",
+}
+
+# Maximum number of project roots kept in memory
+MEMORY_CACHE_SIZE = 64
+
+# "name params...:" (or "@name" for quiet just recipes) at the start of a line, but not "name := value"
+_TARGET_RE = re.compile(r"^@?([A-Za-z_][\w-]*)[^\n:=]*:(?!=)", re.MULTILINE)
+_SECTION_RE = re.compile(r"^\[([\w:.-]+)\]", re.MULTILINE)
+_REQUIREMENT_NAME_RE = re.compile(r"^\s*([A-Za-z0-9][A-Za-z0-9._-]*)")
+
+
+@dataclass(frozen=True)
+class Fingerprint:
+    """What a project is written in and how it is tested and linted."""
+
+    languages: tuple[str, ...] = ()
+    test_command: str | None = None
+    lint_commands: tuple[str, ...] = ()  # Linters, formatters and type checkers
+
+    def to_json(self) -> dict[str, Any]:
+        """Return a JSON-serializable dict."""
+        return asdict(self)
+
+    @classmethod
+    def from_json(cls, data: dict[str, Any]) -> "Fingerprint":
+        """Rebuild a fingerprint saved with to_json()."""
+        return cls(
+            languages=tuple(data["languages"]),
+            test_command=data["test_command"],
+            lint_commands=tuple(data["lint_commands"]),
+        )
+
+
+class Project:
+    """The hook's working directory, fingerprinted on first use."""
+
+    def __init__(self, cwd: str, fingerprint: Fingerprint | None = None):
+        """Initialize for cwd, optionally with a known fingerprint."""
+        self.cwd = cwd
+        if fingerprint is not None:
+            self.fingerprint = fingerprint
+
+    @cached_property
+    def fingerprint(self) -> Fingerprint:
+        """Fingerprint of the project (see get_fingerprint)."""
+        return get_fingerprint(self.cwd)
+
+
+@dataclass(frozen=True)
+class _Entry:
+    probes: tuple[tuple[str, StatSignature], ...]
+    fingerprint: Fingerprint
+
+
+_memory: OrderedDict[str, _Entry] = OrderedDict()
+_memory_lock = threading.Lock()
+
+
+def find_git_root(cwd: str) -> Path | None:
+    """Return the closest directory at or above cwd that contains .git."""
+    path = Path(os.path.abspath(cwd))
+    for directory in (path, *path.parents):
+        if os.path.lexists(directory / ".git"):
+            return directory
+    return None
+
+
+def _targets(path: Path) -> set[str]:
+    """Return the recipe/target names defined in a justfile or Makefile."""
+    return set(_TARGET_RE.findall(path.read_text(encoding="utf-8", errors="replace")))
+
+
+def _mapping(value: Any) -> dict[str, Any]:
+    """Return value if it is a dict, else an empty one (manifests may be malformed)."""
+    return value if isinstance(value, dict) else {}
+
+
+def _requirement_names(requirements: Any) -> set[str]:
+    """Return the lowercase package names of a list of PEP 508 requirements."""
+    names = set()
+    if isinstance(requirements, list):
+        for requirement in requirements:
+            if isinstance(requirement, str) and (match := _REQUIREMENT_NAME_RE.match(requirement)):
+                names.add(match.group(1).lower())
+    return names
+
+
+def _python_tools(path: Path) -> set[str]:
+    """Return the tools a pyproject.toml configures or depends on."""
+    with open(path, "rb") as f:
+        data = tomllib.load(f)
+    tool = _mapping(data.get("tool"))
+    project = _mapping(data.get("project"))
+    names = {name.lower() for name in tool}
+    names |= _requirement_names(project.get("dependencies"))
+    for group in (
+        *_mapping(project.get("optional-dependencies")).values(),
+        *_mapping(data.get("dependency-groups")).values(),
+    ):
+        names |= _requirement_names(group)
+    names |= _requirement_names(_mapping(tool.get("uv")).get("dev-dependencies"))
+    poetry = _mapping(tool.get("poetry"))
+    tables = [poetry.get("dependencies"), poetry.get("dev-dependencies")]
+    tables += [
+        _mapping(group).get("dependencies") for group in _mapping(poetry.get("group")).values()
+    ]
+    for table in tables:
+        names |= {name.lower() for name in _mapping(table)}
+    return names
+
+
+def _scan_directory(
+    directory: Path, directories: list[Path], found: set[str]
+) -> tuple[list[str], list[str], list[str]]:
+    """Return the languages, test commands and lint commands of one directory's manifests.
+
+    Lockfiles count in any of the directories, for workspaces locked at the root.
+    """
+    languages: list[str] = []
+    test_commands: list[str] = []  # Most specific first
+    lint_commands: list[str] = []
+
+    def existing(name: str) -> list[Path]:
+        return [directory / name] if str(directory / name) in found else []
+
+    def locked(name: str) -> bool:
+        return any(str(d / name) in found for d in directories)
+
+    for name, runner in (("justfile", "just"), ("Makefile", "make")):
+        for path in existing(name):
+            try:
+                targets = _targets(path)
+            except OSError:
+                continue
+            test_commands += [f"{runner} {t}" for t in TEST_TARGETS if t in targets]
+            lint_commands += [f"{runner} {t}" for t in LINT_TARGETS if t in targets]
+
+    manifests = existing("pyproject.toml") + existing("setup.cfg") + existing("tox.ini")
+    tools = {tool for name, tool in PYTHON_CONFIG_FILES.items() if existing(name)}
+    if manifests or tools:
+        languages.append("python")
+        prefix = ""
+        if locked("uv.lock"):
+            prefix = "uv run "
+        elif locked("poetry.lock"):
+            prefix = "poetry run "
+        for path in manifests:
+            try:
+                if path.suffix == ".toml":
+                    tools |= _python_tools(path)
+                else:
+                    # setup.cfg/tox.ini sections: [flake8], [mypy], [tool:pytest], [pytest], ...
+                    text = path.read_text(encoding="utf-8", errors="replace")
+                    tools |= {s.lower().removeprefix("tool:") for s in _SECTION_RE.findall(text)}
+            except (OSError, ValueError):
+                continue
+        if "pytest" in tools:
+            test_commands.append(f"{prefix}pytest")
+        elif existing("tox.ini"):
+            test_commands.append("tox")
+        for tool, commands in PYTHON_LINTERS.items():
+            if tool in tools:
+                lint_commands += [f"{prefix}{command}" for command in commands]
+
+    for path in existing("package.json"):
+        try:
+            package = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            continue
+        if not isinstance(package, dict):
+            continue
+        dependencies = {
+            **_mapping(package.get("dependencies")),
+            **_mapping(package.get("devDependencies")),
+        }
+        languages.append("typescript" if "typescript" in dependencies else "javascript")
+        manager = "npm"
+        for lock, name in (("pnpm-lock.yaml", "pnpm"), ("yarn.lock", "yarn"), ("bun.lockb", "bun")):
+            if locked(lock):
+                manager = name
+                break
+        scripts = _mapping(package.get("scripts"))
+        # npm init's placeholder script only fails
+        if "test" in scripts and "no test specified" not in str(scripts["test"]):
+            test_commands.append(f"{manager} test")
+        scripted = [f"{manager} run {s}" for s in ("lint", "format", "typecheck") if s in scripts]
+        lint_commands += scripted
+        if not scripted:
+            lint_commands += [cmd for dep, cmd in JS_LINTERS.items() if dep in dependencies]
+
+    if existing("Cargo.toml"):
+        languages.append("rust")
+        test_commands.append("cargo test")
+        lint_commands += ["cargo clippy", "cargo fmt"]
+
+    if existing("go.mod"):
+        languages.append("go")
+        test_commands.append("go test ./...")
+        lint_commands += ["go vet", "gofmt"]
+
+    return languages, test_commands, lint_commands
+
+
+def _scan(directories: list[Path], found: set[str]) -> Fingerprint:
+    """Derive a fingerprint from the manifests present (found holds their paths).
+
+    The first directory's findings come first, so cwd wins over the git root.
+    """
+    languages: list[str] = []
+    test_commands: list[str] = []
+    lint_commands: list[str] = []
+    for directory in directories:
+        found_languages, found_tests, found_linters = _scan_directory(directory, directories, found)
+        languages += found_languages
+        test_commands += found_tests
+        lint_commands += found_linters
+
+    return Fingerprint(
+        languages=tuple(dict.fromkeys(languages)),
+        test_command=test_commands[0] if test_commands else None,
+        lint_commands=tuple(dict.fromkeys(lint_commands)),
+    )
+
+
+def _probe_directories(cwd: str) -> list[Path]:
+    """Return cwd and its git root (if different), cwd first."""
+    start = Path(os.path.abspath(cwd))
+    root = find_git_root(cwd)
+    return [start] if root is None or root == start else [start, root]
+
+
+def _is_current(entry: _Entry) -> bool:
+    # Probes stay strings; building Path objects would double the cost of a hit
+    return all(stat_signature(path) == sig for path, sig in entry.probes)
+
+
+def _read_disk(disk_cache: DiskCache, key: str) -> _Entry | None:
+    value = disk_cache.get(key)
+    if value is None:
+        return None
+    try:
+        data = json.loads(value)
+        return _Entry(
+            probes=tuple(
+                (probe, tuple(sig) if sig is not None else None) for probe, sig in data["probes"]
+            ),
+            fingerprint=Fingerprint.from_json(data["fingerprint"]),
+        )
+    except (ValueError, KeyError, TypeError):
+        return None
+
+
+def get_fingerprint(cwd: str, disk_cache: DiskCache | None = None) -> Fingerprint:
+    """Return the fingerprint of the project at cwd, from cache when possible.
+
+    Args:
+        cwd: Working directory of the hook
+        disk_cache: On-disk cache (defaults to DISK_CACHE)
+    """
+    directories = _probe_directories(cwd)
+    key = os.pathsep.join(str(d) for d in directories)
+
+    with _memory_lock:
+        entry = _memory.get(key)
+    if entry is not None and _is_current(entry):
+        return entry.fingerprint
+
+    disk_cache = disk_cache if disk_cache is not None else DISK_CACHE
+    entry = _read_disk(disk_cache, key)
+    if entry is None or not _is_current(entry):
+        # Stat before reading, so a concurrent change invalidates the entry next time
+        probes = tuple(
+            (str(d / name), stat_signature(d / name))
+            for d in directories
+            for name in MANIFEST_NAMES
+        )
+        found = {path for path, sig in probes if sig is not None}
+        entry = _Entry(probes=probes, fingerprint=_scan(directories, found))
+        disk_cache.set(
+            key,
+            json.dumps({"probes": entry.probes, "fingerprint": entry.fingerprint.to_json()}).encode(
+                "utf-8"
+            ),
+        )
+
+    with _memory_lock:
+        _memory[key] = entry
+        _memory.move_to_end(key)
+        while len(_memory) > MEMORY_CACHE_SIZE:
+            _memory.popitem(last=False)
+    return entry.fingerprint
+
+
+def clear_memory_cache() -> None:
+    """Forget the fingerprints cached in memory."""
+    with _memory_lock:
+        _memory.clear()
@@ -6,6 +6,7 @@ from ai_flags.handlers.commit import CommitHandler
 from ai_flags.handlers.test import CoverageHandler
 from ai_flags.handlers.debug import DebugHandler
 from ai_flags.handlers.no_lint import NoLintHandler
+from ai_flags.handlers.custom import CustomHandler
 
 __all__ = [
     "FlagHandler",
@@ -14,4 +15,5 @@ __all__ = [
     "CoverageHandler",
     "DebugHandler",
     "NoLintHandler",
+    "CustomHandler",
 ]
@@ -2,10 +2,18 @@
 
 from abc import ABC, abstractmethod
 
+from ai_flags.fingerprint import Project
+
 
 class FlagHandler(ABC):
     """Base class for all flag handlers."""
 
+    # Permission modes the flag applies to unless its config says otherwise (None = all)
+    default_modes: tuple[str, ...] | None = None
+
+    # Whether get_project_hint() may return anything (saves fingerprinting otherwise)
+    uses_project: bool = False
+
     @abstractmethod
     def get_content(self, permission_mode: str | None = None) -> str:
         """Get the context content for this flag.
@@ -18,6 +26,25 @@ class FlagHandler(ABC):
         """
         pass
 
+    def get_short_content(self, permission_mode: str | None = None) -> str:
+        """Get a compact variant of the content, used under a tight token budget.
+
+        Returns:
+            The compact content, or "" if the handler has none
+        """
+        return ""
+
+    def get_project_hint(self, project: Project) -> str:
+        """Get text about the hook's project, appended to the content.
+
+        Args:
+            project: The hook's working directory and its fingerprint
+
+        Returns:
+            The hint, or "" if the handler has none for this project
+        """
+        return ""
+
     @abstractmethod
     def get_xml_tag(self) -> str:
         """Get the XML tag name for this flag's content.
@@ -7,13 +7,17 @@ DEFAULT_CONTENT = (
     "to execute the '/commit' slash command to create a git commit."
 )
 
+# Compact variant used when the context would exceed the token budget
+SHORT_CONTENT = "When done, run the '/commit' slash command to create a git commit."
+
 
 class CommitHandler(FlagHandler):
     """Handler for -c flag: Instruct Claude to execute /commit."""
 
-    def __init__(self, content: str | None = None):
-        """Initialize with optional custom content."""
+    def __init__(self, content: str | None = None, short_content: str | None = None):
+        """Initialize with optional custom content and compact variant."""
         self._custom_content = content
+        self._custom_short_content = short_content
 
     @property
     def flag_letter(self) -> str:
@@ -25,3 +29,7 @@ class CommitHandler(FlagHandler):
     def get_content(self, permission_mode: str | None = None) -> str:
         """Return commit instructions."""
         return self._custom_content if self._custom_content else DEFAULT_CONTENT
+
+    def get_short_content(self, permission_mode: str | None = None) -> str:
+        """Return the compact variant."""
+        return self._custom_short_content if self._custom_short_content else SHORT_CONTENT
@@ -0,0 +1,29 @@
+"""Handler for user-defined flags (``flags`` in config)."""
+
+from ai_flags.handlers.base import FlagHandler
+
+
+class CustomHandler(FlagHandler):
+    """Handler for a flag defined in config: inject its configured content."""
+
+    def __init__(self, flag: str, tag: str, content: str, short_content: str | None = None):
+        """Initialize with the flag, its XML tag, content and optional compact variant."""
+        self._flag = flag
+        self._tag = tag
+        self._content = content
+        self._short_content = short_content
+
+    @property
+    def flag_letter(self) -> str:
+        return self._flag
+
+    def get_xml_tag(self) -> str:
+        return self._tag
+
+    def get_content(self, permission_mode: str | None = None) -> str:
+        """Return the configured content."""
+        return self._content
+
+    def get_short_content(self, permission_mode: str | None = None) -> str:
+        """Return the compact variant, if configured."""
+        return self._short_content or ""
@@ -1,5 +1,8 @@
 """Handler for -d (debug) flag."""
 
+from ai_flags.capture import capture_failures
+from ai_flags.config import DebugCaptureConfig
+from ai_flags.fingerprint import Project
 from ai_flags.handlers.base import FlagHandler
 
 DEFAULT_CONTENT = (
@@ -12,13 +15,24 @@ DEFAULT_CONTENT = (
     "5. Verify solution works"
 )
 
+# Compact variant used when the context would exceed the token budget
+SHORT_CONTENT = "Use the debugger subagent (Task tool) to find the root cause before fixing."
+
 
 class DebugHandler(FlagHandler):
     """Handler for -d flag: Invoke debugger agent for root cause analysis."""
 
-    def __init__(self, content: str | None = None):
-        """Initialize with optional custom content."""
+    def __init__(
+        self,
+        content: str | None = None,
+        short_content: str | None = None,
+        capture: DebugCaptureConfig | None = None,
+    ):
+        """Initialize with optional custom content, compact variant and failure capture."""
         self._custom_content = content
+        self._custom_short_content = short_content
+        self._capture = capture
+        self.uses_project = capture is not None and bool(capture.sources)
 
     @property
     def flag_letter(self) -> str:
@@ -30,3 +44,14 @@ class DebugHandler(FlagHandler):
     def get_content(self, permission_mode: str | None = None) -> str:
         """Return debug instructions."""
         return self._custom_content if self._custom_content else DEFAULT_CONTENT
+
+    def get_short_content(self, permission_mode: str | None = None) -> str:
+        """Return the compact variant."""
+        return self._custom_short_content if self._custom_short_content else SHORT_CONTENT
+
+    def get_project_hint(self, project: Project) -> str:
+        """Return the recent failure output found below the project's cwd."""
+        if self._capture is None or not self._capture.sources:
+            return ""
+        failures = capture_failures(project.cwd, self._capture)
+        return f"Recent failure output in this project:\n{failures}" if failures else ""
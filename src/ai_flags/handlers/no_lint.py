@@ -1,5 +1,6 @@
 """Handler for -n (no-lint) flag."""
 
+from ai_flags.fingerprint import Project
 from ai_flags.handlers.base import FlagHandler
 
 DEFAULT_CONTENT = (
@@ -9,13 +10,19 @@ DEFAULT_CONTENT = (
     "Prioritize implementation speed over correctness."
 )
 
+# Compact variant used when the context would exceed the token budget
+SHORT_CONTENT = "Do not run linters, type checkers or formatters for this task."
+
 
 class NoLintHandler(FlagHandler):
     """Handler for -n flag: Disable linting and type-checking."""
 
-    def __init__(self, content: str | None = None):
-        """Initialize with optional custom content."""
+    uses_project = True
+
+    def __init__(self, content: str | None = None, short_content: str | None = None):
+        """Initialize with optional custom content and compact variant."""
         self._custom_content = content
+        self._custom_short_content = short_content
 
     @property
     def flag_letter(self) -> str:
@@ -27,3 +34,14 @@ class NoLintHandler(FlagHandler):
     def get_content(self, permission_mode: str | None = None) -> str:
         """Return no-lint instructions."""
         return self._custom_content if self._custom_content else DEFAULT_CONTENT
+
+    def get_short_content(self, permission_mode: str | None = None) -> str:
+        """Return the compact variant."""
+        return self._custom_short_content if self._custom_short_content else SHORT_CONTENT
+
+    def get_project_hint(self, project: Project) -> str:
+        """Name the project's linters and formatters."""
+        if not project.fingerprint.lint_commands:
+            return ""
+        commands = ", ".join(f"`{command}`" for command in project.fingerprint.lint_commands)
+        return f"This project's checks to skip: {commands}."
@@ -10,13 +10,23 @@ DEFAULT_CONTENT = """Once you have an implementation plan, split the work strate
 
 Orchestrate, don't implement. Delegate all implementation details to subagents. Review their work at the end."""
 
+# Compact variant used when the context would exceed the token budget
+SHORT_CONTENT = (
+    "Delegate implementation to subagents (parallel for independent tasks, "
+    "one for sequential work); orchestrate and review."
+)
+
 
 class SubagentHandler(FlagHandler):
     """Handler for -s flag: Append subagent orchestration instructions."""
 
-    def __init__(self, content: str | None = None):
-        """Initialize with optional custom content."""
+    # Delegation only makes sense while Claude is planning
+    default_modes = ("plan",)
+
+    def __init__(self, content: str | None = None, short_content: str | None = None):
+        """Initialize with optional custom content and compact variant."""
         self._custom_content = content
+        self._custom_short_content = short_content
 
     @property
     def flag_letter(self) -> str:
@@ -26,12 +36,9 @@ class SubagentHandler(FlagHandler):
         return "subagent_delegation"
 
     def get_content(self, permission_mode: str | None = None) -> str:
-        """Return subagent delegation instructions.
-
-        Note: Only active when permission_mode == "plan"
-        """
-        # Skip if not in plan mode
-        if permission_mode != "plan":
-            return ""
-
+        """Return subagent delegation instructions."""
         return self._custom_content if self._custom_content else DEFAULT_CONTENT
+
+    def get_short_content(self, permission_mode: str | None = None) -> str:
+        """Return the compact variant."""
+        return self._custom_short_content if self._custom_short_content else SHORT_CONTENT
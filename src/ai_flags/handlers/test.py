@@ -1,5 +1,6 @@
 """Handler for -t (test) flag."""
 
+from ai_flags.fingerprint import Project
 from ai_flags.handlers.base import FlagHandler
 
 DEFAULT_CONTENT = (
@@ -8,13 +9,19 @@ DEFAULT_CONTENT = (
     "and edge case handling. Verify all tests pass before completing."
 )
 
+# Compact variant used when the context would exceed the token budget
+SHORT_CONTENT = "Add unit, integration and edge case tests, and make sure they all pass."
+
 
 class CoverageHandler(FlagHandler):
     """Handler for -t flag: Add testing emphasis context."""
 
-    def __init__(self, content: str | None = None):
-        """Initialize with optional custom content."""
+    uses_project = True
+
+    def __init__(self, content: str | None = None, short_content: str | None = None):
+        """Initialize with optional custom content and compact variant."""
         self._custom_content = content
+        self._custom_short_content = short_content
 
     @property
     def flag_letter(self) -> str:
@@ -26,3 +33,13 @@ class CoverageHandler(FlagHandler):
     def get_content(self, permission_mode: str | None = None) -> str:
         """Return testing instructions."""
         return self._custom_content if self._custom_content else DEFAULT_CONTENT
+
+    def get_short_content(self, permission_mode: str | None = None) -> str:
+        """Return the compact variant."""
+        return self._custom_short_content if self._custom_short_content else SHORT_CONTENT
+
+    def get_project_hint(self, project: Project) -> str:
+        """Name the project's test command."""
+        if project.fingerprint.test_command is None:
+            return ""
+        return f"Run this project's tests with `{project.fingerprint.test_command}`."
@@ -0,0 +1,159 @@
+"""Claude Code hook registration."""
+
+import json
+from pathlib import Path
+from typing import Any
+
+from ai_flags.atomic import atomic_write_text
+
+CLAUDE_DIR = Path.home() / ".claude"
+SETTINGS_PATH = CLAUDE_DIR / "settings.json"
+LEGACY_WRAPPER_PATH = CLAUDE_DIR / "hooks" / "UserPromptSubmit" / "detect_flags.py"
+
+HOOK_EVENT = "UserPromptSubmit"
+HOOK_COMMAND = "ai-flags handle"
+DEFAULT_TIMEOUT = 10  # Seconds; Claude Code's own default is 60
+
+# Enforcement of -n (see ai_flags.enforce)
+PRE_TOOL_USE_EVENT = "PreToolUse"
+PRE_TOOL_USE_COMMAND = "ai-flags handle --pre-tool-use"
+PRE_TOOL_USE_MATCHER = "Bash"
+
+
+def load_settings(path: Path) -> dict[str, Any]:
+    """Load a Claude Code settings file.
+
+    Returns:
+        Parsed settings, or an empty dict if the file doesn't exist or is empty
+
+    Raises:
+        ValueError: If the file is not valid JSON
+        TypeError: If the file is not a JSON object or its "hooks" section is malformed
+    """
+    if not path.exists():
+        return {}
+
+    text = path.read_text(encoding="utf-8")
+    if not text.strip():
+        return {}
+
+    data = json.loads(text)
+    if not isinstance(data, dict):
+        raise TypeError(f"{path} does not contain a JSON object")
+    _check_hooks_shape(data)
+    return data
+
+
+def _check_hooks_shape(settings: dict[str, Any]) -> None:
+    """Make sure the "hooks" section has the structure the helpers below rely on."""
+    if "hooks" not in settings:
+        return
+
+    hooks = settings["hooks"]
+    if not isinstance(hooks, dict):
+        raise TypeError('"hooks" must be an object')
+
+    for event, groups in hooks.items():
+        if not isinstance(groups, list) or not all(isinstance(g, dict) for g in groups):
+            raise TypeError(f'"hooks.{event}" must be a list of objects')
+        for group in groups:
+            entries = group.get("hooks", [])
+            if not isinstance(entries, list) or not all(isinstance(h, dict) for h in entries):
+                raise TypeError(f'"hooks.{event}[].hooks" must be a list of objects')
+
+
+def save_settings(path: Path, settings: dict[str, Any]) -> None:
+    """Write settings atomically so Claude Code never sees a partial file."""
+    atomic_write_text(path, json.dumps(settings, indent=2) + "\n")
+
+
+def _event_groups(settings: dict[str, Any], event: str) -> list[dict[str, Any]]:
+    """Return the (mutable) list of matcher groups registered for a hook event."""
+    hooks = settings.setdefault("hooks", {})
+    return hooks.setdefault(event, [])
+
+
+def _is_ai_flags_command(command: str) -> bool:
+    """Check whether a hook command runs `ai-flags handle` directly (possibly by absolute path)."""
+    parts = command.split()
+    return len(parts) >= 2 and Path(parts[0]).name == "ai-flags" and parts[1] == "handle"
+
+
+def _is_legacy_command(command: str) -> bool:
+    """Check whether a hook command runs the legacy Python wrapper."""
+    return LEGACY_WRAPPER_PATH.name in command
+
+
+def merge_hook(
+    settings: dict[str, Any],
+    command: str = HOOK_COMMAND,
+    timeout: int = DEFAULT_TIMEOUT,
+    event: str = HOOK_EVENT,
+    matcher: str | None = None,
+) -> bool:
+    """Register a direct command hook.
+
+    An existing ai-flags entry only gets its timeout updated. Its command
+    (e.g. a deliberate absolute path) and any other keys are kept.
+
+    Args:
+        settings: Settings dict (modified in place)
+        command: Hook command line for a new entry
+        timeout: Hook timeout in seconds
+        event: Hook event name
+        matcher: Tool name pattern of a new entry (tool events only)
+
+    Returns:
+        True if the settings were changed
+    """
+    groups = _event_groups(settings, event)
+
+    for group in groups:
+        for hook in group.get("hooks", []):
+            if hook.get("type") == "command" and _is_ai_flags_command(hook.get("command", "")):
+                if hook.get("timeout") == timeout:
+                    return False
+                hook["timeout"] = timeout
+                return True
+
+    group: dict[str, Any] = {} if matcher is None else {"matcher": matcher}
+    group["hooks"] = [{"type": "command", "command": command, "timeout": timeout}]
+    groups.append(group)
+    return True
+
+
+def find_legacy_hooks(settings: dict[str, Any], event: str = HOOK_EVENT) -> list[str]:
+    """Return the commands of registered hooks that run the legacy wrapper."""
+    groups = settings.get("hooks", {}).get(event, [])
+    return [
+        hook.get("command", "")
+        for group in groups
+        for hook in group.get("hooks", [])
+        if _is_legacy_command(hook.get("command", ""))
+    ]
+
+
+def remove_legacy_hooks(settings: dict[str, Any], event: str = HOOK_EVENT) -> int:
+    """Remove hooks that run the legacy wrapper, dropping groups left empty.
+
+    Returns:
+        Number of hook entries removed
+    """
+    groups = settings.get("hooks", {}).get(event)
+    if not groups:
+        return 0
+
+    removed = 0
+    kept_groups = []
+    for group in groups:
+        hooks = group.get("hooks", [])
+        kept = [hook for hook in hooks if not _is_legacy_command(hook.get("command", ""))]
+        removed += len(hooks) - len(kept)
+        if kept:
+            group["hooks"] = kept
+            kept_groups.append(group)
+        elif not hooks:
+            kept_groups.append(group)
+
+    settings["hooks"][event] = kept_groups
+    return removed
@@ -1,41 +1,62 @@
 """Logging utilities for ai-flags."""
 
+import json
 import logging
+import sys
 from logging.handlers import TimedRotatingFileHandler
 from pathlib import Path
 
+from ai_flags import ephemeral
+
 LOG_DIR = Path.home() / ".config" / "ai-flags" / "logs"
 
+_DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+
+class JsonFormatter(logging.Formatter):
+    """Format records as one JSON object per line: time plus the record's fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        data = {"time": self.formatTime(record, _DATE_FORMAT)}
+        data.update(getattr(record, "fields", None) or {"message": record.getMessage()})
+        return json.dumps(data, ensure_ascii=False)
+
 
 def get_logger() -> logging.Logger:
-    """Get or create the ai-flags logger with daily rotation."""
+    """Get or create the ai-flags logger with daily rotation.
+
+    The destination is chosen once (see ephemeral.log_destination). If the
+    log is off or its directory can't be created, a NullHandler is
+    installed, so later calls neither retry nor format messages.
+    """
     logger = logging.getLogger("ai-flags")
     if logger.handlers:
         return logger  # Already configured
 
-    try:
-        LOG_DIR.mkdir(parents=True, exist_ok=True)
-
-        handler = TimedRotatingFileHandler(
-            LOG_DIR / "handle.log",
-            when="midnight",
-            backupCount=30,  # Keep 30 days
-            encoding="utf-8",
-        )
-        handler.suffix = "%Y-%m-%d"
-        handler.namer = lambda name: name.replace(".log.", "-") + ".log"
-
-        formatter = logging.Formatter(
-            "%(asctime)s | %(message)s",
-            datefmt="%Y-%m-%d %H:%M:%S",
-        )
-        handler.setFormatter(formatter)
-        logger.addHandler(handler)
-        logger.setLevel(logging.INFO)
-    except OSError:
-        # Silently fail if we can't create logs - don't break the tool
-        pass
+    handler: logging.Handler = logging.NullHandler()
+    destination = ephemeral.log_destination()
+    if destination == ephemeral.LOG_STDERR:
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(JsonFormatter())
+    elif destination == ephemeral.LOG_FILE:
+        try:
+            LOG_DIR.mkdir(parents=True, exist_ok=True)
 
+            handler = TimedRotatingFileHandler(
+                LOG_DIR / "handle.log",
+                when="midnight",
+                backupCount=30,  # Keep 30 days
+                encoding="utf-8",
+            )
+            handler.suffix = "%Y-%m-%d"
+            handler.namer = lambda name: name.replace(".log.", "-") + ".log"
+            handler.setFormatter(logging.Formatter("%(asctime)s | %(message)s", _DATE_FORMAT))
+        except OSError:
+            # Silently fail if we can't create logs - don't break the tool
+            pass
+
+    logger.addHandler(handler)
+    logger.setLevel(logging.INFO)
     return logger
 
 
@@ -45,10 +66,15 @@ def log_handle(
     cleaned_prompt: str,
     success: bool,
     error: str | None = None,
+    tokens: int | None = None,
 ) -> None:
-    """Log a handle command invocation."""
+    """Log a handle command invocation.
+
+    Args:
+        tokens: Estimated tokens of the injected context, if any was built
+    """
     logger = get_logger()
-    if not logger.handlers:
+    if isinstance(logger.handlers[0], logging.NullHandler):
         return  # Logging not available
 
     flags_str = ",".join(flags) if flags else "none"
@@ -57,4 +83,15 @@ def log_handle(
 
     status = "OK" if success else f"ERROR: {error}"
 
-    logger.info(f"mode={mode} | flags=[{flags_str}] | prompt={prompt_preview!r} | {status}")
+    message = f"mode={mode} | flags=[{flags_str}] | prompt={prompt_preview!r} | {status}"
+    if tokens is not None:
+        message += f" | tokens={tokens}"
+    fields = {
+        "mode": mode,
+        "flags": flags,
+        "prompt": prompt_preview,
+        "success": success,
+        "error": error,
+        "tokens": tokens,
+    }
+    logger.info(message, extra={"fields": fields})
@@ -0,0 +1,64 @@
+"""Composite flags (macros) defined in config.
+
+A macro is a flag letter that stands for a list of other flags, e.g.
+``macros: {x: [c, t, n]}``. Members may be other macros. Expansions are
+resolved once, when the config is loaded, so prompt handling only does a
+dict lookup per flag.
+"""
+
+from collections.abc import Container, Mapping
+
+
+def resolve_macros(
+    macros: Mapping[str, list[str]], known_flags: Container[str]
+) -> dict[str, tuple[str, ...]]:
+    """Fully expand every macro into plain flags.
+
+    Args:
+        macros: Macro -> member flags (plain flags or other macros)
+        known_flags: Plain flags that members may refer to
+
+    Returns:
+        Macro -> expanded flags in order, without duplicates
+
+    Raises:
+        ValueError: If a macro refers to an unknown flag or (indirectly) to itself
+    """
+    resolved: dict[str, tuple[str, ...]] = {}
+
+    def expand(name: str, path: tuple[str, ...]) -> tuple[str, ...]:
+        if name in resolved:
+            return resolved[name]
+        if name in path:
+            cycle = " -> ".join((*path[path.index(name) :], name))
+            raise ValueError(f"macro cycle: {cycle}")
+
+        flags: list[str] = []
+        for member in macros[name]:
+            if member in macros:
+                members = expand(member, (*path, name))
+            elif member in known_flags:
+                members = (member,)
+            else:
+                raise ValueError(f"macro '{name}' refers to unknown flag '{member}'")
+            flags.extend(flag for flag in members if flag not in flags)
+
+        resolved[name] = tuple(flags)
+        return resolved[name]
+
+    for name in macros:
+        expand(name, ())
+    return resolved
+
+
+def expand_flags(flags: list[str], expansions: Mapping[str, tuple[str, ...]]) -> list[str]:
+    """Replace macros in a parsed flag list with their members.
+
+    Flags that occur more than once after expansion are kept only the first time.
+    """
+    expanded: list[str] = []
+    for flag in flags:
+        for member in expansions.get(flag, (flag,)):
+            if member not in expanded:
+                expanded.append(member)
+    return expanded
@@ -0,0 +1,304 @@
+"""Cross-process usage counters and latency histograms.
+
+Every `ai-flags` process maps the same small fixed-layout file under the
+config dir and adds to its counters in place, so short-lived hook processes
+aggregate without a daemon. `ai-flags metrics export` renders the counters in
+the OpenMetrics text format for node_exporter's textfile collector.
+
+Recording is opt-in (``metrics: true`` in config). Python has no atomic
+fetch-add on mapped memory, so the increments of one invocation are applied
+together under an exclusive flock of the metrics file.
+"""
+
+import mmap
+import os
+import string
+import struct
+from collections.abc import Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from ai_flags import ephemeral
+from ai_flags.config_loader import CONFIG_DIR
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - Windows
+    fcntl = None
+
+METRICS_PATH = CONFIG_DIR / "metrics.bin"
+
+MODES = ("hook", "cli", "api")
+FLAG_LETTERS = string.ascii_lowercase
+PHASES = ("config", "parse", "validate", "execute", "output", "total")
+# Namespaces of ai_flags.cache whose lookups and writes are counted
+CACHE_NAMESPACES = ("projects",)
+CACHE_COUNTS = ("hits", "misses", "writes")
+
+# Histogram upper bounds in seconds; an implicit +Inf bucket follows
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+# File layout: 8-byte header, then one little-endian u64 per slot
+_HEADER = struct.Struct("<4sI")
+_MAGIC = b"AIFM"
+_LAYOUT_VERSION = 2
+_U64 = struct.Struct("<Q")
+_U64_MASK = (1 << 64) - 1
+
+
+def _build_layout() -> dict[str, int]:
+    names = [f"invocations:{mode}" for mode in MODES]
+    names += [f"flag:{letter}" for letter in FLAG_LETTERS]
+    names += ["validation_failures", "errors"]
+    for phase in PHASES:
+        names += [f"latency:{phase}:bucket:{i}" for i in range(len(LATENCY_BUCKETS) + 1)]
+        names += [f"latency:{phase}:sum_ns", f"latency:{phase}:count"]
+    names += [f"cache:{ns}:{count}" for ns in CACHE_NAMESPACES for count in CACHE_COUNTS]
+    return {name: index for index, name in enumerate(names)}
+
+
+_SLOTS = _build_layout()
+FILE_SIZE = _HEADER.size + len(_SLOTS) * _U64.size
+
+
+@dataclass(frozen=True)
+class Sample:
+    """Everything recorded about one invocation."""
+
+    mode: str
+    flags: list[str] = field(default_factory=list)
+    validation_failed: bool = False
+    error: bool = False
+    timings_ns: dict[str, int] = field(default_factory=dict)
+    # Cache namespace -> (hits, misses, writes) since the last sample
+    cache: dict[str, tuple[int, int, int]] = field(default_factory=dict)
+
+
+@dataclass(frozen=True)
+class Histogram:
+    """A latency histogram in Prometheus form."""
+
+    buckets: tuple[tuple[float, int], ...]  # (upper bound, cumulative count), last is +Inf
+    sum: float  # Seconds
+    count: int
+
+
+@dataclass(frozen=True)
+class MetricsSnapshot:
+    """Point-in-time copy of all counters."""
+
+    invocations: dict[str, int]
+    flags: dict[str, int]  # Only flags that were used at least once
+    validation_failures: int
+    errors: int
+    latency: dict[str, Histogram]
+    cache: dict[str, tuple[int, int, int]]  # Namespace -> (hits, misses, writes)
+
+
+def _bucket_index(seconds: float) -> int:
+    for index, bound in enumerate(LATENCY_BUCKETS):
+        if seconds <= bound:
+            return index
+    return len(LATENCY_BUCKETS)
+
+
+def _increments(sample: Sample) -> dict[int, int]:
+    """Translate a sample into slot deltas."""
+    deltas: dict[int, int] = {}
+
+    def add(name: str, value: int = 1) -> None:
+        slot = _SLOTS.get(name)
+        if slot is not None:
+            deltas[slot] = deltas.get(slot, 0) + value
+
+    add(f"invocations:{sample.mode}")
+    for flag in sample.flags:
+        add(f"flag:{flag}")
+    if sample.validation_failed:
+        add("validation_failures")
+    if sample.error:
+        add("errors")
+    for phase, duration_ns in sample.timings_ns.items():
+        add(f"latency:{phase}:bucket:{_bucket_index(duration_ns / 1e9)}")
+        add(f"latency:{phase}:sum_ns", duration_ns)
+        add(f"latency:{phase}:count")
+    for namespace, counts in sample.cache.items():
+        for name, value in zip(CACHE_COUNTS, counts, strict=True):
+            if value:
+                add(f"cache:{namespace}:{name}", value)
+    return deltas
+
+
+def _has_layout(buf: mmap.mmap) -> bool:
+    return _HEADER.unpack_from(buf, 0) == (_MAGIC, _LAYOUT_VERSION)
+
+
+@contextmanager
+def _mapped(path: Path, write: bool) -> Iterator[mmap.mmap | None]:
+    """Map the metrics file under a shared (read) or exclusive (write) lock.
+
+    For writing, a missing file or one with another layout is (re)initialized
+    to zeros. For reading, None is yielded in that case.
+
+    Raises:
+        OSError: For writing in ephemeral mode, before anything is written
+    """
+    if write:
+        ephemeral.check_writable(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    else:
+        try:
+            fd = os.open(path, os.O_RDONLY)
+        except FileNotFoundError:
+            yield None
+            return
+
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, fcntl.LOCK_EX if write else fcntl.LOCK_SH)
+
+        size = os.fstat(fd).st_size
+        if write:
+            if size != FILE_SIZE:
+                os.ftruncate(fd, 0)
+                os.ftruncate(fd, FILE_SIZE)
+            with mmap.mmap(fd, FILE_SIZE) as buf:
+                if not _has_layout(buf):
+                    buf[:] = bytes(FILE_SIZE)
+                    _HEADER.pack_into(buf, 0, _MAGIC, _LAYOUT_VERSION)
+                yield buf
+        elif size != FILE_SIZE:
+            yield None
+        else:
+            with mmap.mmap(fd, FILE_SIZE, access=mmap.ACCESS_READ) as buf:
+                yield buf if _has_layout(buf) else None
+    finally:
+        os.close(fd)  # Also releases the flock
+
+
+def record(sample: Sample, path: Path | None = None) -> None:
+    """Add one invocation to the shared counters.
+
+    Best effort: metrics never break prompt handling, so I/O errors are
+    ignored. Nothing is recorded in ephemeral mode.
+    """
+    if ephemeral.enabled():
+        return
+    deltas = _increments(sample)
+    try:
+        with _mapped(path if path else METRICS_PATH, write=True) as buf:
+            assert buf is not None
+            for slot, delta in deltas.items():
+                offset = _HEADER.size + slot * _U64.size
+                (value,) = _U64.unpack_from(buf, offset)
+                _U64.pack_into(buf, offset, (value + delta) & _U64_MASK)
+    except OSError:
+        pass
+
+
+def snapshot(path: Path | None = None) -> MetricsSnapshot:
+    """Read all counters (all zero if nothing was recorded yet)."""
+    with _mapped(path if path else METRICS_PATH, write=False) as buf:
+        values = [0] * len(_SLOTS)
+        if buf is not None:
+            values = [
+                _U64.unpack_from(buf, _HEADER.size + slot * _U64.size)[0]
+                for slot in range(len(_SLOTS))
+            ]
+
+    def get(name: str) -> int:
+        return values[_SLOTS[name]]
+
+    latency = {}
+    for phase in PHASES:
+        cumulative = 0
+        buckets = []
+        for index, bound in enumerate((*LATENCY_BUCKETS, float("inf"))):
+            cumulative += get(f"latency:{phase}:bucket:{index}")
+            buckets.append((bound, cumulative))
+        latency[phase] = Histogram(
+            buckets=tuple(buckets),
+            sum=get(f"latency:{phase}:sum_ns") / 1e9,
+            count=get(f"latency:{phase}:count"),
+        )
+
+    return MetricsSnapshot(
+        invocations={mode: get(f"invocations:{mode}") for mode in MODES},
+        flags={letter: get(f"flag:{letter}") for letter in FLAG_LETTERS if get(f"flag:{letter}")},
+        validation_failures=get("validation_failures"),
+        errors=get("errors"),
+        latency=latency,
+        cache={
+            ns: (get(f"cache:{ns}:hits"), get(f"cache:{ns}:misses"), get(f"cache:{ns}:writes"))
+            for ns in CACHE_NAMESPACES
+        },
+    )
+
+
+def reset(path: Path | None = None) -> None:
+    """Zero all counters."""
+    path = path if path else METRICS_PATH
+    with _mapped(path, write=True) as buf:
+        assert buf is not None
+        buf[_HEADER.size :] = bytes(FILE_SIZE - _HEADER.size)
+
+
+def _format_bound(bound: float) -> str:
+    return "+Inf" if bound == float("inf") else repr(bound)
+
+
+def render_openmetrics(metrics: MetricsSnapshot) -> str:
+    """Render a snapshot in the OpenMetrics text exposition format."""
+    lines = [
+        "# TYPE ai_flags_invocations counter",
+        "# HELP ai_flags_invocations Prompts handled, by mode.",
+    ]
+    for mode, value in metrics.invocations.items():
+        lines.append(f'ai_flags_invocations_total{{mode="{mode}"}} {value}')
+
+    lines += [
+        "# TYPE ai_flags_flag_uses counter",
+        "# HELP ai_flags_flag_uses Valid flags processed, by flag letter.",
+    ]
+    for letter, value in metrics.flags.items():
+        lines.append(f'ai_flags_flag_uses_total{{flag="{letter}"}} {value}')
+
+    lines += [
+        "# TYPE ai_flags_validation_failures counter",
+        "# HELP ai_flags_validation_failures Prompts with invalid or disabled flags.",
+        f"ai_flags_validation_failures_total {metrics.validation_failures}",
+        "# TYPE ai_flags_errors counter",
+        "# HELP ai_flags_errors Invocations that failed with an unexpected error.",
+        f"ai_flags_errors_total {metrics.errors}",
+        "# TYPE ai_flags_handle_duration_seconds histogram",
+        "# HELP ai_flags_handle_duration_seconds Time spent in each phase of handle.",
+    ]
+    for phase, histogram in metrics.latency.items():
+        for bound, value in histogram.buckets:
+            lines.append(
+                f'ai_flags_handle_duration_seconds_bucket{{phase="{phase}",'
+                f'le="{_format_bound(bound)}"}} {value}'
+            )
+        lines.append(f'ai_flags_handle_duration_seconds_sum{{phase="{phase}"}} {histogram.sum!r}')
+        lines.append(f'ai_flags_handle_duration_seconds_count{{phase="{phase}"}} {histogram.count}')
+
+    lines += [
+        "# TYPE ai_flags_cache_lookups counter",
+        "# HELP ai_flags_cache_lookups On-disk cache lookups, by namespace and result.",
+    ]
+    for namespace, (hits, misses, _) in metrics.cache.items():
+        lines.append(f'ai_flags_cache_lookups_total{{namespace="{namespace}",result="hit"}} {hits}')
+        lines.append(
+            f'ai_flags_cache_lookups_total{{namespace="{namespace}",result="miss"}} {misses}'
+        )
+    lines += [
+        "# TYPE ai_flags_cache_writes counter",
+        "# HELP ai_flags_cache_writes On-disk cache entries written, by namespace.",
+    ]
+    for namespace, (_, _, writes) in metrics.cache.items():
+        lines.append(f'ai_flags_cache_writes_total{{namespace="{namespace}"}} {writes}')
+
+    lines.append("# EOF")
+    return "\n".join(lines) + "\n"
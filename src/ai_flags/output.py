@@ -8,41 +8,114 @@ def wrap_in_xml_tag(tag: str, content: str) -> str:
     return f"<{tag}>\n{content}\n</{tag}>"
 
 
-def format_hook_output(clean_prompt: str, flags: list[str], flag_contexts: str) -> str:
-    """Format output for Claude Code hook (JSON).
+def empty_hook_output() -> dict:
+    """Return the hook output that adds no context."""
+    return {
+        "hookSpecificOutput": {
+            "hookEventName": "UserPromptSubmit",
+            "additionalContext": "",
+        }
+    }
+
+
+# Values of the metadata setting besides "truncated:N"
+METADATA_MODES = ("full", "flags-only", "none")
+_TRUNCATED_PREFIX = "truncated:"
+
+
+def check_metadata_mode(mode: str) -> str:
+    """Validate a metadata mode: full, truncated:N (N >= 0), flags-only or none.
+
+    Raises:
+        ValueError: If mode is not one of those
+    """
+    if mode in METADATA_MODES:
+        return mode
+    if mode.startswith(_TRUNCATED_PREFIX):
+        limit = mode.removeprefix(_TRUNCATED_PREFIX)
+        if limit.isdigit():
+            return mode
+    raise ValueError(f"metadata must be one of {', '.join(METADATA_MODES)} or truncated:N")
+
+
+def format_metadata(clean_prompt: str, flags: list[str], mode: str = "full") -> str:
+    """Render the flag_metadata block.
 
     Args:
         clean_prompt: Prompt without flags
         flags: List of flag letters
-        flag_contexts: Combined XML context from all flags
+        mode: "full" repeats the prompt, "truncated:N" its first N characters,
+            "flags-only" just lists the flags and "none" renders nothing
 
     Returns:
-        JSON string with hookSpecificOutput structure
+        The wrapped block, or "" for mode "none"
     """
-    # Build metadata
+    if mode == "none":
+        return ""
+
     flags_str = " ".join(f"-{flag}" for flag in flags)
-    metadata = (
-        f"Note: Processed flags {flags_str}\nYour actual task (without flags): {clean_prompt}"
-    )
-    wrapped_metadata = wrap_in_xml_tag("flag_metadata", metadata)
+    metadata = f"Note: Processed flags {flags_str}"
+    if mode == "full":
+        metadata += f"\nYour actual task (without flags): {clean_prompt}"
+    elif mode.startswith(_TRUNCATED_PREFIX):
+        limit = int(mode.removeprefix(_TRUNCATED_PREFIX))
+        task = clean_prompt
+        if len(task) > limit:
+            task = f"{task[:limit]}... [{len(task) - limit} more characters]"
+        metadata += f"\nYour actual task (without flags): {task}"
+    return wrap_in_xml_tag("flag_metadata", metadata)
+
+
+def build_hook_output(
+    clean_prompt: str, flags: list[str], flag_contexts: str, metadata: str = "full"
+) -> dict:
+    """Build the hook output structure for Claude Code.
+
+    Args:
+        clean_prompt: Prompt without flags
+        flags: List of flag letters
+        flag_contexts: Combined XML context from all flags
+        metadata: How much of the prompt to echo (see format_metadata)
+
+    Returns:
+        Dict with hookSpecificOutput structure
+    """
+    parts = []
+    wrapped_metadata = format_metadata(clean_prompt, flags, metadata)
+    if wrapped_metadata:
+        parts.append(wrapped_metadata)
 
     # Combine metadata + flag contexts
-    parts = [wrapped_metadata]
     if flag_contexts:
-        parts.append("")  # Blank line separator
+        if parts:
+            parts.append("")  # Blank line separator
         parts.append(flag_contexts)
 
     additional_context = "\n".join(parts)
 
-    # Build hook output JSON
-    output = {
+    return {
         "hookSpecificOutput": {
             "hookEventName": "UserPromptSubmit",
             "additionalContext": additional_context,
         }
     }
 
-    return json.dumps(output, indent=2)
+
+def format_hook_output(
+    clean_prompt: str, flags: list[str], flag_contexts: str, metadata: str = "full"
+) -> str:
+    """Format output for Claude Code hook (JSON).
+
+    Args:
+        clean_prompt: Prompt without flags
+        flags: List of flag letters
+        flag_contexts: Combined XML context from all flags
+        metadata: How much of the prompt to echo (see format_metadata)
+
+    Returns:
+        JSON string with hookSpecificOutput structure
+    """
+    return json.dumps(build_hook_output(clean_prompt, flags, flag_contexts, metadata), indent=2)
 
 
 def format_cli_output(prompt: str, flags: list[str], context: str) -> str:
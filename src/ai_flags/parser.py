@@ -2,20 +2,28 @@
 
 import re
 
+# Longest flag (letter or word) after the dash
+MAX_FLAG_LENGTH = 32
+
+# A flag: a lowercase letter, optionally followed by more letters, digits or underscores
+FLAG_PATTERN = rf"[a-z][a-z0-9_]{{0,{MAX_FLAG_LENGTH - 1}}}"
+FLAG_RE = re.compile(FLAG_PATTERN)
+
 
 def parse_trailing_flags(prompt: str) -> tuple[str, list[str]] | None:
     """Parse trailing flags from prompt.
 
     Args:
-        prompt: User prompt potentially ending with flags like "task -s -c"
+        prompt: User prompt potentially ending with flags like "task -s -c" or "task -review"
 
     Returns:
         Tuple of (cleaned_prompt, list_of_flags) if flags found, None otherwise.
         Example: ("task", ["s", "c"]) for "task -s -c"
+        Sticky modifiers are kept: ("task", ["c+", "t-"]) for "task -c+ -t-"
     """
-    # Match: anything followed by one or more -X flags at the end
-    # Pattern: (.*?) captures main prompt, ((?:-[a-z]\s*)+) captures flags
-    pattern = r"^(.*?)\s+((?:-[a-z]\s*)+)$"
+    # Match: anything followed by one or more -X flags (optionally -X+ or -X-) at the end
+    # Pattern: (.*?) captures main prompt, ((?:-FLAG[+-]?\s*)+) captures flags
+    pattern = rf"^(.*?)\s+((?:-{FLAG_PATTERN}[+-]?\s*)+)$"
     match = re.match(pattern, prompt.strip(), re.DOTALL)
 
     if not match:
@@ -24,7 +32,7 @@ def parse_trailing_flags(prompt: str) -> tuple[str, list[str]] | None:
     clean_prompt = match.group(1).strip()
     flags_str = match.group(2).strip()
 
-    # Extract individual flag letters: "-s -c" -> ["s", "c"]
-    flags = [flag.strip("-") for flag in flags_str.split() if flag.startswith("-")]
+    # Extract individual flags: "-s -c+" -> ["s", "c+"]
+    flags = [flag[1:] for flag in flags_str.split() if flag.startswith("-")]
 
     return (clean_prompt, flags)
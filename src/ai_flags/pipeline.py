@@ -0,0 +1,109 @@
+"""Staged processing of one invocation.
+
+A Pipeline is an ordered tuple of named stages that read and update a
+shared state object. Any stage can finish the invocation early; the
+remaining stages are then skipped, except for the ones marked ``final``
+(such as serializing the response and logging), which always run. The end
+of every stage is timestamped, so the state can report how long each
+stage, and each metrics phase, took.
+
+Pipelines are immutable: insert() returns a new pipeline, so a pipeline
+can be assembled once and shared by every processor in the process (see
+ai_flags.api.PIPELINE for the default stages).
+"""
+
+import time
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field
+from typing import Any
+
+
+@dataclass(frozen=True)
+class Stage:
+    """One named step of a pipeline."""
+
+    name: str
+    run: Callable[[Any], None]  # Called with the PipelineState subclass the pipeline runs on
+    phase: str | None = None  # Metrics phase the stage's time counts toward (None = total only)
+    final: bool = False  # Runs even after an earlier stage finished the invocation
+
+
+@dataclass(slots=True)
+class PipelineState:
+    """Base class of the state passed through a pipeline."""
+
+    done: bool = False  # Set by a stage that finished the invocation
+    # Start time, then (stage, end time) of every stage run, in perf_counter_ns
+    marks: list[tuple[Stage | None, int]] = field(default_factory=list)
+
+    def stage_timings(self) -> dict[str, int]:
+        """Return the nanoseconds each stage that ran took."""
+        return {
+            stage.name: end - start
+            for (_, start), (stage, end) in zip(self.marks, self.marks[1:], strict=False)
+            if stage is not None
+        }
+
+    def phase_timings(self) -> dict[str, int]:
+        """Return the nanoseconds per metrics phase, plus the "total"."""
+        timings: dict[str, int] = {}
+        for (_, start), (stage, end) in zip(self.marks, self.marks[1:], strict=False):
+            if stage is not None and stage.phase is not None:
+                timings[stage.phase] = timings.get(stage.phase, 0) + end - start
+        if self.marks:
+            timings["total"] = self.marks[-1][1] - self.marks[0][1]
+        return timings
+
+
+class Pipeline:
+    """An immutable sequence of stages."""
+
+    def __init__(self, stages: Iterable[Stage]):
+        """Initialize the pipeline.
+
+        Raises:
+            ValueError: If two stages have the same name
+        """
+        self.stages = tuple(stages)
+        names = [stage.name for stage in self.stages]
+        duplicates = sorted({name for name in names if names.count(name) > 1})
+        if duplicates:
+            raise ValueError(f"duplicate stage names: {', '.join(duplicates)}")
+
+    @property
+    def names(self) -> tuple[str, ...]:
+        """Names of the stages, in order."""
+        return tuple(stage.name for stage in self.stages)
+
+    def insert(
+        self, stage: Stage, *, before: str | None = None, after: str | None = None
+    ) -> "Pipeline":
+        """Return a new pipeline with stage added before or after a named stage.
+
+        Without before or after, the stage is appended.
+
+        Raises:
+            ValueError: If both positions are given or the named stage doesn't exist
+        """
+        if before is not None and after is not None:
+            raise ValueError("give either before or after, not both")
+        anchor = before if before is not None else after
+        if anchor is None:
+            return Pipeline((*self.stages, stage))
+        if anchor not in self.names:
+            raise ValueError(f"no stage named '{anchor}'")
+        index = self.names.index(anchor) + (after is not None)
+        return Pipeline((*self.stages[:index], stage, *self.stages[index:]))
+
+    def run(self, state: PipelineState) -> PipelineState:
+        """Run the stages over state and return it."""
+        # Only timestamps are taken here: this runs for every stage of every prompt
+        mark = state.marks.append
+        clock = time.perf_counter_ns
+        mark((None, clock()))
+        for stage in self.stages:
+            if state.done and not stage.final:
+                continue
+            stage.run(state)
+            mark((stage, clock()))
+        return state
@@ -0,0 +1,69 @@
+"""Config profiles selected by the hook's cwd.
+
+A profile is a partial config applied to every directory below a path
+prefix, e.g. ``profiles: {"~/work/monorepo/**": {commit: {content: ...}}}``.
+Prefixes are stored in a trie of path components when the config is
+loaded, so finding the most specific profile for a cwd costs O(path depth)
+however many profiles there are.
+"""
+
+import os
+from pathlib import Path
+
+
+def pattern_parts(pattern: str) -> tuple[str, ...]:
+    """Split a profile pattern into absolute path components.
+
+    "~/oss/**", "~/oss/" and "~/oss" are equivalent.
+
+    Raises:
+        ValueError: If the pattern uses wildcards anywhere but a trailing /**
+    """
+    path = pattern.removesuffix("/**")
+    if any(char in path for char in "*?["):
+        raise ValueError(f"profile '{pattern}' may only use a trailing /** wildcard")
+    path = os.path.expanduser(path)
+    if not os.path.isabs(path):
+        raise ValueError(f"profile '{pattern}' must be an absolute or ~ path")
+    return Path(os.path.normpath(path)).parts
+
+
+class PathTrie:
+    """Maps path prefixes to values; lookups return the longest matching prefix."""
+
+    def __init__(self) -> None:
+        self._children: dict[str, PathTrie] = {}
+        self._value: str | None = None
+
+    def insert(self, parts: tuple[str, ...], value: str) -> None:
+        """Store value under a path prefix."""
+        node = self
+        for part in parts:
+            node = node._children.setdefault(part, PathTrie())
+        node._value = value
+
+    def longest_prefix(self, parts: tuple[str, ...]) -> str | None:
+        """Return the value of the longest stored prefix of parts, if any."""
+        node = self
+        found = self._value
+        for part in parts:
+            child = node._children.get(part)
+            if child is None:
+                break
+            node = child
+            if node._value is not None:
+                found = node._value
+        return found
+
+
+def build_trie(patterns: list[str]) -> PathTrie:
+    """Compile profile patterns into a trie that maps directories to patterns."""
+    trie = PathTrie()
+    for pattern in patterns:
+        trie.insert(pattern_parts(pattern), pattern)
+    return trie
+
+
+def match_profile(trie: PathTrie, cwd: str) -> str | None:
+    """Return the most specific profile pattern covering cwd."""
+    return trie.longest_prefix(Path(os.path.abspath(cwd)).parts)
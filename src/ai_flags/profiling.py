@@ -0,0 +1,203 @@
+"""Opt-in profiling of real `handle` invocations.
+
+Only imported when AI_FLAGS_PROFILE is set, so normal runs pay nothing:
+
+    AI_FLAGS_PROFILE=cprofile            # cProfile stats (.prof)
+    AI_FLAGS_PROFILE=tracemalloc         # Allocation snapshots (.tracemalloc)
+    AI_FLAGS_PROFILE=cprofile,tracemalloc
+    AI_FLAGS_PROFILE_DIR=/tmp/profiles   # Default: ~/.config/ai-flags/profiles (required
+                                         # in ephemeral mode)
+    AI_FLAGS_PROFILE_RATE=0.1            # Profile 10% of invocations (default: all)
+
+`ai-flags profile report` merges the collected files into one ranked view.
+"""
+
+import cProfile
+import io
+import os
+import pickle
+import pstats
+import random
+import time
+import tracemalloc
+from collections.abc import Iterator, Mapping
+from contextlib import contextmanager
+from pathlib import Path
+
+from ai_flags import ephemeral
+from ai_flags.config_loader import CONFIG_DIR
+
+PROFILE_ENV = "AI_FLAGS_PROFILE"
+PROFILE_DIR_ENV = "AI_FLAGS_PROFILE_DIR"
+PROFILE_RATE_ENV = "AI_FLAGS_PROFILE_RATE"
+
+PROFILE_DIR = CONFIG_DIR / "profiles"
+PROFILERS = ("cprofile", "tracemalloc")
+
+CPROFILE_SUFFIX = ".prof"
+TRACEMALLOC_SUFFIX = ".tracemalloc"
+
+# Raised loading a truncated or foreign profile file (marshal for cProfile, pickle for tracemalloc)
+_LOAD_ERRORS = (OSError, EOFError, ValueError, TypeError, pickle.UnpicklingError)
+
+
+def parse_profilers(value: str) -> set[str]:
+    """Parse a comma-separated profiler list, ignoring unknown names."""
+    return {name.strip().lower() for name in value.split(",")} & set(PROFILERS)
+
+
+def _parse_rate(value: str | None) -> float:
+    if not value:
+        return 1.0
+    try:
+        return min(max(float(value), 0.0), 1.0)
+    except ValueError:
+        return 1.0
+
+
+@contextmanager
+def profiled(profilers: set[str], directory: Path, rate: float = 1.0) -> Iterator[None]:
+    """Profile the enclosed block and write one file per profiler into directory.
+
+    Args:
+        profilers: Subset of PROFILERS to run
+        directory: Where profiles are written (created if missing)
+        rate: Fraction of invocations to profile (0.0-1.0)
+    """
+    if not profilers or random.random() >= rate:
+        yield
+        return
+
+    profiler = cProfile.Profile() if "cprofile" in profilers else None
+    trace = "tracemalloc" in profilers and not tracemalloc.is_tracing()
+
+    if trace:
+        tracemalloc.start()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        yield
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        snapshot = None
+        if trace:
+            snapshot = tracemalloc.take_snapshot().filter_traces(
+                (tracemalloc.Filter(False, tracemalloc.__file__),)
+            )
+            tracemalloc.stop()
+
+        # Never let a full disk or read-only dir turn into a failed hook
+        try:
+            directory.mkdir(parents=True, exist_ok=True)
+            stem = f"{time.time_ns()}-{os.getpid()}"
+            if profiler is not None:
+                profiler.dump_stats(directory / f"{stem}{CPROFILE_SUFFIX}")
+            if snapshot is not None:
+                snapshot.dump(str(directory / f"{stem}{TRACEMALLOC_SUFFIX}"))
+        except OSError:
+            pass
+
+
+def from_environment(environ: Mapping[str, str] | None = None):
+    """Return a profiled() context configured from the AI_FLAGS_PROFILE* variables."""
+    env = os.environ if environ is None else environ
+    directory = env.get(PROFILE_DIR_ENV)
+    profilers = parse_profilers(env.get(PROFILE_ENV, ""))
+    if not directory and ephemeral.enabled():
+        profilers = set()  # Only an explicit directory may be written to
+    return profiled(
+        profilers,
+        Path(directory) if directory else PROFILE_DIR,
+        _parse_rate(env.get(PROFILE_RATE_ENV)),
+    )
+
+
+def cprofile_report(
+    files: list[Path],
+    sort: str = "cumulative",
+    limit: int = 30,
+    skipped: list[Path] | None = None,
+) -> str:
+    """Merge cProfile dumps and return the top functions as text.
+
+    Files that can't be loaded are left out and added to skipped. Returns an
+    empty string if none could.
+    """
+    out = io.StringIO()
+    stats = None
+    for path in files:
+        try:
+            if stats is None:
+                stats = pstats.Stats(str(path), stream=out)
+            else:
+                stats.add(str(path))
+        except _LOAD_ERRORS:
+            if skipped is not None:
+                skipped.append(path)
+    if stats is None:
+        return ""
+    stats.strip_dirs().sort_stats(sort).print_stats(limit)
+    return out.getvalue()
+
+
+def tracemalloc_report(
+    files: list[Path], limit: int = 30, skipped: list[Path] | None = None
+) -> str:
+    """Merge tracemalloc snapshots and return the top allocation sites as text.
+
+    Sizes and counts are summed over all snapshots, so a site that allocates
+    a little on every invocation ranks above a one-off. Files that can't be
+    loaded are left out and added to skipped. Returns an empty string if
+    none could.
+    """
+    totals: dict[tuple[str, int], list[int]] = {}
+    loaded = 0
+    for path in files:
+        try:
+            statistics = tracemalloc.Snapshot.load(str(path)).statistics("lineno")
+        except (*_LOAD_ERRORS, AttributeError):
+            if skipped is not None:
+                skipped.append(path)
+            continue
+        loaded += 1
+        for stat in statistics:
+            frame = stat.traceback[0]
+            entry = totals.setdefault((frame.filename, frame.lineno), [0, 0])
+            entry[0] += stat.size
+            entry[1] += stat.count
+    if not loaded:
+        return ""
+
+    ranked = sorted(totals.items(), key=lambda item: item[1][0], reverse=True)[:limit]
+    lines = [f"{loaded} snapshots, top {len(ranked)} allocation sites by total size"]
+    for (filename, lineno), (size, count) in ranked:
+        lines.append(
+            f"{size / 1024:10.1f} KiB {count:8d} blocks  {filename}:{lineno}"
+            f"  (avg {size / loaded / 1024:.1f} KiB/run)"
+        )
+    return "\n".join(lines) + "\n"
+
+
+def report(directory: Path, sort: str = "cumulative", limit: int = 30) -> str:
+    """Build the combined report for all profiles in directory.
+
+    Unreadable files (e.g. truncated by a killed process) are skipped and
+    named at the end.
+    """
+    prof_files = sorted(directory.glob(f"*{CPROFILE_SUFFIX}"))
+    trace_files = sorted(directory.glob(f"*{TRACEMALLOC_SUFFIX}"))
+
+    skipped: list[Path] = []
+    sections = []
+    text = cprofile_report(prof_files, sort, limit, skipped) if prof_files else ""
+    if text:
+        sections.append(f"== cProfile ({len(prof_files) - len(skipped)} runs) ==\n")
+        sections.append(text)
+    text = tracemalloc_report(trace_files, limit, skipped) if trace_files else ""
+    if text:
+        sections.append("== tracemalloc ==\n")
+        sections.append(text)
+    if skipped:
+        sections.append(f"Skipped unreadable files: {', '.join(p.name for p in skipped)}\n")
+    return "".join(sections)
@@ -0,0 +1,68 @@
+"""Registry of the flags a config defines.
+
+The built-in flags have fixed letters and config fields (see
+config.FLAG_FIELDS). User-defined flags come from the config's ``flags``
+section, keyed by name, each with the letter or word typed after the dash:
+
+    flags:
+      security:
+        flag: sec                      # -sec (default: the name)
+        content: Review the change for injection and auth bugs.
+        modes: [default, acceptEdits]
+
+The registry is built once, when the config is validated. It maps every
+flag to its entry, so looking a flag up costs one dict access however many
+flags are defined. Entries name the config field that holds the flag's
+settings rather than holding them, so changes to a loaded config (such as
+``config.commit.enabled = False``) are seen through the registry.
+"""
+
+from collections.abc import Iterable, Iterator
+from dataclasses import dataclass
+
+
+@dataclass(frozen=True, slots=True)
+class FlagEntry:
+    """One flag of a config."""
+
+    flag: str  # Letter or word typed after the dash
+    name: str  # Config field of a built-in flag, key under ``flags`` of a user-defined one
+    builtin: bool
+
+
+class FlagRegistry:
+    """The flags of one config, indexed by flag and by name."""
+
+    def __init__(self, entries: Iterable[FlagEntry]):
+        """Initialize the registry.
+
+        Raises:
+            ValueError: If two entries share a flag or a name
+        """
+        self._flags: dict[str, FlagEntry] = {}
+        self._names: dict[str, FlagEntry] = {}
+        for entry in entries:
+            other = self._flags.get(entry.flag)
+            if other is not None:
+                raise ValueError(f"flags '{other.name}' and '{entry.name}' both use -{entry.flag}")
+            if entry.name in self._names:
+                raise ValueError(f"flag name '{entry.name}' is defined twice")
+            self._flags[entry.flag] = entry
+            self._names[entry.name] = entry
+
+    def get(self, flag: str) -> FlagEntry | None:
+        """Return the entry of a flag, or None if the config doesn't define it."""
+        return self._flags.get(flag)
+
+    def find(self, flag_or_name: str) -> FlagEntry | None:
+        """Return the entry with this flag or, failing that, this name."""
+        return self._flags.get(flag_or_name) or self._names.get(flag_or_name)
+
+    def __contains__(self, flag: object) -> bool:
+        return flag in self._flags
+
+    def __iter__(self) -> Iterator[FlagEntry]:
+        return iter(self._flags.values())
+
+    def __len__(self) -> int:
+        return len(self._flags)
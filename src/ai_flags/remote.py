@@ -0,0 +1,192 @@
+"""Team config fetched over HTTP.
+
+The global config may name a shared document with ``remote: {url: ...}``.
+The document is cached on disk next to its ETag and Last-Modified headers
+and layered over the global config (see config_loader.resolve_config).
+Prompt handling only ever reads the cached copy: once it is older than the
+TTL, a detached process re-fetches it with a conditional GET.
+"""
+
+import hashlib
+import json
+import os
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import yaml
+
+from ai_flags import ephemeral
+from ai_flags.atomic import atomic_write_text
+from ai_flags.config import AiFlagsConfig, RemoteConfig
+
+# Larger documents are rejected rather than cached
+MAX_DOCUMENT_BYTES = 1_048_576
+
+# Results of fetch()
+UPDATED = "updated"
+NOT_MODIFIED = "not modified"
+
+
+@dataclass(frozen=True)
+class CacheFiles:
+    """On-disk cache of one remote URL."""
+
+    document: Path  # Last valid document
+    meta: Path  # URL, ETag and Last-Modified of the document
+    stamp: Path  # mtime = last fetch attempt
+
+
+def cache_files(url: str, directory: Path) -> CacheFiles:
+    """Return the cache files of a URL inside the cache directory."""
+    name = hashlib.sha256(url.encode("utf-8")).hexdigest()[:16]
+    return CacheFiles(
+        document=directory / f"{name}.yaml",
+        meta=directory / f"{name}.json",
+        stamp=directory / f"{name}.checked",
+    )
+
+
+def parse_document(text: str) -> dict[str, Any]:
+    """Parse and validate a remote config document.
+
+    A ``remote`` key in the document is dropped, so a document can't
+    redirect clients to another URL.
+
+    Raises:
+        ValueError: If the document isn't valid YAML or not a valid config
+        TypeError: If the document isn't a mapping
+    """
+    try:
+        data = yaml.safe_load(text)
+    except yaml.YAMLError as e:
+        raise ValueError(f"invalid YAML: {e}") from e
+    if data is None:
+        data = {}
+    if not isinstance(data, dict):
+        raise TypeError("document does not contain a mapping")
+    data.pop("remote", None)
+    AiFlagsConfig(**data)  # ValidationError is a ValueError
+    return data
+
+
+def _read_meta(files: CacheFiles) -> dict[str, Any]:
+    try:
+        meta = json.loads(files.meta.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return meta if isinstance(meta, dict) and files.document.exists() else {}
+
+
+def _touch(path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.touch()
+    os.utime(path)
+
+
+def fetch(settings: RemoteConfig, directory: Path) -> str:
+    """Fetch the remote document now, sending the cached validators.
+
+    Returns:
+        UPDATED if a new document was cached, NOT_MODIFIED on 304
+
+    Raises:
+        OSError: If the server can't be reached or answers with an error, or
+            in ephemeral mode
+        ValueError, TypeError: If the document is too large or not a valid
+            config; the previously cached copy is kept
+    """
+    ephemeral.check_writable(directory)
+
+    # Imported here: the prompt path only reads the cache
+    import urllib.error
+    import urllib.request
+
+    files = cache_files(settings.url, directory)
+    meta = _read_meta(files)
+    headers = {}
+    if meta.get("etag"):
+        headers["If-None-Match"] = meta["etag"]
+    if meta.get("last_modified"):
+        headers["If-Modified-Since"] = meta["last_modified"]
+
+    _touch(files.stamp)
+    request = urllib.request.Request(settings.url, headers=headers)
+    try:
+        with urllib.request.urlopen(request, timeout=settings.timeout) as response:
+            body = response.read(MAX_DOCUMENT_BYTES + 1)
+            etag = response.headers.get("ETag")
+            last_modified = response.headers.get("Last-Modified")
+    except urllib.error.HTTPError as e:
+        if e.code == 304:
+            return NOT_MODIFIED
+        raise
+
+    if len(body) > MAX_DOCUMENT_BYTES:
+        raise ValueError(f"document exceeds {MAX_DOCUMENT_BYTES} bytes")
+    text = body.decode("utf-8")
+    parse_document(text)
+
+    atomic_write_text(files.document, text)
+    atomic_write_text(
+        files.meta,
+        json.dumps({"url": settings.url, "etag": etag, "last_modified": last_modified}) + "\n",
+    )
+    return UPDATED
+
+
+def is_stale(settings: RemoteConfig, directory: Path) -> bool:
+    """Check whether the last fetch attempt is older than the TTL (one stat)."""
+    try:
+        checked = os.stat(cache_files(settings.url, directory).stamp).st_mtime
+    except OSError:
+        return True
+    return checked < time.time() - settings.ttl
+
+
+def refresh_in_background(settings: RemoteConfig, directory: Path) -> None:
+    """Start a detached fetch if the cache is stale; never blocks on the network.
+
+    The attempt is stamped before spawning, so concurrent hook processes
+    start at most one fetch per TTL, even when the server is down. Nothing
+    is started in ephemeral mode; the cached copy, if any, stays in use.
+    """
+    if ephemeral.enabled() or not is_stale(settings, directory):
+        return
+
+    import subprocess  # Only needed once per TTL
+
+    try:
+        _touch(cache_files(settings.url, directory).stamp)
+        subprocess.Popen(
+            [
+                sys.executable,
+                "-m",
+                "ai_flags.remote",
+                settings.url,
+                str(directory),
+                str(settings.timeout),
+            ],
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            start_new_session=True,
+        )
+    except OSError:
+        pass
+
+
+def main(argv: list[str]) -> int:
+    """Entry point of the detached fetch process: URL, cache directory, timeout."""
+    url, directory, timeout = argv
+    try:
+        fetch(RemoteConfig(url=url, timeout=float(timeout)), Path(directory))
+    except (OSError, ValueError, TypeError):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,184 @@
+"""Sticky flags that stay on for the rest of a Claude Code session.
+
+`-c+` turns -c on for the current prompt and every later prompt of the same
+session (the hook input's session_id); `-c-` turns it off again. The state
+lives in a small SQLite database in WAL mode, so concurrent hook processes
+can read while another one writes. Only the current session's row is read,
+and sessions whose sticky flags haven't changed within the TTL are evicted
+whenever the state is written.
+
+In ephemeral mode the state is kept in memory instead, so sticky flags
+last as long as the process (e.g. an embedded FlagProcessor).
+"""
+
+import os
+import sqlite3
+import threading
+import time
+from contextlib import closing
+from pathlib import Path
+
+from ai_flags import ephemeral
+from ai_flags.config_loader import CONFIG_DIR
+
+STATE_PATH = CONFIG_DIR / "state.db"
+DEFAULT_TTL = 24 * 60 * 60  # Seconds
+
+# How long a writer waits for another process holding the write lock
+_BUSY_TIMEOUT = 1.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sticky (
+    session_id TEXT PRIMARY KEY,
+    flags TEXT NOT NULL,
+    updated REAL NOT NULL
+)
+"""
+
+# State of ephemeral mode: session_id -> (flags, updated), like a table row
+_memory: dict[str, tuple[str, float]] = {}
+_memory_lock = threading.Lock()
+
+
+def split_sticky(tokens: list[str]) -> tuple[list[str], list[str], list[str]]:
+    """Separate sticky modifiers from plain flags.
+
+    Args:
+        tokens: Parsed flag tokens, e.g. ["c+", "t", "n-"]
+
+    Returns:
+        Tuple of (flags to apply now, flags to make sticky, flags to unstick).
+        Example: (["c", "t"], ["c"], ["n"]) for the tokens above
+    """
+    flags: list[str] = []
+    sticky_on: list[str] = []
+    sticky_off: list[str] = []
+    for token in tokens:
+        if token.endswith("+"):
+            sticky_on.append(token[:-1])
+            flags.append(token[:-1])
+        elif token.endswith("-"):
+            sticky_off.append(token[:-1])
+        else:
+            flags.append(token)
+    return flags, sticky_on, sticky_off
+
+
+def _decode(row: tuple[str, float] | None, now: float, ttl: int) -> list[str]:
+    if row is None or row[1] < now - ttl or not row[0]:
+        return []
+    return row[0].split(",")
+
+
+def get_sticky(session_id: str, ttl: int = DEFAULT_TTL, path: Path | None = None) -> list[str]:
+    """Return the sticky flags of a session.
+
+    Costs a single stat when sticky flags were never used. Errors (missing
+    or locked database, unexpected schema) count as no sticky flags.
+    """
+    if ephemeral.enabled():
+        with _memory_lock:
+            return _decode(_memory.get(session_id), time.time(), ttl)
+
+    path = path if path else STATE_PATH
+    if not os.path.exists(path):
+        return []
+
+    try:
+        with closing(sqlite3.connect(path, timeout=_BUSY_TIMEOUT)) as conn:
+            row = conn.execute(
+                "SELECT flags, updated FROM sticky WHERE session_id = ?", (session_id,)
+            ).fetchone()
+    except sqlite3.Error:
+        return []
+    return _decode(row, time.time(), ttl)
+
+
+def has_sticky(session_id: str, path: Path | None = None) -> bool:
+    """Return whether a session has stored sticky flags, expired or not.
+
+    Needs no TTL, and so no config: prompts without flags use it to skip
+    loading the config. Costs a single stat when sticky flags were never used.
+    """
+    if ephemeral.enabled():
+        with _memory_lock:
+            return session_id in _memory
+
+    path = path if path else STATE_PATH
+    if not os.path.exists(path):
+        return False
+
+    try:
+        with closing(sqlite3.connect(path, timeout=_BUSY_TIMEOUT)) as conn:
+            row = conn.execute(
+                "SELECT 1 FROM sticky WHERE session_id = ?", (session_id,)
+            ).fetchone()
+    except sqlite3.Error:
+        return False
+    return row is not None
+
+
+def update_sticky(
+    session_id: str,
+    sticky_on: list[str],
+    sticky_off: list[str],
+    ttl: int = DEFAULT_TTL,
+    path: Path | None = None,
+) -> list[str]:
+    """Apply sticky modifiers to a session and evict expired sessions.
+
+    Returns:
+        The session's sticky flags after the update. If the state can't be
+        written, the update is skipped and sticky_on is returned.
+    """
+    path = path if path else STATE_PATH
+    now = time.time()
+    if ephemeral.enabled():
+        return _update_memory(session_id, sticky_on, sticky_off, ttl, now)
+
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(sqlite3.connect(path, timeout=_BUSY_TIMEOUT, isolation_level=None)) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(_SCHEMA)
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT flags, updated FROM sticky WHERE session_id = ?", (session_id,)
+                ).fetchone()
+                flags = [f for f in _decode(row, now, ttl) if f not in sticky_off]
+                flags += [f for f in sticky_on if f not in flags]
+
+                if flags:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO sticky (session_id, flags, updated) "
+                        "VALUES (?, ?, ?)",
+                        (session_id, ",".join(flags), now),
+                    )
+                else:
+                    conn.execute("DELETE FROM sticky WHERE session_id = ?", (session_id,))
+                conn.execute("DELETE FROM sticky WHERE updated < ?", (now - ttl,))
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+    except (sqlite3.Error, OSError):
+        return list(sticky_on)
+
+    return flags
+
+
+def _update_memory(
+    session_id: str, sticky_on: list[str], sticky_off: list[str], ttl: int, now: float
+) -> list[str]:
+    """update_sticky() on the in-memory state of ephemeral mode."""
+    with _memory_lock:
+        flags = [f for f in _decode(_memory.get(session_id), now, ttl) if f not in sticky_off]
+        flags += [f for f in sticky_on if f not in flags]
+        if flags:
+            _memory[session_id] = (",".join(flags), now)
+        else:
+            _memory.pop(session_id, None)
+        for expired in [key for key, (_, updated) in _memory.items() if updated < now - ttl]:
+            del _memory[expired]
+    return flags
@@ -0,0 +1,60 @@
+"""Bounded reads from the end of large files.
+
+Transcripts and logs can be hundreds of MB. These helpers map the file and
+only touch the pages of its last max_bytes, so the cost doesn't depend on
+the file size.
+"""
+
+import mmap
+import os
+from collections.abc import Iterator
+from pathlib import Path
+
+
+def iter_lines_reverse(path: Path, max_bytes: int) -> Iterator[bytes]:
+    """Yield the lines of a file from last to first, within its last max_bytes.
+
+    Empty lines are skipped. A line cut off by the max_bytes boundary is not
+    yielded, so every line returned is complete.
+
+    Raises:
+        OSError: If the file can't be opened
+    """
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            start = max(0, size - max_bytes)
+            end = size
+            while end > start:
+                newline = buf.rfind(b"\n", start, end)
+                if newline == -1:
+                    if start == 0:  # First line of the file
+                        yield buf[:end]
+                    return
+                if newline + 1 < end:
+                    yield buf[newline + 1 : end]
+                end = newline
+
+
+def read_tail(path: str | Path, max_bytes: int) -> bytes:
+    """Return the last max_bytes of a file, starting at a line boundary if possible.
+
+    Raises:
+        OSError: If the file can't be opened
+    """
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size == 0:
+            return b""
+
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+            start = max(0, size - max_bytes)
+            if start > 0:
+                # Drop the partial first line unless that would leave nothing
+                newline = buf.find(b"\n", start, size - 1)
+                if newline != -1:
+                    start = newline + 1
+            return buf[start:size]
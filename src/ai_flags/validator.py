@@ -1,25 +1,19 @@
 """Flag validation logic."""
 
-# Flag registry - all recognized flags
+# Built-in flag letters; a config's registry adds user-defined flags (see ai_flags.registry)
 RECOGNIZED_FLAGS = {"s", "c", "t", "d", "n"}
 
 
-def validate_flags(flags: list[str], enabled_flags: set[str]) -> bool:
-    """Validate that all flags are recognized and enabled.
+def validate_flags(flags: list[str], enabled_flags: set[str] | frozenset[str]) -> bool:
+    """Validate that all flags are defined and enabled.
+
+    Only defined flags can be enabled, so one lookup per flag covers both.
 
     Args:
-        flags: List of flag letters (e.g., ["s", "c"])
-        enabled_flags: Set of enabled flag letters from config
+        flags: List of flags (e.g., ["s", "c"] or ["review"])
+        enabled_flags: Set of enabled flags from the config's registry
 
     Returns:
         True if all flags are valid and enabled, False otherwise
     """
-    # Check all flags are recognized
-    if not all(flag in RECOGNIZED_FLAGS for flag in flags):
-        return False
-
-    # Check all flags are enabled in config
-    if not all(flag in enabled_flags for flag in flags):
-        return False
-
-    return True
+    return all(flag in enabled_flags for flag in flags)
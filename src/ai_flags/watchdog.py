@@ -0,0 +1,121 @@
+"""Response deadline for hook invocations.
+
+A hook that hangs holds up the user's prompt: a stalled NFS home, a stdin
+that never closes or a slow handler would all block Claude Code. In hook
+mode, `handle` arms a Watchdog first thing. If no response was written when
+the deadline passes, the watchdog writes the precomputed empty hook output,
+records the overrun and exits the process with status 0.
+
+The deadline comes from the environment rather than config.yaml, because
+reading the config is one of the things that can hang:
+
+    AI_FLAGS_DEADLINE_MS=500   # Default: 200; 0 disables the watchdog
+"""
+
+import contextlib
+import os
+import sys
+import threading
+from collections.abc import Callable
+from typing import Self, TextIO
+
+DEADLINE_ENV = "AI_FLAGS_DEADLINE_MS"
+DEFAULT_DEADLINE_MS = 200
+
+# Time the overrun callback gets before the process exits regardless
+OVERRUN_GRACE = 0.1
+
+
+def deadline_from_environment() -> float:
+    """Return the deadline in seconds from AI_FLAGS_DEADLINE_MS (0 = none)."""
+    value = os.environ.get(DEADLINE_ENV)
+    if not value:
+        return DEFAULT_DEADLINE_MS / 1000
+    try:
+        return max(int(value), 0) / 1000
+    except ValueError:
+        return DEFAULT_DEADLINE_MS / 1000
+
+
+class Watchdog:
+    """Writes a fallback response and exits the process once a deadline passes.
+
+    The real response must be written with write(). Both writers hold the
+    same output lock, so exactly one complete response reaches the stream.
+    Use as a context manager; leaving the block disarms the watchdog.
+    """
+
+    def __init__(
+        self,
+        deadline: float,
+        fallback: str,
+        on_overrun: Callable[[bool], None] | None = None,
+        stream: TextIO | None = None,
+    ):
+        """Initialize the watchdog.
+
+        Args:
+            deadline: Seconds from start() until it fires (0 = never)
+            fallback: Response written if none was written in time
+            on_overrun: Called after firing with whether the fallback was written
+            stream: Where responses go (default: sys.stdout at write time)
+        """
+        self.deadline = deadline
+        self._fallback = fallback
+        self._on_overrun = on_overrun
+        self._stream = stream
+        self._output_lock = threading.Lock()
+        self._written = False
+        self._disarmed = threading.Event()
+
+    def start(self) -> Self:
+        """Start the countdown (no-op without a deadline)."""
+        if self.deadline > 0:
+            threading.Thread(target=self._watch, name="ai-flags-watchdog", daemon=True).start()
+        return self
+
+    def disarm(self) -> None:
+        """Stop the countdown."""
+        self._disarmed.set()
+
+    def write(self, text: str) -> bool:
+        """Write the response unless one was already written.
+
+        Returns:
+            False if the response was dropped
+        """
+        with self._output_lock:
+            if self._written:
+                return False
+            stream = self._stream if self._stream is not None else sys.stdout
+            stream.write(text)
+            stream.flush()
+            self._written = True
+            return True
+
+    def __enter__(self) -> Self:
+        return self.start()
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.disarm()
+
+    def _exit(self) -> None:
+        with self._output_lock:
+            os._exit(0)
+
+    def _watch(self) -> None:
+        if self._disarmed.wait(self.deadline):
+            return
+
+        # Exit even if the overrun callback blocks, but never in the middle of a write
+        hard_exit = threading.Timer(OVERRUN_GRACE, self._exit)
+        hard_exit.daemon = True
+        hard_exit.start()
+
+        # The process must exit 0 whatever happens
+        with contextlib.suppress(Exception):
+            answered = self.write(self._fallback)
+            if self._on_overrun is not None:
+                self._on_overrun(answered)
+        hard_exit.cancel()
+        self._exit()
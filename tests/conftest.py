@@ -0,0 +1,41 @@
+"""Shared test setup."""
+
+import pytest
+
+from ai_flags import cache, capture, ephemeral, fingerprint
+
+
+@pytest.fixture(autouse=True)
+def no_hook_deadline(monkeypatch):
+    """Keep the hook watchdog from exiting the test process on a slow machine."""
+    monkeypatch.setenv("AI_FLAGS_DEADLINE_MS", "0")
+
+
+@pytest.fixture(autouse=True)
+def not_ephemeral(monkeypatch):
+    """Write state as usual, even where the test run's home directory is read-only."""
+    monkeypatch.setenv("AI_FLAGS_EPHEMERAL", "0")
+    monkeypatch.delenv("AI_FLAGS_LOG", raising=False)
+    ephemeral.clear_cache()
+    yield
+    ephemeral.clear_cache()
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path_factory, monkeypatch):
+    """Keep cached project fingerprints out of the real config dir.
+
+    The namespace is stamped as just evicted, so tests don't spawn eviction processes.
+    """
+    root = tmp_path_factory.mktemp("cache")
+    (root / "projects").mkdir()
+    (root / "projects" / ".evicted").touch()
+    monkeypatch.setenv("AI_FLAGS_CACHE_DIR", str(root))
+    fingerprint.clear_memory_cache()
+    cache.take_counts()
+
+
+@pytest.fixture(autouse=True)
+def capture_cache():
+    """Start every test without rendered failure tails from an earlier one."""
+    capture.clear_cache()
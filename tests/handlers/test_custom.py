@@ -0,0 +1,24 @@
+"""Tests for the handler of user-defined flags."""
+
+from ai_flags.handlers.custom import CustomHandler
+
+
+class TestCustomHandler:
+    """Test CustomHandler for flags defined in config."""
+
+    def test_flag_and_tag(self):
+        """Should return the configured flag and XML tag."""
+        handler = CustomHandler("review", "review_instructions", "Review it.")
+        assert handler.flag_letter == "review"
+        assert handler.get_xml_tag() == "review_instructions"
+
+    def test_content(self):
+        """Should return the configured content in every permission mode."""
+        handler = CustomHandler("rv", "review_instructions", "Review it.")
+        assert handler.get_content() == "Review it."
+        assert handler.get_content("plan") == "Review it."
+
+    def test_short_content(self):
+        """Should return the compact variant, or nothing without one."""
+        assert CustomHandler("rv", "tag", "Long.", "Short.").get_short_content() == "Short."
+        assert CustomHandler("rv", "tag", "Long.").get_short_content() == ""
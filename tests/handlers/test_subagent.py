@@ -1,5 +1,6 @@
 """Tests for subagent handler."""
 
+from ai_flags.executor import compile_dispatch_table
 from ai_flags.handlers.subagent import SubagentHandler
 
 
@@ -25,12 +26,16 @@ class TestSubagentHandler:
         assert "implementation plan" in content.lower()
         assert "subagents in parallel" in content.lower()
 
-    def test_empty_content_outside_plan_mode(self):
-        """Should return empty string when not in plan mode."""
-        handler = SubagentHandler()
-        assert handler.get_content(permission_mode=None) == ""
-        assert handler.get_content(permission_mode="normal") == ""
-        assert handler.get_content(permission_mode="default") == ""
+    def test_applies_only_in_plan_mode_by_default(self):
+        """Should declare plan as its only default permission mode."""
+        assert SubagentHandler.default_modes == ("plan",)
+
+    def test_not_rendered_outside_plan_mode(self):
+        """Should be dropped from every dispatch table except plan's."""
+        handlers = {"s": SubagentHandler()}
+        assert "s" in compile_dispatch_table(handlers, "plan")
+        for mode in [None, "default", "acceptEdits", "bypassPermissions"]:
+            assert compile_dispatch_table(handlers, mode) == {}
 
     def test_custom_content_overrides_default(self):
         """Should use custom content when provided."""
@@ -39,13 +44,10 @@ class TestSubagentHandler:
         assert handler.get_content(permission_mode="plan") == custom
 
     def test_custom_content_respects_permission_mode(self):
-        """Custom content should still respect permission mode check."""
-        custom = "Custom content"
-        handler = SubagentHandler(content=custom)
-        # Should only return content in plan mode
-        assert handler.get_content(permission_mode="plan") == custom
-        assert handler.get_content(permission_mode=None) == ""
-        assert handler.get_content(permission_mode="normal") == ""
+        """Custom content should still respect the default modes."""
+        handlers = {"s": SubagentHandler(content="Custom content")}
+        assert compile_dispatch_table(handlers, "plan")["s"].count("Custom content") == 1
+        assert compile_dispatch_table(handlers, "default") == {}
 
     def test_default_content_contains_task_tool_reference(self):
         """Default content should mention the Task tool."""
@@ -60,12 +62,7 @@ class TestSubagentHandler:
         assert "orchestrate" in content.lower()
 
     def test_different_permission_modes(self):
-        """Test various permission mode values."""
-        handler = SubagentHandler()
-
-        # Only "plan" should return content
-        assert len(handler.get_content(permission_mode="plan")) > 0
-
-        # All other modes should return empty
+        """Only plan mode should render the flag."""
+        handlers = {"s": SubagentHandler()}
         for mode in ["", "auto", "approval", "execute", "disabled"]:
-            assert handler.get_content(permission_mode=mode) == ""
+            assert compile_dispatch_table(handlers, mode) == {}
@@ -0,0 +1,320 @@
+"""Tests for the in-process API."""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from ai_flags import api
+from ai_flags.api import PIPELINE, FlagProcessor, Invocation, ProcessResult
+from ai_flags.config import AiFlagsConfig, FlagConfig
+from ai_flags.config_loader import get_default_config, save_config
+from ai_flags.pipeline import Stage
+
+
+@pytest.fixture
+def temp_config(tmp_path, monkeypatch):
+    """Use temporary config file for tests."""
+    config_path = tmp_path / "config.yaml"
+    monkeypatch.setattr("ai_flags.config_loader.CONFIG_PATH", config_path)
+    monkeypatch.setattr("ai_flags.config_loader.CONFIG_DIR", tmp_path)
+    save_config(get_default_config())
+    return config_path
+
+
+def _context(output: dict) -> str:
+    return output["hookSpecificOutput"]["additionalContext"]
+
+
+class TestRun:
+    """Test FlagProcessor.run()."""
+
+    def test_returns_context_for_valid_flags(self, temp_config):
+        """Should return cleaned prompt, flags and context."""
+        result = FlagProcessor().run("my task -c -t")
+        assert isinstance(result, ProcessResult)
+        assert result.error is None
+        assert result.cleaned_prompt == "my task"
+        assert result.flags == ["c", "t"]
+        assert "<commit_instructions>" in result.context
+        assert "<test_instructions>" in result.context
+
+    def test_no_flags_sets_error(self, temp_config):
+        """Should report missing flags."""
+        result = FlagProcessor().run("my task")
+        assert result.error == "No flags detected"
+        assert result.flags == []
+        assert result.context == ""
+
+    def test_invalid_flags_sets_error(self, temp_config):
+        """Should report invalid flags."""
+        result = FlagProcessor().run("my task -x")
+        assert result.error == "Invalid or disabled flags"
+        assert result.flags == ["x"]
+
+    def test_permission_mode_passed_through(self, temp_config):
+        """Should only include -s context in plan mode."""
+        processor = FlagProcessor()
+        assert "<subagent_delegation>" in processor.run("task -s", "plan").context
+        assert processor.run("task -s", "default").context == ""
+
+
+class TestPipeline:
+    """Test the processing pipeline behind run() and process()."""
+
+    def test_stages_timed(self):
+        """Should time every stage that ran."""
+        invocation = FlagProcessor(AiFlagsConfig()).invoke(Invocation(prompt="task -c"))
+        assert invocation.result is not None and invocation.result.flags == ["c"]
+        assert set(invocation.stage_timings()) == set(PIPELINE.names)
+
+    def test_flagless_prompt_rejected_before_parsing(self, monkeypatch):
+        """Should not parse a prompt that can't end with a flag."""
+        monkeypatch.setattr("ai_flags.api.parse_trailing_flags", pytest.fail)
+        result = FlagProcessor(AiFlagsConfig()).run("word " * 100_000)
+        assert result.error == "No flags detected"
+
+    def test_flagless_prompt_rejected_before_config(self, tmp_path, monkeypatch):
+        """Should not load the config for a flagless prompt of a session without sticky flags."""
+        monkeypatch.setattr("ai_flags.sticky.STATE_PATH", tmp_path / "state.db")
+        monkeypatch.setattr("ai_flags.config_loader.resolve_config", pytest.fail)
+        output = FlagProcessor().process({"prompt": "just a question", "session_id": "s1"})
+        assert _context(output) == ""
+
+    def test_flagless_prompt_with_sticky_flags(self, tmp_path, monkeypatch):
+        """Should load the config when the session has sticky flags."""
+        monkeypatch.setattr("ai_flags.sticky.STATE_PATH", tmp_path / "state.db")
+        processor = FlagProcessor(AiFlagsConfig())
+        processor.process({"prompt": "task -c+", "session_id": "s1"})
+        output = processor.process({"prompt": "just a question", "session_id": "s1"})
+        assert "<commit_instructions>" in _context(output)
+
+    def test_custom_stage(self):
+        """Should run custom stages, which may change the flags."""
+
+        def drop_commit(invocation: Invocation) -> None:
+            invocation.flags = [flag for flag in invocation.flags if flag != "c"]
+
+        pipeline = PIPELINE.insert(Stage("drop-commit", drop_commit), after="parse")
+        result = FlagProcessor(AiFlagsConfig(), pipeline=pipeline).run("task -c -t")
+        assert result.flags == ["t"]
+        assert "<commit_instructions>" not in result.context
+
+    def test_custom_stage_short_circuit(self):
+        """Should skip to the final stages when a custom stage finishes the invocation."""
+
+        def refuse(invocation: Invocation) -> None:
+            invocation.finish(ProcessResult(cleaned_prompt=invocation.prompt, error="Refused"))
+
+        pipeline = PIPELINE.insert(Stage("refuse", refuse), before="parse")
+        output = FlagProcessor(AiFlagsConfig(), pipeline=pipeline).process({"prompt": "x -c"})
+        assert _context(output) == ""
+
+    def test_process_json_text(self):
+        """Should accept the hook payload as JSON text."""
+        processor = FlagProcessor(AiFlagsConfig())
+        assert "<commit_instructions>" in _context(processor.process('{"prompt": "x -c"}'))
+        assert _context(processor.process("not json")) == ""
+        assert _context(processor.process("[1, 2]")) == ""
+
+
+class TestPermissionModes:
+    """Test per-flag permission mode configuration."""
+
+    def test_flag_restricted_to_modes(self):
+        """Should drop a flag outside its configured modes."""
+        config = AiFlagsConfig(commit=FlagConfig(modes=["acceptEdits"]))
+        processor = FlagProcessor(config)
+        assert processor.run("task -c", "default").context == ""
+        assert "<commit_instructions>" in processor.run("task -c", "acceptEdits").context
+
+    def test_subagent_enabled_outside_plan(self):
+        """Should let config widen the subagent flag beyond plan mode."""
+        config = AiFlagsConfig(subagent=FlagConfig(modes=["plan", "default"]))
+        assert "<subagent_delegation>" in FlagProcessor(config).run("task -s", "default").context
+
+    def test_mode_content_variant(self):
+        """Should use the content variant for the current mode."""
+        config = AiFlagsConfig(commit=FlagConfig(mode_content={"plan": "Plan commits"}))
+        processor = FlagProcessor(config)
+        assert "Plan commits" in processor.run("task -c", "plan").context
+        assert "Plan commits" not in processor.run("task -c", "default").context
+
+    def test_unknown_mode_compiled_on_demand(self, temp_config):
+        """Should handle permission modes it doesn't know in advance."""
+        processor = FlagProcessor()
+        assert "<commit_instructions>" in processor.run("task -c", "someNewMode").context
+        assert "someNewMode" in processor._get_snapshot().tables
+
+
+class TestProcess:
+    """Test FlagProcessor.process()."""
+
+    def test_valid_hook_input(self, temp_config):
+        """Should return hook output with context."""
+        output = FlagProcessor().process({"prompt": "my task -c"})
+        assert output["hookSpecificOutput"]["hookEventName"] == "UserPromptSubmit"
+        assert "<flag_metadata>" in _context(output)
+        assert "<commit_instructions>" in _context(output)
+
+    def test_no_flags_returns_empty(self, temp_config):
+        """Should return empty context when no flags are present."""
+        assert _context(FlagProcessor().process({"prompt": "my task"})) == ""
+
+    def test_invalid_flags_returns_empty(self, temp_config):
+        """Should return empty context for invalid flags."""
+        assert _context(FlagProcessor().process({"prompt": "my task -x"})) == ""
+
+    def test_missing_prompt_returns_empty(self, temp_config):
+        """Should tolerate a payload without a prompt."""
+        assert _context(FlagProcessor().process({})) == ""
+
+    def test_error_returns_empty(self, temp_config, monkeypatch):
+        """Should degrade gracefully on unexpected errors."""
+
+        def boom(*args, **kwargs):
+            raise RuntimeError("boom")
+
+        monkeypatch.setattr("ai_flags.api.render_flags", boom)
+        assert _context(FlagProcessor().process({"prompt": "my task -c"})) == ""
+
+    def test_metadata_mode(self):
+        """Should echo the prompt only as the metadata setting allows."""
+        processor = FlagProcessor(AiFlagsConfig(metadata="flags-only"))
+        context = _context(processor.process({"prompt": "pasted log " * 1000 + "-c"}))
+        assert "pasted log" not in context
+        assert "Processed flags -c" in context
+
+        processor = FlagProcessor(AiFlagsConfig(metadata="none"))
+        context = _context(processor.process({"prompt": "my task -c"}))
+        assert context.startswith("<commit_instructions>")
+
+    def test_merged_blocks(self):
+        """Should merge the flag blocks into one when configured."""
+        processor = FlagProcessor(AiFlagsConfig(merge_blocks=True, macros={"x": ["c", "t"]}))
+        for prompt in ("task -c -t", "task -x"):
+            context = processor.run(prompt).context
+            assert context.startswith("<flag_instructions>")
+            assert context.count("<") == 2
+
+    def test_module_level_process(self, temp_config, monkeypatch):
+        """Should process with the shared default processor."""
+        monkeypatch.setattr(api, "_default_processor", None)
+        assert "<commit_instructions>" in _context(api.process({"prompt": "task -c"}))
+        assert api.get_processor() is api.get_processor()
+
+
+class TestConfigCaching:
+    """Test config and handler caching."""
+
+    def test_explicit_config_is_used(self, temp_config):
+        """Should use an explicit config without touching the file."""
+        config = AiFlagsConfig(commit=FlagConfig(content="Explicit commit"))
+        processor = FlagProcessor(config)
+        temp_config.unlink()
+        assert "Explicit commit" in processor.run("task -c").context
+
+    def test_config_cached_when_unchanged(self, temp_config, monkeypatch):
+        """Should not re-read the config while the file is unchanged."""
+        calls = []
+        original = api.config_loader._read_config_data
+
+        def counting_read(path):
+            calls.append(path)
+            return original(path)
+
+        monkeypatch.setattr(api.config_loader, "_read_config_data", counting_read)
+        api.config_loader.clear_config_cache()
+        processor = FlagProcessor()
+        for _ in range(5):
+            processor.run("task -c")
+        assert calls == [temp_config]
+
+    def test_handlers_cached(self, temp_config):
+        """Should reuse handler instances between calls."""
+        processor = FlagProcessor()
+        processor.run("task -c")
+        first = processor._get_snapshot().handlers
+        processor.run("task -c")
+        assert processor._get_snapshot().handlers is first
+
+    def test_reloads_when_file_changes(self, temp_config):
+        """Should pick up config changes on disk."""
+        processor = FlagProcessor()
+        assert processor.run("task -c").error is None
+
+        config = get_default_config()
+        config.commit.enabled = False
+        save_config(config)
+        # Make sure the signature changes even on coarse mtime filesystems
+        stat = os.stat(temp_config)
+        os.utime(temp_config, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+        assert processor.run("task -c").error == "Invalid or disabled flags"
+
+    def test_invalidate_forces_reload(self, temp_config):
+        """Should reload after invalidate()."""
+        processor = FlagProcessor()
+        first = processor.config
+        processor.invalidate()
+        assert processor.config is not first
+
+
+class TestProjectLayers:
+    """Test project config layers resolved from the hook's cwd."""
+
+    def test_cwd_layer_applies(self, temp_config, tmp_path):
+        """Should apply .ai-flags.yaml from the hook's cwd."""
+        project = tmp_path / "repo"
+        (project / "src").mkdir(parents=True)
+        (project / ".ai-flags.yaml").write_text("no_lint:\n  enabled: false\n")
+
+        processor = FlagProcessor()
+        output = processor.process({"prompt": "task -n", "cwd": str(project / "src")})
+        assert _context(output) == ""
+        assert "<no_lint_instructions>" in processor.run("task -n", cwd=str(tmp_path)).context
+
+    def test_directories_with_same_layers_share_handlers(self, temp_config, tmp_path):
+        """Should reuse handlers for directories resolving to the same layers."""
+        (tmp_path / "a").mkdir()
+        (tmp_path / "b").mkdir()
+        processor = FlagProcessor()
+        first = processor._get_snapshot(str(tmp_path / "a"))
+        assert processor._get_snapshot(str(tmp_path / "b")) is first
+
+    def test_snapshot_cache_is_lru(self, temp_config, tmp_path, monkeypatch):
+        """A recently used layer set should survive eviction."""
+        monkeypatch.setattr(api, "SNAPSHOT_CACHE_SIZE", 2)
+        dirs = []
+        for name in ("a", "b", "c"):
+            directory = tmp_path / name
+            directory.mkdir()
+            (directory / ".ai-flags.yaml").write_text(f"commit:\n  content: {name}\n")
+            dirs.append(str(directory))
+
+        processor = FlagProcessor()
+        hot = processor._get_snapshot(dirs[0])
+        processor._get_snapshot(dirs[1])
+        assert processor._get_snapshot(dirs[0]) is hot
+        processor._get_snapshot(dirs[2])  # Evicts "b", the least recently used
+        assert processor._get_snapshot(dirs[0]) is hot
+
+
+class TestThreadSafety:
+    """Test concurrent use of a single processor."""
+
+    def test_concurrent_process(self, temp_config):
+        """Should produce identical results from many threads."""
+        processor = FlagProcessor()
+        expected = processor.process({"prompt": "task -c -t"})
+
+        def worker():
+            return [processor.process({"prompt": "task -c -t"}) for _ in range(50)]
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            futures = [pool.submit(worker) for _ in range(8)]
+        # result() re-raises a worker's exception
+        results = [output for future in futures for output in future.result()]
+
+        assert len(results) == 400
+        assert all(result == expected for result in results)
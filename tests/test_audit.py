@@ -0,0 +1,168 @@
+"""Tests for the audit store."""
+
+import hashlib
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+
+from ai_flags import audit
+from ai_flags.api import FlagProcessor
+from ai_flags.cli import cli
+from ai_flags.config import AiFlagsConfig
+from ai_flags.config_loader import save_config
+
+
+@pytest.fixture
+def audit_dir(tmp_path, monkeypatch):
+    """Use a temporary audit directory and a config with auditing enabled."""
+    path = tmp_path / "audit"
+    monkeypatch.setattr("ai_flags.audit.AUDIT_DIR", path)
+    monkeypatch.setattr("ai_flags.config_loader.CONFIG_PATH", tmp_path / "config.yaml")
+    save_config(AiFlagsConfig(audit=True))
+    return path
+
+
+def _blobs(directory: Path) -> list[Path]:
+    return list((directory / "blobs").rglob("*.z"))
+
+
+class TestStore:
+    """Test recording and reading."""
+
+    def test_flag_mask_round_trip(self):
+        """Should encode flags as a bitmask."""
+        assert audit.flag_mask(["c", "t", "x"]) == (1 << 2) | (1 << 19) | (1 << 23)
+        assert audit.mask_flags(audit.flag_mask(["t", "c"])) == ["c", "t"]
+
+    def test_record_and_read(self, audit_dir):
+        """Should store the context by hash and a fixed-size record."""
+        audit.record("<commit_instructions>x</commit_instructions>", ["c"], "sess-1", "fix it -c")
+
+        r = audit.get_record(-1)
+        assert r.index == 0
+        assert r.session_id == "sess-1"
+        assert r.flags == ["c"]
+        assert r.prompt_hash == hashlib.sha256(b"fix it -c").hexdigest()
+        assert audit.load_blob(r.context_hash) == "<commit_instructions>x</commit_instructions>"
+        assert (audit_dir / "records-v1.bin").stat().st_size == audit.RECORD_SIZE
+
+    def test_identical_contexts_stored_once(self, audit_dir):
+        """Storage should grow with distinct contexts, not prompts."""
+        for i in range(50):
+            audit.record("same context", ["c"], "s", f"prompt {i}")
+        audit.record("other context", ["t"], "s", "prompt")
+
+        assert audit.count() == 51
+        assert len(_blobs(audit_dir)) == 2
+
+    def test_corrupt_blob_detected(self, audit_dir):
+        """Should refuse a blob that doesn't match its hash."""
+        audit.record("context", ["c"], "s", "p")
+        [blob] = _blobs(audit_dir)
+        blob.write_bytes(b"garbage")
+        with pytest.raises(ValueError):
+            audit.load_blob(audit.get_record(0).context_hash)
+
+    def test_missing_record(self, audit_dir):
+        """Should raise IndexError for unknown records."""
+        with pytest.raises(IndexError):
+            audit.get_record(0)
+
+    def test_unwritable_directory_ignored(self, tmp_path):
+        """Should never raise from record()."""
+        blocker = tmp_path / "file"
+        blocker.write_text("")
+        audit.record("context", ["c"], "s", "p", directory=blocker / "audit")
+
+    def test_concurrent_processes(self, audit_dir):
+        """Appends from separate processes should produce whole records."""
+        src = Path(__file__).resolve().parents[1] / "src"
+        env = {**os.environ, "PYTHONPATH": str(src)}
+        script = (
+            "from pathlib import Path\n"
+            "from ai_flags import audit\n"
+            "for i in range(50):\n"
+            f"    audit.record('ctx', ['c'], 's', str(i), directory=Path({str(audit_dir)!r}))\n"
+        )
+        procs = [subprocess.Popen([sys.executable, "-c", script], env=env) for _ in range(4)]
+        assert all(proc.wait(timeout=60) == 0 for proc in procs)
+
+        assert (audit_dir / "records-v1.bin").stat().st_size == 200 * audit.RECORD_SIZE
+        assert all(r.flags == ["c"] for r in audit.iter_records())
+
+
+class TestProcessorAudit:
+    """Test recording from FlagProcessor."""
+
+    def test_hook_invocation_recorded(self, audit_dir):
+        """Should record the injected flag context."""
+        processor = FlagProcessor(log_mode="hook")
+        processor.process({"prompt": "task -c -t", "session_id": "abc"})
+
+        r = audit.get_record(-1)
+        assert r.session_id == "abc"
+        assert r.flags == ["c", "t"]
+        assert r.prompt_hash == hashlib.sha256(b"task -c -t").hexdigest()
+        assert "<commit_instructions>" in audit.load_blob(r.context_hash)
+
+    def test_no_record_without_context(self, audit_dir):
+        """Should not record prompts without injected context."""
+        FlagProcessor().process({"prompt": "no flags here"})
+        FlagProcessor().process({"prompt": "task -x"})
+        assert audit.count() == 0
+
+    def test_disabled_by_default(self, audit_dir):
+        """Should not write anything unless enabled."""
+        save_config(AiFlagsConfig())
+        FlagProcessor().process({"prompt": "task -c"})
+        assert not audit_dir.exists()
+
+
+class TestCommands:
+    """Test 'ai-flags audit'."""
+
+    def test_show_latest(self, audit_dir):
+        """Should reconstruct the latest injection."""
+        FlagProcessor().process({"prompt": "task -c", "session_id": "abc"})
+        result = CliRunner().invoke(cli, ["audit", "show"])
+        assert result.exit_code == 0
+        assert "Session: abc" in result.output
+        assert "Flags:   -c" in result.output
+        assert "<commit_instructions>" in result.output
+
+    def test_show_by_index(self, audit_dir):
+        """Should show any past injection."""
+        processor = FlagProcessor()
+        processor.process({"prompt": "task -c"})
+        processor.process({"prompt": "task -t"})
+        result = CliRunner().invoke(cli, ["audit", "show", "0"])
+        assert "<commit_instructions>" in result.output
+        assert "<test_instructions>" not in result.output
+
+    def test_show_missing(self, audit_dir):
+        """Should fail for unknown records."""
+        result = CliRunner().invoke(cli, ["audit", "show", "5"])
+        assert result.exit_code == 1
+        assert "No audit record 5" in result.output
+
+    def test_list(self, audit_dir):
+        """Should list recent records, optionally per session."""
+        processor = FlagProcessor()
+        processor.process({"prompt": "task -c", "session_id": "one"})
+        processor.process({"prompt": "task -t", "session_id": "two"})
+
+        result = CliRunner().invoke(cli, ["audit", "list"])
+        assert result.exit_code == 0
+        assert len(result.output.splitlines()) == 2
+
+        result = CliRunner().invoke(cli, ["audit", "list", "--session", "two"])
+        assert result.output.splitlines()[0].split()[0] == "1"
+        assert "-t" in result.output
+
+    def test_list_empty(self, audit_dir):
+        """Should say when nothing was recorded."""
+        assert "No audit records" in CliRunner().invoke(cli, ["audit", "list"]).output
@@ -0,0 +1,101 @@
+"""Tests for the token budget."""
+
+from ai_flags.api import FlagProcessor
+from ai_flags.budget import estimate_tokens, fit_budget, fragment_tokens
+from ai_flags.config import AiFlagsConfig, FlagConfig
+from ai_flags.handlers.commit import SHORT_CONTENT as COMMIT_SHORT
+from ai_flags.handlers.test import SHORT_CONTENT as TEST_SHORT
+
+TABLE = {"c": "long " * 10, "t": "long " * 10, "d": "long " * 10}
+SHORT = {"c": "short", "t": "short"}
+
+
+class TestEstimateTokens:
+    """Test estimate_tokens()."""
+
+    def test_words_and_punctuation(self):
+        """Should count words and punctuation characters."""
+        assert estimate_tokens("") == 0
+        assert estimate_tokens("fix the bug") == 3
+        assert estimate_tokens("<tag>") == 3
+
+    def test_long_words_count_more(self):
+        """Should count long words as several tokens."""
+        assert estimate_tokens("internationalization") == 3
+
+    def test_large_text_uses_length(self):
+        """Should fall back to a length-based estimate for huge texts."""
+        assert estimate_tokens("a " * 100_000) == 50_000
+
+    def test_fragment_estimates_cached(self):
+        """Should cache estimates of static fragments."""
+        fragment = "<c>\nunique fragment for caching\n</c>"
+        before = fragment_tokens.cache_info().hits
+        fragment_tokens(fragment)
+        fragment_tokens(fragment)
+        assert fragment_tokens.cache_info().hits == before + 1
+
+
+class TestFitBudget:
+    """Test fit_budget()."""
+
+    def test_within_budget_unchanged(self):
+        """Should keep every full block when they fit."""
+        assert fit_budget(["c", "t"], TABLE, SHORT, {}, 100) == {
+            "c": TABLE["c"],
+            "t": TABLE["t"],
+        }
+
+    def test_short_variants_by_priority(self):
+        """Should compact the lowest-priority flag first."""
+        chosen = fit_budget(["c", "t"], TABLE, SHORT, {"c": 1}, 15)
+        assert chosen == {"c": TABLE["c"], "t": "short"}
+
+    def test_later_flags_compacted_first(self):
+        """Should compact later flags first among equal priorities."""
+        chosen = fit_budget(["c", "t"], TABLE, SHORT, {}, 15)
+        assert chosen == {"c": TABLE["c"], "t": "short"}
+
+    def test_drops_blocks_when_short_is_not_enough(self):
+        """Should drop the lowest-priority blocks once all are compacted."""
+        chosen = fit_budget(["c", "t", "d"], TABLE, SHORT, {"d": 5}, 11)
+        assert chosen == {"d": TABLE["d"], "c": "short"}
+
+
+class TestProcessorBudget:
+    """Test the token budget in FlagProcessor."""
+
+    def test_no_budget_keeps_full_content(self):
+        """Should report the estimated tokens without changing the context."""
+        result = FlagProcessor(AiFlagsConfig()).run("task -c -t")
+        assert COMMIT_SHORT not in result.context
+        assert result.tokens == estimate_tokens(result.context.replace("\n", " ")) > 0
+
+    def test_budget_uses_short_variants(self):
+        """Should fall back to compact variants to fit the budget."""
+        full = FlagProcessor(AiFlagsConfig()).run("task -c -t -d")
+        result = FlagProcessor(AiFlagsConfig(token_budget=full.tokens - 10)).run("task -c -t -d")
+        assert result.tokens <= full.tokens - 10
+        assert "<debug_instructions>" in result.context
+
+    def test_priority_keeps_full_content(self):
+        """A high-priority flag should keep its full content the longest."""
+        config = AiFlagsConfig(
+            token_budget=80, commit=FlagConfig(priority=10, content="Commit " * 40)
+        )
+        result = FlagProcessor(config).run("task -c -t")
+        assert "Commit " * 40 in result.context
+        assert f"<test_instructions>\n{TEST_SHORT}\n" in result.context
+
+    def test_custom_short_content(self):
+        """Should use the configured compact variant."""
+        config = AiFlagsConfig(
+            token_budget=15, commit=FlagConfig(content="x " * 50, short_content="Commit.")
+        )
+        assert "Commit." in FlagProcessor(config).run("task -c").context
+
+    def test_macro_over_budget_is_fitted(self):
+        """A lone macro over the budget should not use its pre-rendered context."""
+        config = AiFlagsConfig(token_budget=40, macros={"x": ["c", "t", "d", "n"]})
+        result = FlagProcessor(config).run("task -x")
+        assert 0 < result.tokens <= 40
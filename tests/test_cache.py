@@ -0,0 +1,266 @@
+"""Tests for the on-disk cache."""
+
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+from click.testing import CliRunner
+
+from ai_flags import cache, fingerprint, metrics
+from ai_flags.api import FlagProcessor
+from ai_flags.cache import DiskCache, cache_root, evict
+from ai_flags.cli import cli
+from ai_flags.config import AiFlagsConfig
+
+
+@pytest.fixture
+def root(tmp_path, monkeypatch):
+    """Use a temporary cache root and record evictions instead of spawning them."""
+    path = tmp_path / "cache"
+    monkeypatch.setenv("AI_FLAGS_CACHE_DIR", str(path))
+    return path
+
+
+@pytest.fixture
+def spawned(monkeypatch):
+    """Record background evictions instead of spawning processes."""
+    calls = []
+    monkeypatch.setattr(
+        "ai_flags.cache.evict_in_background", lambda directory, max_bytes: calls.append(directory)
+    )
+    return calls
+
+
+def age(path, seconds: float) -> None:
+    mtime = time.time() - seconds
+    os.utime(path, (mtime, mtime))
+
+
+class TestDiskCache:
+    """Test DiskCache."""
+
+    def test_round_trip(self, root, spawned):
+        """Should return what was stored, under the configured root."""
+        store = DiskCache("contexts")
+        store.set("key", b"value")
+        assert store.get("key") == b"value"
+        assert store.directory == root / "contexts"
+        assert cache_root() == root
+
+    def test_missing(self, root):
+        """Should miss for a key that was never stored."""
+        assert DiskCache("contexts").get("nope") is None
+
+    def test_overwrite(self, root, spawned):
+        """Should replace the previous value."""
+        store = DiskCache("contexts")
+        store.set("key", b"old")
+        store.set("key", b"new")
+        assert store.get("key") == b"new"
+
+    def test_namespaces_separate(self, root, spawned):
+        """Should keep the same key apart in different namespaces."""
+        DiskCache("a").set("key", b"1")
+        assert DiskCache("b").get("key") is None
+
+    def test_invalid_namespace(self):
+        """Should reject namespaces that aren't plain names."""
+        with pytest.raises(ValueError):
+            DiskCache("../escape")
+
+    def test_ttl(self, root, spawned, monkeypatch):
+        """Should miss once an entry has expired."""
+        store = DiskCache("git", ttl=10)
+        store.set("key", b"value")
+        assert store.get("key") == b"value"
+        monkeypatch.setattr("ai_flags.cache.time.time", lambda: time.monotonic() + 1e10)
+        assert store.get("key") is None
+
+    def test_ttl_override(self, root, spawned):
+        """Should use the per-entry ttl over the cache's."""
+        store = DiskCache("git", ttl=3600)
+        store.set("key", b"value", ttl=-1)
+        assert store.get("key") is None
+
+    def test_other_key_in_file(self, root, spawned):
+        """Should miss if the entry file holds another key."""
+        store = DiskCache("contexts")
+        store.set("a", b"value")
+        path_a, _ = store._path("a")
+        path_b, _ = store._path("b")
+        path_b.parent.mkdir(parents=True, exist_ok=True)
+        path_b.write_bytes(path_a.read_bytes())
+        assert store.get("b") is None
+
+    def test_damaged_file(self, root, spawned):
+        """Should miss for a truncated entry."""
+        store = DiskCache("contexts")
+        store.set("key", b"value")
+        store._path("key")[0].write_bytes(b"AI")
+        assert store.get("key") is None
+
+    def test_unwritable_root(self, tmp_path, spawned):
+        """Should ignore write errors."""
+        blocker = tmp_path / "file"
+        blocker.write_text("")
+        store = DiskCache("contexts", root=blocker)
+        store.set("key", b"value")
+        assert store.get("key") is None
+
+    def test_delete(self, root, spawned):
+        """Should remove an entry."""
+        store = DiskCache("contexts")
+        store.set("key", b"value")
+        store.delete("key")
+        assert store.get("key") is None
+
+    def test_stats(self, root, spawned):
+        """Should count hits, misses and writes."""
+        store = DiskCache("contexts")
+        store.get("key")
+        store.set("key", b"value")
+        store.get("key")
+        store.get("key")
+        stats = store.stats
+        assert (stats.hits, stats.misses, stats.writes) == (2, 1, 1)
+        assert stats.hit_rate == pytest.approx(2 / 3)
+
+    def test_hit_touches_old_entry(self, root, spawned):
+        """Should refresh the recency of an entry that is hit."""
+        store = DiskCache("contexts")
+        store.set("key", b"value")
+        path = store._path("key")[0]
+        age(path, 3600)
+        store.get("key")
+        assert time.time() - path.stat().st_mtime < 60
+
+
+class TestEviction:
+    """Test evict() and its background trigger."""
+
+    def test_write_triggers_background_eviction(self, root, spawned):
+        """Should hand eviction to the background after a write."""
+        DiskCache("contexts").set("key", b"value")
+        assert spawned == [root / "contexts"]
+
+    def test_least_recently_used_first(self, root, spawned):
+        """Should delete the oldest entries until the namespace fits."""
+        store = DiskCache("contexts")
+        for i, seconds in enumerate((30, 10, 20)):
+            store.set(f"k{i}", b"x" * 1000)
+            age(store._path(f"k{i}")[0], seconds)
+        assert evict(store.directory, 2500) == 1
+        assert store.get("k0") is None
+        assert store.get("k1") == b"x" * 1000
+        assert store.get("k2") == b"x" * 1000
+
+    def test_expired_first(self, root, spawned):
+        """Should delete expired entries even when under the cap."""
+        store = DiskCache("git")
+        store.set("old", b"value", ttl=-1)
+        store.set("new", b"value")
+        assert evict(store.directory, 1_000_000) == 1
+        assert not store._path("old")[0].exists()
+        assert store.get("new") == b"value"
+
+    def test_stale_temp_files(self, root, spawned):
+        """Should delete temp files left behind by crashed writers."""
+        store = DiskCache("contexts")
+        store.set("key", b"value")
+        temp = store._path("key")[0].with_name(".crashed.tmp")
+        temp.write_bytes(b"partial")
+        age(temp, 7200)
+        evict(store.directory, 1_000_000)
+        assert not temp.exists()
+
+    def test_stamped(self, root, monkeypatch):
+        """Should start at most one eviction per interval."""
+        calls = []
+        monkeypatch.setattr(subprocess, "Popen", lambda *args, **kwargs: calls.append(args))
+        store = DiskCache("contexts")
+        store.set("a", b"1")
+        store.set("b", b"2")
+        assert len(calls) == 1
+
+    def test_detached_process(self, root, spawned):
+        """Should evict when run as python -m ai_flags.cache."""
+        store = DiskCache("contexts")
+        for i in range(4):
+            store.set(f"k{i}", b"x" * 1000)
+        subprocess.run(
+            [sys.executable, "-m", "ai_flags.cache", str(store.directory), "2500"],
+            check=True,
+            env={**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)},
+        )
+        assert cache.usage()[0].entries == 2
+
+
+READER = """
+import sys
+from ai_flags.cache import DiskCache
+
+store = DiskCache("race")
+bad = 0
+for _ in range(2000):
+    value = store.get("key")
+    if value is not None and value != value[:1] * len(value):
+        bad += 1
+print(bad)
+"""
+
+
+class TestConcurrency:
+    """Test lock-free reads against concurrent writers."""
+
+    def test_readers_never_see_partial_entries(self, root, spawned):
+        """Should return complete values while another process rewrites them."""
+        env = {**os.environ, "PYTHONPATH": os.pathsep.join(sys.path)}
+        reader = subprocess.Popen(
+            [sys.executable, "-c", READER], env=env, stdout=subprocess.PIPE, text=True
+        )
+        store = DiskCache("race")
+        while reader.poll() is None:
+            for letter in b"ab":
+                store.set("key", bytes([letter]) * 200_000)
+        assert reader.stdout is not None
+        assert reader.stdout.read().strip() == "0"
+
+
+class TestCli:
+    """Test `ai-flags cache`."""
+
+    def test_stats_empty(self, root):
+        """Should say so when nothing is cached."""
+        assert "No cached entries" in CliRunner().invoke(cli, ["cache", "stats"]).output
+
+    def test_stats_hit_rate(self, root, spawned, tmp_path, monkeypatch):
+        """Should show the lookups that processes recorded in the metrics."""
+        monkeypatch.setattr("ai_flags.metrics.METRICS_PATH", tmp_path / "metrics.bin")
+        project = tmp_path / "project"
+        project.mkdir()
+        (project / "Cargo.toml").write_text("")
+        processor = FlagProcessor(AiFlagsConfig(metrics=True))
+        for _ in range(2):
+            fingerprint.clear_memory_cache()
+            processor.run("task -t", cwd=str(project))
+
+        assert metrics.snapshot().cache["projects"] == (1, 1, 1)
+        output = CliRunner().invoke(cli, ["cache", "stats"]).output
+        assert "projects" in output and "1 hits" in output and "(50% hit rate)" in output
+
+    def test_stats_and_clear(self, root, spawned):
+        """Should list namespaces and clear them."""
+        DiskCache("contexts").set("key", b"value")
+        runner = CliRunner()
+
+        result = runner.invoke(cli, ["cache", "stats"])
+        assert result.exit_code == 0
+        assert f"Cache root: {root}" in result.output
+        assert "contexts" in result.output and "1 entries" in result.output
+
+        result = runner.invoke(cli, ["cache", "clear"])
+        assert result.exit_code == 0
+        assert "Removed 1 cache entries" in result.output
+        assert "0 entries" in runner.invoke(cli, ["cache", "stats"]).output
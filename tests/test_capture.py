@@ -0,0 +1,145 @@
+"""Tests for recent failure output capture."""
+
+import json
+import os
+import time
+
+import pytest
+
+from ai_flags import capture
+from ai_flags.api import FlagProcessor
+from ai_flags.capture import capture_failures, render_tail
+from ai_flags.config import AiFlagsConfig, DebugCaptureConfig
+
+LASTFAILED = ".pytest_cache/v/cache/lastfailed"
+
+
+def write(path, data: bytes, age: float = 0) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    if age:
+        mtime = time.time() - age
+        os.utime(path, (mtime, mtime))
+
+
+class TestRenderTail:
+    """Test render_tail()."""
+
+    def test_lastfailed_node_ids(self, tmp_path):
+        """Should list the failed test ids of pytest's lastfailed file."""
+        path = tmp_path / "lastfailed"
+        write(
+            path, json.dumps({"tests/test_a.py::test_one": True, "tests/test_b.py": True}).encode()
+        )
+        text = render_tail(str(path), 8192, "lastfailed")
+        assert text == "Failed tests (lastfailed):\ntests/test_a.py::test_one\ntests/test_b.py"
+
+    def test_lastfailed_cut_off(self, tmp_path):
+        """Should keep only the complete entries of a cut-off file."""
+        path = tmp_path / "lastfailed"
+        ids = {f"tests/test_{i:03}.py::test_x": True for i in range(100)}
+        write(path, json.dumps(ids, indent=2).encode())
+        text = render_tail(str(path), 200, "lastfailed")
+        assert text.splitlines()[-1] == "tests/test_099.py::test_x"
+        assert all(line.startswith("tests/test_0") for line in text.splitlines()[1:])
+
+    def test_log_tail_strips_ansi(self, tmp_path):
+        """Should return the last complete lines of a log without terminal colours."""
+        path = tmp_path / "run.log"
+        write(path, b"x" * 10_000 + b"\n\x1b[31mFAILED\x1b[0m test_a\n")
+        text = render_tail(str(path), 100, "run.log")
+        assert text == "Last 23 bytes of run.log:\nFAILED test_a"
+        assert "\x1b" not in text
+
+    def test_empty_file(self, tmp_path):
+        """Should render nothing for an empty file."""
+        path = tmp_path / "run.log"
+        write(path, b"")
+        assert render_tail(str(path), 100, "run.log") == ""
+
+
+class TestCaptureFailures:
+    """Test capture_failures()."""
+
+    def test_no_sources(self, tmp_path):
+        """Should capture nothing without configured sources."""
+        assert capture_failures(str(tmp_path), DebugCaptureConfig()) == ""
+
+    def test_missing_source(self, tmp_path):
+        """Should skip sources that don't exist."""
+        settings = DebugCaptureConfig(sources=[LASTFAILED])
+        assert capture_failures(str(tmp_path), settings) == ""
+
+    def test_newest_first_up_to_max_files(self, tmp_path):
+        """Should read the most recently modified matches only."""
+        for i, age in enumerate((30, 10, 20)):
+            write(tmp_path / "logs" / f"{i}.log", f"log {i}".encode(), age=age)
+        settings = DebugCaptureConfig(sources=["logs/*.log"], max_files=2)
+        text = capture_failures(str(tmp_path), settings)
+        assert text.index("log 1") < text.index("log 2")
+        assert "log 0" not in text
+
+    def test_old_files_skipped(self, tmp_path):
+        """Should ignore files older than max_age."""
+        write(tmp_path / "old.log", b"stale", age=7200)
+        write(tmp_path / "new.log", b"fresh")
+        settings = DebugCaptureConfig(sources=["*.log"], max_age=3600)
+        text = capture_failures(str(tmp_path), settings)
+        assert "fresh" in text
+        assert "stale" not in text
+
+    def test_total_cap(self, tmp_path):
+        """Should stop reading once max_total_bytes are used."""
+        for i in range(3):
+            write(tmp_path / f"{i}.log", b"y" * 1000, age=i)
+        settings = DebugCaptureConfig(sources=["*.log"], max_bytes=600, max_total_bytes=900)
+        text = capture_failures(str(tmp_path), settings)
+        assert text.count("bytes of") == 2
+        assert "Last 300 bytes of 1.log" in text
+
+    def test_deadline(self, tmp_path, monkeypatch):
+        """Should stop reading once the deadline has passed."""
+        for i in range(3):
+            write(tmp_path / f"{i}.log", b"output", age=i)
+        real_render = capture.render_tail
+
+        def slow_render(*args):
+            time.sleep(0.02)
+            return real_render(*args)
+
+        monkeypatch.setattr("ai_flags.capture.render_tail", slow_render)
+        settings = DebugCaptureConfig(sources=["*.log"], deadline_ms=10)
+        assert capture_failures(str(tmp_path), settings).count("bytes of") == 1
+
+    def test_cached_until_changed(self, tmp_path, monkeypatch):
+        """Should reuse a rendered tail until the file changes."""
+        path = tmp_path / "run.log"
+        write(path, b"first", age=10)
+        settings = DebugCaptureConfig(sources=["run.log"])
+        assert "first" in capture_failures(str(tmp_path), settings)
+
+        monkeypatch.setattr("ai_flags.capture.render_tail", pytest.fail)
+        assert "first" in capture_failures(str(tmp_path), settings)
+
+        monkeypatch.undo()
+        write(path, b"second run")
+        assert "second run" in capture_failures(str(tmp_path), settings)
+
+
+class TestDebugFlag:
+    """Test failure output in -d."""
+
+    def test_included_when_configured(self, tmp_path):
+        """Should append the failure output to -d."""
+        write(tmp_path / LASTFAILED, b'{"tests/test_a.py::test_one": true}')
+        config = AiFlagsConfig(debug_capture=DebugCaptureConfig(sources=[LASTFAILED]))
+        context = FlagProcessor(config).run("fix it -d", cwd=str(tmp_path)).context
+        assert "Recent failure output in this project:" in context
+        assert "tests/test_a.py::test_one" in context
+        assert context.index("test_one") < context.index("</debug_instructions>")
+
+    def test_off_by_default(self, tmp_path):
+        """Should not read anything without configured sources."""
+        write(tmp_path / LASTFAILED, b'{"tests/test_a.py::test_one": true}')
+        context = FlagProcessor(AiFlagsConfig()).run("fix it -d", cwd=str(tmp_path)).context
+        assert "test_one" not in context
@@ -1,8 +1,13 @@
 """Integration tests for CLI commands."""
 
 import json
+import os
+import subprocess
+import sys
 import pytest
+import yaml
 from click.testing import CliRunner
+from pathlib import Path
 from unittest.mock import patch
 
 from ai_flags.cli import cli
@@ -252,6 +257,23 @@ class TestHandleCommand:
         # This is expected behavior in CLI mode
         assert result.exit_code != 0
 
+    def test_optional_modules_not_imported(self, tmp_path):
+        """Should not import auditing, metrics or remote config for a default hook run."""
+        src = Path(__file__).resolve().parents[1] / "src"
+        env = {**os.environ, "HOME": str(tmp_path), "PYTHONPATH": str(src)}
+        script = (
+            "import sys\n"
+            "from ai_flags.cli import cli\n"
+            "from click.testing import CliRunner\n"
+            "CliRunner().invoke(cli, ['handle'], input='{\"prompt\": \"task -c\"}')\n"
+            "modules = ('ai_flags.audit', 'ai_flags.metrics', 'ai_flags.remote')\n"
+            "print([m for m in modules if m in sys.modules])\n"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", script], env=env, capture_output=True, text=True, check=True
+        )
+        assert result.stdout.strip() == "[]"
+
 
 class TestConfigCommands:
     """Test 'ai-flags config' commands."""
@@ -264,6 +286,16 @@ class TestConfigCommands:
         assert "-s" in result.output or "subagent" in result.output
         assert "-c" in result.output or "commit" in result.output
 
+    def test_config_show_environment(self, runner, temp_config, monkeypatch):
+        """Should name the environment source and the variables used."""
+        monkeypatch.setenv("AI_FLAGS_CONFIG", "env")
+        monkeypatch.setenv("AI_FLAGS_DISABLED", "c")
+        result = runner.invoke(cli, ["config", "show"])
+        assert result.exit_code == 0
+        assert "Config source: environment only (AI_FLAGS_CONFIG=env)" in result.output
+        assert "Environment: AI_FLAGS_DISABLED" in result.output
+        assert "-c (commit    ): ✗ disabled" in result.output
+
     def test_config_set_enable(self, runner, temp_config):
         """Should enable a flag."""
         result = runner.invoke(cli, ["config", "set", "s", "enabled"])
@@ -282,6 +314,24 @@ class TestConfigCommands:
         assert result.exit_code == 0
         assert "disabled" in result.output
 
+    def test_config_set_ignores_environment(self, runner, temp_config, monkeypatch):
+        """Should not copy AI_FLAGS_* overrides into config.yaml."""
+        monkeypatch.setenv("AI_FLAGS_DISABLED", "n,s")
+        result = runner.invoke(cli, ["config", "set", "c", "disabled"])
+        assert result.exit_code == 0
+        data = yaml.safe_load(temp_config.read_text())
+        assert data["commit"]["enabled"] is False
+        assert data["subagent"]["enabled"] is True
+        assert data["no_lint"]["enabled"] is True
+
+    def test_config_set_invalid_file(self, runner, temp_config):
+        """Should refuse to overwrite a config file it can't read."""
+        temp_config.write_text("token_budget: -1\n")
+        result = runner.invoke(cli, ["config", "set", "c", "disabled"])
+        assert result.exit_code == 1
+        assert "Invalid config" in result.output
+        assert temp_config.read_text() == "token_budget: -1\n"
+
     def test_config_reset(self, runner, temp_config):
         """Should reset config to defaults."""
         # First disable a flag
@@ -1,14 +1,25 @@
 """Tests for configuration loading and saving."""
 
+import os
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
 import pytest
 import yaml
+from pydantic import ValidationError
 
 from ai_flags.config import AiFlagsConfig, FlagConfig
+from ai_flags import config_loader
 from ai_flags.config_loader import (
+    config_write_lock,
     load_config,
     save_config,
     reset_config,
     get_default_config,
+    merge_config_data,
+    resolve_config,
 )
 
 
@@ -290,6 +301,12 @@ class TestAiFlagsConfig:
         assert config.debug.content is None
         assert config.no_lint.content is None
 
+    def test_metadata_mode_validated(self):
+        """Should reject unknown metadata modes."""
+        assert AiFlagsConfig(metadata="truncated:200").metadata == "truncated:200"
+        with pytest.raises(ValidationError):
+            AiFlagsConfig(metadata="truncated:lots")
+
 
 class TestFlagConfig:
     """Test FlagConfig model."""
@@ -382,3 +399,299 @@ class TestConfigPersistence:
         assert "false" in content.lower()
         # Should not use flow style (inline) format
         assert not content.startswith("{")
+
+
+class TestMergeConfigData:
+    """Test merge_config_data()."""
+
+    def test_nested_dicts_merged(self):
+        """Should merge nested flag dicts field by field."""
+        base = {"commit": {"enabled": True, "content": "Base"}}
+        override = {"commit": {"enabled": False}}
+        assert merge_config_data(base, override) == {
+            "commit": {"enabled": False, "content": "Base"}
+        }
+
+    def test_inputs_not_mutated(self):
+        """Should not modify its arguments."""
+        base = {"commit": {"enabled": True}}
+        merge_config_data(base, {"commit": {"enabled": False}})
+        assert base == {"commit": {"enabled": True}}
+
+
+class TestProjectLayers:
+    """Test project-level .ai-flags.yaml/.toml layers."""
+
+    @pytest.fixture
+    def project(self, tmp_path, temp_config_path):
+        """Create a nested project directory with a global config."""
+        config = get_default_config()
+        config.commit.content = "Global commit"
+        save_config(config)
+        nested = tmp_path / "repo" / "pkg" / "src"
+        nested.mkdir(parents=True)
+        return tmp_path / "repo"
+
+    def test_no_cwd_ignores_layers(self, project):
+        """Should only use the global config without cwd."""
+        (project / ".ai-flags.yaml").write_text("no_lint:\n  enabled: false\n")
+        assert load_config().no_lint.enabled
+
+    def test_layer_in_parent_applies(self, project):
+        """Should merge a layer from a parent directory over the global config."""
+        (project / ".ai-flags.yaml").write_text("no_lint:\n  enabled: false\n")
+        config = load_config(cwd=project / "pkg" / "src")
+        assert not config.no_lint.enabled
+        # Untouched fields keep the global values
+        assert config.commit.content == "Global commit"
+
+    def test_closest_layer_wins(self, project):
+        """Should let the closest directory override outer ones."""
+        (project / ".ai-flags.yaml").write_text("test:\n  content: Outer\n")
+        (project / "pkg" / ".ai-flags.yaml").write_text("test:\n  content: Inner\n")
+        resolved = resolve_config(project / "pkg" / "src")
+        assert resolved.config.test.content == "Inner"
+        assert resolved.layers[-2:] == (
+            project / ".ai-flags.yaml",
+            project / "pkg" / ".ai-flags.yaml",
+        )
+
+    def test_toml_layer(self, project):
+        """Should read TOML layers."""
+        (project / ".ai-flags.toml").write_text("[debug]\nenabled = false\n")
+        assert not load_config(cwd=project).debug.enabled
+
+    def test_broken_layer_skipped(self, project):
+        """Should ignore an invalid layer but keep the global config."""
+        (project / ".ai-flags.yaml").write_text("commit:\n  enabled: [not, a, bool]\n")
+        config = load_config(cwd=project)
+        assert config.commit.enabled
+        assert config.commit.content == "Global commit"
+
+    def test_returns_private_copy(self, project):
+        """Should return an independent instance on every call."""
+        first = load_config(cwd=project)
+        first.commit.enabled = False
+        assert load_config(cwd=project).commit.enabled
+
+
+class TestResolveCache:
+    """Test caching of resolved configs."""
+
+    @pytest.fixture
+    def counting_reads(self, monkeypatch):
+        """Count config file reads."""
+        calls = []
+        original = config_loader._read_config_data
+
+        def counting_read(path):
+            calls.append(path)
+            return original(path)
+
+        monkeypatch.setattr(config_loader, "_read_config_data", counting_read)
+        config_loader.clear_config_cache()
+        return calls
+
+    def test_cached_while_unchanged(self, tmp_path, temp_config_path, counting_reads):
+        """Should not re-read files while nothing changed."""
+        save_config(get_default_config())
+        (tmp_path / ".ai-flags.yaml").write_text("debug:\n  enabled: false\n")
+        counting_reads.clear()
+
+        first = resolve_config(tmp_path)
+        assert resolve_config(tmp_path) is first
+        assert len(counting_reads) == 2
+
+    def test_new_layer_detected(self, tmp_path, temp_config_path, counting_reads):
+        """Should notice a layer created after a negative lookup."""
+        assert resolve_config(tmp_path).config.debug.enabled
+        (tmp_path / ".ai-flags.yaml").write_text("debug:\n  enabled: false\n")
+        assert not resolve_config(tmp_path).config.debug.enabled
+
+    def test_removed_layer_detected(self, tmp_path, temp_config_path):
+        """Should notice a layer that was deleted."""
+        layer = tmp_path / ".ai-flags.yaml"
+        layer.write_text("debug:\n  enabled: false\n")
+        assert not resolve_config(tmp_path).config.debug.enabled
+        layer.unlink()
+        assert resolve_config(tmp_path).config.debug.enabled
+
+    def test_probes_include_negative_lookups(self, tmp_path, temp_config_path):
+        """Should record missing candidate files for revalidation."""
+        resolved = resolve_config(tmp_path)
+        missing = [path for path, signature in resolved.probes if signature is None]
+        assert tmp_path / ".ai-flags.yaml" in missing
+        assert tmp_path / ".ai-flags.toml" in missing
+
+    def test_relative_cwd_follows_chdir(self, tmp_path, temp_config_path, monkeypatch):
+        """A relative cwd should resolve against the current directory on every call."""
+        (tmp_path / "a").mkdir()
+        (tmp_path / "b").mkdir()
+        (tmp_path / "b" / ".ai-flags.yaml").write_text("debug:\n  enabled: false\n")
+
+        monkeypatch.chdir(tmp_path / "a")
+        assert resolve_config(".").config.debug.enabled
+        monkeypatch.chdir(tmp_path / "b")
+        assert not resolve_config(".").config.debug.enabled
+
+    def test_lru_eviction(self, tmp_path, temp_config_path, monkeypatch):
+        """Should keep at most RESOLVE_CACHE_SIZE entries."""
+        monkeypatch.setattr(config_loader, "RESOLVE_CACHE_SIZE", 2)
+        config_loader.clear_config_cache()
+        for name in ("a", "b", "c"):
+            (tmp_path / name).mkdir()
+            resolve_config(tmp_path / name)
+        keys = [cwd for _, cwd, _ in config_loader._resolve_cache]
+        assert keys == [str(tmp_path / "b"), str(tmp_path / "c")]
+
+
+INCREMENT_SCRIPT = """
+from ai_flags.config_loader import config_write_lock, load_config, save_config
+
+for _ in range({count}):
+    with config_write_lock():
+        cfg = load_config()
+        cfg.commit.content = str(int(cfg.commit.content or "0") + 1)
+        save_config(cfg)
+"""
+
+READER_SCRIPT = """
+import os
+import threading
+import time
+from pathlib import Path
+
+from ai_flags.config_loader import load_config
+
+path = Path({path!r})
+expected_dir = Path({expected_dir!r})
+expected = {{(expected_dir / name).read_text() for name in ("first.expected", "second.expected")}}
+deadline = time.monotonic() + 20  # Wall-clock cap in case the writer dies
+counts = [0, 0]
+lock = threading.Lock()
+
+
+def running():
+    return not os.path.exists({stop!r}) and time.monotonic() < deadline
+
+
+def raw_reader():
+    reads = bad = 0
+    while running():
+        with open(path) as f:
+            if f.read() not in expected:
+                bad += 1
+        reads += 1
+        time.sleep(0.05)
+    with lock:
+        counts[0] += reads
+        counts[1] += bad
+
+
+def config_reader():
+    bad = 0
+    while running():
+        # load_config() would silently fall back to defaults on a partial file
+        if load_config(path).commit.enabled:
+            bad += 1
+        time.sleep(0.05)
+    with lock:
+        counts[1] += bad
+
+
+threads = [threading.Thread(target=raw_reader) for _ in range(50)]
+threads.append(threading.Thread(target=config_reader))
+for thread in threads:
+    thread.start()
+for thread in threads:
+    thread.join()
+print(counts[0], counts[1])
+"""
+
+
+class TestConcurrentWrites:
+    """Test atomic writes and writer serialization."""
+
+    def test_save_leaves_no_temp_files(self, temp_config_path):
+        """Should leave only the config and its lock file behind."""
+        save_config(get_default_config())
+        names = sorted(p.name for p in temp_config_path.parent.iterdir())
+        assert names == ["config.yaml", "config.yaml.lock"]
+
+    def test_save_replaces_file(self, temp_config_path):
+        """Should replace the file rather than rewriting it in place."""
+        save_config(get_default_config())
+        first_inode = temp_config_path.stat().st_ino
+        # Keep the old inode alive so it can't be reused for the new file
+        with open(temp_config_path):
+            save_config(get_default_config())
+            assert temp_config_path.stat().st_ino != first_inode
+
+    def test_readers_never_see_partial_config(self, temp_config_path, tmp_path):
+        """Hundreds of concurrent readers should only ever see complete configs."""
+        first = get_default_config()
+        first.commit.enabled = False
+        first.commit.content = "a" * 20_000
+        second = get_default_config()
+        second.commit.enabled = False
+        second.test.content = "b" * 30_000
+        save_config(second)
+        (tmp_path / "second.expected").write_text(temp_config_path.read_text())
+        save_config(first)
+        (tmp_path / "first.expected").write_text(temp_config_path.read_text())
+
+        # Readers run in separate processes so they can't starve the writer of the GIL
+        stop_file = tmp_path / "stop"
+        script = READER_SCRIPT.format(
+            path=str(temp_config_path), expected_dir=str(tmp_path), stop=str(stop_file)
+        )
+        src = Path(__file__).resolve().parents[1] / "src"
+        env = {**os.environ, "PYTHONPATH": str(src)}
+        readers = [
+            subprocess.Popen(
+                [sys.executable, "-c", script], env=env, stdout=subprocess.PIPE, text=True
+            )
+            for _ in range(4)
+        ]
+        try:
+            for i in range(50):
+                save_config(second if i % 2 else first)
+        finally:
+            stop_file.touch()
+            outputs = [proc.communicate(timeout=60)[0] for proc in readers]
+
+        assert all(proc.returncode == 0 for proc in readers), outputs
+        reads = [int(out.split()[0]) for out in outputs]
+        bad_reads = [int(out.split()[1]) for out in outputs]
+        assert bad_reads == [0, 0, 0, 0]
+        assert sum(reads) >= 200
+
+    def test_locked_updates_from_threads_not_lost(self, temp_config_path):
+        """Concurrent locked read-modify-write cycles should all be applied."""
+        save_config(get_default_config())
+
+        def increment():
+            for _ in range(20):
+                with config_write_lock():
+                    cfg = load_config()
+                    cfg.commit.content = str(int(cfg.commit.content or "0") + 1)
+                    save_config(cfg)
+
+        threads = [threading.Thread(target=increment) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert load_config().commit.content == "160"
+
+    def test_locked_updates_from_processes_not_lost(self, tmp_path):
+        """The fcntl lock should serialize writers in separate processes."""
+        src = Path(__file__).resolve().parents[1] / "src"
+        env = {**os.environ, "HOME": str(tmp_path), "PYTHONPATH": str(src)}
+        script = INCREMENT_SCRIPT.format(count=10)
+        procs = [subprocess.Popen([sys.executable, "-c", script], env=env) for _ in range(4)]
+        assert all(proc.wait(timeout=60) == 0 for proc in procs)
+
+        config_path = tmp_path / ".config" / "ai-flags" / "config.yaml"
+        assert load_config(config_path).commit.content == "40"
@@ -0,0 +1,131 @@
+"""Tests for transcript-aware deduplication."""
+
+import json
+
+import pytest
+
+from ai_flags.api import FlagProcessor
+from ai_flags.config import AiFlagsConfig, DedupConfig
+from ai_flags.dedup import REFERENCE_NOTE, recently_injected, reference_block
+
+
+def _user(text: str) -> dict:
+    return {"type": "user", "message": {"role": "user", "content": text}}
+
+
+def _injection(context: str) -> dict:
+    return {"type": "attachment", "attachment": {"type": "hook", "content": context}}
+
+
+def _write_transcript(path, entries) -> None:
+    # Compact separators, like Claude Code's transcript writer
+    path.write_text("".join(json.dumps(e, separators=(",", ":")) + "\n" for e in entries))
+
+
+@pytest.fixture
+def processor():
+    return FlagProcessor(AiFlagsConfig(dedup=DedupConfig(enabled=True, turns=2)))
+
+
+class TestRecentlyInjected:
+    """Test recently_injected()."""
+
+    def test_finds_block(self, tmp_path):
+        """Should find a block injected in a recent turn."""
+        block = '<t>\nWrite "tests"\n</t>'
+        transcript = tmp_path / "t.jsonl"
+        _write_transcript(transcript, [_user("task"), _injection(block)])
+        assert recently_injected(transcript, {"t": block, "c": "<c>\nx\n</c>"}, 5, 65536) == {"t"}
+
+    def test_respects_turn_limit(self, tmp_path):
+        """Should not look further back than the configured number of turns."""
+        block = "<t>\ntests\n</t>"
+        transcript = tmp_path / "t.jsonl"
+        _write_transcript(
+            transcript, [_injection(block), _user("one"), _user("two"), _user("three")]
+        )
+        assert recently_injected(transcript, {"t": block}, 2, 65536) == set()
+        assert recently_injected(transcript, {"t": block}, 4, 65536) == {"t"}
+
+    def test_tool_results_are_not_turns(self, tmp_path):
+        """Tool results recorded as user messages should not count as turns."""
+        block = "<t>\ntests\n</t>"
+        tool_result = {"type": "user", "message": {"content": [{"type": "tool_result"}]}}
+        transcript = tmp_path / "t.jsonl"
+        _write_transcript(transcript, [_injection(block), tool_result, tool_result])
+        assert recently_injected(transcript, {"t": block}, 1, 65536) == {"t"}
+
+    def test_respects_byte_bound(self, tmp_path):
+        """Should not read beyond max_bytes from the end."""
+        block = "<t>\ntests\n</t>"
+        transcript = tmp_path / "t.jsonl"
+        _write_transcript(transcript, [_injection(block), _injection("x" * 5000)])
+        assert recently_injected(transcript, {"t": block}, 5, 2048) == set()
+
+    def test_missing_transcript(self, tmp_path):
+        """Should treat an unreadable transcript as having no injections."""
+        assert (
+            recently_injected(tmp_path / "missing.jsonl", {"t": "<t>\nx\n</t>"}, 5, 4096) == set()
+        )
+
+
+class TestReferenceBlock:
+    """Test reference_block()."""
+
+    def test_keeps_tags(self):
+        """Should keep the tags and replace the body."""
+        assert reference_block("<t>\nlong\nbody\n</t>") == f"<t>\n{REFERENCE_NOTE}\n</t>"
+
+
+class TestProcessorDedup:
+    """Test deduplication in FlagProcessor."""
+
+    def test_repeated_block_replaced(self, processor, tmp_path):
+        """Should emit a reference for a block injected in a recent turn."""
+        first = processor.run("task -t -c").context
+        transcript = tmp_path / "t.jsonl"
+        _write_transcript(transcript, [_user("task"), _injection(first)])
+
+        context = processor.run("next -t -d", transcript_path=str(transcript)).context
+        assert f"<test_instructions>\n{REFERENCE_NOTE}\n</test_instructions>" in context
+        assert "<debug_instructions>\n" + REFERENCE_NOTE not in context
+
+    def test_disabled_by_default(self, tmp_path):
+        """Should leave the context alone unless enabled."""
+        processor = FlagProcessor(AiFlagsConfig())
+        first = processor.run("task -t").context
+        transcript = tmp_path / "t.jsonl"
+        _write_transcript(transcript, [_injection(first)])
+        assert processor.run("task -t", transcript_path=str(transcript)).context == first
+
+    def test_hook_input_transcript_path(self, processor, tmp_path):
+        """Should take the transcript from the hook payload."""
+        first = processor.run("task -c").context
+        transcript = tmp_path / "t.jsonl"
+        _write_transcript(transcript, [_injection(first)])
+
+        output = processor.process({"prompt": "again -c", "transcript_path": str(transcript)})
+        assert REFERENCE_NOTE in output["hookSpecificOutput"]["additionalContext"]
+
+    def test_lone_macro_deduplicated(self, tmp_path):
+        """Should not use the pre-rendered macro context when dedup applies."""
+        config = AiFlagsConfig(dedup=DedupConfig(enabled=True), macros={"x": ["c", "t"]})
+        processor = FlagProcessor(config)
+        first = processor.run("task -c").context
+        transcript = tmp_path / "t.jsonl"
+        _write_transcript(transcript, [_injection(first)])
+
+        context = processor.run("task -x", transcript_path=str(transcript)).context
+        assert f"<commit_instructions>\n{REFERENCE_NOTE}" in context
+        assert "<test_instructions>\n" + REFERENCE_NOTE not in context
+
+    def test_merged_blocks_found(self, tmp_path):
+        """Should recognize blocks that were injected merged into one."""
+        processor = FlagProcessor(AiFlagsConfig(dedup=DedupConfig(enabled=True), merge_blocks=True))
+        first = processor.run("task -c -t").context
+        transcript = tmp_path / "t.jsonl"
+        _write_transcript(transcript, [_injection(first)])
+
+        context = processor.run("task -c -d", transcript_path=str(transcript)).context
+        assert f"{REFERENCE_NOTE}\n\n" in context
+        assert "debug" in context.lower()
@@ -0,0 +1,183 @@
+"""Tests for PreToolUse enforcement of -n."""
+
+import json
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+
+from ai_flags import enforce
+from ai_flags.api import FlagProcessor
+from ai_flags.cli import cli
+from ai_flags.config import AiFlagsConfig
+
+PATTERN = enforce.compile_pattern(enforce.DEFAULT_LINT_COMMANDS)
+
+
+@pytest.fixture
+def marker_dir(tmp_path, monkeypatch):
+    """Use a temporary marker directory and sticky state."""
+    path = tmp_path / "no-lint"
+    monkeypatch.setattr("ai_flags.enforce.MARKER_DIR", path)
+    monkeypatch.setattr("ai_flags.sticky.STATE_PATH", tmp_path / "state.db")
+    return path
+
+
+def _bash(command: str, session_id: str = "s1") -> dict:
+    return {"session_id": session_id, "tool_name": "Bash", "tool_input": {"command": command}}
+
+
+class TestPattern:
+    """Test compile_pattern()."""
+
+    @pytest.mark.parametrize(
+        "command",
+        [
+            "ruff check .",
+            "uv run ruff check src",
+            "cd src && uv run mypy .",
+            ".venv/bin/pyright",
+            "npx eslint src/",
+            "python -m mypy pkg",
+            "cargo  clippy --all",
+            "make build; ruff format",
+            "echo start\nblack .",
+        ],
+    )
+    def test_linter_calls_match(self, command):
+        """Should match linters in command position."""
+        assert re.search(PATTERN, command, re.MULTILINE)
+
+    @pytest.mark.parametrize(
+        "command",
+        ["grep ruff notes.md", "pytest -q", "cat ruff.toml", "cargo build", "git commit -m 'ruff'"],
+    )
+    def test_other_calls_pass(self, command):
+        """Should not match linter names used as arguments."""
+        assert not re.search(PATTERN, command, re.MULTILINE)
+
+
+class TestCheck:
+    """Test check()."""
+
+    def test_no_marker_passes(self, marker_dir):
+        """Should allow everything when -n is not active."""
+        assert enforce.check(_bash("ruff check .")) is None
+
+    def test_active_marker_denies_linters(self, marker_dir):
+        """Should deny matching Bash calls of the marked session only."""
+        enforce.activate("s1", PATTERN, ttl=3600)
+        output = enforce.check(_bash("ruff check ."))
+        assert output["hookSpecificOutput"]["permissionDecision"] == "deny"
+        assert enforce.check(_bash("pytest")) is None
+        assert enforce.check(_bash("ruff check .", session_id="s2")) is None
+
+    def test_other_tools_pass(self, marker_dir):
+        """Should only look at Bash calls."""
+        enforce.activate("s1", PATTERN, ttl=3600)
+        payload = {"session_id": "s1", "tool_name": "Read", "tool_input": {"file_path": "x"}}
+        assert enforce.check(payload) is None
+
+    def test_deactivate(self, marker_dir):
+        """Should stop denying after deactivation."""
+        enforce.activate("s1", PATTERN, ttl=3600)
+        enforce.deactivate("s1")
+        assert enforce.check(_bash("ruff check .")) is None
+
+    def test_unsafe_session_id_ignored(self, marker_dir):
+        """Should never use a session id as a path outside the marker directory."""
+        enforce.activate("../escape", PATTERN, ttl=3600)
+        assert not marker_dir.exists()
+
+    def test_stale_markers_pruned(self, marker_dir):
+        """Should drop markers older than the TTL when activating."""
+        enforce.activate("old", PATTERN, ttl=3600)
+        os.utime(marker_dir / "old", (0, 0))
+        enforce.activate("new", PATTERN, ttl=3600)
+        assert sorted(p.name for p in marker_dir.iterdir()) == ["new"]
+
+
+class TestProcessorEnforcement:
+    """Test that UserPromptSubmit toggles the marker."""
+
+    def test_marker_follows_latest_prompt(self, marker_dir):
+        """Should enforce -n until a prompt without it."""
+        processor = FlagProcessor(AiFlagsConfig())
+        processor.process({"prompt": "task -n", "session_id": "s1"})
+        assert (marker_dir / "s1").read_text() == PATTERN
+
+        processor.process({"prompt": "task -c", "session_id": "s1"})
+        assert not (marker_dir / "s1").exists()
+
+    def test_no_writes_without_marker(self, marker_dir, monkeypatch):
+        """Should not touch the marker directory for prompts of sessions without -n."""
+
+        unlinked = []
+        monkeypatch.setattr(Path, "unlink", lambda path, **kwargs: unlinked.append(path))
+        processor = FlagProcessor(AiFlagsConfig())
+        processor.process({"prompt": "task -c", "session_id": "s1"})
+        processor.process({"prompt": "no flags", "session_id": "s1"})
+        assert unlinked == []
+        assert not marker_dir.exists()
+
+    def test_sticky_no_lint(self, marker_dir):
+        """Should keep enforcing while -n is sticky."""
+        processor = FlagProcessor(AiFlagsConfig())
+        processor.process({"prompt": "task -n+", "session_id": "s1"})
+        processor.process({"prompt": "next task", "session_id": "s1"})
+        assert (marker_dir / "s1").exists()
+
+    def test_empty_command_list_disables_enforcement(self, marker_dir):
+        """Should not deny anything when lint_commands is empty."""
+        processor = FlagProcessor(AiFlagsConfig(lint_commands=[]))
+        processor.process({"prompt": "task -n", "session_id": "s1"})
+        assert not marker_dir.exists()
+
+
+class TestHandleCommand:
+    """Test 'ai-flags handle --pre-tool-use'."""
+
+    def test_cli_option(self, marker_dir):
+        """Should print the deny decision as hook JSON."""
+        enforce.activate("s1", PATTERN, ttl=3600)
+        result = CliRunner().invoke(
+            cli, ["handle", "--pre-tool-use"], input=json.dumps(_bash("ruff check ."))
+        )
+        assert result.exit_code == 0
+        assert json.loads(result.output)["hookSpecificOutput"]["permissionDecision"] == "deny"
+
+    def test_invalid_input_passes(self, marker_dir):
+        """Should never block a tool call because of bad input."""
+        result = CliRunner().invoke(cli, ["handle", "--pre-tool-use"], input="not json")
+        assert result.exit_code == 0
+        assert result.output == ""
+
+    def test_entry_point_skips_heavy_imports(self, tmp_path):
+        """The pass-through path should not import click, pydantic or the config."""
+        src = Path(__file__).resolve().parents[1] / "src"
+        env = {**os.environ, "PYTHONPATH": str(src), "HOME": str(tmp_path)}
+        script = (
+            "import sys\n"
+            "sys.argv = ['ai-flags', 'handle', '--pre-tool-use']\n"
+            "from ai_flags.__main__ import main\n"
+            "try:\n"
+            "    main()\n"
+            "except SystemExit:\n"
+            "    pass\n"
+            "heavy = ('click', 'pydantic', 'yaml', 'ai_flags.config_loader', 'ai_flags.cli')\n"
+            "print(sorted(m for m in heavy if m in sys.modules), file=sys.stderr)\n"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", script],
+            env=env,
+            input=json.dumps(_bash("ruff check .")),
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        assert result.stdout == ""
+        assert result.stderr.strip() == "[]"
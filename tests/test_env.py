@@ -0,0 +1,248 @@
+"""Tests for configuration from environment variables."""
+
+import builtins
+import os
+
+import pytest
+from click.testing import CliRunner
+
+from ai_flags import config_loader
+from ai_flags.cli import cli
+from ai_flags.config import AiFlagsConfig, FlagConfig
+from ai_flags.config_loader import (
+    get_default_config,
+    load_config,
+    merge_config_data,
+    resolve_config,
+    save_config,
+)
+from ai_flags.env import config_layers, config_vars, disabled_data, env_only, snapshot
+
+
+@pytest.fixture
+def temp_config_path(tmp_path, monkeypatch):
+    """Use a temporary global config file."""
+    path = tmp_path / "config.yaml"
+    monkeypatch.setattr("ai_flags.config_loader.CONFIG_PATH", path)
+    config_loader.clear_config_cache()
+    return path
+
+
+def merged(variables):
+    """Return the config data of variables that config_layers() accepts without errors."""
+    layers, errors = config_layers(variables)
+    assert errors == []
+    data = {}
+    for _, overrides in layers:
+        data = merge_config_data(data, overrides)
+    return data
+
+
+class TestConfigLayers:
+    """Test config_layers()."""
+
+    def test_top_level_field(self):
+        """Should set a top-level field from AI_FLAGS_<FIELD>."""
+        assert config_layers((("AI_FLAGS_TOKEN_BUDGET", "2000"),)) == (
+            [("AI_FLAGS_TOKEN_BUDGET", {"token_budget": "2000"})],
+            [],
+        )
+
+    def test_section_field(self):
+        """Should set a nested field from AI_FLAGS_<SECTION>_<FIELD>."""
+        data = merged(
+            (("AI_FLAGS_COMMIT_CONTENT", "Commit now"), ("AI_FLAGS_NO_LINT_ENABLED", "false"))
+        )
+        assert data == {"commit": {"content": "Commit now"}, "no_lint": {"enabled": "false"}}
+
+    def test_json_values(self):
+        """Should decode lists and mappings as JSON."""
+        data = merged(
+            (
+                ("AI_FLAGS_LINT_COMMANDS", '["ruff", "mypy"]'),
+                ("AI_FLAGS_DEBUG_CAPTURE_SOURCES", '["logs/*.log"]'),
+                ("AI_FLAGS_MACROS", '{"x": ["c", "t"]}'),
+            )
+        )
+        assert data["lint_commands"] == ["ruff", "mypy"]
+        assert data["debug_capture"] == {"sources": ["logs/*.log"]}
+        assert data["macros"] == {"x": ["c", "t"]}
+
+    def test_invalid_json(self):
+        """Should leave out a complex value that isn't JSON, and only that one."""
+        layers, errors = config_layers(
+            (("AI_FLAGS_LINT_COMMANDS", "ruff,mypy"), ("AI_FLAGS_TOKEN_BUDGET", "9"))
+        )
+        assert layers == [("AI_FLAGS_TOKEN_BUDGET", {"token_budget": "9"})]
+        assert len(errors) == 1
+        assert errors[0].startswith("AI_FLAGS_LINT_COMMANDS is not valid JSON")
+
+    def test_field_overrides_section(self):
+        """Should apply a section's fields over the whole section."""
+        data = merged(
+            (
+                ("AI_FLAGS_DEDUP_TURNS", "3"),
+                ("AI_FLAGS_DEDUP", '{"enabled": true, "turns": 9}'),
+            )
+        )
+        assert data == {"dedup": {"enabled": True, "turns": "3"}}
+
+    def test_disabled_left_out(self):
+        """Should leave AI_FLAGS_DISABLED to disabled_data()."""
+        assert config_layers((("AI_FLAGS_DISABLED", "n"),)) == ([], [])
+
+    def test_unrelated_variables_ignored(self):
+        """Should ignore AI_FLAGS_* variables that aren't config fields."""
+        assert merged((("AI_FLAGS_DEADLINE_MS", "0"), ("AI_FLAGS_PROFILE", "x"))) == {}
+
+    def test_file_only_fields(self):
+        """Should not read profiles or remote from the environment."""
+        assert "AI_FLAGS_REMOTE_URL" not in config_vars()
+        assert "AI_FLAGS_PROFILES" not in config_vars()
+
+
+class TestDisabledData:
+    """Test disabled_data()."""
+
+    def test_builtin_flags(self):
+        """Should disable the built-in flags listed."""
+        data, errors = disabled_data("n, s", AiFlagsConfig().registry)
+        assert data == {"no_lint": {"enabled": False}, "subagent": {"enabled": False}}
+        assert errors == []
+
+    def test_custom_flags(self):
+        """Should disable user-defined flags under flags.<name>."""
+        config = AiFlagsConfig(flags={"security": {"flag": "sec", "content": "Check auth"}})
+        data, errors = disabled_data("sec,c", config.registry)
+        assert data == {"flags": {"security": {"enabled": False}}, "commit": {"enabled": False}}
+        assert errors == []
+
+    def test_unknown_flag(self):
+        """Should report unknown flags and disable the others."""
+        data, errors = disabled_data("z,c", AiFlagsConfig().registry)
+        assert data == {"commit": {"enabled": False}}
+        assert errors == ["AI_FLAGS_DISABLED: unknown flag 'z'"]
+
+
+class TestSnapshot:
+    """Test snapshot() and env_only()."""
+
+    def test_only_prefixed_sorted(self):
+        """Should keep AI_FLAGS_* variables, sorted by name."""
+        environ = {"HOME": "/h", "AI_FLAGS_B": "2", "AI_FLAGS_A": "1"}
+        assert snapshot(environ) == (("AI_FLAGS_A", "1"), ("AI_FLAGS_B", "2"))
+
+    def test_env_only(self):
+        """Should recognize AI_FLAGS_CONFIG=env."""
+        assert env_only({"AI_FLAGS_CONFIG": "env"})
+        assert not env_only({"AI_FLAGS_CONFIG": "file"})
+        assert not env_only({})
+
+
+class TestEnvironmentLayer:
+    """Test environment variables as a config layer."""
+
+    def test_overrides_files(self, temp_config_path, tmp_path, monkeypatch):
+        """Should apply variables over the global config and project layers."""
+        config = get_default_config()
+        config.commit.content = "From file"
+        config.test.content = "Test from file"
+        save_config(config)
+        (tmp_path / ".ai-flags.yaml").write_text("commit:\n  content: From project\n")
+        monkeypatch.setenv("AI_FLAGS_COMMIT_CONTENT", "From env")
+
+        resolved = resolve_config(tmp_path)
+        assert resolved.config.commit.content == "From env"
+        assert resolved.config.test.content == "Test from file"
+        assert resolved.env_vars == ("AI_FLAGS_COMMIT_CONTENT",)
+
+    def test_variable_change_applies(self, temp_config_path, monkeypatch):
+        """Should not serve a config cached for other variables."""
+        assert load_config().subagent.enabled
+        monkeypatch.setenv("AI_FLAGS_DISABLED", "s")
+        assert not load_config().subagent.enabled
+        monkeypatch.delenv("AI_FLAGS_DISABLED")
+        assert load_config().subagent.enabled
+
+    def test_invalid_variables_skipped(self, temp_config_path, monkeypatch):
+        """Should skip only the variables that don't validate, and say why."""
+        monkeypatch.setenv("AI_FLAGS_TOKEN_BUDGET", "lots")
+        monkeypatch.setenv("AI_FLAGS_DEBUG", "{not json")
+        monkeypatch.setenv("AI_FLAGS_COMMIT_CONTENT", "From env")
+        resolved = resolve_config()
+        assert resolved.config.token_budget is None
+        assert resolved.config.commit.content == "From env"
+        assert resolved.env_vars == ("AI_FLAGS_COMMIT_CONTENT",)
+        assert len(resolved.env_errors) == 2
+        assert resolved.env_errors[0].startswith("AI_FLAGS_DEBUG is not valid JSON")
+        assert resolved.env_errors[1].startswith("AI_FLAGS_TOKEN_BUDGET: ")
+
+    def test_disabled_custom_flag(self, temp_config_path, monkeypatch):
+        """Should disable user-defined flags of the files and of the other variables."""
+        temp_config_path.write_text("flags:\n  security:\n    content: Check auth\n")
+        monkeypatch.setenv("AI_FLAGS_FLAGS", '{"perf": {"content": "Profile it"}}')
+        monkeypatch.setenv("AI_FLAGS_DISABLED", "perf")
+        resolved = resolve_config()
+        assert resolved.env_errors == ()
+        assert not resolved.config.flags["perf"].enabled
+
+        monkeypatch.delenv("AI_FLAGS_FLAGS")
+        monkeypatch.setenv("AI_FLAGS_DISABLED", "security,z")
+        monkeypatch.setenv("AI_FLAGS_COMMIT_CONTENT", "From env")
+        resolved = resolve_config()
+        assert not resolved.config.flags["security"].enabled
+        assert resolved.config.commit.content == "From env"
+        assert resolved.env_vars == ("AI_FLAGS_COMMIT_CONTENT", "AI_FLAGS_DISABLED")
+        assert resolved.env_errors == ("AI_FLAGS_DISABLED: unknown flag 'z'",)
+
+    def test_errors_shown(self, temp_config_path, tmp_path, monkeypatch):
+        """Should report skipped variables in config show and on stderr in CLI mode."""
+        monkeypatch.setattr("ai_flags.cli.CONFIG_PATH", temp_config_path)
+        monkeypatch.setenv("AI_FLAGS_TOKEN_BUDGET", "lots")
+        monkeypatch.chdir(tmp_path)
+        runner = CliRunner()
+
+        result = runner.invoke(cli, ["config", "show"])
+        assert "Ignored: AI_FLAGS_TOKEN_BUDGET: " in result.stdout
+
+        result = runner.invoke(cli, ["handle", "task -c"])
+        assert result.exit_code == 0
+        assert "Warning: ignoring AI_FLAGS_TOKEN_BUDGET: " in result.stderr
+        assert "<commit_instructions>" in result.stdout
+
+
+class TestEnvironmentOnly:
+    """Test AI_FLAGS_CONFIG=env."""
+
+    @pytest.fixture
+    def no_files(self, monkeypatch):
+        """Fail on any file access from here on."""
+
+        def refuse(*args, **kwargs):
+            raise AssertionError(f"file access: {args}")
+
+        monkeypatch.setattr(builtins, "open", refuse)
+        monkeypatch.setattr(os, "stat", refuse)
+        monkeypatch.setattr(os, "getcwd", refuse)
+
+    def test_no_file_access(self, temp_config_path, tmp_path, monkeypatch, no_files):
+        """Should build the config without touching any file."""
+        monkeypatch.setenv("AI_FLAGS_CONFIG", "env")
+        monkeypatch.setenv("AI_FLAGS_DISABLED", "n,s")
+        monkeypatch.setenv("AI_FLAGS_COMMIT_CONTENT", "Env commit")
+
+        config = load_config(cwd=tmp_path)
+        assert config.get_enabled_flags() == {"c", "t", "d"}
+        assert config.commit.content == "Env commit"
+
+    def test_files_ignored(self, temp_config_path, tmp_path, monkeypatch):
+        """Should ignore the global config and project layers."""
+        save_config(get_default_config().model_copy(update={"token_budget": 100}))
+        (tmp_path / ".ai-flags.yaml").write_text("commit:\n  enabled: false\n")
+        monkeypatch.setenv("AI_FLAGS_CONFIG", "env")
+
+        resolved = resolve_config(tmp_path)
+        assert resolved.config.token_budget is None
+        assert resolved.config.commit == FlagConfig()
+        assert resolved.layers == ()
+        assert resolved.probes == ()
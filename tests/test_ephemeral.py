@@ -0,0 +1,150 @@
+"""Tests for ephemeral (read-only) mode."""
+
+import json
+import logging
+
+import pytest
+from click.testing import CliRunner
+
+from ai_flags import ephemeral, metrics
+from ai_flags.api import FlagProcessor
+from ai_flags.cache import DiskCache
+from ai_flags.cli import cli
+from ai_flags.config import AiFlagsConfig
+from ai_flags.config_loader import save_config
+from ai_flags.logger import get_logger, log_handle
+
+
+@pytest.fixture
+def state(tmp_path, monkeypatch):
+    """Point every state file of ai-flags into a temporary directory."""
+    monkeypatch.setattr("ai_flags.config_loader.CONFIG_DIR", tmp_path)
+    monkeypatch.setattr("ai_flags.config_loader.CONFIG_PATH", tmp_path / "config.yaml")
+    monkeypatch.setattr("ai_flags.cli.CONFIG_PATH", tmp_path / "config.yaml")
+    monkeypatch.setattr("ai_flags.sticky.STATE_PATH", tmp_path / "state.db")
+    monkeypatch.setattr("ai_flags.enforce.MARKER_DIR", tmp_path / "no-lint")
+    monkeypatch.setattr("ai_flags.metrics.METRICS_PATH", tmp_path / "metrics.bin")
+    monkeypatch.setattr("ai_flags.audit.AUDIT_DIR", tmp_path / "audit")
+    monkeypatch.setattr("ai_flags.logger.LOG_DIR", tmp_path / "logs")
+    monkeypatch.setenv("AI_FLAGS_CACHE_DIR", str(tmp_path / "cache"))
+    return tmp_path
+
+
+@pytest.fixture
+def on(monkeypatch):
+    """Turn ephemeral mode on."""
+    monkeypatch.setenv("AI_FLAGS_EPHEMERAL", "1")
+    ephemeral.clear_cache()
+
+
+@pytest.fixture
+def fresh_logger():
+    """Let get_logger() choose its destination again."""
+    logger = logging.getLogger("ai-flags")
+    logger.handlers.clear()
+    yield
+    logger.handlers.clear()
+
+
+class TestDetection:
+    """Test enabled()."""
+
+    def test_writable_config_dir(self, state, monkeypatch):
+        """Should stay off when the config directory can be created."""
+        monkeypatch.delenv("AI_FLAGS_EPHEMERAL")
+        monkeypatch.setattr("ai_flags.config_loader.CONFIG_DIR", state / "missing" / "ai-flags")
+        assert ephemeral.enabled() is False
+
+    def test_unwritable_config_dir(self, state, monkeypatch):
+        """Should turn on when the config directory can't be created."""
+        monkeypatch.delenv("AI_FLAGS_EPHEMERAL")
+        (state / "home").write_text("a file, not a directory")
+        monkeypatch.setattr("ai_flags.config_loader.CONFIG_DIR", state / "home" / "ai-flags")
+        assert ephemeral.enabled() is True
+
+    @pytest.mark.parametrize(("value", "expected"), [("1", True), ("on", True), ("0", False)])
+    def test_environment_overrides(self, state, monkeypatch, value, expected):
+        """Should let AI_FLAGS_EPHEMERAL force the mode either way."""
+        monkeypatch.setenv("AI_FLAGS_EPHEMERAL", value)
+        (state / "home").write_text("")
+        monkeypatch.setattr("ai_flags.config_loader.CONFIG_DIR", state / "home" / "ai-flags")
+        assert ephemeral.enabled() is expected
+
+    def test_cached(self, monkeypatch):
+        """Should decide once per process."""
+        assert ephemeral.enabled() is False
+        monkeypatch.setenv("AI_FLAGS_EPHEMERAL", "1")
+        assert ephemeral.enabled() is False
+        ephemeral.clear_cache()
+        assert ephemeral.enabled() is True
+
+
+class TestLogging:
+    """Test the handle log in ephemeral mode."""
+
+    def test_off_by_default(self, state, on, fresh_logger):
+        """Should neither create the log directory nor keep retrying."""
+        log_handle(mode="cli", flags=["c"], cleaned_prompt="task", success=True)
+        assert isinstance(get_logger().handlers[0], logging.NullHandler)
+        assert not (state / "logs").exists()
+
+    def test_stderr(self, state, on, fresh_logger, monkeypatch, capsys):
+        """Should write JSON lines to stderr with AI_FLAGS_LOG=stderr."""
+        monkeypatch.setenv("AI_FLAGS_LOG", "stderr")
+        log_handle(mode="hook", flags=["c", "t"], cleaned_prompt="fix it", success=True, tokens=9)
+        line = json.loads(capsys.readouterr().err)
+        assert line["mode"] == "hook"
+        assert line["flags"] == ["c", "t"]
+        assert line["prompt"] == "fix it"
+        assert line["tokens"] == 9
+        assert not (state / "logs").exists()
+
+
+class TestWrites:
+    """Test that nothing is written in ephemeral mode."""
+
+    def test_save_config_refused(self, state, on):
+        """Should fail with EROFS before touching the config."""
+        with pytest.raises(OSError, match="ephemeral mode"):
+            save_config(AiFlagsConfig())
+        assert list(state.iterdir()) == []
+
+    @pytest.mark.parametrize(
+        "args",
+        [
+            ["config", "set", "c", "disabled"],
+            ["config", "reset"],
+            ["config", "edit"],
+            ["metrics", "reset"],
+            ["cache", "clear"],
+        ],
+    )
+    def test_commands_fail(self, state, on, args):
+        """Should exit 1 with an error instead of writing."""
+        result = CliRunner().invoke(cli, args)
+        assert result.exit_code == 1
+        assert "ephemeral mode" in result.output
+        assert list(state.iterdir()) == []
+
+    def test_hook_keeps_state_in_memory(self, state, on):
+        """Should run sessions, -n, metrics and auditing without creating files."""
+        processor = FlagProcessor(AiFlagsConfig(metrics=True, audit=True))
+        processor.process({"prompt": "task -c+ -n", "session_id": "s1"})
+        output = processor.process({"prompt": "next task", "session_id": "s1"})
+
+        assert "<commit_instructions>" in output["hookSpecificOutput"]["additionalContext"]
+        assert list(state.iterdir()) == []
+        assert sum(metrics.snapshot().invocations.values()) == 0
+
+    def test_disk_cache_in_memory(self, state, on):
+        """Should serve DiskCache entries from memory, within max_bytes."""
+        store = DiskCache("test", max_bytes=10)
+        store.set("a", b"12345")
+        store.set("b", b"12345")
+        assert store.get("a") == b"12345"
+        store.set("c", b"12345")  # Evicts b, the least recently used
+        assert store.get("b") is None
+        assert store.get("a") == b"12345"
+        store.delete("a")
+        assert store.get("a") is None
+        assert not (state / "cache").exists()
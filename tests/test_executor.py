@@ -1,6 +1,12 @@
 """Tests for flag handler execution."""
 
-from ai_flags.executor import execute_flag_handlers, wrap_in_xml_tag
+from ai_flags.executor import (
+    MERGED_TAG,
+    compile_dispatch_table,
+    execute_flag_handlers,
+    render_flags,
+    wrap_in_xml_tag,
+)
 from ai_flags.handlers.base import FlagHandler
 
 
@@ -223,3 +229,54 @@ class TestExecuteFlagHandlers:
         assert lines[3] == "<test_instructions>"
         assert lines[4] == "Test"
         assert lines[5] == "</test_instructions>"
+
+
+class TestCompileDispatchTable:
+    """Test compile_dispatch_table() and render_flags()."""
+
+    def test_default_modes_respected(self) -> None:
+        """A handler's default_modes should decide where it applies."""
+
+        class PlanOnly(MockHandler):
+            default_modes = ("plan",)
+
+        handlers = {
+            "s": PlanOnly("s", "subagent_delegation", "Subagent"),
+            "c": MockHandler("c", "commit_instructions", "Commit"),
+        }
+        assert set(compile_dispatch_table(handlers, "plan")) == {"s", "c"}
+        assert set(compile_dispatch_table(handlers, "default")) == {"c"}
+        assert set(compile_dispatch_table(handlers, None)) == {"c"}
+
+    def test_config_modes_override_default(self) -> None:
+        """Configured modes should replace the handler's default."""
+        handlers = {"c": MockHandler("c", "commit_instructions", "Commit")}
+        flag_modes = {"c": ["acceptEdits", "bypassPermissions"]}
+        assert compile_dispatch_table(handlers, "plan", flag_modes) == {}
+        assert "c" in compile_dispatch_table(handlers, "acceptEdits", flag_modes)
+
+    def test_mode_content_variant(self) -> None:
+        """A content variant for the mode should replace the regular content."""
+        handlers = {"c": MockHandler("c", "commit_instructions", "Commit")}
+        mode_content = {"c": {"plan": "Plan the commits"}}
+        assert compile_dispatch_table(handlers, "plan", None, mode_content) == {
+            "c": "<commit_instructions>\nPlan the commits\n</commit_instructions>"
+        }
+        assert "Commit" in compile_dispatch_table(handlers, "default", None, mode_content)["c"]
+
+    def test_render_flags_in_prompt_order(self) -> None:
+        """Should join the blocks of the given flags, skipping missing ones."""
+        table = {"c": "<c/>", "t": "<t/>"}
+        assert render_flags(["t", "s", "c"], table) == "<t/>\n<c/>"
+
+    def test_render_flags_merged(self) -> None:
+        """Should put the contents of several blocks into one block."""
+        table = {"c": "<c>\nCommit\n</c>", "t": "<t>\nTest\nmore\n</t>"}
+        assert render_flags(["t", "c"], table, merge=True) == (
+            f"<{MERGED_TAG}>\nTest\nmore\n\nCommit\n</{MERGED_TAG}>"
+        )
+
+    def test_render_flags_merge_single_block(self) -> None:
+        """A single block should keep its own tag."""
+        table = {"c": "<c>\nCommit\n</c>"}
+        assert render_flags(["c"], table, merge=True) == "<c>\nCommit\n</c>"
@@ -0,0 +1,217 @@
+"""Tests for project fingerprinting."""
+
+import json
+import os
+
+import pytest
+
+from ai_flags import fingerprint
+from ai_flags.api import FlagProcessor
+from ai_flags.cache import DiskCache
+from ai_flags.config import AiFlagsConfig
+from ai_flags.fingerprint import Fingerprint, Project, get_fingerprint
+from ai_flags.handlers import CoverageHandler, NoLintHandler
+
+PYPROJECT = """\
+[project]
+name = "demo"
+dependencies = ["requests>=2"]
+
+[dependency-groups]
+dev = ["pytest>=8", "mypy"]
+
+[tool.ruff]
+line-length = 100
+"""
+
+
+@pytest.fixture
+def project(tmp_path):
+    """An empty git repository."""
+    root = tmp_path / "repo"
+    (root / ".git").mkdir(parents=True)
+    return root
+
+
+def _write(path, text: str) -> None:
+    path.write_text(text)
+    # Make sure rewrites within the same clock tick still change the signature
+    os.utime(path, ns=(os.stat(path).st_mtime_ns + 1_000_000_000,) * 2)
+
+
+class TestDetection:
+    """Test what get_fingerprint() detects."""
+
+    def test_python_uv(self, project):
+        """Should find pytest and linters in pyproject.toml and prefix uv run."""
+        _write(project / "pyproject.toml", PYPROJECT)
+        _write(project / "uv.lock", "")
+        assert get_fingerprint(str(project)) == Fingerprint(
+            languages=("python",),
+            test_command="uv run pytest",
+            lint_commands=("uv run ruff check", "uv run ruff format", "uv run mypy"),
+        )
+
+    def test_python_config_files(self, project):
+        """Should recognize setup.cfg sections and standalone tool configs."""
+        _write(project / "setup.cfg", "[metadata]\nname = x\n\n[tool:pytest]\n\n[flake8]\n")
+        _write(project / "pyrightconfig.json", "{}")
+        result = get_fingerprint(str(project))
+        assert result.test_command == "pytest"
+        assert result.lint_commands == ("flake8", "pyright")
+
+    def test_task_runner_preferred(self, project):
+        """Should prefer the project's own recipes over tool commands."""
+        _write(project / "pyproject.toml", PYPROJECT)
+        _write(
+            project / "justfile",
+            'set shell := ["bash", "-c"]\n\ntest *args:\n    pytest\n\n@lint:\n    ruff check\n',
+        )
+        result = get_fingerprint(str(project))
+        assert result.test_command == "just test"
+        assert result.lint_commands[0] == "just lint"
+        assert "just set" not in result.lint_commands
+
+    def test_makefile(self, project):
+        """Should read Makefile targets, ignoring variable assignments."""
+        _write(project / "Makefile", "PY := python3\n.PHONY: test\ntest: build\n\t$(PY) -m x\n")
+        assert get_fingerprint(str(project)).test_command == "make test"
+
+    def test_package_json(self, project):
+        """Should use the lockfile's package manager and the package scripts."""
+        package = {
+            "scripts": {"test": "vitest", "lint": "eslint ."},
+            "devDependencies": {"typescript": "^5", "eslint": "^9"},
+        }
+        _write(project / "package.json", json.dumps(package))
+        _write(project / "pnpm-lock.yaml", "")
+        assert get_fingerprint(str(project)) == Fingerprint(
+            languages=("typescript",), test_command="pnpm test", lint_commands=("pnpm run lint",)
+        )
+
+    def test_package_json_without_scripts(self, project):
+        """Should skip npm's placeholder test script and name linters from dependencies."""
+        package = {
+            "scripts": {"test": 'echo "Error: no test specified" && exit 1'},
+            "devDependencies": {"prettier": "^3"},
+        }
+        _write(project / "package.json", json.dumps(package))
+        assert get_fingerprint(str(project)) == Fingerprint(
+            languages=("javascript",), lint_commands=("prettier",)
+        )
+
+    def test_rust_and_go(self, project):
+        """Should know the standard commands of cargo and go."""
+        _write(project / "Cargo.toml", "[package]\n")
+        _write(project / "go.mod", "module x\n")
+        result = get_fingerprint(str(project))
+        assert result.languages == ("rust", "go")
+        assert result.test_command == "cargo test"
+        assert "go vet" in result.lint_commands
+
+    def test_git_root_from_subdirectory(self, project):
+        """Should look in the git root too, with cwd's manifests first."""
+        _write(project / "pyproject.toml", PYPROJECT)
+        sub = project / "web"
+        sub.mkdir()
+        _write(sub / "package.json", json.dumps({"scripts": {"test": "jest"}}))
+        result = get_fingerprint(str(sub))
+        assert result.languages == ("javascript", "python")
+        assert result.test_command == "npm test"
+
+    def test_malformed_manifests_ignored(self, project):
+        """Should skip manifests it can't parse."""
+        _write(project / "pyproject.toml", "[project\n")
+        _write(project / "package.json", "[1, 2]")
+        _write(project / "Cargo.toml", "")
+        assert get_fingerprint(str(project)).test_command == "cargo test"
+
+    def test_empty_directory(self, tmp_path):
+        """Should return an empty fingerprint."""
+        assert get_fingerprint(str(tmp_path)) == Fingerprint()
+
+
+class TestCaching:
+    """Test the stat-keyed caches."""
+
+    @pytest.fixture
+    def no_scan(self, monkeypatch):
+        def fail(*args):
+            raise AssertionError("rescanned")
+
+        def disable():
+            monkeypatch.setattr("ai_flags.fingerprint._scan", fail)
+
+        return disable
+
+    def test_memory_and_disk_hits(self, project, no_scan):
+        """Should not rescan unchanged manifests, in this process or the next."""
+        _write(project / "pyproject.toml", PYPROJECT)
+        first = get_fingerprint(str(project))
+        no_scan()
+        assert get_fingerprint(str(project)) == first
+        fingerprint.clear_memory_cache()
+        assert get_fingerprint(str(project)) == first
+
+    def test_changed_manifest_invalidates(self, project):
+        """Should rescan when a manifest is edited."""
+        _write(project / "pyproject.toml", PYPROJECT)
+        assert get_fingerprint(str(project)).test_command == "pytest"
+        _write(project / "pyproject.toml", PYPROJECT.replace('"pytest>=8", ', ""))
+        assert get_fingerprint(str(project)).test_command is None
+
+    def test_new_manifest_invalidates(self, project):
+        """Should rescan when a manifest appears."""
+        _write(project / "pyproject.toml", PYPROJECT)
+        assert get_fingerprint(str(project)).test_command == "pytest"
+        _write(project / "uv.lock", "")
+        fingerprint.clear_memory_cache()
+        assert get_fingerprint(str(project)).test_command == "uv run pytest"
+
+    def test_unwritable_cache_dir(self, project, tmp_path):
+        """Should still return a fingerprint."""
+        blocker = tmp_path / "file"
+        blocker.write_text("")
+        _write(project / "Cargo.toml", "")
+        disk_cache = DiskCache("projects", root=blocker)
+        assert get_fingerprint(str(project), disk_cache).test_command == "cargo test"
+
+
+class TestHints:
+    """Test the project hints of -t and -n."""
+
+    def test_handler_hints(self):
+        """Should name the commands, or nothing if there are none."""
+        found = Fingerprint(test_command="just test", lint_commands=("ruff check", "mypy"))
+        project = Project("/unused", found)
+        assert "`just test`" in CoverageHandler().get_project_hint(project)
+        assert "`ruff check`, `mypy`" in NoLintHandler().get_project_hint(project)
+        empty = Project("/unused", Fingerprint())
+        assert CoverageHandler().get_project_hint(empty) == ""
+        assert NoLintHandler().get_project_hint(empty) == ""
+
+    def test_processor_adds_hints(self, project):
+        """Should add the hints inside the blocks for the hook's cwd."""
+        _write(project / "pyproject.toml", PYPROJECT)
+        context = FlagProcessor(AiFlagsConfig()).run("task -t -n -c", cwd=str(project)).context
+        assert "Run this project's tests with `pytest`.\n</test_instructions>" in context
+        assert "`ruff check`, `ruff format`, `mypy`.\n</no_lint_instructions>" in context
+        assert "project" not in context.split("<commit_instructions>")[1]
+
+    def test_lone_macro_gets_hints(self, project):
+        """Should not use the pre-rendered macro context when hints apply."""
+        _write(project / "pyproject.toml", PYPROJECT)
+        processor = FlagProcessor(AiFlagsConfig(macros={"x": ["c", "t"]}))
+        assert "`pytest`" in processor.run("task -x", cwd=str(project)).context
+
+    def test_disabled(self, project):
+        """Should leave the blocks alone when project_hints is off."""
+        _write(project / "pyproject.toml", PYPROJECT)
+        processor = FlagProcessor(AiFlagsConfig(project_hints=False))
+        assert "`pytest`" not in processor.run("task -t", cwd=str(project)).context
+
+    def test_hook_cwd(self, project):
+        """Should use the cwd of the hook payload."""
+        _write(project / "Cargo.toml", "")
+        output = FlagProcessor(AiFlagsConfig()).process({"prompt": "x -t", "cwd": str(project)})
+        assert "`cargo test`" in output["hookSpecificOutput"]["additionalContext"]
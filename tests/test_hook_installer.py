@@ -0,0 +1,332 @@
+"""Tests for Claude Code hook registration."""
+
+import json
+
+import pytest
+from click.testing import CliRunner
+
+from ai_flags import hook_installer
+from ai_flags.cli import cli
+
+LEGACY_COMMAND = "python3 ~/.claude/hooks/UserPromptSubmit/detect_flags.py"
+
+
+@pytest.fixture
+def claude_dir(tmp_path, monkeypatch):
+    """Use a temporary ~/.claude directory."""
+    claude_dir = tmp_path / ".claude"
+    monkeypatch.setattr(hook_installer, "SETTINGS_PATH", claude_dir / "settings.json")
+    monkeypatch.setattr(
+        hook_installer,
+        "LEGACY_WRAPPER_PATH",
+        claude_dir / "hooks" / "UserPromptSubmit" / "detect_flags.py",
+    )
+    return claude_dir
+
+
+def _hooks(settings: dict) -> list[dict]:
+    return [
+        hook for group in settings["hooks"]["UserPromptSubmit"] for hook in group.get("hooks", [])
+    ]
+
+
+class TestMergeHook:
+    """Test merge_hook()."""
+
+    def test_adds_entry_to_empty_settings(self):
+        """Should register the command hook with a timeout."""
+        settings: dict = {}
+        assert hook_installer.merge_hook(settings, timeout=5)
+        assert _hooks(settings) == [{"type": "command", "command": "ai-flags handle", "timeout": 5}]
+
+    def test_idempotent(self):
+        """Should not add a second entry."""
+        settings: dict = {}
+        hook_installer.merge_hook(settings)
+        assert not hook_installer.merge_hook(settings)
+        assert len(_hooks(settings)) == 1
+
+    def test_updates_timeout_in_place(self):
+        """Should update an existing entry rather than duplicating it."""
+        settings: dict = {}
+        hook_installer.merge_hook(settings, timeout=5)
+        assert hook_installer.merge_hook(settings, timeout=30)
+        assert _hooks(settings) == [
+            {"type": "command", "command": "ai-flags handle", "timeout": 30}
+        ]
+
+    def test_recognizes_absolute_path(self):
+        """Should treat an absolute-path ai-flags command as already installed."""
+        settings = {
+            "hooks": {
+                "UserPromptSubmit": [
+                    {
+                        "hooks": [
+                            {
+                                "type": "command",
+                                "command": "/usr/local/bin/ai-flags handle",
+                                "timeout": 10,
+                            }
+                        ]
+                    }
+                ]
+            }
+        }
+        assert not hook_installer.merge_hook(settings, timeout=10)
+        assert len(_hooks(settings)) == 1
+
+    def test_keeps_command_and_extra_keys(self):
+        """Should only update the timeout of an existing entry."""
+        existing = {
+            "type": "command",
+            "command": "/opt/bin/ai-flags handle",
+            "timeout": 5,
+            "statusMessage": "Processing flags",
+        }
+        settings = {"hooks": {"UserPromptSubmit": [{"hooks": [existing]}]}}
+        assert hook_installer.merge_hook(settings, timeout=20)
+        assert _hooks(settings) == [{**existing, "timeout": 20}]
+
+    def test_matcher_for_tool_events(self):
+        """Should register tool hooks under a matcher group."""
+        settings: dict = {}
+        assert hook_installer.merge_hook(
+            settings,
+            command=hook_installer.PRE_TOOL_USE_COMMAND,
+            event=hook_installer.PRE_TOOL_USE_EVENT,
+            matcher="Bash",
+        )
+        assert settings["hooks"]["PreToolUse"] == [
+            {
+                "matcher": "Bash",
+                "hooks": [
+                    {
+                        "type": "command",
+                        "command": "ai-flags handle --pre-tool-use",
+                        "timeout": hook_installer.DEFAULT_TIMEOUT,
+                    }
+                ],
+            }
+        ]
+
+    def test_preserves_other_settings(self):
+        """Should keep unrelated settings and hooks."""
+        other = {"type": "command", "command": "other-tool", "timeout": 3}
+        settings = {
+            "model": "opus",
+            "hooks": {
+                "UserPromptSubmit": [{"hooks": [other]}],
+                "Stop": [{"hooks": [{"type": "command", "command": "notify"}]}],
+            },
+        }
+        hook_installer.merge_hook(settings)
+        assert settings["model"] == "opus"
+        assert settings["hooks"]["Stop"] == [{"hooks": [{"type": "command", "command": "notify"}]}]
+        assert other in _hooks(settings)
+        assert len(_hooks(settings)) == 2
+
+
+class TestLegacyHooks:
+    """Test legacy wrapper detection and removal."""
+
+    def test_finds_legacy_entry(self):
+        """Should find hooks that run the wrapper script."""
+        settings = {
+            "hooks": {
+                "UserPromptSubmit": [{"hooks": [{"type": "command", "command": LEGACY_COMMAND}]}]
+            }
+        }
+        assert hook_installer.find_legacy_hooks(settings) == [LEGACY_COMMAND]
+
+    def test_removes_legacy_entry_and_empty_group(self):
+        """Should drop the wrapper hook and its now-empty group."""
+        settings = {
+            "hooks": {
+                "UserPromptSubmit": [
+                    {"hooks": [{"type": "command", "command": LEGACY_COMMAND}]},
+                    {"hooks": [{"type": "command", "command": "other-tool"}]},
+                ]
+            }
+        }
+        assert hook_installer.remove_legacy_hooks(settings) == 1
+        assert settings["hooks"]["UserPromptSubmit"] == [
+            {"hooks": [{"type": "command", "command": "other-tool"}]}
+        ]
+
+    def test_no_legacy_entries(self):
+        """Should be a no-op without legacy hooks."""
+        assert hook_installer.remove_legacy_hooks({}) == 0
+
+
+class TestSettingsFile:
+    """Test settings file I/O."""
+
+    def test_load_missing_file(self, tmp_path):
+        """Should return empty settings for a missing file."""
+        assert hook_installer.load_settings(tmp_path / "settings.json") == {}
+
+    def test_load_rejects_non_object(self, tmp_path):
+        """Should reject settings that are not a JSON object."""
+        path = tmp_path / "settings.json"
+        path.write_text("[]")
+        with pytest.raises(TypeError):
+            hook_installer.load_settings(path)
+
+    @pytest.mark.parametrize(
+        "settings",
+        [
+            {"hooks": None},
+            {"hooks": {"UserPromptSubmit": None}},
+            {"hooks": {"UserPromptSubmit": [None]}},
+            {"hooks": {"UserPromptSubmit": [{"hooks": "ai-flags handle"}]}},
+        ],
+    )
+    def test_load_rejects_malformed_hooks(self, tmp_path, settings):
+        """Should reject a hooks section the installer can't safely edit."""
+        path = tmp_path / "settings.json"
+        path.write_text(json.dumps(settings))
+        with pytest.raises(TypeError):
+            hook_installer.load_settings(path)
+
+    def test_save_round_trip(self, tmp_path):
+        """Should write settings that load back unchanged, leaving no temp files."""
+        path = tmp_path / "nested" / "settings.json"
+        settings = {"hooks": {}, "model": "opus"}
+        hook_installer.save_settings(path, settings)
+        assert hook_installer.load_settings(path) == settings
+        assert [p.name for p in path.parent.iterdir()] == ["settings.json"]
+
+
+class TestInstallHookCommand:
+    """Test 'ai-flags install-hook' command."""
+
+    def test_installs_hook(self, claude_dir):
+        """Should create settings.json with the hook."""
+        result = CliRunner().invoke(cli, ["install-hook"])
+        assert result.exit_code == 0
+        assert "Hook installed" in result.output
+
+        settings = json.loads((claude_dir / "settings.json").read_text())
+        assert _hooks(settings) == [
+            {
+                "type": "command",
+                "command": "ai-flags handle",
+                "timeout": hook_installer.DEFAULT_TIMEOUT,
+            }
+        ]
+
+    def test_installs_pre_tool_use_hook(self, claude_dir):
+        """Should register the -n enforcement hook unless --no-enforce is given."""
+        CliRunner().invoke(cli, ["install-hook"])
+        settings = json.loads((claude_dir / "settings.json").read_text())
+        [group] = settings["hooks"]["PreToolUse"]
+        assert group["matcher"] == "Bash"
+        assert group["hooks"][0]["command"] == "ai-flags handle --pre-tool-use"
+
+        path = claude_dir / "other.json"
+        CliRunner().invoke(cli, ["install-hook", "--settings", str(path), "--no-enforce"])
+        assert "PreToolUse" not in json.loads(path.read_text())["hooks"]
+
+    def test_second_run_is_noop(self, claude_dir):
+        """Should report an existing installation without rewriting the file."""
+        runner = CliRunner()
+        runner.invoke(cli, ["install-hook"])
+        result = runner.invoke(cli, ["install-hook"])
+        assert result.exit_code == 0
+        assert "already installed" in result.output
+
+    def test_custom_settings_path_and_timeout(self, claude_dir, tmp_path):
+        """Should honor --settings and --timeout."""
+        path = tmp_path / "project" / ".claude" / "settings.json"
+        result = CliRunner().invoke(
+            cli, ["install-hook", "--settings", str(path), "--timeout", "3"]
+        )
+        assert result.exit_code == 0
+        assert _hooks(json.loads(path.read_text()))[0]["timeout"] == 3
+
+    def test_removes_legacy_wrapper(self, claude_dir):
+        """Should remove the legacy wrapper file and settings entry with --yes."""
+        wrapper = hook_installer.LEGACY_WRAPPER_PATH
+        wrapper.parent.mkdir(parents=True)
+        wrapper.write_text("# legacy")
+        hook_installer.save_settings(
+            claude_dir / "settings.json",
+            {
+                "hooks": {
+                    "UserPromptSubmit": [
+                        {"hooks": [{"type": "command", "command": LEGACY_COMMAND}]}
+                    ]
+                }
+            },
+        )
+
+        result = CliRunner().invoke(cli, ["install-hook", "--yes"])
+        assert result.exit_code == 0
+        assert "Legacy wrapper removed" in result.output
+        assert not wrapper.exists()
+
+        settings = json.loads((claude_dir / "settings.json").read_text())
+        assert [hook["command"] for hook in _hooks(settings)] == ["ai-flags handle"]
+
+    def test_keeps_legacy_wrapper_when_declined(self, claude_dir):
+        """Should keep the wrapper and warn about double injection when declined."""
+        hook_installer.save_settings(
+            claude_dir / "settings.json",
+            {
+                "hooks": {
+                    "UserPromptSubmit": [
+                        {"hooks": [{"type": "command", "command": LEGACY_COMMAND}]}
+                    ]
+                }
+            },
+        )
+
+        result = CliRunner().invoke(cli, ["install-hook"], input="n\n")
+        assert result.exit_code == 0
+        assert "added twice" in result.output
+
+        settings = json.loads((claude_dir / "settings.json").read_text())
+        assert len(_hooks(settings)) == 2
+
+    def test_null_hooks_section(self, claude_dir):
+        """Should report a malformed hooks section instead of crashing."""
+        claude_dir.mkdir()
+        (claude_dir / "settings.json").write_text('{"hooks": null}')
+        result = CliRunner().invoke(cli, ["install-hook"])
+        assert result.exit_code == 1
+        assert "Cannot parse" in result.output
+
+    def test_project_settings_leave_global_wrapper(self, claude_dir, tmp_path):
+        """Should not touch the global wrapper when targeting another settings file."""
+        wrapper = hook_installer.LEGACY_WRAPPER_PATH
+        wrapper.parent.mkdir(parents=True)
+        wrapper.write_text("# legacy")
+        path = tmp_path / "project" / ".claude" / "settings.json"
+
+        result = CliRunner().invoke(cli, ["install-hook", "--settings", str(path), "--yes"])
+        assert result.exit_code == 0
+        assert "legacy" not in result.output.lower()
+        assert wrapper.exists()
+
+    def test_wrapper_removal_failure_reported(self, claude_dir, monkeypatch):
+        """Should warn instead of crashing when the wrapper can't be removed."""
+        wrapper = hook_installer.LEGACY_WRAPPER_PATH
+        wrapper.parent.mkdir(parents=True)
+        wrapper.write_text("# legacy")
+
+        def deny(self, missing_ok=False):
+            raise PermissionError("denied")
+
+        monkeypatch.setattr(type(wrapper), "unlink", deny)
+        result = CliRunner().invoke(cli, ["install-hook", "--yes"])
+        assert result.exit_code == 0
+        assert "Could not remove" in result.output
+        assert "Hook installed" in result.output
+
+    def test_invalid_settings_file(self, claude_dir):
+        """Should fail cleanly on malformed settings."""
+        claude_dir.mkdir()
+        (claude_dir / "settings.json").write_text("{not json")
+        result = CliRunner().invoke(cli, ["install-hook"])
+        assert result.exit_code == 1
+        assert "Cannot parse" in result.output
@@ -113,6 +113,13 @@ class TestLogHandle:
         content = log_file.read_text()
         assert "ERROR: No flags detected" in content
 
+    def test_logs_estimated_tokens(self, temp_log_dir):
+        """Should append the estimated token count when given."""
+        log_handle(mode="hook", flags=["c"], cleaned_prompt="task", success=True, tokens=42)
+
+        content = (temp_log_dir / "handle.log").read_text()
+        assert content.rstrip().endswith("| OK | tokens=42")
+
     def test_logs_empty_flags_as_none(self, temp_log_dir):
         """Should log empty flags list as 'none'."""
         log_handle(
@@ -0,0 +1,129 @@
+"""Tests for composite flags (macros)."""
+
+import pytest
+from click.testing import CliRunner
+from pydantic import ValidationError
+
+from ai_flags.api import FlagProcessor
+from ai_flags.cli import cli
+from ai_flags.config import AiFlagsConfig, FlagConfig
+from ai_flags.config_loader import save_config
+from ai_flags.macros import expand_flags, resolve_macros
+
+KNOWN = {"s", "c", "t", "d", "n"}
+
+
+class TestResolveMacros:
+    """Test resolve_macros()."""
+
+    def test_plain_members(self):
+        """Should keep member order."""
+        assert resolve_macros({"x": ["c", "t", "n"]}, KNOWN) == {"x": ("c", "t", "n")}
+
+    def test_nested_macros_flattened(self):
+        """Should expand macros used as members, dropping duplicates."""
+        resolved = resolve_macros({"x": ["c", "t"], "y": ["x", "n", "c"]}, KNOWN)
+        assert resolved["y"] == ("c", "t", "n")
+
+    def test_unknown_member_rejected(self):
+        """Should reject members that are neither flags nor macros."""
+        with pytest.raises(ValueError, match="unknown flag 'q'"):
+            resolve_macros({"x": ["c", "q"]}, KNOWN)
+
+    def test_cycle_rejected(self):
+        """Should reject direct and indirect cycles."""
+        with pytest.raises(ValueError, match="x -> y -> x"):
+            resolve_macros({"x": ["y"], "y": ["x"]}, KNOWN)
+        with pytest.raises(ValueError, match="cycle"):
+            resolve_macros({"x": ["x"]}, KNOWN)
+
+
+class TestExpandFlags:
+    """Test expand_flags()."""
+
+    def test_expands_macros_in_place(self):
+        """Should replace macros with their members, keeping the order."""
+        assert expand_flags(["s", "x", "d"], {"x": ("c", "t")}) == ["s", "c", "t", "d"]
+
+    def test_duplicates_dropped(self):
+        """Should include each flag once."""
+        assert expand_flags(["c", "x"], {"x": ("c", "t")}) == ["c", "t"]
+
+
+class TestConfigValidation:
+    """Test macro validation when the config is loaded."""
+
+    def test_valid_macros(self):
+        """Should accept valid macros."""
+        assert AiFlagsConfig(macros={"x": ["c", "t", "n"]}).macros == {"x": ["c", "t", "n"]}
+
+    @pytest.mark.parametrize(
+        "macros",
+        [
+            {"c": ["t"]},  # Shadows a built-in flag
+            {"xy": ["c"]},  # Not a single letter
+            {"X": ["c"]},  # Parser only accepts lowercase
+            {"x": ["q"]},  # Unknown member
+            {"x": ["y"], "y": ["x"]},  # Cycle
+        ],
+    )
+    def test_invalid_macros_rejected(self, macros):
+        """Should reject invalid macros."""
+        with pytest.raises(ValidationError):
+            AiFlagsConfig(macros=macros)
+
+
+class TestProcessorMacros:
+    """Test macro expansion in FlagProcessor."""
+
+    def test_macro_matches_member_flags(self):
+        """A macro should produce the same context as typing its members."""
+        processor = FlagProcessor(AiFlagsConfig(macros={"x": ["c", "t", "n"]}))
+        result = processor.run("task -x")
+        assert result.error is None
+        assert result.flags == ["x"]
+        assert result.context == processor.run("task -c -t -n").context
+
+    def test_lone_macro_uses_prerendered_context(self, monkeypatch):
+        """Should not render a lone macro per prompt."""
+        processor = FlagProcessor(AiFlagsConfig(macros={"x": ["c", "t"]}))
+
+        def fail(*args, **kwargs):
+            raise AssertionError("rendered per prompt")
+
+        monkeypatch.setattr("ai_flags.api.render_flags", fail)
+        assert "<commit_instructions>" in processor.run("task -x", "default").context
+
+    def test_macro_with_other_flags(self):
+        """Should combine macros with plain flags."""
+        processor = FlagProcessor(AiFlagsConfig(macros={"x": ["c"]}))
+        context = processor.run("task -x -d").context
+        assert context.index("<commit_instructions>") < context.index("<debug_instructions>")
+
+    def test_permission_mode_respected(self):
+        """Should render -s inside a macro only in plan mode."""
+        processor = FlagProcessor(AiFlagsConfig(macros={"p": ["s", "c"]}))
+        assert "<subagent_delegation>" in processor.run("task -p", "plan").context
+        assert "<subagent_delegation>" not in processor.run("task -p", "default").context
+
+    def test_disabled_member_invalidates_macro(self):
+        """Should reject a macro whose members include a disabled flag."""
+        config = AiFlagsConfig(test=FlagConfig(enabled=False), macros={"x": ["c", "t"]})
+        assert FlagProcessor(config).run("task -x").error == "Invalid or disabled flags"
+
+    def test_cyclic_macro_file_falls_back_to_defaults(self, tmp_path, monkeypatch):
+        """A config file with a cyclic macro should be rejected at load time."""
+        config_path = tmp_path / "config.yaml"
+        monkeypatch.setattr("ai_flags.config_loader.CONFIG_PATH", config_path)
+        config_path.write_text("macros:\n  x: [y]\n  y: [x]\n")
+        assert FlagProcessor().run("task -x").error == "Invalid or disabled flags"
+
+    def test_config_show_lists_macros(self, tmp_path, monkeypatch):
+        """Should show defined macros."""
+        config_path = tmp_path / "config.yaml"
+        monkeypatch.setattr("ai_flags.config_loader.CONFIG_PATH", config_path)
+        monkeypatch.setattr("ai_flags.cli.CONFIG_PATH", config_path)
+        save_config(AiFlagsConfig(macros={"x": ["c", "t", "n"]}))
+
+        result = CliRunner().invoke(cli, ["config", "show"])
+        assert "-x = -c -t -n" in result.output
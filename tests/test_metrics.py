@@ -0,0 +1,181 @@
+"""Tests for usage metrics."""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+
+from ai_flags import metrics
+from ai_flags.api import FlagProcessor
+from ai_flags.cli import cli
+from ai_flags.config import AiFlagsConfig
+from ai_flags.config_loader import save_config
+from ai_flags.metrics import Sample
+
+
+@pytest.fixture
+def metrics_path(tmp_path, monkeypatch):
+    """Use a temporary metrics file and config with metrics enabled."""
+    path = tmp_path / "metrics.bin"
+    monkeypatch.setattr("ai_flags.metrics.METRICS_PATH", path)
+    monkeypatch.setattr("ai_flags.config_loader.CONFIG_PATH", tmp_path / "config.yaml")
+    monkeypatch.setattr("ai_flags.config_loader.CONFIG_DIR", tmp_path)
+    save_config(AiFlagsConfig(metrics=True))
+    return path
+
+
+class TestRecord:
+    """Test recording and reading counters."""
+
+    def test_empty_snapshot_without_file(self, metrics_path):
+        """Should report zeros before anything was recorded."""
+        snap = metrics.snapshot()
+        assert snap.invocations == {"hook": 0, "cli": 0, "api": 0}
+        assert snap.flags == {}
+        assert snap.latency["total"].count == 0
+        assert not metrics_path.exists()
+
+    def test_counters_accumulate(self, metrics_path):
+        """Should add up samples."""
+        metrics.record(Sample(mode="hook", flags=["c", "t"]))
+        metrics.record(Sample(mode="hook", flags=["c"], validation_failed=True))
+        metrics.record(Sample(mode="cli", error=True))
+
+        snap = metrics.snapshot()
+        assert snap.invocations == {"hook": 2, "cli": 1, "api": 0}
+        assert snap.flags == {"c": 2, "t": 1}
+        assert snap.validation_failures == 1
+        assert snap.errors == 1
+        assert metrics_path.stat().st_size == metrics.FILE_SIZE
+
+    def test_latency_histogram(self, metrics_path):
+        """Should bucket durations cumulatively and keep sum and count."""
+        metrics.record(Sample(mode="hook", timings_ns={"parse": 200_000}))  # 0.2 ms
+        metrics.record(Sample(mode="hook", timings_ns={"parse": 5_000_000_000}))  # 5 s
+
+        histogram = metrics.snapshot().latency["parse"]
+        assert histogram.count == 2
+        assert histogram.sum == pytest.approx(5.0002)
+        assert histogram.buckets[0] == (0.0005, 1)
+        assert histogram.buckets[-2] == (1.0, 1)
+        assert histogram.buckets[-1] == (float("inf"), 2)
+
+    def test_cache_counts(self, metrics_path):
+        """Should add up cache lookups per known namespace."""
+        metrics.record(Sample(mode="hook", cache={"projects": (1, 2, 2), "other": (5, 5, 5)}))
+        metrics.record(Sample(mode="hook", cache={"projects": (3, 0, 0)}))
+        assert metrics.snapshot().cache == {"projects": (4, 2, 2)}
+
+        text = metrics.render_openmetrics(metrics.snapshot())
+        assert 'ai_flags_cache_lookups_total{namespace="projects",result="hit"} 4' in text
+        assert 'ai_flags_cache_writes_total{namespace="projects"} 2' in text
+
+    def test_foreign_file_is_reinitialized(self, metrics_path):
+        """Should reset a file with another layout instead of misreading it."""
+        metrics_path.write_bytes(b"garbage" * 10)
+        assert metrics.snapshot().invocations["hook"] == 0
+
+        metrics.record(Sample(mode="hook"))
+        assert metrics.snapshot().invocations["hook"] == 1
+
+    def test_unwritable_path_is_ignored(self, tmp_path):
+        """Should never raise from record()."""
+        blocker = tmp_path / "file"
+        blocker.write_text("")
+        metrics.record(Sample(mode="hook"), path=blocker / "metrics.bin")
+
+    def test_reset(self, metrics_path):
+        """Should zero all counters."""
+        metrics.record(Sample(mode="api", flags=["c"]))
+        metrics.reset()
+        snap = metrics.snapshot()
+        assert snap.invocations["api"] == 0
+        assert snap.flags == {}
+
+    def test_concurrent_processes(self, metrics_path):
+        """Increments from separate processes should not be lost."""
+        src = Path(__file__).resolve().parents[1] / "src"
+        env = {**os.environ, "PYTHONPATH": str(src)}
+        script = (
+            "from pathlib import Path\n"
+            "from ai_flags.metrics import Sample, record\n"
+            "for _ in range(50):\n"
+            f"    record(Sample(mode='hook', flags=['c']), path=Path({str(metrics_path)!r}))\n"
+        )
+        procs = [subprocess.Popen([sys.executable, "-c", script], env=env) for _ in range(4)]
+        assert all(proc.wait(timeout=60) == 0 for proc in procs)
+
+        snap = metrics.snapshot()
+        assert snap.invocations["hook"] == 200
+        assert snap.flags == {"c": 200}
+
+
+class TestProcessorIntegration:
+    """Test that FlagProcessor records invocations."""
+
+    def test_process_records_hook_invocation(self, metrics_path):
+        """Should count the mode, the flags and every phase."""
+        FlagProcessor(log_mode="hook").process({"prompt": "task -c -t"})
+
+        snap = metrics.snapshot()
+        assert snap.invocations["hook"] == 1
+        assert snap.flags == {"c": 1, "t": 1}
+        for phase in metrics.PHASES:
+            assert snap.latency[phase].count == 1
+
+    def test_invalid_flags_count_as_validation_failure(self, metrics_path):
+        """Should count invalid flags as a failure, not as flag usage."""
+        FlagProcessor(log_mode="hook").process({"prompt": "task -x"})
+
+        snap = metrics.snapshot()
+        assert snap.validation_failures == 1
+        assert snap.flags == {}
+
+    def test_errors_counted(self, metrics_path, monkeypatch):
+        """Should count unexpected errors."""
+
+        def boom(*args, **kwargs):
+            raise RuntimeError("boom")
+
+        monkeypatch.setattr("ai_flags.api.render_flags", boom)
+        FlagProcessor().process({"prompt": "task -c"})
+        assert metrics.snapshot().errors == 1
+
+    def test_disabled_by_default(self, metrics_path):
+        """Should not touch the metrics file unless enabled."""
+        save_config(AiFlagsConfig())
+        FlagProcessor().run("task -c")
+        assert not metrics_path.exists()
+
+
+class TestExportCommand:
+    """Test 'ai-flags metrics export'."""
+
+    def test_export_to_stdout(self, metrics_path):
+        """Should print OpenMetrics text."""
+        metrics.record(Sample(mode="hook", flags=["c"], timings_ns={"total": 1_000_000}))
+
+        result = CliRunner().invoke(cli, ["metrics", "export"])
+        assert result.exit_code == 0
+        assert "# TYPE ai_flags_invocations counter" in result.output
+        assert 'ai_flags_invocations_total{mode="hook"} 1' in result.output
+        assert 'ai_flags_flag_uses_total{flag="c"} 1' in result.output
+        assert 'ai_flags_handle_duration_seconds_bucket{phase="total",le="+Inf"} 1' in result.output
+        assert result.output.endswith("# EOF\n")
+
+    def test_export_to_file(self, metrics_path, tmp_path):
+        """Should write the .prom file."""
+        output = tmp_path / "textfile" / "ai_flags.prom"
+        result = CliRunner().invoke(cli, ["metrics", "export", "--output", str(output)])
+        assert result.exit_code == 0
+        assert output.read_text().endswith("# EOF\n")
+
+    def test_reset_command(self, metrics_path):
+        """Should zero the counters."""
+        metrics.record(Sample(mode="hook"))
+        result = CliRunner().invoke(cli, ["metrics", "reset"])
+        assert result.exit_code == 0
+        assert metrics.snapshot().invocations["hook"] == 0
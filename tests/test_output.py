@@ -4,7 +4,13 @@ import json
 
 import pytest
 
-from ai_flags.output import format_cli_output, format_hook_output
+from ai_flags.output import (
+    build_hook_output,
+    check_metadata_mode,
+    empty_hook_output,
+    format_cli_output,
+    format_hook_output,
+)
 
 
 class TestFormatHookOutput:
@@ -167,6 +173,72 @@ class TestFormatHookOutput:
         assert "</flag_metadata>" in parts[0]
 
 
+class TestMetadataModes:
+    """Test the metadata modes of build_hook_output()."""
+
+    CONTEXT = "<commit_instructions>Test</commit_instructions>"
+
+    def _context(self, prompt: str, metadata: str) -> str:
+        output = build_hook_output(prompt, ["c"], self.CONTEXT, metadata)
+        return output["hookSpecificOutput"]["additionalContext"]
+
+    def test_truncated(self) -> None:
+        """Should echo at most N characters of the prompt."""
+        context = self._context("x" * 1000, "truncated:10")
+        assert "Your actual task (without flags): xxxxxxxxxx... [990 more characters]" in context
+        assert "x" * 11 not in context
+
+    def test_truncated_short_prompt_unchanged(self) -> None:
+        """Should echo prompts within the limit whole."""
+        assert "(without flags): my task\n" in self._context("my task", "truncated:10")
+
+    def test_flags_only(self) -> None:
+        """Should list the flags without the prompt."""
+        context = self._context("secret task", "flags-only")
+        assert "Processed flags -c" in context
+        assert "secret task" not in context
+
+    def test_none(self) -> None:
+        """Should emit only the flag contexts."""
+        assert self._context("my task", "none") == self.CONTEXT
+
+    @pytest.mark.parametrize("mode", ["full", "truncated:0", "truncated:500", "flags-only", "none"])
+    def test_valid_modes(self, mode: str) -> None:
+        """Should accept every documented mode."""
+        assert check_metadata_mode(mode) == mode
+
+    @pytest.mark.parametrize("mode", ["", "short", "truncated", "truncated:", "truncated:-1"])
+    def test_invalid_modes(self, mode: str) -> None:
+        """Should reject anything else."""
+        with pytest.raises(ValueError):
+            check_metadata_mode(mode)
+
+
+class TestBuildHookOutput:
+    """Test build_hook_output() and empty_hook_output()."""
+
+    def test_matches_formatted_json(self) -> None:
+        """Dict output should be what format_hook_output() serializes."""
+        flags = ["c"]
+        flag_contexts = "<commit_instructions>Test</commit_instructions>"
+
+        result = build_hook_output("my task", flags, flag_contexts)
+
+        assert result == json.loads(format_hook_output("my task", flags, flag_contexts))
+
+    def test_empty_output(self) -> None:
+        """Empty output should carry no context."""
+        result = empty_hook_output()
+        assert result["hookSpecificOutput"]["hookEventName"] == "UserPromptSubmit"
+        assert result["hookSpecificOutput"]["additionalContext"] == ""
+
+    def test_empty_output_is_fresh(self) -> None:
+        """Each call should return an independent dict."""
+        first = empty_hook_output()
+        first["hookSpecificOutput"]["additionalContext"] = "changed"
+        assert empty_hook_output()["hookSpecificOutput"]["additionalContext"] == ""
+
+
 class TestFormatCliOutput:
     """Test format_cli_output() for CLI mode."""
 
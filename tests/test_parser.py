@@ -41,6 +41,13 @@ class TestParseTrailingFlags:
                 "lots\n\n\nof\n\n\nnewlines -d -n",
                 ("lots\n\n\nof\n\n\nnewlines", ["d", "n"]),
             ),
+            # Sticky modifiers
+            ("my task -c+", ("my task", ["c+"])),
+            ("my task -c- -t", ("my task", ["c-", "t"])),
+            # Words (user-defined flags)
+            ("my task -review", ("my task", ["review"])),
+            ("my task -c -sec_2+", ("my task", ["c", "sec_2+"])),
+            ("my task -" + "w" * 32, ("my task", ["w" * 32])),
         ],
     )
     def test_valid_flags(self, prompt: str, expected: tuple[str, list[str]]) -> None:
@@ -66,6 +73,9 @@ class TestParseTrailingFlags:
             "my task --s",
             "my task -S",  # uppercase
             "my task -1",  # number
+            "my task -c+-",  # more than one modifier
+            "my task -" + "w" * 33,  # longer than MAX_FLAG_LENGTH
+            "my task -2fa",  # word starting with a digit
             # No text before flags
             "-s",
         ],
@@ -0,0 +1,89 @@
+"""Tests for the staged processing pipeline."""
+
+from dataclasses import dataclass, field
+
+import pytest
+
+from ai_flags.pipeline import Pipeline, PipelineState, Stage
+
+
+@dataclass
+class State(PipelineState):
+    seen: list[str] = field(default_factory=list)
+
+
+def record(name: str, finish: bool = False):
+    def run(state: State) -> None:
+        state.seen.append(name)
+        if finish:
+            state.done = True
+
+    return run
+
+
+class TestPipeline:
+    """Test Pipeline."""
+
+    def test_stages_in_order(self):
+        """Should run every stage in order."""
+        pipeline = Pipeline([Stage("a", record("a")), Stage("b", record("b"))])
+        assert pipeline.run(State()).seen == ["a", "b"]
+
+    def test_short_circuit_keeps_final_stages(self):
+        """Should skip the stages after a finishing one, except final stages."""
+        pipeline = Pipeline(
+            [
+                Stage("a", record("a", finish=True)),
+                Stage("b", record("b")),
+                Stage("c", record("c"), final=True),
+            ]
+        )
+        assert pipeline.run(State()).seen == ["a", "c"]
+
+    def test_duplicate_names(self):
+        """Should reject two stages with the same name."""
+        with pytest.raises(ValueError, match="duplicate stage names: a"):
+            Pipeline([Stage("a", record("a")), Stage("a", record("a"))])
+
+    def test_insert(self):
+        """Should return a new pipeline with the stage at the given position."""
+        pipeline = Pipeline([Stage("a", record("a")), Stage("c", record("c"))])
+        assert pipeline.insert(Stage("b", record("b")), after="a").names == ("a", "b", "c")
+        assert pipeline.insert(Stage("b", record("b")), before="a").names == ("b", "a", "c")
+        assert pipeline.insert(Stage("b", record("b"))).names == ("a", "c", "b")
+        assert pipeline.names == ("a", "c")
+
+    def test_insert_unknown_anchor(self):
+        """Should reject an anchor that isn't a stage."""
+        pipeline = Pipeline([Stage("a", record("a"))])
+        with pytest.raises(ValueError, match="no stage named 'z'"):
+            pipeline.insert(Stage("b", record("b")), after="z")
+        with pytest.raises(ValueError, match="either"):
+            pipeline.insert(Stage("b", record("b")), before="a", after="a")
+
+
+class TestTimings:
+    """Test PipelineState timings."""
+
+    def test_stage_and_phase_timings(self):
+        """Should time the stages that ran, summed per phase."""
+        pipeline = Pipeline(
+            [
+                Stage("a", record("a"), phase="parse"),
+                Stage("b", record("b"), phase="parse"),
+                Stage("c", record("c", finish=True)),
+                Stage("d", record("d"), phase="output"),
+            ]
+        )
+        state = pipeline.run(State())
+        stages = state.stage_timings()
+        assert set(stages) == {"a", "b", "c"}
+        phases = state.phase_timings()
+        assert phases["parse"] == stages["a"] + stages["b"]
+        assert "output" not in phases
+        assert phases["total"] == sum(stages.values())
+
+    def test_not_run(self):
+        """Should report no timings before the pipeline ran."""
+        assert State().stage_timings() == {}
+        assert State().phase_timings() == {}
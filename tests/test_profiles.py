@@ -0,0 +1,166 @@
+"""Tests for path-prefix config profiles."""
+
+import os
+
+import pytest
+from click.testing import CliRunner
+from pydantic import ValidationError
+
+from ai_flags.api import FlagProcessor
+from ai_flags.cli import cli
+from ai_flags.config import AiFlagsConfig
+from ai_flags.config_loader import load_config, resolve_config, save_config
+from ai_flags.profiles import PathTrie, build_trie, match_profile, pattern_parts
+
+
+@pytest.fixture
+def temp_config(tmp_path, monkeypatch):
+    """Use a temporary global config."""
+    config_path = tmp_path / "config.yaml"
+    monkeypatch.setattr("ai_flags.config_loader.CONFIG_PATH", config_path)
+    monkeypatch.setattr("ai_flags.cli.CONFIG_PATH", config_path)
+    return config_path
+
+
+def _profiles(root) -> dict:
+    return {
+        f"{root}/work/**": {"commit": {"content": "Work commits"}},
+        f"{root}/work/monorepo/**": {"commit": {"content": "Monorepo commits"}},
+        f"{root}/oss": {"test": {"enabled": False}},
+    }
+
+
+class TestTrie:
+    """Test PathTrie and pattern handling."""
+
+    def test_longest_prefix_wins(self):
+        """Should return the most specific stored prefix."""
+        trie = build_trie(["/a/**", "/a/b/c/**"])
+        assert match_profile(trie, "/a/b/c/d") == "/a/b/c/**"
+        assert match_profile(trie, "/a/b") == "/a/**"
+        assert match_profile(trie, "/a") == "/a/**"
+        assert match_profile(trie, "/ab") is None
+
+    def test_many_profiles(self):
+        """Should resolve among hundreds of prefixes."""
+        trie = PathTrie()
+        for i in range(500):
+            trie.insert(("/", "repos", f"r{i}"), f"r{i}")
+        assert trie.longest_prefix(("/", "repos", "r321", "src")) == "r321"
+
+    def test_pattern_forms(self):
+        """Trailing /**, a trailing slash and ~ should be accepted."""
+        home = os.path.expanduser("~")
+        assert pattern_parts("~/oss/**") == pattern_parts("~/oss/") == pattern_parts(f"{home}/oss")
+
+    @pytest.mark.parametrize("pattern", ["~/work/*/src", "relative/**", "/a/b?"])
+    def test_unsupported_patterns(self, pattern):
+        """Should reject inner wildcards and relative paths."""
+        with pytest.raises(ValueError):
+            pattern_parts(pattern)
+
+
+class TestConfigValidation:
+    """Test profile validation at load time."""
+
+    def test_invalid_profile_content(self):
+        """Should reject profiles that are not valid partial configs."""
+        with pytest.raises(ValidationError):
+            AiFlagsConfig(profiles={"/a/**": {"token_budget": 0}})
+
+    def test_nested_profiles_rejected(self):
+        """Profiles can't define profiles or a remote source."""
+        with pytest.raises(ValidationError, match="can't set profiles"):
+            AiFlagsConfig(profiles={"/a/**": {"profiles": {}}})
+
+    def test_invalid_pattern(self):
+        """Should reject unsupported patterns when the config is loaded."""
+        with pytest.raises(ValidationError):
+            AiFlagsConfig(profiles={"/a/*/b": {}})
+
+    def test_copy_keeps_profiles(self):
+        """Copies of a config should still resolve profiles."""
+        config = AiFlagsConfig(profiles={"/a/**": {}}).model_copy(deep=True)
+        assert config.match_profile("/a/b") == "/a/**"
+
+
+class TestResolve:
+    """Test profile resolution in resolve_config."""
+
+    def test_profile_applied_by_cwd(self, temp_config, tmp_path):
+        """Should merge the most specific profile for cwd over the global config."""
+        save_config(AiFlagsConfig(profiles=_profiles(tmp_path)))
+
+        monorepo = resolve_config(tmp_path / "work" / "monorepo" / "pkg")
+        assert monorepo.profile == f"{tmp_path}/work/monorepo/**"
+        assert monorepo.config.commit.content == "Monorepo commits"
+
+        assert load_config(cwd=tmp_path / "work" / "app").commit.content == "Work commits"
+        assert load_config(cwd=tmp_path / "oss" / "lib").test.enabled is False
+
+        elsewhere = resolve_config(tmp_path / "other")
+        assert elsewhere.profile is None
+        assert elsewhere.config.commit.content is None
+
+    def test_project_layer_overrides_profile(self, temp_config, tmp_path):
+        """Project files should stay on top of profiles."""
+        save_config(AiFlagsConfig(profiles=_profiles(tmp_path)))
+        project = tmp_path / "work" / "app"
+        project.mkdir(parents=True)
+        (project / ".ai-flags.yaml").write_text("commit:\n  content: App commits\n")
+        assert load_config(cwd=project).commit.content == "App commits"
+
+    def test_profiles_validated_once(self, temp_config, tmp_path, monkeypatch):
+        """Should validate and compile the global profiles once per file version."""
+        save_config(AiFlagsConfig(profiles=_profiles(tmp_path)))
+        builds = []
+        monkeypatch.setattr(
+            "ai_flags.config.build_trie", lambda patterns: builds.append(1) or build_trie(patterns)
+        )
+        for name in ("a", "b", "c"):
+            config = resolve_config(tmp_path / "work" / name).config
+            assert config.commit.content == "Work commits"
+            assert config.match_profile(str(tmp_path / "oss")) == f"{tmp_path}/oss"
+        assert len(builds) == 1
+
+        project = tmp_path / "work" / "d"
+        project.mkdir(parents=True)
+        (project / ".ai-flags.yaml").write_text("profiles:\n  /elsewhere: {}\n")
+        assert resolve_config(project).config.match_profile("/elsewhere") == "/elsewhere"
+
+    def test_no_profile_without_cwd(self, temp_config, tmp_path):
+        """Global-only resolution should not apply profiles."""
+        save_config(AiFlagsConfig(profiles=_profiles(tmp_path)))
+        assert resolve_config().profile is None
+
+
+class TestProcessorProfiles:
+    """Test profiles in FlagProcessor."""
+
+    def test_context_follows_cwd(self, temp_config, tmp_path):
+        """Should render each profile's content for its directories."""
+        save_config(AiFlagsConfig(profiles=_profiles(tmp_path)))
+        processor = FlagProcessor()
+        assert (
+            "Monorepo commits" in processor.run("x -c", cwd=str(tmp_path / "work/monorepo")).context
+        )
+        assert "Work commits" in processor.run("x -c", cwd=str(tmp_path / "work/app")).context
+        assert "Work commits" not in processor.run("x -c", cwd=str(tmp_path)).context
+
+    def test_profile_snapshot_shared(self, temp_config, tmp_path):
+        """Directories under the same profile should share the compiled snapshot."""
+        save_config(AiFlagsConfig(profiles=_profiles(tmp_path)))
+        processor = FlagProcessor()
+        first = processor._get_snapshot(str(tmp_path / "work" / "a"))
+        second = processor._get_snapshot(str(tmp_path / "work" / "b"))
+        assert first is second
+        assert first is not processor._get_snapshot(str(tmp_path / "oss"))
+
+    def test_config_show_names_profile(self, temp_config, tmp_path, monkeypatch):
+        """Should show the profile applied to the current directory."""
+        save_config(AiFlagsConfig(profiles=_profiles(tmp_path)))
+        work = tmp_path / "work"
+        work.mkdir()
+        monkeypatch.chdir(work)
+        result = CliRunner().invoke(cli, ["config", "show"])
+        assert f"Profile: {tmp_path}/work/**" in result.output
@@ -0,0 +1,147 @@
+"""Tests for opt-in profiling."""
+
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+
+from ai_flags import profiling
+from ai_flags.cli import cli
+from ai_flags.config_loader import get_default_config, save_config
+
+
+@pytest.fixture
+def temp_config(tmp_path, monkeypatch):
+    """Use temporary config file for tests."""
+    config_path = tmp_path / "config.yaml"
+    monkeypatch.setattr("ai_flags.config_loader.CONFIG_PATH", config_path)
+    monkeypatch.setattr("ai_flags.config_loader.CONFIG_DIR", tmp_path)
+    monkeypatch.setattr("ai_flags.cli.CONFIG_PATH", config_path)
+    save_config(get_default_config())
+    return config_path
+
+
+def _handle(env: dict[str, str]):
+    hook_input = json.dumps({"prompt": "task -c"})
+    return CliRunner().invoke(cli, ["handle"], input=hook_input, env=env)
+
+
+class TestParsing:
+    """Test environment parsing."""
+
+    def test_parse_profilers(self):
+        """Should accept a comma-separated list and drop unknown names."""
+        assert profiling.parse_profilers("cprofile") == {"cprofile"}
+        assert profiling.parse_profilers("cProfile, tracemalloc") == {"cprofile", "tracemalloc"}
+        assert profiling.parse_profilers("perf") == set()
+
+    @pytest.mark.parametrize(
+        ("value", "expected"), [(None, 1.0), ("0.25", 0.25), ("7", 1.0), ("-1", 0.0), ("x", 1.0)]
+    )
+    def test_parse_rate(self, value, expected):
+        """Should clamp the sampling rate and default to profiling every run."""
+        assert profiling._parse_rate(value) == expected
+
+
+class TestHandleProfiling:
+    """Test profiling of the handle command."""
+
+    def test_cprofile_writes_profile(self, temp_config, tmp_path):
+        """Should drop a .prof file per invocation."""
+        profile_dir = tmp_path / "profiles"
+        env = {"AI_FLAGS_PROFILE": "cprofile", "AI_FLAGS_PROFILE_DIR": str(profile_dir)}
+        result = _handle(env)
+        assert result.exit_code == 0
+        assert "<commit_instructions>" in result.output
+        assert len(list(profile_dir.glob("*.prof"))) == 1
+
+    def test_tracemalloc_writes_snapshot(self, temp_config, tmp_path):
+        """Should drop a .tracemalloc file per invocation."""
+        profile_dir = tmp_path / "profiles"
+        env = {"AI_FLAGS_PROFILE": "tracemalloc", "AI_FLAGS_PROFILE_DIR": str(profile_dir)}
+        assert _handle(env).exit_code == 0
+        assert len(list(profile_dir.glob("*.tracemalloc"))) == 1
+
+    def test_rate_zero_skips_profiling(self, temp_config, tmp_path):
+        """Should not profile unsampled invocations."""
+        profile_dir = tmp_path / "profiles"
+        env = {
+            "AI_FLAGS_PROFILE": "cprofile",
+            "AI_FLAGS_PROFILE_DIR": str(profile_dir),
+            "AI_FLAGS_PROFILE_RATE": "0",
+        }
+        assert _handle(env).exit_code == 0
+        assert not profile_dir.exists()
+
+    def test_profile_written_on_exit(self, temp_config, tmp_path):
+        """Should still write the profile when handle exits with an error."""
+        profile_dir = tmp_path / "profiles"
+        env = {"AI_FLAGS_PROFILE": "cprofile", "AI_FLAGS_PROFILE_DIR": str(profile_dir)}
+        result = CliRunner().invoke(cli, ["handle", "task -x"], env=env)
+        assert result.exit_code == 1
+        assert len(list(profile_dir.glob("*.prof"))) == 1
+
+    def test_not_imported_when_unset(self):
+        """Should not import the profiling machinery on normal runs."""
+        src = Path(__file__).resolve().parents[1] / "src"
+        env = {k: v for k, v in os.environ.items() if not k.startswith("AI_FLAGS_PROFILE")}
+        env["PYTHONPATH"] = str(src)
+        script = (
+            "import sys\n"
+            "from ai_flags.cli import cli\n"
+            "from click.testing import CliRunner\n"
+            "CliRunner().invoke(cli, ['handle', 'task -c'])\n"
+            "print(any(m in sys.modules for m in ('ai_flags.profiling', 'cProfile')))\n"
+        )
+        result = subprocess.run(
+            [sys.executable, "-c", script], env=env, capture_output=True, text=True, check=True
+        )
+        assert result.stdout.strip() == "False"
+
+
+class TestReport:
+    """Test 'ai-flags profile report'."""
+
+    def test_report_merges_profiles(self, temp_config, tmp_path):
+        """Should merge every collected profile into one report."""
+        profile_dir = tmp_path / "profiles"
+        env = {
+            "AI_FLAGS_PROFILE": "cprofile,tracemalloc",
+            "AI_FLAGS_PROFILE_DIR": str(profile_dir),
+        }
+        for _ in range(3):
+            assert _handle(env).exit_code == 0
+
+        result = CliRunner().invoke(
+            cli, ["profile", "report", "--dir", str(profile_dir), "--limit", "5"]
+        )
+        assert result.exit_code == 0
+        assert "== cProfile (3 runs) ==" in result.output
+        assert "3 snapshots" in result.output
+
+    def test_report_skips_unreadable_files(self, temp_config, tmp_path):
+        """Should report the readable profiles and name the unreadable ones."""
+        profile_dir = tmp_path / "profiles"
+        env = {
+            "AI_FLAGS_PROFILE": "cprofile,tracemalloc",
+            "AI_FLAGS_PROFILE_DIR": str(profile_dir),
+        }
+        assert _handle(env).exit_code == 0
+        (profile_dir / "broken.prof").write_bytes(b"\x00garbage")
+        (profile_dir / "broken.tracemalloc").write_bytes(b"\x80\x04truncated")
+
+        result = CliRunner().invoke(cli, ["profile", "report", "--dir", str(profile_dir)])
+        assert result.exit_code == 0
+        assert "== cProfile (1 runs) ==" in result.output
+        assert "1 snapshots" in result.output
+        assert "Skipped unreadable files: broken.prof, broken.tracemalloc" in result.output
+
+    def test_report_without_profiles(self, tmp_path):
+        """Should fail when there is nothing to report."""
+        result = CliRunner().invoke(cli, ["profile", "report", "--dir", str(tmp_path)])
+        assert result.exit_code == 1
+        assert "No profiles found" in result.output
@@ -0,0 +1,176 @@
+"""Tests for user-defined flags and the flag registry."""
+
+import pytest
+from click.testing import CliRunner
+from pydantic import ValidationError
+
+from ai_flags.api import FlagProcessor
+from ai_flags.cli import cli
+from ai_flags.config import AiFlagsConfig, CustomFlagConfig
+from ai_flags.config_loader import load_config, save_config
+from ai_flags.registry import FlagEntry, FlagRegistry
+
+REVIEW = {"flag": "rv", "content": "Review the change for security bugs."}
+
+
+@pytest.fixture
+def temp_config(tmp_path, monkeypatch):
+    """Use a temporary global config."""
+    config_path = tmp_path / "config.yaml"
+    monkeypatch.setattr("ai_flags.config_loader.CONFIG_PATH", config_path)
+    monkeypatch.setattr("ai_flags.cli.CONFIG_PATH", config_path)
+    return config_path
+
+
+class TestFlagRegistry:
+    """Test FlagRegistry lookups."""
+
+    def test_lookup_by_flag_and_name(self):
+        """Should find entries by flag, and by name as a fallback."""
+        registry = FlagRegistry([FlagEntry("c", "commit", True), FlagEntry("rv", "review", False)])
+        assert registry.get("rv") == FlagEntry("rv", "review", False)
+        assert registry.get("review") is None
+        assert registry.find("review") == registry.find("rv")
+        assert "c" in registry
+        assert "commit" not in registry
+        assert len(registry) == 2
+        assert [entry.flag for entry in registry] == ["c", "rv"]
+
+    def test_duplicate_flag_rejected(self):
+        """Should refuse two entries with the same flag."""
+        with pytest.raises(ValueError, match="both use -c"):
+            FlagRegistry([FlagEntry("c", "commit", True), FlagEntry("c", "check", False)])
+
+    def test_duplicate_name_rejected(self):
+        """Should refuse two entries with the same name."""
+        with pytest.raises(ValueError, match="defined twice"):
+            FlagRegistry([FlagEntry("a", "same", False), FlagEntry("b", "same", False)])
+
+
+class TestCustomFlagConfig:
+    """Test validation of the flags section."""
+
+    def test_registered(self):
+        """Should add user-defined flags next to the built-in ones."""
+        config = AiFlagsConfig(flags={"review": REVIEW, "perf": {"content": "Measure first."}})
+        assert config.get_enabled_flags() == {"s", "c", "t", "d", "n", "rv", "perf"}
+        flag_config = config.get_flag_config("rv")
+        assert isinstance(flag_config, CustomFlagConfig)
+        assert flag_config.content == REVIEW["content"]
+        assert config.get_flag_config("review") is None
+
+    def test_changes_after_validation_seen(self):
+        """Should read enabled from the config's fields, not from a copy."""
+        config = AiFlagsConfig(flags={"review": REVIEW}).model_copy(deep=True)
+        config.flags["review"].enabled = False
+        config.commit.enabled = False
+        assert config.get_enabled_flags() == {"s", "t", "d", "n"}
+
+    @pytest.mark.parametrize(
+        "flags",
+        [
+            {"review": {"flag": "c", "content": "x"}},  # Taken by a built-in flag
+            {"a": {"flag": "rv", "content": "x"}, "b": {"flag": "rv", "content": "y"}},
+            {"commit": {"flag": "k", "content": "x"}},  # Name of a built-in flag
+            {"Review": {"content": "x"}},  # Name isn't a valid flag and no flag given
+            {"review": {"flag": "-r", "content": "x"}},
+            {"review": {"flag": "x" * 33, "content": "x"}},  # Longer than MAX_FLAG_LENGTH
+            {"review": {"flag": "rv"}},  # No content
+            {"review": {"content": "x", "tag": "<bad>"}},
+        ],
+    )
+    def test_invalid_rejected(self, flags):
+        """Should reject conflicting or malformed flags at load time."""
+        with pytest.raises(ValidationError):
+            AiFlagsConfig(flags=flags)
+
+    def test_macros(self):
+        """Should let macros use user-defined flags but not shadow them."""
+        config = AiFlagsConfig(
+            flags={"r": {"content": "x"}, "review": REVIEW}, macros={"x": ["rv"]}
+        )
+        assert config.macros == {"x": ["rv"]}
+        with pytest.raises(ValidationError, match="shadows"):
+            AiFlagsConfig(flags={"r": {"content": "x"}}, macros={"r": ["c"]})
+
+
+class TestProcessing:
+    """Test user-defined flags in prompts."""
+
+    @pytest.fixture
+    def processor(self):
+        return FlagProcessor(
+            AiFlagsConfig(
+                flags={
+                    "review": REVIEW,
+                    "plan_only": {"content": "Only plan.", "modes": ["plan"], "tag": "planning"},
+                    "off": {"content": "Never injected.", "enabled": False},
+                },
+                macros={"x": ["rv", "c"]},
+            )
+        )
+
+    def test_word_flag(self, processor):
+        """Should inject the content under <name>_instructions."""
+        result = processor.run("check the login flow -rv")
+        assert result.error is None
+        assert result.cleaned_prompt == "check the login flow"
+        assert result.flags == ["rv"]
+        assert (
+            result.context == f"<review_instructions>\n{REVIEW['content']}\n</review_instructions>"
+        )
+
+    def test_with_builtin_flags_and_macros(self, processor):
+        """Should render user-defined and built-in blocks in prompt order."""
+        context = processor.run("task -x -t").context
+        blocks = ["<review_instructions>", "<commit_instructions>", "<test_instructions>"]
+        assert [context.index(block) for block in blocks] == sorted(
+            context.index(block) for block in blocks
+        )
+
+    def test_modes_and_tag(self, processor):
+        """Should apply only in the configured modes, under the configured tag."""
+        assert processor.run("task -plan_only", "plan").context == (
+            "<planning>\nOnly plan.\n</planning>"
+        )
+        assert processor.run("task -plan_only", "default").context == ""
+
+    @pytest.mark.parametrize("prompt", ["task -off", "task -unknown", "task -rv -nope"])
+    def test_disabled_or_unknown_invalid(self, processor, prompt):
+        """Should report disabled and undefined flags as invalid."""
+        assert processor.run(prompt).error == "Invalid or disabled flags"
+
+    def test_sticky(self, processor, tmp_path, monkeypatch):
+        """Should keep a user-defined flag for the session."""
+        monkeypatch.setattr("ai_flags.sticky.STATE_PATH", tmp_path / "sticky.db")
+        processor.run("task -rv+", session_id="s1")
+        assert processor.run("next task", session_id="s1").flags == ["rv"]
+        processor.run("task -rv-", session_id="s1")
+        assert processor.run("next task", session_id="s1").error == "No flags detected"
+
+
+class TestCli:
+    """Test the CLI with user-defined flags."""
+
+    def test_set_by_flag_or_name(self, temp_config):
+        """Should enable and disable user-defined flags by flag or name."""
+        save_config(AiFlagsConfig(flags={"review": REVIEW}))
+        runner = CliRunner()
+        result = runner.invoke(cli, ["config", "set", "review", "disabled"])
+        assert result.exit_code == 0
+        assert load_config().flags["review"].enabled is False
+        runner.invoke(cli, ["config", "set", "rv", "enabled"])
+        assert load_config().flags["review"].enabled is True
+
+    def test_set_unknown(self, temp_config):
+        """Should fail for a flag the config doesn't define."""
+        result = CliRunner().invoke(cli, ["config", "set", "nope", "disabled"])
+        assert result.exit_code == 1
+        assert "Unknown flag 'nope'" in result.output
+
+    def test_show(self, temp_config):
+        """Should list user-defined flags after the built-in ones."""
+        save_config(AiFlagsConfig(flags={"review": REVIEW}))
+        output = CliRunner().invoke(cli, ["config", "show"]).output
+        assert "-n (no_lint   ): ✓ enabled" in output
+        assert "-rv (review    ): ✓ enabled" in output
@@ -0,0 +1,261 @@
+"""Tests for the remote team config, against a local stand-in server."""
+
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import pytest
+from click.testing import CliRunner
+
+from ai_flags import config_loader, remote
+from ai_flags.api import FlagProcessor
+from ai_flags.cli import cli
+from ai_flags.config import RemoteConfig
+
+TEAM_CONFIG = "commit:\n  content: Team commit rules\n"
+
+
+class _Server:
+    """Serves one config document with an ETag and records the requests."""
+
+    def __init__(self):
+        self.document = TEAM_CONFIG
+        self.etag = '"v1"'
+        self.status = 200
+        self.requests: list[dict[str, str]] = []
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests.append(dict(self.headers))
+                if server.status != 200:
+                    self.send_error(server.status)
+                    return
+                if self.headers.get("If-None-Match") == server.etag:
+                    self.send_response(304)
+                    self.end_headers()
+                    return
+                body = server.document.encode()
+                self.send_response(200)
+                self.send_header("ETag", server.etag)
+                self.send_header("Last-Modified", "Mon, 19 Oct 2026 10:00:00 GMT")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/ai-flags.yaml"
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def server():
+    """Run a local config server."""
+    server = _Server()
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def config_dir(tmp_path, monkeypatch):
+    """Use a temporary config directory."""
+    monkeypatch.setattr("ai_flags.config_loader.CONFIG_PATH", tmp_path / "config.yaml")
+    monkeypatch.setattr("ai_flags.config_loader.REMOTE_DIR", tmp_path / "remote")
+    monkeypatch.setattr("ai_flags.cli.CONFIG_PATH", tmp_path / "config.yaml")
+    return tmp_path
+
+
+@pytest.fixture
+def spawned(monkeypatch):
+    """Record background refreshes instead of spawning processes."""
+    calls: list[str] = []
+
+    def record(settings, directory):
+        calls.append(settings.url)
+
+    monkeypatch.setattr("ai_flags.remote.refresh_in_background", record)
+    return calls
+
+
+def _use_remote(config_dir: Path, url: str, ttl: int = 3600) -> None:
+    (config_dir / "config.yaml").write_text(f"remote:\n  url: {url}\n  ttl: {ttl}\n")
+
+
+class TestFetch:
+    """Test fetch()."""
+
+    def test_caches_document_and_validators(self, server, tmp_path):
+        """Should store the document together with its ETag."""
+        settings = RemoteConfig(url=server.url)
+        assert remote.fetch(settings, tmp_path) == remote.UPDATED
+
+        files = remote.cache_files(server.url, tmp_path)
+        assert files.document.read_text() == TEAM_CONFIG
+        assert json.loads(files.meta.read_text())["etag"] == '"v1"'
+
+    def test_conditional_get(self, server, tmp_path):
+        """Should send If-None-Match and keep the cache on 304."""
+        settings = RemoteConfig(url=server.url)
+        remote.fetch(settings, tmp_path)
+        assert remote.fetch(settings, tmp_path) == remote.NOT_MODIFIED
+        assert server.requests[1]["If-None-Match"] == '"v1"'
+        assert "If-Modified-Since" in server.requests[1]
+
+        server.document, server.etag = "test:\n  enabled: false\n", '"v2"'
+        assert remote.fetch(settings, tmp_path) == remote.UPDATED
+        assert "enabled: false" in remote.cache_files(server.url, tmp_path).document.read_text()
+
+    def test_invalid_document_keeps_cache(self, server, tmp_path):
+        """Should reject invalid documents without replacing the cached copy."""
+        settings = RemoteConfig(url=server.url)
+        remote.fetch(settings, tmp_path)
+        server.document, server.etag = "token_budget: -5\n", '"bad"'
+        with pytest.raises(ValueError):
+            remote.fetch(settings, tmp_path)
+        assert remote.cache_files(server.url, tmp_path).document.read_text() == TEAM_CONFIG
+
+    def test_server_error(self, server, tmp_path):
+        """Should raise OSError when the server fails."""
+        server.status = 500
+        with pytest.raises(OSError):
+            remote.fetch(RemoteConfig(url=server.url), tmp_path)
+
+    def test_remote_key_dropped(self):
+        """A document must not redirect clients to another URL."""
+        assert remote.parse_document("remote:\n  url: http://evil\n") == {}
+
+    def test_url_scheme_validated(self):
+        """Should only accept http(s) URLs."""
+        with pytest.raises(ValueError):
+            RemoteConfig(url="file:///etc/passwd")
+
+
+class TestLayering:
+    """Test the cached document as a config layer."""
+
+    def test_cached_copy_overrides_global_config(self, server, config_dir, spawned):
+        """Should apply the cached document without touching the network."""
+        _use_remote(config_dir, server.url)
+        remote.fetch(RemoteConfig(url=server.url), config_dir / "remote")
+        requests = len(server.requests)
+
+        config = config_loader.load_config()
+        assert config.commit.content == "Team commit rules"
+        assert config.remote.url == server.url
+        assert len(server.requests) == requests
+
+    def test_project_layer_overrides_remote(self, server, config_dir, spawned, tmp_path):
+        """Should keep project layers on top of the remote document."""
+        _use_remote(config_dir, server.url)
+        remote.fetch(RemoteConfig(url=server.url), config_dir / "remote")
+        project = tmp_path / "project"
+        project.mkdir()
+        (project / ".ai-flags.yaml").write_text("commit:\n  content: Project rules\n")
+        assert config_loader.load_config(cwd=project).commit.content == "Project rules"
+
+    def test_without_cache_uses_local_config(self, server, config_dir, spawned):
+        """Should work from the local config until the first fetch finished."""
+        _use_remote(config_dir, server.url)
+        result = FlagProcessor().run("task -c")
+        assert result.error is None
+        assert "Team commit rules" not in result.context
+        assert spawned == [server.url]
+        assert server.requests == []
+
+    def test_refreshed_document_picked_up(self, server, config_dir, spawned):
+        """Should reload once the background fetch replaced the cached copy."""
+        _use_remote(config_dir, server.url)
+        processor = FlagProcessor()
+        assert "Team commit rules" not in processor.run("task -c").context
+        remote.fetch(RemoteConfig(url=server.url), config_dir / "remote")
+        assert "Team commit rules" in processor.run("task -c").context
+
+
+class TestBackgroundRefresh:
+    """Test refresh_in_background()."""
+
+    def test_at_most_once_per_ttl(self, tmp_path, monkeypatch):
+        """Should spawn one fetch per TTL, even if it fails."""
+        spawns = []
+        monkeypatch.setattr("subprocess.Popen", lambda *args, **kwargs: spawns.append(args))
+        settings = RemoteConfig(url="http://127.0.0.1:9/x.yaml", ttl=60)
+
+        remote.refresh_in_background(settings, tmp_path)
+        remote.refresh_in_background(settings, tmp_path)
+        assert len(spawns) == 1
+
+        stamp = remote.cache_files(settings.url, tmp_path).stamp
+        os.utime(stamp, (time.time() - 120, time.time() - 120))
+        remote.refresh_in_background(settings, tmp_path)
+        assert len(spawns) == 2
+
+    def test_detached_fetch(self, server, tmp_path, monkeypatch):
+        """The spawned process should fetch and cache the document."""
+        src = Path(__file__).resolve().parents[1] / "src"
+        monkeypatch.setenv("PYTHONPATH", str(src))
+        remote.refresh_in_background(RemoteConfig(url=server.url), tmp_path)
+
+        document = remote.cache_files(server.url, tmp_path).document
+        deadline = time.monotonic() + 30
+        while not document.exists() and time.monotonic() < deadline:
+            time.sleep(0.05)
+        assert document.read_text() == TEAM_CONFIG
+
+    def test_module_entry_point_reports_failure(self, tmp_path):
+        """Should exit non-zero instead of raising when the fetch fails."""
+        assert remote.main(["http://127.0.0.1:9/x.yaml", str(tmp_path), "0.5"]) == 1
+
+
+class TestCommands:
+    """Test 'ai-flags config fetch' and 'config show'."""
+
+    def test_fetch_command(self, server, config_dir, spawned):
+        """Should fetch in the foreground and report the result."""
+        _use_remote(config_dir, server.url)
+        result = CliRunner().invoke(cli, ["config", "fetch"])
+        assert result.exit_code == 0
+        assert f"Remote config updated: {server.url}" in result.output
+
+        result = CliRunner().invoke(cli, ["config", "show"])
+        assert f"Remote config: {server.url}\n" in result.output
+        assert "custom content" in result.output
+
+    def test_set_keeps_document_out_of_config(self, server, config_dir, spawned):
+        """Should not copy the cached document into config.yaml, so updates still apply."""
+        _use_remote(config_dir, server.url)
+        remote.fetch(RemoteConfig(url=server.url), config_dir / "remote")
+        result = CliRunner().invoke(cli, ["config", "set", "t", "disabled"])
+        assert result.exit_code == 0
+        assert "Team commit rules" not in (config_dir / "config.yaml").read_text()
+
+        server.document, server.etag = "commit:\n  content: New team rules\n", '"v2"'
+        remote.fetch(RemoteConfig(url=server.url), config_dir / "remote")
+        config = config_loader.load_config()
+        assert config.commit.content == "New team rules"
+        assert config.test.enabled is False
+
+    def test_fetch_without_remote(self, config_dir):
+        """Should fail when no remote is configured."""
+        result = CliRunner().invoke(cli, ["config", "fetch"])
+        assert result.exit_code == 1
+        assert "No remote config" in result.output
+
+    def test_fetch_failure(self, server, config_dir, spawned):
+        """Should report fetch errors."""
+        server.status = 404
+        _use_remote(config_dir, server.url)
+        result = CliRunner().invoke(cli, ["config", "fetch"])
+        assert result.exit_code == 1
+        assert "Cannot fetch" in result.output
@@ -0,0 +1,157 @@
+"""Tests for sticky flags."""
+
+import sqlite3
+import time
+
+import pytest
+
+from ai_flags import sticky
+from ai_flags.api import FlagProcessor
+from ai_flags.config import AiFlagsConfig, FlagConfig
+from ai_flags.sticky import get_sticky, has_sticky, split_sticky, update_sticky
+
+
+@pytest.fixture
+def state_path(tmp_path, monkeypatch):
+    """Use a temporary state database."""
+    path = tmp_path / "state.db"
+    monkeypatch.setattr("ai_flags.sticky.STATE_PATH", path)
+    return path
+
+
+class TestSplitSticky:
+    """Test split_sticky()."""
+
+    def test_split(self):
+        """Should apply + flags now and never apply - flags."""
+        assert split_sticky(["c+", "t", "n-"]) == (["c", "t"], ["c"], ["n"])
+
+    def test_plain_flags(self):
+        """Should pass plain flags through."""
+        assert split_sticky(["s", "c"]) == (["s", "c"], [], [])
+
+
+class TestStore:
+    """Test the SQLite state store."""
+
+    def test_missing_database(self, state_path):
+        """Should report no sticky flags without creating the database."""
+        assert get_sticky("session") == []
+        assert not state_path.exists()
+
+    def test_on_and_off(self, state_path):
+        """Should add and remove flags per session."""
+        assert update_sticky("a", ["c", "t"], []) == ["c", "t"]
+        assert update_sticky("a", ["n"], ["c"]) == ["t", "n"]
+        assert get_sticky("a") == ["t", "n"]
+        assert get_sticky("b") == []
+
+    def test_empty_session_row_deleted(self, state_path):
+        """Should remove a session once it has no sticky flags."""
+        update_sticky("a", ["c"], [])
+        update_sticky("a", [], ["c"])
+        with sqlite3.connect(state_path) as conn:
+            assert conn.execute("SELECT COUNT(*) FROM sticky").fetchone() == (0,)
+
+    def test_wal_mode(self, state_path):
+        """Should use write-ahead logging so readers don't block on writers."""
+        update_sticky("a", ["c"], [])
+        with sqlite3.connect(state_path) as conn:
+            assert conn.execute("PRAGMA journal_mode").fetchone() == ("wal",)
+
+    def test_expired_sessions_evicted(self, state_path, monkeypatch):
+        """Should ignore and evict sessions older than the TTL."""
+        update_sticky("old", ["c"], [], ttl=60)
+        monkeypatch.setattr(time, "time", lambda: 10**10)
+        assert get_sticky("old", ttl=60) == []
+
+        update_sticky("new", ["t"], [], ttl=60)
+        with sqlite3.connect(state_path) as conn:
+            sessions = conn.execute("SELECT session_id FROM sticky").fetchall()
+        assert sessions == [("new",)]
+
+    def test_has_sticky(self, state_path):
+        """Should tell whether a session has stored flags, without a TTL."""
+        assert has_sticky("a") is False
+        assert not state_path.exists()
+        update_sticky("a", ["c"], [])
+        assert has_sticky("a") is True
+        assert has_sticky("b") is False
+        update_sticky("a", [], ["c"])
+        assert has_sticky("a") is False
+
+    def test_unwritable_path(self, tmp_path):
+        """Should fall back to the prompt's own flags instead of raising."""
+        blocker = tmp_path / "file"
+        blocker.write_text("")
+        assert update_sticky("a", ["c"], [], path=blocker / "state.db") == ["c"]
+
+
+class TestProcessorSticky:
+    """Test sticky flags in FlagProcessor."""
+
+    def test_sticky_flag_applies_to_later_prompts(self, state_path):
+        """Should keep -c on for the rest of the session."""
+        processor = FlagProcessor(AiFlagsConfig())
+        first = processor.run("task -c+ -t", session_id="a")
+        assert first.flags == ["c", "t"]
+
+        second = processor.run("next task", session_id="a")
+        assert second.error is None
+        assert second.flags == ["c"]
+        assert "<commit_instructions>" in second.context
+
+        third = processor.run("more -d", session_id="a")
+        assert third.flags == ["d", "c"]
+
+    def test_other_sessions_unaffected(self, state_path):
+        """Should key sticky flags by session."""
+        processor = FlagProcessor(AiFlagsConfig())
+        processor.run("task -c+", session_id="a")
+        assert processor.run("task", session_id="b").error == "No flags detected"
+
+    def test_turn_off(self, state_path):
+        """Should stop applying a flag after -c-."""
+        processor = FlagProcessor(AiFlagsConfig())
+        processor.run("task -c+", session_id="a")
+        result = processor.run("task -c-", session_id="a")
+        assert result.cleaned_prompt == "task"
+        assert result.error == "No flags detected"
+        assert get_sticky("a") == []
+
+    def test_invalid_flags_not_stored(self, state_path):
+        """Should reject the prompt and store nothing if a flag is invalid."""
+        processor = FlagProcessor(AiFlagsConfig())
+        assert processor.run("task -c+ -x", session_id="a").error == "Invalid or disabled flags"
+        assert get_sticky("a") == []
+
+    def test_disabled_sticky_flag_skipped(self, state_path):
+        """Should skip sticky flags that were disabled later."""
+        update_sticky("a", ["c"], [])
+        processor = FlagProcessor(AiFlagsConfig(commit=FlagConfig(enabled=False)))
+        result = processor.run("task -t", session_id="a")
+        assert result.error is None
+        assert result.flags == ["t"]
+
+    def test_without_session(self, state_path):
+        """Should treat -c+ as -c when there is no session to remember it for."""
+        result = FlagProcessor(AiFlagsConfig()).run("task -c+")
+        assert result.flags == ["c"]
+        assert not state_path.exists()
+
+    def test_hook_payload_session(self, state_path):
+        """Should read session_id from the hook payload."""
+        processor = FlagProcessor(AiFlagsConfig())
+        processor.process({"prompt": "task -n+", "session_id": "a"})
+        output = processor.process({"prompt": "task", "session_id": "a"})
+        assert "<no_lint_instructions>" in output["hookSpecificOutput"]["additionalContext"]
+
+    def test_lookup_overhead(self, state_path):
+        """A lookup on the hook path should stay well under a millisecond."""
+        for session in range(200):
+            update_sticky(str(session), ["c"], [])
+        start = time.perf_counter()
+        for _ in range(100):
+            get_sticky("100")
+        assert (time.perf_counter() - start) / 100 < 0.001
+        assert sticky.get_sticky("100") == ["c"]
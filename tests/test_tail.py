@@ -0,0 +1,59 @@
+"""Tests for bounded tail reads."""
+
+from ai_flags.tail import iter_lines_reverse, read_tail
+
+
+class TestIterLinesReverse:
+    """Test iter_lines_reverse()."""
+
+    def test_lines_in_reverse_order(self, tmp_path):
+        """Should yield lines last to first, without newlines."""
+        path = tmp_path / "f.jsonl"
+        path.write_bytes(b"one\ntwo\nthree\n")
+        assert list(iter_lines_reverse(path, 1024)) == [b"three", b"two", b"one"]
+
+    def test_missing_trailing_newline(self, tmp_path):
+        """Should yield the last line even without a trailing newline."""
+        path = tmp_path / "f.jsonl"
+        path.write_bytes(b"one\ntwo")
+        assert list(iter_lines_reverse(path, 1024)) == [b"two", b"one"]
+
+    def test_empty_lines_skipped(self, tmp_path):
+        """Should skip blank lines."""
+        path = tmp_path / "f.jsonl"
+        path.write_bytes(b"one\n\n\ntwo\n")
+        assert list(iter_lines_reverse(path, 1024)) == [b"two", b"one"]
+
+    def test_bounded_read_drops_partial_line(self, tmp_path):
+        """Should stop at the byte bound and never yield a cut-off line."""
+        path = tmp_path / "f.jsonl"
+        path.write_bytes(b"a" * 100 + b"\nlast\n")
+        assert list(iter_lines_reverse(path, 10)) == [b"last"]
+
+    def test_empty_file(self, tmp_path):
+        """Should yield nothing for an empty file."""
+        path = tmp_path / "f.jsonl"
+        path.write_bytes(b"")
+        assert list(iter_lines_reverse(path, 1024)) == []
+
+
+class TestReadTail:
+    """Test read_tail()."""
+
+    def test_whole_small_file(self, tmp_path):
+        """Should return the whole file when it fits."""
+        path = tmp_path / "f.log"
+        path.write_bytes(b"one\ntwo\n")
+        assert read_tail(path, 1024) == b"one\ntwo\n"
+
+    def test_starts_at_line_boundary(self, tmp_path):
+        """Should drop the partial first line of a bounded read."""
+        path = tmp_path / "f.log"
+        path.write_bytes(b"x" * 100 + b"\nline one\nline two\n")
+        assert read_tail(path, 20) == b"line one\nline two\n"
+
+    def test_single_long_line_kept(self, tmp_path):
+        """Should return the raw tail when it contains no line break."""
+        path = tmp_path / "f.log"
+        path.write_bytes(b"x" * 100)
+        assert read_tail(path, 10) == b"x" * 10
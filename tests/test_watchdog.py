@@ -0,0 +1,125 @@
+"""Tests for the hook response deadline."""
+
+import io
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+from ai_flags import watchdog
+from ai_flags.watchdog import Watchdog
+
+
+class _SlowStream(io.StringIO):
+    """A stream whose writes take a while."""
+
+    def __init__(self, delay: float):
+        super().__init__()
+        self.delay = delay
+
+    def write(self, text: str) -> int:
+        time.sleep(self.delay)
+        return super().write(text)
+
+
+@pytest.fixture
+def exits(monkeypatch):
+    """Record os._exit() calls instead of exiting."""
+    called = threading.Event()
+    monkeypatch.setattr("ai_flags.watchdog.os._exit", lambda status: called.set())
+    return called
+
+
+class TestDeadlineFromEnvironment:
+    """Test deadline_from_environment()."""
+
+    @pytest.mark.parametrize(
+        ("value", "expected"), [(None, 0.2), ("500", 0.5), ("0", 0.0), ("-1", 0.0), ("x", 0.2)]
+    )
+    def test_values(self, monkeypatch, value, expected):
+        """Should read milliseconds, falling back to the default."""
+        if value is None:
+            monkeypatch.delenv(watchdog.DEADLINE_ENV, raising=False)
+        else:
+            monkeypatch.setenv(watchdog.DEADLINE_ENV, value)
+        assert watchdog.deadline_from_environment() == expected
+
+
+class TestWatchdog:
+    """Test Watchdog."""
+
+    def test_single_response(self):
+        """Should drop any response after the first."""
+        stream = io.StringIO()
+        dog = Watchdog(0, "fallback\n", stream=stream)
+        assert dog.write("first\n")
+        assert not dog.write("second\n")
+        assert stream.getvalue() == "first\n"
+
+    def test_fires_after_deadline(self, exits):
+        """Should write the fallback, report the overrun and exit."""
+        stream = io.StringIO()
+        overruns = []
+        with Watchdog(0.05, "fallback\n", overruns.append, stream):
+            assert exits.wait(5)
+        assert stream.getvalue() == "fallback\n"
+        assert overruns == [True]
+
+    def test_disarmed_in_time(self, exits):
+        """Should do nothing when the block finishes before the deadline."""
+        stream = io.StringIO()
+        with Watchdog(0.2, "fallback\n", stream=stream) as dog:
+            dog.write("real\n")
+        assert not exits.wait(0.4)
+        assert stream.getvalue() == "real\n"
+
+    def test_response_in_progress_not_interleaved(self, exits):
+        """A response being written when the deadline passes should be completed."""
+        stream = _SlowStream(0.2)
+        overruns = []
+        with Watchdog(0.05, "fallback\n", overruns.append, stream) as dog:
+            dog.write("real\n")
+            assert exits.wait(5)
+        assert stream.getvalue() == "real\n"
+        assert overruns == [False]
+
+    def test_blocking_overrun_callback(self, exits):
+        """Should exit even if recording the overrun hangs."""
+        with Watchdog(0.05, "fallback\n", lambda answered: time.sleep(5), io.StringIO()):
+            assert exits.wait(watchdog.OVERRUN_GRACE + 2)
+
+
+class TestHookDeadline:
+    """Test the deadline of a real hook process."""
+
+    def test_stdin_never_closed(self, tmp_path):
+        """Should answer with empty output and exit 0 when stdin hangs."""
+        src = Path(__file__).resolve().parents[1] / "src"
+        env = {
+            **os.environ,
+            "PYTHONPATH": str(src),
+            "HOME": str(tmp_path),
+            watchdog.DEADLINE_ENV: "300",
+        }
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "ai_flags", "handle"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            env=env,
+        )
+        try:
+            assert proc.wait(timeout=30) == 0
+            output = json.loads(proc.stdout.read())
+            assert output["hookSpecificOutput"]["additionalContext"] == ""
+            assert b"Deadline of 300 ms exceeded" in proc.stderr.read()
+        finally:
+            proc.kill()
+            proc.stdin.close()
+            proc.stdout.close()
+            proc.stderr.close()